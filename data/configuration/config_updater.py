@@ -36,6 +36,7 @@ from stdm.data.configuration.db_items import DbItem
 from stdm.data.configuration.stdm_configuration import StdmConfiguration
 from stdm.data.configuration.exception import ConfigurationException
 from stdm.data.configuration import profile_foreign_keys
+from stdm.data.text_search import create_search_indexes
 
 LOGGER = logging.getLogger('stdm')
 
@@ -219,6 +220,11 @@ class ConfigurationSchemaUpdater(QObject):
 
             self.update_completed.emit(False)
 
+            return
+
+        #Index the columns searched in the STR view in the background
+        create_search_indexes(profile)
+
     def _update_entities(self, entities):
         for e in entities:
             action = e.action
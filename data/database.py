@@ -20,6 +20,7 @@ email                : gkahiu@gmail.com
 """
 import logging
 from datetime import date
+from itertools import chain
 from collections import (
     defaultdict,
     OrderedDict
@@ -31,6 +32,7 @@ from sqlalchemy import (
     Table,
     event,
     func,
+    inspect,
     MetaData,
     exc
 )
@@ -221,6 +223,89 @@ def alchemy_table_relationships(table_name):
 
     return relationship_names
 
+
+class StatementCounter(object):
+    """
+    Context manager that counts the SQL statements executed through the
+    engine while it is active, e.g. to check the number of queries issued
+    when loading records.
+    """
+    def __init__(self, engine):
+        self._engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self._engine, 'before_cursor_execute', self._on_execute)
+
+        return self
+
+    def __exit__(self, *args):
+        event.remove(self._engine, 'before_cursor_execute', self._on_execute)
+
+
+#Callables notified with the names of the tables changed through the Model
+#save, update and delete methods
+_table_change_listeners = []
+
+
+def add_table_change_listener(listener):
+    """
+    Registers a callable that is notified when tables are changed.
+    :param listener: Callable taking the set of changed table names.
+    """
+    if not listener in _table_change_listeners:
+        _table_change_listeners.append(listener)
+
+
+def remove_table_change_listener(listener):
+    """
+    Removes a callable registered using 'add_table_change_listener'.
+    """
+    if listener in _table_change_listeners:
+        _table_change_listeners.remove(listener)
+
+
+def notify_table_changes(table_names):
+    """
+    Notifies the listeners that the tables have been changed, e.g. by an
+    import that does not use the Model methods.
+    :param table_names: Names of the changed tables.
+    :type table_names: set
+    """
+    if len(table_names) == 0:
+        return
+
+    for listener in list(_table_change_listeners):
+        try:
+            listener(set(table_names))
+        except Exception as ex:
+            LOGGER.debug(unicode(ex))
+
+
+def _pending_tables(session):
+    #Names of the tables of the objects to be flushed by the session and
+    #of the association tables of their changed many-to-many relationships
+    tables = set()
+    deleted = set(session.deleted)
+    for obj in chain(session.new, session.dirty, deleted):
+        table = getattr(obj, '__table__', None)
+        if table is None:
+            continue
+        tables.add(table.name)
+
+        state = inspect(obj)
+        for rel in state.mapper.relationships:
+            if rel.secondary is None:
+                continue
+            #The association rows of deleted objects are always removed
+            if obj in deleted or state.attrs[rel.key].history.has_changes():
+                tables.add(rel.secondary.name)
+
+    return tables
+
         
 class Model(object):
     '''
@@ -233,6 +318,7 @@ class Model(object):
     def save(self):            
         db = STDMDb.instance()
         db.session.add(self)
+        tables = _pending_tables(db.session)
         try:
             db.session.commit()
         except exc.SQLAlchemyError as db_error:
@@ -240,12 +326,15 @@ class Model(object):
             LOGGER.debug(unicode(db_error))
             raise db_error
 
+        notify_table_changes(tables)
+
     def saveMany(self,objects = []):
         '''
         Save multiple objects of the same type in one go.
         '''
         db = STDMDb.instance()
         db.session.add_all(objects)
+        tables = _pending_tables(db.session)
         try:
             db.session.commit()
         except exc.SQLAlchemyError as db_error:
@@ -253,14 +342,19 @@ class Model(object):
             LOGGER.debug(unicode(db_error))
             raise db_error
 
+        notify_table_changes(tables)
+
     def update(self):
         db = STDMDb.instance()
+        tables = _pending_tables(db.session)
         try:
             db.session.commit()
         except exc.SQLAlchemyError as db_error:
             db.session.rollback()
             LOGGER.debug(unicode(db_error))
             raise db_error
+
+        notify_table_changes(tables)
             
     def delete(self):
         from stdm.data.pg_utils import set_child_dependencies_null_on_delete
@@ -268,7 +362,9 @@ class Model(object):
         db = STDMDb.instance()
         try:
             db.session.delete(self)
+            tables = _pending_tables(db.session)
             db.session.commit()
+            notify_table_changes(tables)
 
             return True
         except exc.SQLAlchemyError as db_error:
@@ -281,6 +377,7 @@ class Model(object):
             # Attempt to delete again
             db.session.delete(self)
             db.session.commit()
+            notify_table_changes(set([self.__table__.name]))
 
             raise db_error
 
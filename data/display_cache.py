@@ -0,0 +1,264 @@
+"""
+/***************************************************************************
+Name                 : Display Cache
+Description          : Display values of lookups, administrative units and
+                       related records shared by the column widget factories
+                       of each profile.
+Date                 : 19/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import threading
+from collections import OrderedDict
+
+from sqlalchemy.sql.expression import text
+
+from stdm.data.database import (
+    add_table_change_listener,
+    Singleton,
+    STDMDb
+)
+
+#Maximum number of parent records cached per table, the least recently
+#used records are discarded first
+MAX_CACHED_RECORDS = 10000
+
+#Cached in place of the parent records that do not exist
+_MISSING = object()
+
+
+class ProfileDisplayValues(object):
+    """
+    Display values of the value lists, administrative units and parent
+    records of foreign key columns of a profile. Value lists and
+    administrative units are loaded in one query per table the first time
+    they are needed, parent records are loaded in batches of primary keys
+    and at most MAX_CACHED_RECORDS of them are kept per table. Primary keys
+    without a record are cached as well so that they are not queried again
+    until the table is changed. The values are shared by all column widget factories, including those
+    used in the worker threads of the entity browsers.
+    """
+    def __init__(self, profile_name):
+        self.profile_name = profile_name
+        self._lock = threading.Lock()
+
+        #Lists of [value, code] or [name, code] indexed by id, by table name
+        self._code_values = {}
+
+        #Parent records indexed by id in the order they were used, by table
+        #name
+        self._records = {}
+
+    @staticmethod
+    def _execute(sql, params, session=None):
+        #Runs the statement in the session or in a new connection
+        if session is not None:
+            return session.execute(sql, params).fetchall()
+
+        conn = STDMDb.instance().engine.connect()
+        try:
+            return conn.execute(sql, **params).fetchall()
+        finally:
+            conn.close()
+
+    def _table_values(self, table_name, value_column, session=None):
+        with self._lock:
+            values = self._code_values.get(table_name, None)
+        if values is not None:
+            return values
+
+        sql = text(u'SELECT * FROM {0} ORDER BY id'.format(table_name))
+
+        values = OrderedDict()
+        for r in self._execute(sql, {}, session):
+            values[r.id] = [getattr(r, value_column), r.code]
+
+        with self._lock:
+            self._code_values[table_name] = values
+
+        return values
+
+    def value_list(self, table_name, session=None):
+        """
+        :param table_name: Name of the value list table.
+        :type table_name: str
+        :param session: Session used if the values are not cached, e.g.
+        that of a worker thread, a new connection if None.
+        :type session: Session
+        :return: Lists of the value and code of the lookups indexed by id.
+        The collection is shared and should not be modified.
+        :rtype: OrderedDict
+        """
+        return self._table_values(table_name, 'value', session)
+
+    def admin_units(self, table_name, session=None):
+        """
+        :param table_name: Name of the administrative spatial unit table.
+        :type table_name: str
+        :param session: Session used if the values are not cached.
+        :type session: Session
+        :return: Lists of the name and code of the administrative units
+        indexed by id. The collection is shared and should not be modified.
+        :rtype: OrderedDict
+        """
+        return self._table_values(table_name, 'name', session)
+
+    @staticmethod
+    def _use_record(records, rec_id, rec):
+        #Adds the record as the most recently used one
+        records.pop(rec_id, None)
+        records[rec_id] = rec
+
+        while len(records) > MAX_CACHED_RECORDS:
+            records.popitem(last=False)
+
+    def prefetch_records(self, table_name, ids, session=None):
+        """
+        Loads the records of the table that are not yet cached in a single
+        query.
+        :param table_name: Name of the parent table.
+        :type table_name: str
+        :param ids: Primary keys of the records.
+        :type ids: set
+        :param session: Session used for the query, e.g. that of a worker
+        thread, a new connection if None.
+        :type session: Session
+        """
+        with self._lock:
+            records = self._records.setdefault(table_name, OrderedDict())
+            missing = []
+            for i in ids:
+                if i in records:
+                    self._use_record(records, i, records[i])
+                else:
+                    missing.append(i)
+
+        if len(missing) == 0:
+            return
+
+        sql = text(
+            u'SELECT * FROM {0} WHERE id = ANY(:ids)'.format(table_name)
+        )
+        found = dict((r.id, r) for r in self._execute(
+            sql, {'ids': missing}, session
+        ))
+
+        with self._lock:
+            records = self._records.setdefault(table_name, OrderedDict())
+            for i in missing:
+                self._use_record(records, i, found.get(i, _MISSING))
+
+    def record(self, table_name, rec_id, session=None):
+        """
+        :param table_name: Name of the parent table.
+        :type table_name: str
+        :param rec_id: Primary key of the record.
+        :type rec_id: int
+        :param session: Session used if the record is not cached.
+        :type session: Session
+        :return: Row of the record or None if it does not exist.
+        :rtype: RowProxy
+        """
+        with self._lock:
+            records = self._records.get(table_name, {})
+            rec = records.get(rec_id, None)
+            if rec is not None:
+                self._use_record(records, rec_id, rec)
+
+        if rec is None:
+            self.prefetch_records(table_name, [rec_id], session)
+
+            with self._lock:
+                rec = self._records.get(table_name, {}).get(rec_id, None)
+
+        if rec is _MISSING:
+            return None
+
+        return rec
+
+    def invalidate_tables(self, table_names):
+        """
+        Discards the values of the tables.
+        :param table_names: Names of the changed tables.
+        :type table_names: set
+        """
+        with self._lock:
+            for t in table_names:
+                self._code_values.pop(t, None)
+                self._records.pop(t, None)
+
+    def clear(self):
+        """
+        Discards all values.
+        """
+        with self._lock:
+            self._code_values.clear()
+            self._records.clear()
+
+
+@Singleton
+class DisplayValueCache(object):
+    """
+    Display values of each profile, discarded once their tables are changed
+    through the Model save, update and delete methods or by an import.
+    """
+    def __init__(self):
+        self._profiles = {}
+        self._lock = threading.Lock()
+
+        add_table_change_listener(self.invalidate_tables)
+
+    def profile_values(self, profile_name):
+        """
+        :param profile_name: Name of the profile.
+        :type profile_name: str
+        :return: Display values of the profile.
+        :rtype: ProfileDisplayValues
+        """
+        with self._lock:
+            values = self._profiles.get(profile_name, None)
+            if values is None:
+                values = ProfileDisplayValues(profile_name)
+                self._profiles[profile_name] = values
+
+        return values
+
+    def invalidate_tables(self, table_names):
+        """
+        Discards the values of the tables in all profiles.
+        :param table_names: Names of the changed tables.
+        :type table_names: set
+        """
+        with self._lock:
+            profiles = self._profiles.values()
+
+        for p in profiles:
+            p.invalidate_tables(table_names)
+
+    def clear(self):
+        """
+        Discards the values of all profiles, e.g. when the user logs out.
+        """
+        with self._lock:
+            self._profiles.clear()
+
+
+def profile_display_values(profile):
+    """
+    :param profile: Profile whose display values are required.
+    :type profile: Profile
+    :return: Shared display values of the profile.
+    :rtype: ProfileDisplayValues
+    """
+    return DisplayValueCache.instance().profile_values(profile.name)
@@ -0,0 +1,62 @@
+"""
+/***************************************************************************
+Name                 : Display Columns
+Description          : Parent tables and columns describing the values of
+                       lookup, administrative unit and foreign key columns,
+                       used to show those values in exports and filters.
+Date                 : 19/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+
+
+def display_columns(column):
+    """
+    Gets the parent table and the columns that describe the values of a
+    lookup, administrative unit or foreign key column.
+    :param column: Entity column.
+    :type column: BaseColumn
+    :return: Parent table name, referenced parent column and display
+    column names. None if the column has no display values.
+    :rtype: tuple
+    """
+    if column is None:
+        return None
+
+    type_info = column.TYPE_INFO
+    if type_info == 'LOOKUP':
+        if column.value_list is None:
+            return None
+
+        return column.value_list.name, 'id', ['value']
+
+    if not type_info in ('ADMIN_SPATIAL_UNIT', 'FOREIGN_KEY'):
+        return None
+
+    parent = column.entity_relation.parent
+    if parent is None:
+        return None
+
+    if type_info == 'ADMIN_SPATIAL_UNIT':
+        return parent.name, 'id', ['name']
+
+    display_cols = column.entity_relation.display_cols
+    if not display_cols:
+        return None
+
+    return (
+        parent.name,
+        column.entity_relation.parent_column or 'id',
+        list(display_cols)
+    )
@@ -0,0 +1,196 @@
+"""
+/***************************************************************************
+Name                 : Entity Filter
+Description          : Builds SQL filter expressions on entity columns from
+                       the text typed in the entity browser so that records
+                       are filtered in the database.
+Date                 : 19/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+from datetime import (
+    date,
+    datetime,
+    timedelta
+)
+from decimal import (
+    Decimal,
+    InvalidOperation
+)
+
+from sqlalchemy import (
+    and_,
+    false,
+    or_,
+    Text
+)
+from sqlalchemy.sql.expression import (
+    cast,
+    column,
+    select,
+    table
+)
+
+from stdm.data.display_columns import display_columns
+
+# Escape character for the LIKE wildcards in the filter text, backslashes
+# would be doubled when the ESCAPE clause is rendered
+_LIKE_ESCAPE = '^'
+
+_TEXT_TYPES = ['VARCHAR', 'TEXT', 'AUTO_GENERATED']
+
+_NUMERIC_TYPES = ['INT', 'SERIAL', 'DOUBLE', 'PERCENT']
+
+_DATE_TYPES = ['DATE', 'DATETIME']
+
+_TRUE_VALUES = ['1', 'true', 'yes', 't', 'y']
+
+_FALSE_VALUES = ['0', 'false', 'no', 'f', 'n']
+
+
+def _contains_pattern(text):
+    # ILIKE pattern matching the text anywhere in the value
+    for c in (_LIKE_ESCAPE, '%', '_'):
+        text = text.replace(c, _LIKE_ESCAPE + c)
+
+    return u'%{0}%'.format(text)
+
+
+def _text_match(expr, text):
+    # Case insensitive match that can use trigram indexes
+    return expr.ilike(_contains_pattern(text), escape=_LIKE_ESCAPE)
+
+
+def _date_range(text):
+    """
+    Parses a year, year and month or full date.
+    :return: Start and end, exclusive, of the period or None if the text
+    is not a date.
+    :rtype: tuple
+    """
+    for fmt, period in (('%Y-%m-%d', 'day'), ('%Y-%m', 'month'),
+                        ('%Y', 'year')):
+        try:
+            start = datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+
+        if period == 'day':
+            end = start + timedelta(days=1)
+        elif period == 'month':
+            end = date(start.year + start.month // 12,
+                       start.month % 12 + 1, 1)
+        else:
+            end = date(start.year + 1, 1, 1)
+
+        return start, end
+
+    return None
+
+
+def _display_value_ids(column_obj, text):
+    # Subquery of the parent ids whose display values match the text
+    display = display_columns(column_obj)
+    if display is None:
+        return None
+
+    parent_table, parent_col, display_cols = display
+    parent = table(parent_table, column(parent_col),
+                   *[column(d) for d in display_cols])
+
+    return select([parent.c[parent_col]]).where(
+        or_(*[_text_match(cast(parent.c[d], Text), text)
+              for d in display_cols])
+    )
+
+
+def _multiple_select_filter(model, column_obj, text):
+    # Records linked to at least one lookup value matching the text
+    association = column_obj.association
+    value_list = column_obj.value_list
+    if association is None or value_list is None:
+        return None
+
+    lk_col = association.first_reference_column.name
+    record_col = association.second_reference_column.name
+    assoc = table(association.name, column(lk_col), column(record_col))
+    lookup = table(value_list.name, column('id'), column('value'))
+
+    lookup_ids = select([lookup.c.id]).where(
+        _text_match(lookup.c.value, text)
+    )
+
+    return model.id.in_(
+        select([assoc.c[record_col]]).where(assoc.c[lk_col].in_(lookup_ids))
+    )
+
+
+def entity_column_filter(model, column_obj, text):
+    """
+    Creates a filter expression for records whose value in the column
+    matches the text typed by the user. The comparison depends on the
+    column type so that indexes on the column can be used where possible:
+    numbers and booleans are compared for equality, dates are matched to
+    the day, month or year typed, lookup, administrative unit and foreign
+    key columns are matched on the display values of the referenced rows
+    and other values contain the text, ignoring the case.
+    :param model: Entity model.
+    :param column_obj: Entity column used for filtering.
+    :type column_obj: BaseColumn
+    :param text: Filter text.
+    :type text: str
+    :return: Filter expression or None if the text is empty.
+    """
+    text = text.strip()
+    if not text:
+        return None
+
+    type_info = column_obj.TYPE_INFO
+    if type_info == 'MULTIPLE_SELECT':
+        return _multiple_select_filter(model, column_obj, text)
+
+    attr = getattr(model, column_obj.name, None)
+    if attr is None:
+        return None
+
+    if type_info in ('LOOKUP', 'ADMIN_SPATIAL_UNIT', 'FOREIGN_KEY'):
+        parent_ids = _display_value_ids(column_obj, text)
+        if parent_ids is not None:
+            return attr.in_(parent_ids)
+
+    elif type_info in _NUMERIC_TYPES:
+        try:
+            value = Decimal(text)
+        except InvalidOperation:
+            return false()
+
+        return attr == value
+
+    elif type_info in _DATE_TYPES:
+        period = _date_range(text)
+        if period is not None:
+            return and_(attr >= period[0], attr < period[1])
+
+    elif type_info == 'BOOL':
+        if text.lower() in _TRUE_VALUES:
+            return attr == True
+        if text.lower() in _FALSE_VALUES:
+            return attr == False
+
+        return false()
+
+    elif type_info in _TEXT_TYPES:
+        return _text_match(attr, text)
+
+    return _text_match(cast(attr, Text), text)
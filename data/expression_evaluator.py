@@ -0,0 +1,354 @@
+"""
+/***************************************************************************
+Name                 : Expression Evaluator
+Description          : Computes the values of the expression columns of an
+                       entity for saved records, in SQL where the expression
+                       can be translated and otherwise against a single
+                       prepared layer of the entity.
+Date                 : 19/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+from collections import OrderedDict
+
+from PyQt4.QtCore import QPyNullVariant
+
+from qgis.core import (
+    QgsExpression,
+    QgsFeatureRequest
+)
+
+from sqlalchemy.sql.expression import text
+
+from stdm.data.database import STDMDb
+from stdm.data.pg_utils import vector_layer
+
+#Kinds of the values of the columns that can be used in translated
+#expressions
+_COLUMN_KINDS = {
+    'SERIAL': 'int',
+    'INT': 'int',
+    'DOUBLE': 'float',
+    'PERCENT': 'float',
+    'VARCHAR': 'text',
+    'TEXT': 'text',
+    'AUTO_GENERATED': 'text'
+}
+
+#SQL types of the output data types of expression columns
+_OUTPUT_TYPES = {
+    'int': 'integer',
+    'float': 'double precision'
+}
+
+_NUMERIC_KINDS = ('int', 'float')
+
+#Cached evaluators by profile and entity name
+_evaluators = {}
+
+
+def _literal_sql(value):
+    #SQL of a literal and the kind of its value
+    if isinstance(value, bool):
+        return None
+
+    if isinstance(value, (int, long)):
+        return unicode(value), 'int'
+
+    if isinstance(value, float):
+        return repr(value), 'float'
+
+    if isinstance(value, basestring):
+        return u"'{0}'".format(value.replace(u"'", u"''")), 'text'
+
+    return None
+
+
+def _binary_sql(node, entity):
+    #SQL of an arithmetic or concatenation operator
+    left = _node_sql(node.opLeft(), entity)
+    right = _node_sql(node.opRight(), entity)
+    if left is None or right is None:
+        return None
+
+    (l_sql, l_kind), (r_sql, r_kind) = left, right
+    op = node.op()
+
+    if op == QgsExpression.boConcat or (
+            op == QgsExpression.boPlus and l_kind == r_kind == 'text'):
+        return u'({0}::text || {1}::text)'.format(l_sql, r_sql), 'text'
+
+    if not l_kind in _NUMERIC_KINDS or not r_kind in _NUMERIC_KINDS:
+        return None
+
+    kind = 'int' if l_kind == r_kind == 'int' else 'float'
+    operators = {
+        QgsExpression.boPlus: '+',
+        QgsExpression.boMinus: '-',
+        QgsExpression.boMul: '*'
+    }
+    if op in operators:
+        return u'({0} {1} {2})'.format(l_sql, operators[op], r_sql), kind
+
+    #QGIS returns NULL instead of failing on division by zero
+    if op == QgsExpression.boDiv:
+        return u'({0}::double precision / NULLIF({1}, 0))'.format(
+            l_sql, r_sql
+        ), 'float'
+
+    if op == QgsExpression.boIntDiv:
+        return u'floor({0}::double precision / NULLIF({1}, 0))'.format(
+            l_sql, r_sql
+        ), 'int'
+
+    if op == QgsExpression.boMod and kind == 'int':
+        return u'({0} % NULLIF({1}, 0))'.format(l_sql, r_sql), 'int'
+
+    if op == QgsExpression.boPow:
+        return u'power({0}, {1})'.format(l_sql, r_sql), 'float'
+
+    return None
+
+
+def _node_sql(node, entity):
+    #SQL of the expression node and the kind of its value, None if the
+    #node cannot be translated
+    node_type = node.nodeType()
+
+    if node_type == QgsExpression.ntLiteral:
+        return _literal_sql(node.value())
+
+    if node_type == QgsExpression.ntColumnRef:
+        col = entity.columns.get(node.name(), None)
+        if col is None:
+            return None
+
+        kind = _COLUMN_KINDS.get(col.TYPE_INFO, None)
+        if kind is None:
+            return None
+
+        return u'"{0}"'.format(col.name), kind
+
+    if node_type == QgsExpression.ntUnaryOperator:
+        operand = _node_sql(node.operand(), entity)
+        if operand is None or not operand[1] in _NUMERIC_KINDS:
+            return None
+
+        if node.op() == QgsExpression.uoMinus:
+            return u'(-{0})'.format(operand[0]), operand[1]
+
+        return None
+
+    if node_type == QgsExpression.ntBinaryOperator:
+        return _binary_sql(node, entity)
+
+    return None
+
+
+def expression_sql(column):
+    """
+    Translates the expression of the column to SQL. Only arithmetic and
+    concatenation of literals and of numeric and text columns of the
+    entity are translated.
+    :param column: Expression column.
+    :type column: ExpressionColumn
+    :return: SQL computing the value of the column from the columns of the
+    entity table or None if the expression cannot be translated.
+    :rtype: unicode
+    """
+    exp = QgsExpression(column.expression)
+    if exp.hasParserError() or exp.rootNode() is None:
+        return None
+
+    res = _node_sql(exp.rootNode(), column.entity)
+    if res is None:
+        return None
+
+    sql_type = _OUTPUT_TYPES.get(column.output_data_type, 'text')
+
+    return u'CAST({0} AS {1})'.format(res[0], sql_type)
+
+
+def _expression_columns(entity):
+    return [c for c in entity.columns.values()
+            if c.TYPE_INFO == 'EXPRESSION']
+
+
+class EntityExpressionEvaluator(object):
+    """
+    Computes the values of the expression columns of an entity for saved
+    records. The expressions are parsed once per entity. Those that can be
+    translated to SQL are computed by the database for all the records in
+    one query, the others are prepared once against a single layer of the
+    entity and evaluated on the features of the records fetched in one
+    request.
+    """
+    def __init__(self, entity):
+        """
+        :param entity: Entity with expression columns.
+        :type entity: Entity
+        """
+        self.entity = entity
+        self._layer = None
+        self._prepared = False
+
+        #SQL of the translated expressions and the remaining expressions,
+        #by column name
+        self._sql = OrderedDict()
+        self._expressions = OrderedDict()
+
+        for c in _expression_columns(entity):
+            sql = expression_sql(c)
+            if sql is None:
+                self._expressions[c.name] = QgsExpression(c.expression)
+            else:
+                self._sql[c.name] = sql
+
+        self.expressions_key = self.entity_expressions_key(entity)
+
+    @staticmethod
+    def entity_expressions_key(entity):
+        """
+        :return: Names and expressions of the expression columns of the
+        entity, used to check whether the evaluator is current.
+        :rtype: tuple
+        """
+        return tuple(
+            (c.name, c.expression) for c in _expression_columns(entity)
+        )
+
+    def _prepared_layer(self):
+        #Creates the layer and prepares the expressions the first time
+        #they are evaluated
+        if self._prepared:
+            return self._layer
+
+        srid = None
+        geom_column = ''
+        if self.entity.has_geometry_column():
+            geom_column = [c.name for c in self.entity.columns.values()
+                           if c.TYPE_INFO == 'GEOMETRY'][0]
+            geom_col_obj = self.entity.columns[geom_column]
+
+            if geom_col_obj.srid >= 100000:
+                srid = geom_col_obj.srid
+
+        self._layer = vector_layer(
+            self.entity.name, geom_column=geom_column, proj_wkt=srid
+        )
+        if self._layer is None:
+            return None
+
+        fields = self._layer.pendingFields()
+        for exp in self._expressions.values():
+            if not exp.hasParserError():
+                exp.prepare(fields)
+
+        self._prepared = True
+
+        return self._layer
+
+    def _sql_values(self, ids, names, values):
+        columns = u', '.join(
+            u'{0} AS "{1}"'.format(self._sql[n], n) for n in names
+        )
+        sql = text(u'SELECT id, {0} FROM {1} WHERE id = ANY(:ids)'.format(
+            columns, self.entity.name
+        ))
+
+        #The session includes the changes that have only been flushed
+        res = STDMDb.instance().session.execute(sql, {'ids': list(ids)})
+        for r in res:
+            rec_values = values.setdefault(r.id, {})
+            for n in names:
+                rec_values[n] = r[n]
+
+    def _layer_values(self, ids, names, values):
+        for n in names:
+            exp = self._expressions[n]
+            if exp.hasParserError():
+                raise Exception(exp.parserErrorString())
+
+        layer = self._prepared_layer()
+        if layer is None:
+            return
+
+        request = QgsFeatureRequest()
+        request.setFilterFids(set(ids))
+
+        for feature in layer.getFeatures(request):
+            rec_values = values.setdefault(feature.id(), {})
+            for n in names:
+                value = self._expressions[n].evaluate(feature)
+                if isinstance(value, QPyNullVariant):
+                    value = None
+
+                rec_values[n] = value
+
+    def evaluate(self, ids, column_names=None):
+        """
+        Computes the values of the expression columns for the records.
+        :param ids: Primary keys of the saved records.
+        :type ids: list
+        :param column_names: Names of the expression columns to compute, all
+        of them if None.
+        :type column_names: list
+        :return: Values of the columns by column name, indexed by the ids of
+        the records found.
+        :rtype: dict
+        """
+        ids = [i for i in ids if i is not None]
+        values = {}
+        if len(ids) == 0:
+            return values
+
+        if column_names is None:
+            column_names = self._sql.keys() + self._expressions.keys()
+
+        sql_names = [n for n in column_names if n in self._sql]
+        if len(sql_names) > 0:
+            self._sql_values(ids, sql_names, values)
+
+        exp_names = [n for n in column_names if n in self._expressions]
+        if len(exp_names) > 0:
+            self._layer_values(ids, exp_names, values)
+
+        return values
+
+
+def entity_expression_evaluator(entity):
+    """
+    :param entity: Entity with expression columns.
+    :type entity: Entity
+    :return: Evaluator of the expression columns of the entity, created once
+    and reused until the expressions change.
+    :rtype: EntityExpressionEvaluator
+    """
+    key = (entity.profile.name, entity.name)
+    evaluator = _evaluators.get(key, None)
+
+    if evaluator is None or evaluator.entity is not entity or \
+            evaluator.expressions_key != \
+            EntityExpressionEvaluator.entity_expressions_key(entity):
+        evaluator = EntityExpressionEvaluator(entity)
+        _evaluators[key] = evaluator
+
+    return evaluator
+
+
+def clear_expression_evaluators():
+    """
+    Discards the evaluators and their layers, e.g. when the user logs out.
+    """
+    _evaluators.clear()
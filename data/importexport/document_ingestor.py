@@ -0,0 +1,494 @@
+"""
+/***************************************************************************
+Name                 : Document Ingestor
+Description          : Copies supporting documents referenced in an import
+                       source to the document repository using a pool of
+                       worker threads and links them to the imported
+                       records in bulk.
+Date                 : 19/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from collections import namedtuple
+from datetime import datetime
+from multiprocessing.pool import ThreadPool
+from uuid import uuid4
+
+from PyQt4.QtGui import QApplication
+
+from stdm.data.database import STDMDb
+from stdm.network.filemanager import DOCUMENT_BUFFER_SIZE
+
+LOGGER = logging.getLogger('stdm')
+
+# Default number of threads copying documents to the repository
+DEFAULT_DOCUMENT_WORKERS = 4
+
+# Result of copying or matching a single source document, 'path' is the
+# location of the file in the repository
+IngestedDocument = namedtuple(
+    'IngestedDocument',
+    ['identifier', 'filename', 'size', 'reused', 'path']
+)
+
+
+def _file_digest(path, buffer_size=DOCUMENT_BUFFER_SIZE):
+    # SHA-1 digest of the file contents
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(buffer_size)
+            if not block:
+                break
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def _copy_with_digest(source, destination, buffer_size=DOCUMENT_BUFFER_SIZE):
+    # Copies the file and computes its SHA-1 digest in a single pass
+    digest = hashlib.sha1()
+    with open(source, 'rb') as src, open(destination, 'wb') as dest:
+        while True:
+            block = src.read(buffer_size)
+            if not block:
+                break
+            digest.update(block)
+            dest.write(block)
+
+    return digest.hexdigest()
+
+
+def _file_suffix(file_name):
+    # Same as QFileInfo.completeSuffix, used by the network file manager
+    base_name = os.path.basename(file_name)
+    if not '.' in base_name:
+        return ''
+
+    return base_name.split('.', 1)[1]
+
+
+def _stored_file_name(identifier, suffix):
+    # Name of the document file in the repository
+    if not suffix:
+        return identifier
+
+    return u'{0}.{1}'.format(identifier, suffix)
+
+
+class _DocumentTypeStore(object):
+    """
+    Repository directory for one document type. Files already in the
+    directory are indexed by size and only hashed when a source document
+    of the same size and extension is submitted. Each supporting document
+    row references its own file since the network file manager deletes
+    the file together with the row, files with the same contents are
+    added as hard links (or local copies) of the stored file instead of
+    being copied from the source again.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        # {digest: file name} of files in the directory
+        self._digests = {}
+        # {(size, suffix): [file names]} of files not yet hashed
+        self._unhashed = {}
+        # {path: digest} of the files copied to the directory
+        self._copied = {}
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+            return
+
+        for f in os.listdir(directory):
+            path = os.path.join(directory, f)
+            if not os.path.isfile(path):
+                continue
+
+            key = (os.path.getsize(path), _file_suffix(f).lower())
+            self._unhashed.setdefault(key, []).append(f)
+
+    def _index_candidates(self, size, suffix):
+        # Hashes stored files matching the size and extension
+        candidates = self._unhashed.pop((size, suffix.lower()), [])
+        for f in candidates:
+            digest = _file_digest(os.path.join(self.directory, f))
+            self._digests.setdefault(digest, f)
+
+    def link_copy(self, file_name, suffix=None):
+        """
+        Adds a file with the contents of a stored file under a new
+        identifier. A hard link is created where the file system supports
+        it so that the contents are not written again, deleting either of
+        the files does not affect the other one.
+        :param file_name: Name of the stored file.
+        :type file_name: str
+        :param suffix: Extension of the new file, the network file manager
+        uses the extension of the source document. Defaults to the
+        extension of the stored file.
+        :type suffix: str
+        :return: Repository identifier of the new file.
+        :rtype: str
+        """
+        if suffix is None:
+            suffix = _file_suffix(file_name)
+
+        identifier = unicode(uuid4())
+        source = os.path.join(self.directory, file_name)
+        destination = os.path.join(
+            self.directory, _stored_file_name(identifier, suffix)
+        )
+
+        try:
+            os.link(source, destination)
+        except (AttributeError, OSError):
+            # No hard links on Windows or the repository file system
+            shutil.copyfile(source, destination)
+
+        with self._lock:
+            self._copied[destination] = None
+
+        return identifier
+
+    def keep(self, path):
+        """
+        Excludes the file from the copies deleted by 'remove_copies' once
+        a supporting document row references it.
+        :param path: Path of the file in the directory.
+        :type path: str
+        """
+        with self._lock:
+            self._copied.pop(path, None)
+
+    def ingest(self, source, buffer_size):
+        """
+        Copies the source file to the directory. If a file with the same
+        contents is already stored, it is linked instead of copying the
+        source.
+        :param source: Path of the source document.
+        :type source: str
+        :param buffer_size: Size of the blocks read from the source file.
+        :type buffer_size: int
+        :return: Repository identifier of the new file and True if the
+        contents of an existing file have been reused.
+        :rtype: tuple
+        """
+        size = os.path.getsize(source)
+        suffix = _file_suffix(source)
+
+        with self._lock:
+            self._index_candidates(size, suffix)
+            has_candidates = len(self._digests) > 0
+
+        # Avoid reading the source twice if nothing can match
+        if has_candidates:
+            digest = _file_digest(source, buffer_size)
+            with self._lock:
+                stored_name = self._digests.get(digest, None)
+            if stored_name is not None:
+                return self.link_copy(stored_name, suffix), True
+
+        identifier = unicode(uuid4())
+        file_name = _stored_file_name(identifier, suffix)
+        destination = os.path.join(self.directory, file_name)
+
+        digest = _copy_with_digest(source, destination, buffer_size)
+
+        with self._lock:
+            # Later files with the same contents are linked to this one
+            self._digests.setdefault(digest, file_name)
+            self._copied[destination] = digest
+
+        return identifier, False
+
+    def remove_copies(self):
+        """
+        Deletes the files copied to the directory, e.g. when the import
+        that copied them has failed.
+        """
+        with self._lock:
+            for path, digest in self._copied.iteritems():
+                if self._digests.get(digest, None) == os.path.basename(path):
+                    del self._digests[digest]
+                try:
+                    os.remove(path)
+                except OSError as ex:
+                    LOGGER.debug('%s could not be removed: %s', path, ex)
+
+            self._copied.clear()
+
+
+class DocumentIngestor(object):
+    """
+    Copies supporting documents to the document repository in worker
+    threads while the import continues. Documents with the same contents,
+    either within the import or already in the repository, are only read
+    from the source once but every supporting document row gets its own
+    file and identifier. The supporting document rows are written when the
+    import finishes.
+    """
+    def __init__(self, entity, document_model, repository_path,
+                 num_workers=DEFAULT_DOCUMENT_WORKERS,
+                 buffer_size=DOCUMENT_BUFFER_SIZE):
+        """
+        :param entity: Entity whose records the documents belong to.
+        :type entity: Entity
+        :param document_model: Entity supporting document model as returned
+        by 'entity_model'.
+        :param repository_path: Root directory of the document repository.
+        :type repository_path: str
+        :param num_workers: Number of threads copying documents.
+        :type num_workers: int
+        :param buffer_size: Size of the blocks read when copying documents.
+        :type buffer_size: int
+        """
+        if not repository_path or not os.path.isdir(repository_path):
+            msg = QApplication.translate(
+                'DocumentIngestor',
+                u"The root document repository '{0}' does not exist.\n"
+                u"Please check the path settings."
+            )
+            raise IOError(msg.format(repository_path))
+
+        self.entity = entity
+        self.document_model = document_model
+        self.repository_path = repository_path
+        self.buffer_size = buffer_size
+        self._pool = ThreadPool(max(1, num_workers))
+        self._stores = {}
+        # {(store directory, absolute path): AsyncResult}
+        self._jobs = {}
+        # Documents submitted since the last call to 'assign'
+        self._pending = []
+        # [(record id, document type id, store, AsyncResult)]
+        self._links = []
+
+    def _doc_type_directory(self, document_type):
+        # Same layout as the network file manager
+        return u'{0}/{1}/{2}/{3}'.format(
+            self.repository_path,
+            self.entity.profile.name.lower(),
+            self.entity.name,
+            document_type.lower().replace(' ', '_')
+        ).lower()
+
+    def _store(self, document_type):
+        directory = self._doc_type_directory(document_type)
+        store = self._stores.get(directory, None)
+        if store is None:
+            store = _DocumentTypeStore(directory)
+            self._stores[directory] = store
+
+        return store
+
+    def _ingest(self, store, path):
+        identifier, reused = store.ingest(path, self.buffer_size)
+        stored_path = os.path.join(
+            store.directory, _stored_file_name(identifier, _file_suffix(path))
+        )
+
+        return IngestedDocument(
+            identifier,
+            os.path.basename(path),
+            os.path.getsize(path),
+            reused,
+            stored_path
+        )
+
+    def submit(self, path, document_type_id, document_type):
+        """
+        Queues the document for copying to the repository. A file is only
+        copied once regardless of the number of records referencing it.
+        :param path: Absolute path of the source document.
+        :type path: str
+        :param document_type_id: Primary key of the document type.
+        :type document_type_id: int
+        :param document_type: Document type name.
+        :type document_type: str
+        """
+        abs_path = os.path.abspath(path)
+        store = self._store(document_type)
+        job_key = (store.directory, abs_path)
+        job = self._jobs.get(job_key, None)
+        if job is None:
+            job = self._pool.apply_async(self._ingest, (store, abs_path))
+            self._jobs[job_key] = job
+
+        self._pending.append((document_type_id, store, job))
+
+    def has_pending(self):
+        """
+        :return: True if documents have been submitted since the last call
+        to 'assign'.
+        :rtype: bool
+        """
+        return len(self._pending) > 0
+
+    def assign(self, record_id):
+        """
+        Links the documents submitted since the last call to the record
+        with the given primary key.
+        :param record_id: Primary key of the imported record.
+        :type record_id: int
+        """
+        for doc_type_id, store, job in self._pending:
+            self._links.append((record_id, doc_type_id, store, job))
+
+        self._pending = []
+
+    def _tables(self):
+        # Entity and profile supporting document tables
+        entity_doc_table = self.document_model.__table__
+        profile_doc_table = \
+            self.document_model.__mapper__.base_mapper.local_table
+
+        return entity_doc_table, profile_doc_table
+
+    def _assigned_documents(self):
+        """
+        Waits for the outstanding copies of the assigned documents. A
+        source document referenced by several records is only copied once,
+        the other records get a link to the copy so that each supporting
+        document row has its own file.
+        :return: Record id, document type id, store and ingested document
+        of the assigned documents.
+        :rtype: list
+        """
+        self._pool.close()
+
+        try:
+            self._pool.join()
+
+            documents = []
+            used_paths = set()
+            for record_id, doc_type_id, store, job in self._links:
+                doc = job.get()
+                if doc.path in used_paths:
+                    identifier = store.link_copy(os.path.basename(doc.path))
+                    doc = doc._replace(
+                        identifier=identifier,
+                        reused=True,
+                        path=os.path.join(
+                            store.directory,
+                            _stored_file_name(
+                                identifier, _file_suffix(doc.path)
+                            )
+                        )
+                    )
+                used_paths.add(doc.path)
+                documents.append((record_id, doc_type_id, store, doc))
+
+        finally:
+            self._links = []
+            self._pending = []
+
+        return documents
+
+    def finish(self, batch_size=1000):
+        """
+        Waits for the outstanding copies and writes the supporting document
+        rows for the documents assigned so far in bulk. It is also called
+        when an import fails so that the records already committed keep
+        their documents, the documents submitted for the failed record are
+        deleted by 'terminate'.
+        :param batch_size: Maximum number of rows in a single insert
+        statement.
+        :type batch_size: int
+        :return: Number of documents copied from the source and number of
+        documents linked to the contents of a file in the repository.
+        :rtype: tuple
+        """
+        links = self._assigned_documents()
+
+        copied = len([doc for _, _, _, doc in links if not doc.reused])
+        reused = len(links) - copied
+
+        entity_doc_table, profile_doc_table = self._tables()
+        entity_ref = self.entity.supporting_doc.entity_reference.name
+        doc_ref = self.entity.supporting_doc.document_reference.name
+        doc_type_ref = self.entity.supporting_doc.doc_type.name
+
+        session = STDMDb.instance().session
+        creation_date = datetime.now()
+
+        try:
+            for i in range(0, len(links), batch_size):
+                batch = links[i:i + batch_size]
+                doc_rows = [
+                    {
+                        'creation_date': creation_date,
+                        'document_identifier': doc.identifier,
+                        'filename': doc.filename,
+                        'document_size': doc.size,
+                        'source_entity': self.entity.name
+                    }
+                    for _, _, _, doc in batch
+                ]
+
+                # Ids are returned in the order of the values
+                insert_stmt = profile_doc_table.insert().values(
+                    doc_rows
+                ).returning(profile_doc_table.c.id)
+                doc_ids = [
+                    r[0] for r in session.execute(insert_stmt).fetchall()
+                ]
+
+                link_rows = [
+                    {
+                        doc_ref: doc_id,
+                        entity_ref: record_id,
+                        doc_type_ref: doc_type_id
+                    }
+                    for doc_id, (record_id, doc_type_id, _, _) in zip(
+                        doc_ids, batch
+                    )
+                ]
+                session.execute(entity_doc_table.insert(), link_rows)
+
+            session.commit()
+
+        except:
+            session.rollback()
+            raise
+
+        # The linked files are no longer deleted by 'terminate'
+        for _, _, store, doc in links:
+            store.keep(doc.path)
+
+        LOGGER.debug(
+            '%s documents linked to %s records, %s copied and %s reused.',
+            len(links), self.entity.name, copied, reused
+        )
+
+        return copied, reused
+
+    def terminate(self):
+        """
+        Stops the worker threads without linking the documents that have
+        not been written by 'finish', e.g. when the import fails. The files
+        of these documents are deleted since no record references them.
+        """
+        self._pool.terminate()
+        self._pool.join()
+        self._links = []
+        self._pending = []
+
+        for store in self._stores.values():
+            store.remove_copies()
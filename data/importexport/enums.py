@@ -12,18 +12,23 @@ except:
     import gdal
     import ogr
 
+#64-bit integer fields are only available from GDAL 2.0
+_OFT_INTEGER64 = getattr(ogr, 'OFTInteger64', ogr.OFTInteger)
+
 drivers={
          "shp":"ESRI Shapefile",
          "csv":"CSV",
          "tab":"MapInfo File",
          "gpx":"GPX",
-         "dxf":"DXF"
+         "dxf":"DXF",
+         "gpkg":"GPKG",
+         "sqlite":"SQLite"
          }
 
 ogrTypes={
           "character varying":ogr.OFTString,
-          "bigint":ogr.OFTInteger,
-          "bigserial":ogr.OFTInteger,
+          "bigint":_OFT_INTEGER64,
+          "bigserial":_OFT_INTEGER64,
           "boolean":ogr.OFTString,
           "bytea":ogr.OFTBinary,
           "character":ogr.OFTString,
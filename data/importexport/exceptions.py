@@ -23,4 +23,17 @@ class TranslatorException(Exception):
         self.message = message
         
     def __str__(self):
-        return repr(self.message)
\ No newline at end of file
+        return repr(self.message)
+
+
+class FeatureImportException(Exception):
+    """
+    Raised when a source feature could not be written to the database.
+    """
+    def __init__(self, message, feature_number):
+        Exception.__init__(self, message)
+        self.message = message
+        self.feature_number = feature_number
+
+    def __unicode__(self):
+        return self.message
\ No newline at end of file
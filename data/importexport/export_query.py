@@ -0,0 +1,105 @@
+"""
+/***************************************************************************
+Name                 : Export Query
+Description          : Builds export queries that replace lookup, admin
+                       unit and foreign key ids with their display values
+                       through joins in the database.
+Date                 : 19/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+from stdm.data.display_columns import display_columns
+
+# Alias of the exported table in the generated query
+_TABLE_ALIAS = 't'
+
+
+def denormalized_query(entity, table, columns, where="", geom_column="",
+                       dest_srid=None):
+    """
+    Builds the select list and FROM clause of an export query in which the
+    lookup, administrative unit and foreign key columns are replaced by
+    their display values using LEFT JOINs. The filter is applied to the
+    exported table before the joins so that its column names remain
+    unambiguous.
+    :param entity: Entity corresponding to the exported table, None for
+    views in which case the column values are exported as they are.
+    :type entity: Entity
+    :param table: Name of the exported table.
+    :type table: str
+    :param columns: Exported column names, possibly quoted.
+    :type columns: list
+    :param where: Filter expression.
+    :type where: str
+    :param geom_column: Geometry column, exported as WKB after the other
+    columns.
+    :type geom_column: str
+    :param dest_srid: SRID that the geometries are transformed to.
+    :type dest_srid: int
+    :return: Select list, FROM clause and the names of the columns whose
+    values have been replaced by text.
+    :rtype: tuple
+    """
+    select_items = []
+    joins = []
+    text_columns = []
+
+    for i, col in enumerate(columns):
+        name = col.strip('"')
+        col_obj = entity.column(name) if entity is not None else None
+        display = display_columns(col_obj)
+
+        if display is None:
+            select_items.append(u'{0}."{1}"'.format(_TABLE_ALIAS, name))
+
+            continue
+
+        parent_table, parent_col, display_cols = display
+        join_alias = u'j{0:d}'.format(i)
+        joins.append(
+            u'LEFT JOIN {0} {1} ON {1}."{2}" = {3}."{4}"'.format(
+                parent_table, join_alias, parent_col, _TABLE_ALIAS, name
+            )
+        )
+
+        display_values = [
+            u'{0}."{1}"'.format(join_alias, d) for d in display_cols
+        ]
+        if len(display_values) == 1:
+            value_expr = u'CAST({0} AS text)'.format(display_values[0])
+        else:
+            value_expr = u"concat_ws(' ', {0})".format(
+                u', '.join(display_values)
+            )
+
+        select_items.append(u'{0} AS "{1}"'.format(value_expr, name))
+        text_columns.append(name)
+
+    if geom_column:
+        geom_expr = u'{0}."{1}"'.format(_TABLE_ALIAS, geom_column)
+        if dest_srid is not None:
+            geom_expr = u'ST_Transform({0}, {1:d})'.format(
+                geom_expr, dest_srid
+            )
+        select_items.append(u'ST_AsBinary({0})'.format(geom_expr))
+
+    table_sql = u'SELECT * FROM {0}'.format(table)
+    if where:
+        table_sql += u' WHERE {0}'.format(where)
+
+    from_sql = u'({0}) {1}'.format(table_sql, _TABLE_ALIAS)
+    if len(joins) > 0:
+        from_sql += u' ' + u' '.join(joins)
+
+    return u','.join(select_items), from_sql, text_columns
@@ -0,0 +1,339 @@
+"""
+/***************************************************************************
+Name                 : Headless Importer
+Description          : Runs data imports without the import wizard so that
+                       they can be scripted e.g. for nightly batch imports
+                       on a server.
+Date                 : 19/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+
+Usage (from the directory containing the stdm package):
+
+    python -m stdm.data.importexport.headless import_config.json
+
+The JSON configuration file has the following structure:
+
+    {
+        "source": "/data/parties.shp",
+        "table": "ab_party",
+        "profile": "Basic",
+        "configuration": "/home/stdm/.stdm/configuration.stc",
+        "database": {
+            "host": "localhost", "port": 5432, "name": "stdm",
+            "user": "postgres", "password": "secret"
+        },
+        "columns": {"first_nam": "first_name", "last_nam": "last_name"},
+        "append": true,
+        "geometry_column": null,
+        "transform_crs": false,
+        "batch_size": 1000,
+        "document_workers": 4,
+        "document_repository": "/srv/stdm/documents",
+        "translators": []
+    }
+
+The 'translators' item contains the value translator settings as returned
+by 'ValueTranslatorManager.translator_configs'. Supporting documents are
+copied to 'document_repository', or the repository path in the registry if
+omitted, by 'document_workers' threads. If the password is omitted
+then the PGPASSWORD environment variable is used. Progress and the final
+summary are written to stdout as one JSON object per line.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from PyQt4.QtCore import QDir
+
+import stdm.data
+from stdm.data.connection import DatabaseConnection
+from stdm.security.user import User
+
+LOGGER = logging.getLogger('stdm')
+
+DEFAULT_CONFIG_FILE = QDir.home().path() + '/.stdm/configuration.stc'
+
+
+def connect_database(db_config):
+    """
+    Sets the application connection used by the data layer.
+    :param db_config: Connection settings i.e. host, port, name, user and
+    password. If the password is omitted then the PGPASSWORD environment
+    variable is used.
+    :type db_config: dict
+    """
+    db_conn = DatabaseConnection(
+        db_config.get('host', 'localhost'),
+        db_config.get('port', 5432),
+        db_config.get('name', 'stdm')
+    )
+    password = db_config.get('password', os.environ.get('PGPASSWORD', ''))
+    db_conn.User = User(db_config.get('user', 'postgres'), password)
+
+    is_valid, msg = db_conn.validateConnection()
+    if not is_valid:
+        raise IOError(msg)
+
+    stdm.data.app_dbconn = db_conn
+
+
+def load_profile(config_path, profile_name):
+    """
+    Loads the configuration file and returns the profile with the given
+    name.
+    :param config_path: Path to the configuration file.
+    :type config_path: str
+    :param profile_name: Profile name.
+    :type profile_name: str
+    :rtype: Profile
+    """
+    from stdm.data.configuration.stdm_configuration import (
+        StdmConfiguration
+    )
+    from stdm.settings.config_serializer import (
+        ConfigurationFileSerializer
+    )
+
+    ConfigurationFileSerializer(config_path).load()
+
+    profile = StdmConfiguration.instance().profile(profile_name)
+    if profile is None:
+        raise ValueError(
+            u'Profile {0} does not exist in {1}.'.format(
+                profile_name,
+                config_path
+            )
+        )
+
+    return profile
+
+
+class HeadlessImporter(object):
+    """
+    Imports features from an OGR data source into an entity table without
+    any user interface. Progress and timings are reported through a
+    callable which receives a dictionary for each event.
+    """
+    def __init__(self, config, emit=None, progress_interval=1000):
+        """
+        :param config: Import settings, see the module documentation for
+        the expected structure.
+        :type config: dict
+        :param emit: Callable which is passed progress and summary events.
+        :type emit: callable
+        :param progress_interval: Number of features after which a progress
+        event is emitted.
+        :type progress_interval: int
+        """
+        self.config = config
+        self._emit = emit
+        self.progress_interval = max(1, progress_interval)
+        self._start = None
+
+    def emit(self, event, **kwargs):
+        """
+        Sends an event, with the elapsed time since the start of the import,
+        to the emit callable.
+        :param event: Event name.
+        :type event: str
+        """
+        kwargs['event'] = event
+        if self._start is not None:
+            kwargs['elapsed'] = round(time.time() - self._start, 3)
+
+        LOGGER.debug(u'Headless import: %s', kwargs)
+
+        if self._emit is not None:
+            self._emit(kwargs)
+
+    def _connect(self):
+        connect_database(self.config.get('database', {}))
+
+    def _load_profile(self):
+        # Loads the configuration file and returns the destination profile
+        return load_profile(
+            self.config.get('configuration', DEFAULT_CONFIG_FILE),
+            self.config.get('profile', '')
+        )
+
+    def _on_progress(self, current, total):
+        if current % self.progress_interval == 0 or current == total:
+            self.emit('progress', imported=current, total=total)
+
+        return True
+
+    def run(self, validate=False):
+        """
+        Runs the import.
+        :param validate: True to check the source data before importing and
+        abort if any issues are found.
+        :type validate: bool
+        :return: Machine-readable summary of the import.
+        :rtype: dict
+        """
+        # Imported here since the data layer requires the connection first
+        from stdm.data.importexport.reader import (
+            DEFAULT_BATCH_SIZE,
+            DEFAULT_DOCUMENT_WORKERS,
+            OGRReader
+        )
+        from stdm.data.importexport.value_translators import (
+            ValueTranslatorManager
+        )
+
+        self._start = time.time()
+        timings = {}
+
+        source = self.config['source']
+        table = self.config['table']
+        columns = self.config.get('columns', {})
+        geom_column = self.config.get('geometry_column', None)
+
+        summary = {
+            'source': source,
+            'table': table,
+            'status': 'failed',
+            'imported': 0,
+            'total': 0
+        }
+
+        try:
+            self._connect()
+            profile = self._load_profile()
+            timings['setup'] = round(time.time() - self._start, 3)
+
+            reader = OGRReader(source, profile)
+            if not reader.isValid():
+                raise IOError(u'{0} could not be opened.'.format(source))
+
+            summary['total'] = reader.getLayer().GetFeatureCount()
+
+            translator_manager = ValueTranslatorManager()
+            translator_manager.load_translator_configs(
+                self.config.get('translators', [])
+            )
+
+            if validate:
+                t_start = time.time()
+                report = reader.validate(table, columns, geom_column,
+                                         translator_manager)
+                timings['validation'] = round(time.time() - t_start, 3)
+
+                if report.has_errors():
+                    summary['status'] = 'invalid'
+                    summary['issues'] = report.summary().splitlines()
+
+                    return self._finish(summary, timings)
+
+            self.emit('start', table=table, total=summary['total'])
+
+            t_start = time.time()
+            summary['imported'] = reader.featToDb(
+                table,
+                columns,
+                self.config.get('append', True),
+                None,
+                geom_column,
+                translator_manager=translator_manager,
+                progress_callback=self._on_progress,
+                transform_crs=self.config.get('transform_crs', False),
+                batch_size=self.config.get('batch_size', DEFAULT_BATCH_SIZE),
+                document_workers=max(1, self.config.get(
+                    'document_workers', DEFAULT_DOCUMENT_WORKERS
+                )),
+                document_repository=self.config.get(
+                    'document_repository', None
+                )
+            )
+            timings['import'] = round(time.time() - t_start, 3)
+
+            summary['status'] = 'success'
+
+        except Exception as ex:
+            LOGGER.debug(u'Headless import failed: %s', unicode(ex))
+            summary['error'] = unicode(ex)
+
+        return self._finish(summary, timings)
+
+    def _finish(self, summary, timings):
+        total_time = time.time() - self._start
+        timings['total'] = round(total_time, 3)
+        summary['timings'] = timings
+
+        if summary['imported'] > 0 and timings.get('import', 0) > 0:
+            summary['features_per_second'] = round(
+                summary['imported'] / timings['import'], 1
+            )
+
+        self.emit('summary', **summary)
+
+        return summary
+
+
+def write_json_line(event):
+    sys.stdout.write(json.dumps(event) + '\n')
+    sys.stdout.flush()
+
+
+def main(argv=None):
+    """
+    Command-line entry point for running headless imports.
+    :return: Exit code, 0 if the import succeeded.
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(
+        description='Import an OGR data source into an STDM entity table.'
+    )
+    parser.add_argument('config', help='Path to the JSON import settings.')
+    parser.add_argument('--source', help='Overrides the source file.')
+    parser.add_argument('--table', help='Overrides the destination table.')
+    parser.add_argument('--validate', action='store_true',
+                        help='Check the source data before importing.')
+    parser.add_argument('--progress-interval', type=int, default=1000,
+                        help='Number of features between progress events.')
+    args = parser.parse_args(argv)
+
+    with open(args.config) as f:
+        config = json.load(f)
+
+    if args.source:
+        config['source'] = args.source
+    if args.table:
+        config['table'] = args.table
+
+    logging.basicConfig(level=logging.INFO)
+
+    # The data layer relies on QGIS core classes
+    from qgis.core import QgsApplication
+    app = QgsApplication(sys.argv if argv is None else argv, False)
+    app.initQgis()
+
+    importer = HeadlessImporter(
+        config,
+        emit=write_json_line,
+        progress_interval=args.progress_interval
+    )
+    summary = importer.run(args.validate)
+
+    app.exitQgis()
+
+    return 0 if summary['status'] == 'success' else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,522 @@
+"""
+/***************************************************************************
+Name                 : Profile Exporter
+Description          : Exports all the tables of a profile, together with
+                       the relationships between them, to a single
+                       GeoPackage or to a directory of files e.g. for
+                       backups or hand-overs to partners.
+Date                 : 19/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+
+Usage (from the directory containing the stdm package):
+
+    python -m stdm.data.importexport.profile_exporter export_config.json
+
+The JSON configuration file has the following structure:
+
+    {
+        "target": "/backups/basic.gpkg",
+        "profile": "Basic",
+        "configuration": "/home/stdm/.stdm/configuration.stc",
+        "database": {
+            "host": "localhost", "port": 5432, "name": "stdm",
+            "user": "postgres", "password": "secret"
+        },
+        "readers": 4,
+        "fetch_size": 5000
+    }
+
+If the target has no file extension then each table is written to a
+separate file, in the format specified by the optional 'format' item, in
+the target directory. The timings of each table and the final summary are
+written to stdout as one JSON object per line.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+from Queue import (
+    Full,
+    Queue
+)
+
+try:
+    from osgeo import ogr
+    from osgeo import osr
+except:
+    import ogr
+    import osr
+
+from PyQt4.QtGui import QApplication
+
+from stdm.data.pg_utils import (
+    DEFAULT_FETCH_SIZE,
+    stream_report_filter,
+    table_column_types,
+    table_geometry_columns
+)
+from stdm.data.importexport.enums import (
+    drivers,
+    ogrTypes,
+    wkbTypes
+)
+from stdm.data.importexport.writer import (
+    DEFAULT_TRANSACTION_SIZE,
+    OGRWriter
+)
+
+LOGGER = logging.getLogger('stdm')
+
+# Number of tables read concurrently, each through its own connection
+DEFAULT_READERS = 4
+
+# Formats that can store all the tables in a single file
+MULTI_LAYER_FORMATS = ['gpkg', 'sqlite']
+
+# Tables describing the exported tables and the relationships between them
+TABLES_METADATA_TABLE = 'stdm_tables'
+RELATIONS_METADATA_TABLE = 'stdm_relations'
+
+# Number of row chunks a reader fetches ahead of the writer
+_READ_AHEAD_CHUNKS = 4
+
+# Marks the end of the rows of a table
+_END_OF_ROWS = object()
+
+
+class _TableReader(object):
+    """
+    Reads the rows of a table in a worker thread and hands them over to
+    the writer in chunks.
+    """
+    def __init__(self, table, columns, fetch_size, cancelled):
+        self.table = table
+        self.columns = columns
+        self.fetch_size = fetch_size
+        self.read_time = 0
+        self._cancelled = cancelled
+        self._chunks = Queue(_READ_AHEAD_CHUNKS)
+
+    def _put(self, item):
+        # Gives up if the writer has stopped consuming the rows
+        while not self._cancelled.is_set():
+            try:
+                self._chunks.put(item, timeout=0.5)
+
+                return True
+
+            except Full:
+                continue
+
+        return False
+
+    def read(self):
+        """
+        Fetches the rows from the database, this is run in a worker thread.
+        """
+        if self._cancelled.is_set():
+            return
+
+        try:
+            chunk = []
+            start = time.time()
+            rows = stream_report_filter(self.table, self.columns,
+                                        fetch_size=self.fetch_size)
+            for r in rows:
+                chunk.append(r)
+                if len(chunk) == self.fetch_size:
+                    self.read_time += time.time() - start
+                    if not self._put(chunk):
+                        rows.close()
+
+                        return
+                    chunk = []
+                    start = time.time()
+
+            self.read_time += time.time() - start
+            if len(chunk) > 0:
+                self._put(chunk)
+
+            self._put(_END_OF_ROWS)
+
+        except Exception as ex:
+            self._put(ex)
+
+    def rows(self):
+        """
+        :return: Generator of the rows read so far, it blocks until the
+        next chunk is available.
+        """
+        while True:
+            chunk = self._chunks.get()
+            if chunk is _END_OF_ROWS:
+                return
+
+            if isinstance(chunk, Exception):
+                raise chunk
+
+            for r in chunk:
+                yield r
+
+
+class ProfileExporter(object):
+    """
+    Exports the entity, lookup, association, supporting document and social
+    tenure relationship tables of a profile. Tables are read concurrently
+    by a pool of readers while a single writer creates the output layers
+    one after the other. The tables and the relationships between them are
+    described in the 'stdm_tables' and 'stdm_relations' tables of the
+    output.
+    """
+    def __init__(self, profile, target, file_format='gpkg',
+                 num_readers=DEFAULT_READERS, fetch_size=DEFAULT_FETCH_SIZE,
+                 transaction_size=DEFAULT_TRANSACTION_SIZE):
+        """
+        :param profile: Profile whose tables are to be exported.
+        :type profile: Profile
+        :param target: GeoPackage or SQLite file, or a directory in which a
+        file is created for each table.
+        :type target: str
+        :param file_format: Extension of the files created in the target
+        directory, one of the keys in 'enums.drivers'. Ignored if the
+        target is a file.
+        :type file_format: str
+        :param num_readers: Number of tables read at the same time.
+        :type num_readers: int
+        :param fetch_size: Number of rows fetched in each round trip.
+        :type fetch_size: int
+        :param transaction_size: Number of features written in each OGR
+        transaction.
+        :type transaction_size: int
+        """
+        self.profile = profile
+        self.target = target
+        self.num_readers = max(1, num_readers)
+        self.fetch_size = fetch_size
+        self.transaction_size = transaction_size
+
+        ext = os.path.splitext(target)[1][1:].lower()
+        self._single_file = ext in MULTI_LAYER_FORMATS
+        self.file_format = ext if self._single_file else file_format.lower()
+
+        if not self.file_format in drivers:
+            msg = QApplication.translate(
+                'ProfileExporter',
+                u'{0} is not a supported export format.'
+            )
+            raise ValueError(msg.format(self.file_format))
+
+        self._ds = None
+        self._writer = OGRWriter(target)
+
+    def table_names(self):
+        """
+        :return: Names of the profile tables that exist in the database.
+        :rtype: list
+        """
+        names = self.profile.table_names()
+        col_types = table_column_types(names)
+
+        return [n for n in names if n in col_types]
+
+    def _data_source(self, layer_name):
+        # Returns the data source in which the layer is to be created
+        driver = ogr.GetDriverByName(drivers[self.file_format])
+        if driver is None:
+            raise Exception(
+                u"{0} driver not available.".format(drivers[self.file_format])
+            )
+
+        if self._single_file:
+            if self._ds is None:
+                self._ds = driver.CreateDataSource(self.target)
+
+            ds = self._ds
+
+        else:
+            if not os.path.isdir(self.target):
+                os.makedirs(self.target)
+
+            path = os.path.join(
+                self.target,
+                u'{0}.{1}'.format(layer_name, self.file_format)
+            )
+            ds = driver.CreateDataSource(path)
+
+        if ds is None:
+            raise Exception("Creation of output file failed.")
+
+        return ds
+
+    def _create_layer(self, ds, name, fields, geom_type=ogr.wkbNone,
+                      srid=None):
+        crs = None
+        if srid:
+            crs = osr.SpatialReference()
+            crs.ImportFromEPSG(srid)
+
+        lyr = ds.CreateLayer(name, crs, geom_type)
+        if lyr is None:
+            raise Exception("Layer creation failed")
+
+        for field_name, ogr_type in fields:
+            field_defn = ogr.FieldDefn(field_name.encode('utf-8'), ogr_type)
+            if lyr.CreateField(field_defn) != 0:
+                raise Exception("Creating %s field failed"%(field_name))
+
+        return lyr
+
+    def _table_layout(self, table, col_types, geom_cols):
+        """
+        :return: The select list, the OGR fields and the geometry column
+        definition, if any, of the layer for the table. The first geometry
+        column is the layer geometry and any others are written as WKT.
+        :rtype: tuple
+        """
+        geom_col = geom_cols[0] if len(geom_cols) > 0 else None
+        other_geoms = set(g[0] for g in geom_cols[1:])
+
+        select_cols = []
+        fields = []
+        for col, data_type in col_types:
+            if geom_col is not None and col == geom_col[0]:
+                continue
+
+            if col in other_geoms:
+                select_cols.append(u'ST_AsText("{0}")'.format(col))
+                fields.append((col, ogr.OFTString))
+
+            else:
+                select_cols.append(u'"{0}"'.format(col))
+                fields.append((col, ogrTypes.get(data_type, ogr.OFTString)))
+
+        if geom_col is not None:
+            select_cols.append(u'ST_AsBinary("{0}")'.format(geom_col[0]))
+
+        return u','.join(select_cols), fields, geom_col
+
+    def _write_metadata(self, tables):
+        # Describes the tables and the relationships between them
+        table_rows = []
+        for t in tables:
+            entity = self.profile.entity_by_name(t)
+            table_rows.append((
+                t,
+                entity.short_name,
+                entity.TYPE_INFO
+            ))
+
+        relation_rows = [
+            (
+                r.name,
+                r.parent.name,
+                r.parent_column,
+                r.child.name,
+                r.child_column,
+                r.on_delete_action,
+                r.on_update_action
+            )
+            for r in self.profile.relations.values()
+            if r.parent is not None and r.child is not None
+        ]
+
+        metadata = [
+            (
+                TABLES_METADATA_TABLE,
+                ['table_name', 'short_name', 'entity_type'],
+                table_rows
+            ),
+            (
+                RELATIONS_METADATA_TABLE,
+                [
+                    'name', 'parent_table', 'parent_column', 'child_table',
+                    'child_column', 'on_delete', 'on_update'
+                ],
+                relation_rows
+            )
+        ]
+
+        for name, columns, rows in metadata:
+            ds = self._data_source(name)
+            fields = [(c, ogr.OFTString) for c in columns]
+            lyr = self._create_layer(ds, name, fields)
+            self._writer.write_features(
+                lyr, rows, [ogr.OFTString] * len(columns)
+            )
+            lyr, ds = None, None
+
+    def run(self, progress_callback=None):
+        """
+        Exports the tables.
+        :param progress_callback: Callable which is passed the name of each
+        table and its timings once it has been written.
+        :type progress_callback: callable
+        :return: Number of rows and the read and write times, in seconds,
+        of each table. The read time is the time spent fetching rows from
+        the database by the reader of the table.
+        :rtype: OrderedDict
+        """
+        tables = self.table_names()
+        col_types = table_column_types(tables)
+        geom_cols = table_geometry_columns(tables)
+
+        cancelled = threading.Event()
+        readers = []
+        layouts = []
+        for t in tables:
+            select_cols, fields, geom_col = self._table_layout(
+                t, col_types[t], geom_cols.get(t, [])
+            )
+            layouts.append((fields, geom_col))
+            readers.append(
+                _TableReader(t, select_cols, self.fetch_size, cancelled)
+            )
+
+        summary = OrderedDict()
+        pool = ThreadPool(self.num_readers)
+
+        try:
+            # Readers are started in the order in which the tables are
+            # written so that the writer never waits on a queued reader.
+            for reader in readers:
+                pool.apply_async(reader.read)
+
+            for reader, (fields, geom_col) in zip(readers, layouts):
+                start = time.time()
+
+                geom_type, srid, geom_index = ogr.wkbNone, None, -1
+                if geom_col is not None:
+                    geom_type = wkbTypes.get(geom_col[1].upper(),
+                                             ogr.wkbUnknown)
+                    srid = geom_col[2]
+                    geom_index = len(fields)
+
+                ds = self._data_source(reader.table)
+                lyr = self._create_layer(ds, reader.table, fields,
+                                         geom_type, srid)
+                num_rows = self._writer.write_features(
+                    lyr,
+                    reader.rows(),
+                    [f[1] for f in fields],
+                    geom_index,
+                    transaction_size=self.transaction_size
+                )
+                # Closes the file of the table if not writing to a single
+                # file
+                lyr, ds = None, None
+
+                timing = {
+                    'rows': num_rows,
+                    'read': round(reader.read_time, 3),
+                    'write': round(time.time() - start, 3)
+                }
+                summary[reader.table] = timing
+
+                LOGGER.debug('%s exported: %s', reader.table, timing)
+
+                if progress_callback is not None:
+                    progress_callback(reader.table, timing)
+
+            self._write_metadata(tables)
+
+        finally:
+            cancelled.set()
+            pool.close()
+            pool.join()
+            # Flushes the features to the file
+            self._ds = None
+
+        return summary
+
+
+def main(argv=None):
+    """
+    Command-line entry point for exporting a profile.
+    :return: Exit code, 0 if the export succeeded.
+    :rtype: int
+    """
+    from stdm.data.importexport.headless import (
+        DEFAULT_CONFIG_FILE,
+        connect_database,
+        load_profile,
+        write_json_line
+    )
+
+    parser = argparse.ArgumentParser(
+        description='Export all the tables of an STDM profile.'
+    )
+    parser.add_argument('config', help='Path to the JSON export settings.')
+    parser.add_argument('--target', help='Overrides the target file.')
+    args = parser.parse_args(argv)
+
+    with open(args.config) as f:
+        config = json.load(f)
+
+    if args.target:
+        config['target'] = args.target
+
+    logging.basicConfig(level=logging.INFO)
+
+    # The data layer relies on QGIS core classes
+    from qgis.core import QgsApplication
+    app = QgsApplication(sys.argv if argv is None else argv, False)
+    app.initQgis()
+
+    start = time.time()
+    summary = {'target': config.get('target'), 'status': 'failed'}
+
+    try:
+        connect_database(config.get('database', {}))
+        profile = load_profile(
+            config.get('configuration', DEFAULT_CONFIG_FILE),
+            config.get('profile', '')
+        )
+
+        exporter = ProfileExporter(
+            profile,
+            config['target'],
+            config.get('format', 'gpkg'),
+            config.get('readers', DEFAULT_READERS),
+            config.get('fetch_size', DEFAULT_FETCH_SIZE)
+        )
+        tables = exporter.run(
+            lambda t, timing: write_json_line(
+                dict(timing, event='table', table=t)
+            )
+        )
+        summary['status'] = 'success'
+        summary['tables'] = len(tables)
+        summary['rows'] = sum(t['rows'] for t in tables.values())
+
+    except Exception as ex:
+        LOGGER.debug(u'Profile export failed: %s', unicode(ex))
+        summary['error'] = unicode(ex)
+
+    summary['elapsed'] = round(time.time() - start, 3)
+    summary['event'] = 'summary'
+    write_json_line(summary)
+
+    app.exitQgis()
+
+    return 0 if summary['status'] == 'success' else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
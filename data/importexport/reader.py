@@ -22,12 +22,28 @@ email                : stdm@unhabitat.org
 from PyQt4.QtCore import *
 from PyQt4.QtGui import *
 
+import logging
+import struct
+import sys
+
 try:
     from osgeo import gdal
     from osgeo import ogr
+    from osgeo import osr
 except:
     import gdal
     import ogr
+    import osr
+
+from sqlalchemy import (
+    bindparam,
+    func
+)
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import (
+    MetaData,
+    Table
+)
 
 from stdm.data.pg_utils import (
     delete_table_data,
@@ -38,27 +54,80 @@ from stdm.settings import (
     current_profile
 )
 from stdm.data.database import (
+    notify_table_changes,
     STDMDb
 )
+from stdm.data.importexport.exceptions import FeatureImportException
 from stdm.data.importexport.value_translators import (
     IgnoreType,
+    SourceDocumentTranslator,
     ValueTranslatorManager
 )
+from stdm.data.importexport.validator import ImportValidator
+from stdm.data.importexport.document_ingestor import (
+    DEFAULT_DOCUMENT_WORKERS,
+    DocumentIngestor
+)
 from stdm.data.configuration import entity_model
 from stdm.data.configuration.exception import ConfigurationException
-from stdm.ui.sourcedocument import SourceDocumentManager
+from stdm.ui.sourcedocument import (
+    network_document_path,
+    SourceDocumentManager
+)
+
+LOGGER = logging.getLogger('stdm')
+
+# Flag in the WKB geometry type indicating that an SRID follows the type
+EWKB_SRID_FLAG = 0x20000000
+
+# Number of rows sent to the database in a single bulk insert statement
+DEFAULT_BATCH_SIZE = 1000
+
+# Bind parameter name for EWKB geometries in bulk insert statements
+_EWKB_PARAM = 'stdm_geom_ewkb'
+
+
+def to_ewkb(geom, srid):
+    """
+    Exports an OGR geometry to PostGIS extended WKB with the SRID embedded.
+    :param geom: The OGR geometry.
+    :type geom: ogr.Geometry
+    :param srid: Spatial reference identifier of the geometry.
+    :type srid: int
+    :return: Binary EWKB representation of the geometry.
+    :rtype: str
+    """
+    # Little endian so that the header can be unpacked without checks.
+    # Some GDAL versions return a bytearray instead of a string.
+    wkb = bytes(geom.ExportToWkb(ogr.wkbNDR))
+    geom_type = struct.unpack('<I', wkb[1:5])[0]
+
+    return wkb[0] + struct.pack('<Ii', geom_type | EWKB_SRID_FLAG,
+                                int(srid)) + wkb[5:]
 
 
 class OGRReader(object):
-    def __init__(self, source_file):
+    def __init__(self, source_file, profile=None):
+        """
+        :param source_file: Path to the source data file.
+        :type source_file: str
+        :param profile: Profile containing the destination entities. The
+        current profile is used if not specified.
+        :type profile: Profile
+        """
         self._ds = ogr.Open(source_file)
         self._targetGeomColSRID = -1
         self._geomType = ''
         self._dbSession = STDMDb.instance().session
         self._mapped_cls = None
         self._mapped_doc_cls = None
-        self._current_profile = current_profile()
+        self._current_profile = profile
+        if self._current_profile is None:
+            self._current_profile = current_profile()
         self._source_doc_manager = None
+        self._document_ingestor = None
+        self._coord_transform = None
+        self._pending_rows = []
 
     def getLayer(self):
         # Return the first layer in the data source
@@ -268,14 +337,15 @@ class OGRReader(object):
                 value = False
         return value
 
-    def _insertRow(self, target_table, columnValueMapping):
+    def _fix_row_values(self, target_table, columnValueMapping):
         """
-        Insert a new row using the mapped class instance then mapping column
-        names to the corresponding column values.
+        Applies the auto fixes to the values of the mapped class attributes.
+        :return: Attribute names and corresponding values that will be set.
+        :rtype: dict
         """
-        model_instance = self._mapped_cls()
+        row_values = {}
         for col, value in columnValueMapping.iteritems():
-            if hasattr(model_instance, col):
+            if hasattr(self._mapped_cls, col):
                 # 'documents' is not a column so exclude it.
                 if col != 'documents' and not 'collection' in col:
                     value = self.auto_fix_float_integer(target_table, col,
@@ -284,8 +354,26 @@ class OGRReader(object):
                     value = self.auto_fix_date(target_table, col, value)
                     value = self.auto_fix_yes_no(target_table, col, value)
 
-                if not isinstance(value, IgnoreType):
-                    setattr(model_instance, col, value)
+                if not isinstance(value, IgnoreType) and \
+                        not value is IgnoreType:
+                    row_values[col] = value
+
+        return row_values
+
+    def _insertRow(self, target_table, columnValueMapping, geom_column=None):
+        """
+        Insert a new row using the mapped class instance then mapping column
+        names to the corresponding column values.
+        :return: Primary key of the new row.
+        :rtype: int
+        """
+        model_instance = self._mapped_cls()
+        row_values = self._fix_row_values(target_table, columnValueMapping)
+        for col, value in row_values.iteritems():
+            if col == geom_column and value is not None:
+                value = func.ST_GeomFromEWKB(value)
+
+            setattr(model_instance, col, value)
 
         try:
             self._dbSession.add(model_instance)
@@ -295,6 +383,228 @@ class OGRReader(object):
             self._dbSession.rollback()
             raise
 
+        return model_instance.id
+
+    def _requires_model_instance(self, row_values):
+        # Relationships such as multiple select values and supporting
+        # documents can only be persisted through the mapped class.
+        table_cols = self._mapped_cls.__table__.c
+
+        for col, value in row_values.iteritems():
+            if not col in table_cols:
+                if isinstance(value, list) and len(value) == 0:
+                    continue
+
+                return True
+
+        return False
+
+    def _queue_row(self, target_table, columnValueMapping, geom_column,
+                   batch_size, associations=None, feature_number=None):
+        """
+        Adds the row to the pending bulk insert rows, or inserts it
+        through the mapped class if it has relationship values. Pending rows
+        are always written first so that the source order is preserved.
+        :param associations: Association entities and the lookup ids to be
+        linked to the row.
+        :type associations: list
+        :param feature_number: Number of the source feature of the row,
+        reported if the row cannot be written.
+        :type feature_number: int
+        """
+        if associations is None:
+            associations = []
+
+        row_values = self._fix_row_values(target_table, columnValueMapping)
+
+        if self._requires_model_instance(row_values):
+            self._flush_rows(geom_column)
+            record_id = self._insertRow(target_table, columnValueMapping,
+                                        geom_column)
+            self._write_associations([record_id], [associations])
+
+            return
+
+        table_cols = self._mapped_cls.__table__.c
+        row = dict(
+            (col, value) for col, value in row_values.iteritems()
+            if col in table_cols
+        )
+        self._pending_rows.append((row, associations, feature_number))
+
+        if len(self._pending_rows) >= batch_size:
+            self._flush_rows(geom_column)
+
+    def _flush_rows(self, geom_column):
+        """
+        Writes the pending rows using one multi-row insert statement per
+        group of rows setting the same columns. Geometries are bound as
+        binary EWKB. The primary keys of groups with multiple select values
+        are returned by the insert statement so that the association rows
+        can be written in bulk as well. If the statements fail, the rows are
+        written one at a time to find the failing feature.
+        :raises FeatureImportException: If a row cannot be written.
+        """
+        if len(self._pending_rows) == 0:
+            return
+
+        table = self._mapped_cls.__table__
+        pending_rows = self._pending_rows
+
+        # Rows in an executemany statement must have the same keys
+        row_groups = {}
+        for row, associations, _ in pending_rows:
+            row_groups.setdefault(tuple(sorted(row.keys())), []).append(
+                (row, associations)
+            )
+
+        self._pending_rows = []
+
+        try:
+            for cols, group in row_groups.iteritems():
+                # Copies are bound so that the rows can be written again
+                rows = [dict(row) for row, _ in group]
+                group_associations = [assoc for _, assoc in group]
+
+                if any(group_associations):
+                    record_ids = self._insert_returning_ids(
+                        table, cols, rows, geom_column
+                    )
+                    self._write_associations(record_ids, group_associations,
+                                             commit=False)
+
+                    continue
+
+                insert_stmt = table.insert()
+                if geom_column in cols:
+                    insert_stmt = insert_stmt.values({
+                        geom_column: func.ST_GeomFromEWKB(
+                            bindparam(_EWKB_PARAM)
+                        )
+                    })
+                    for r in rows:
+                        r[_EWKB_PARAM] = r.pop(geom_column)
+
+                self._dbSession.execute(insert_stmt, rows)
+
+            self._dbSession.commit()
+
+        except SQLAlchemyError:
+            self._dbSession.rollback()
+            self._insert_rows_individually(pending_rows, geom_column)
+
+        except:
+            self._dbSession.rollback()
+            raise
+
+    def _insert_rows_individually(self, pending_rows, geom_column):
+        """
+        Writes the rows of a failed batch one at a time in the source order,
+        committing each of them, so that the rows preceding the failing one
+        are imported as when every row was inserted on its own.
+        :param pending_rows: Rows, association ids and feature numbers.
+        :type pending_rows: list
+        :raises FeatureImportException: If a row cannot be written.
+        """
+        table = self._mapped_cls.__table__
+
+        for row, associations, feature_number in pending_rows:
+            try:
+                record_ids = self._insert_returning_ids(
+                    table, tuple(row.keys()), [dict(row)], geom_column
+                )
+                self._write_associations(record_ids, [associations],
+                                         commit=False)
+                self._dbSession.commit()
+
+            except SQLAlchemyError as ex:
+                self._dbSession.rollback()
+                raise self._feature_error(feature_number, ex)
+
+    def _feature_error(self, feature_number, error):
+        # Error reporting the source feature that could not be written
+        msg = QApplication.translate(
+            'OGRReader',
+            'Feature {0} could not be imported:\n{1}'
+        )
+
+        return FeatureImportException(
+            msg.format(feature_number, unicode(error)),
+            feature_number
+        )
+
+    def _insert_returning_ids(self, table, cols, rows, geom_column):
+        # Inserts the rows in a single statement and returns their primary
+        # keys in the same order.
+        if len(cols) == 0:
+            return [
+                self._dbSession.execute(
+                    table.insert().returning(table.c.id)
+                ).scalar()
+                for r in rows
+            ]
+
+        if geom_column in cols:
+            for r in rows:
+                if r[geom_column] is not None:
+                    r[geom_column] = func.ST_GeomFromEWKB(r[geom_column])
+
+        insert_stmt = table.insert().values(rows).returning(table.c.id)
+
+        return [r[0] for r in self._dbSession.execute(insert_stmt)]
+
+    def _association_table(self, association):
+        # Association tables are reflected together with the mapped class
+        metadata = self._mapped_cls.metadata
+        assoc_table = metadata.tables.get(association.name, None)
+        if assoc_table is None:
+            assoc_table = Table(
+                association.name,
+                MetaData(bind=STDMDb.instance().engine),
+                autoload=True
+            )
+
+        return assoc_table
+
+    def _write_associations(self, record_ids, associations, commit=True):
+        """
+        Links the multiple select lookup ids to the records using one
+        multi-row insert statement per association table.
+        :param record_ids: Primary keys of the records.
+        :type record_ids: list
+        :param associations: For each record, a list of association entities
+        and the lookup ids linked to the record.
+        :type associations: list
+        :param commit: True to commit the session after the insert.
+        :type commit: bool
+        """
+        assoc_rows = {}
+        for record_id, record_assocs in zip(record_ids, associations):
+            for association, lk_ids in record_assocs:
+                lk_col = association.first_reference_column.name
+                record_col = association.second_reference_column.name
+                rows = assoc_rows.setdefault(association.name,
+                                             (association, []))[1]
+                rows.extend(
+                    {lk_col: lk_id, record_col: record_id}
+                    for lk_id in lk_ids
+                )
+
+        if len(assoc_rows) == 0:
+            return
+
+        try:
+            for association, rows in assoc_rows.itervalues():
+                assoc_table = self._association_table(association)
+                self._dbSession.execute(assoc_table.insert(), rows)
+
+            if commit:
+                self._dbSession.commit()
+
+        except:
+            self._dbSession.rollback()
+            raise
+
     def auto_fix_geom_type(self, geom, source_geom_type, destination_geom_type):
         """
         Converts single geometry type to multi type if the destination is multi type.
@@ -304,28 +614,28 @@ class OGRReader(object):
         :type source_geom_type: String
         :param destination_geom_type: Destination geometry type
         :type destination_geom_type: String
-        :return: WkB geometry and the output layer geometry type.
+        :return: OGR geometry and the output layer geometry type.
         :rtype: Tuple
         """
         # Convert polygon to multipolygon if the destination table is multi-polygon.
         if source_geom_type.lower() == 'polygon' and \
                         destination_geom_type.lower() == 'multipolygon':
-            geom_wkb, geom_type = self.to_ogr_multi_type(geom,
-                                                            ogr.wkbMultiPolygon)
+            out_geom, geom_type = self.to_ogr_multi_type(geom,
+                                                         ogr.wkbMultiPolygon)
 
         elif source_geom_type.lower() == 'linestring' and \
                         destination_geom_type.lower() == 'multilinestring':
-            geom_wkb, geom_type = self.to_ogr_multi_type(geom,
-                                                            ogr.wkbMultiLineString)
+            out_geom, geom_type = self.to_ogr_multi_type(geom,
+                                                         ogr.wkbMultiLineString)
 
         elif source_geom_type.lower() == 'point' and \
                         destination_geom_type.lower() == 'multipoint':
-            geom_wkb, geom_type = self.to_ogr_multi_type(geom, ogr.wkbMultiPoint)
+            out_geom, geom_type = self.to_ogr_multi_type(geom, ogr.wkbMultiPoint)
         else:
-            geom_wkb = geom.ExportToWkt()
+            out_geom = geom
             geom_type = geom.GetGeometryName()
 
-        return geom_wkb, geom_type
+        return out_geom, geom_type
 
     def to_ogr_multi_type(self, geom, ogr_type):
         """
@@ -334,26 +644,103 @@ class OGRReader(object):
         :type geom: OGRGeometry
         :param ogr_type: The ogr geometry type
         :type ogr_type: String
-        :return: WkB geometry and the output layer geometry type.
+        :return: OGR multi-type geometry and the output layer geometry type.
         :rtype: Tuple
         """
         multi_geom = ogr.Geometry(ogr_type)
         multi_geom.AddGeometry(geom)
-        geom_wkb = multi_geom.ExportToWkt()
         geom_type = multi_geom.GetGeometryName()
-        return geom_wkb, geom_type
+        return multi_geom, geom_type
+
+    def _coordinate_transformation(self, target_srid):
+        """
+        Creates the transformation from the source layer CRS to the CRS of
+        the destination geometry column, so that geometries are reprojected
+        on the client instead of the database.
+        :param target_srid: SRID of the destination geometry column.
+        :type target_srid: int
+        :return: Coordinate transformation object or None if the source layer
+        has no CRS or it is the same as the target CRS.
+        :rtype: osr.CoordinateTransformation
+        """
+        source_srs = self.getLayer().GetSpatialRef()
+        if source_srs is None:
+            return None
+
+        target_srs = osr.SpatialReference()
+        target_srs.ImportFromEPSG(int(target_srid))
+
+        # Keep x/y (lon/lat) order regardless of the GDAL version
+        for srs in (source_srs, target_srs):
+            if hasattr(srs, 'SetAxisMappingStrategy'):
+                srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+
+        if source_srs.IsSame(target_srs):
+            return None
+
+        return osr.CoordinateTransformation(source_srs, target_srs)
+
+    def validate(self, targettable, columnmatch, geomColumn=None,
+                 translator_manager=None):
+        """
+        Checks the source data against the destination table configuration
+        without writing any data to the database.
+        :param targettable: Destination table name
+        :param columnmatch: Dictionary containing source columns as keys and target columns as the values.
+        :param geomColumn: Destination geometry column, None for textual data.
+        :param translator_manager: Instance of 'stdm.data.importexport.ValueTranslatorManager'
+        containing value translators defined for the destination table columns.
+        :type translator_manager: ValueTranslatorManager
+        :return: Report containing the issues found in each column.
+        :rtype: ImportValidationReport
+        """
+        validator = ImportValidator(
+            self,
+            self._data_source_entity(targettable),
+            columnmatch,
+            geomColumn,
+            translator_manager
+        )
+
+        return validator.run()
 
     def featToDb(self, targettable, columnmatch, append, parentdialog,
-                 geomColumn=None, geomCode=-1, translator_manager=None):
+                 geomColumn=None, geomCode=-1, translator_manager=None,
+                 progress_callback=None, transform_crs=False,
+                 batch_size=DEFAULT_BATCH_SIZE,
+                 document_workers=DEFAULT_DOCUMENT_WORKERS,
+                 document_repository=None):
         """
         Performs the data import from the source layer to the STDM database.
         :param targettable: Destination table name
         :param columnmatch: Dictionary containing source columns as keys and target columns as the values.
         :param append: True to append, false to overwrite by deleting previous records
-        :param parentdialog: A reference to the calling dialog.
+        :param parentdialog: A reference to the calling dialog. If None, no
+        progress dialog will be shown, which is the case for headless imports.
         :param translator_manager: Instance of 'stdm.data.importexport.ValueTranslatorManager'
         containing value translators defined for the destination table columns.
         :type translator_manager: ValueTranslatorManager
+        :param progress_callback: Callable which is passed the number of
+        features imported so far and the total number of features. The import
+        is cancelled if the callable returns False.
+        :type progress_callback: callable
+        :param transform_crs: True to reproject the source geometries to the
+        CRS of the destination geometry column.
+        :type transform_crs: bool
+        :param batch_size: Maximum number of rows written in a single
+        multi-row insert statement. Rows with multiple select values or
+        supporting documents are inserted individually.
+        :type batch_size: int
+        :param document_workers: Number of threads copying supporting
+        documents to the repository while the import runs. The documents are
+        linked to the imported records at the end of the import. If 0, each
+        document is uploaded through the source document manager.
+        :type document_workers: int
+        :param document_repository: Root directory of the document
+        repository. The path in the registry is used if not specified.
+        :type document_repository: str
+        :return: Number of features imported.
+        :rtype: int
         """
         # Check current profile
         if self._current_profile is None:
@@ -380,143 +767,308 @@ class OGRReader(object):
 
         # Configure progress dialog
         init_val = 0
-        progress = QProgressDialog("", "&Cancel", init_val, numFeat,
-                                   parentdialog)
-        progress.setWindowModality(Qt.WindowModal)
+        progress = None
+        if parentdialog is not None:
+            progress = QProgressDialog("", "&Cancel", init_val, numFeat,
+                                       parentdialog)
+            progress.setWindowModality(Qt.WindowModal)
         lblMsgTemp = "Importing {0} of {1} to STDM..."
 
         # Set entity for use in translators
         destination_entity = self._data_source_entity(targettable)
 
-        for feat in lyr:
-            column_value_mapping = {}
-            column_count = 0
-            progress.setValue(init_val)
-            progressMsg = lblMsgTemp.format((init_val + 1), numFeat)
-            progress.setLabelText(progressMsg)
-
-            if progress.wasCanceled():
-                break
-
-            # Reset source document manager for new records
-            if destination_entity.supports_documents:
-                if not self._source_doc_manager is None:
-                    self._source_doc_manager.reset()
-
-            for f in range(feat_defn.GetFieldCount()):
-                field_defn = feat_defn.GetFieldDefn(f)
-                field_name = field_defn.GetNameRef()
-
-                # Append value only if it has been defined by the user
-                if field_name in columnmatch:
-                    dest_column = columnmatch[field_name]
-
-                    field_value = feat.GetField(f)
-
-                    # Create mapped class only once
-                    if self._mapped_cls is None:
-                        mapped_cls, mapped_doc_cls = self._get_mapped_class(
-                            targettable)
-
-                        if mapped_cls is None:
-                            msg = QApplication.translate(
-                                "OGRReader",
-                                "Something happened that caused the "
-                                "database table not to be mapped to the "
-                                "corresponding model class. Please contact"
-                                " your system administrator."
-                            )
+        # Models are only mapped once, see below
+        if self._mapped_cls is not None:
+            self._init_document_handler(destination_entity,
+                                        document_workers,
+                                        document_repository,
+                                        translator_manager,
+                                        columnmatch)
 
-                            raise RuntimeError(msg)
-
-                        self._mapped_cls = mapped_cls
-                        self._mapped_doc_cls = mapped_doc_cls
+        try:
+            for feat in lyr:
+                column_value_mapping = {}
+                # Association entities and lookup ids of multiple select
+                # columns
+                associations = []
+                column_count = 0
+
+                if progress is not None:
+                    progress.setValue(init_val)
+                    progressMsg = lblMsgTemp.format((init_val + 1), numFeat)
+                    progress.setLabelText(progressMsg)
+
+                    if progress.wasCanceled():
+                        break
+
+                if progress_callback is not None:
+                    if progress_callback(init_val, numFeat) is False:
+                        break
+
+                # Reset source document manager for new records
+                if destination_entity.supports_documents:
+                    if not self._source_doc_manager is None:
+                        self._source_doc_manager.reset()
+
+                for f in range(feat_defn.GetFieldCount()):
+                    field_defn = feat_defn.GetFieldDefn(f)
+                    field_name = field_defn.GetNameRef()
+
+                    # Append value only if it has been defined by the user
+                    if field_name in columnmatch:
+                        dest_column = columnmatch[field_name]
+
+                        field_value = feat.GetField(f)
+
+                        # Create mapped class only once
+                        if self._mapped_cls is None:
+                            mapped_cls, mapped_doc_cls = self._get_mapped_class(
+                                targettable)
+
+                            if mapped_cls is None:
+                                msg = QApplication.translate(
+                                    "OGRReader",
+                                    "Something happened that caused the "
+                                    "database table not to be mapped to the "
+                                    "corresponding model class. Please contact"
+                                    " your system administrator."
+                                )
+
+                                raise RuntimeError(msg)
+
+                            self._mapped_cls = mapped_cls
+                            self._mapped_doc_cls = mapped_doc_cls
+
+                            # Create source document manager if the entity supports them
+                            self._init_document_handler(
+                                destination_entity,
+                                document_workers,
+                                document_repository,
+                                translator_manager,
+                                columnmatch
+                            )
 
-                        # Create source document manager if the entity supports them
-                        if destination_entity.supports_documents:
-                            self._source_doc_manager = SourceDocumentManager(
-                                destination_entity.supporting_doc,
-                                self._mapped_doc_cls
+                            if geomColumn is not None:
+                                # Use geometry column SRID in the target table
+                                self._geomType, self._targetGeomColSRID = \
+                                    geometryType(targettable, geomColumn)
+
+                                if transform_crs:
+                                    self._coord_transform = \
+                                        self._coordinate_transformation(
+                                            self._targetGeomColSRID
+                                        )
+
+                        '''
+                        Check if there is a value translator defined for the
+                        specified destination column.
+                        '''
+                        value_translator = translator_manager.translator(
+                            dest_column)
+
+                        if value_translator is not None:
+                            # Set destination table entity
+                            value_translator.entity = destination_entity
+
+                            source_col_names = value_translator.source_column_names()
+                            field_value_mappings = self._map_column_values(
+                                feat,
+                                feat_defn,
+                                source_col_names
+                            )
+                            # Set source document manager if required
+                            if value_translator.requires_source_document_manager:
+                                value_translator.source_document_manager = self._source_doc_manager
+                                value_translator.document_ingestor = \
+                                    self._document_ingestor
+
+                            field_value = value_translator.referencing_column_value(
+                                field_value_mappings
                             )
 
-                        if geomColumn is not None:
-                            # Use geometry column SRID in the target table
-                            self._geomType, self._targetGeomColSRID = \
-                                geometryType(targettable, geomColumn)
-
-                    '''
-                    Check if there is a value translator defined for the
-                    specified destination column.
-                    '''
-                    value_translator = translator_manager.translator(
-                        dest_column)
-
-                    if value_translator is not None:
-                        # Set destination table entity
-                        value_translator.entity = destination_entity
-
-                        source_col_names = value_translator.source_column_names()
-                        field_value_mappings = self._map_column_values(
-                            feat,
-                            feat_defn,
-                            source_col_names
+                        if not isinstance(field_value, IgnoreType):
+                            # Check column type and rename if multiple select for
+                            # SQLAlchemy compatibility
+                            col_obj = destination_entity.column(dest_column)
+                            if col_obj.TYPE_INFO == 'MULTIPLE_SELECT':
+                                # Lookup ids are written to the association
+                                # table after the record has been inserted.
+                                if isinstance(field_value, list):
+                                    if len(field_value) > 0:
+                                        associations.append(
+                                            (col_obj.association, field_value)
+                                        )
+                                    column_count += 1
+
+                                    continue
+
+                                lk_name = col_obj.value_list.name
+                                dest_column = u'{0}_collection'.format(lk_name)
+
+                            column_value_mapping[dest_column] = field_value
+
+                        # Set supporting documents
+                        if self._source_doc_manager is not None:
+                            column_value_mapping['documents'] = \
+                                self._source_doc_manager.model_objects()
+
+                        column_count += 1
+
+                # Only insert geometry if it has been defined by the user
+                if geomColumn is not None:
+                    geom = feat.GetGeometryRef()
+                    if geom is not None:
+                        # Check if the geometry types match
+                        layerGeomType = geom.GetGeometryName()
+
+                        # Convert polygon to multipolygon if the destination table is multi-polygon.
+                        out_geom, geom_type = self.auto_fix_geom_type(
+                            geom, layerGeomType, self._geomType)
+
+                        if self._coord_transform is not None:
+                            out_geom = out_geom.Clone()
+                            out_geom.Transform(self._coord_transform)
+
+                        # Bind as binary EWKB instead of text for PostGIS to parse
+                        column_value_mapping[geomColumn] = buffer(
+                            to_ewkb(out_geom, self._targetGeomColSRID)
                         )
-                        # Set source document manager if required
-                        if value_translator.requires_source_document_manager:
-                            value_translator.source_document_manager = self._source_doc_manager
 
-                        field_value = value_translator.referencing_column_value(
-                            field_value_mappings
-                        )
+                        if geom_type.lower() != self._geomType.lower():
+                            raise TypeError(
+                                "The geometries of the source and destination columns do not match.\n" \
+                                "Source Geometry Type: {0}, Destination Geometry Type: {1}".format(
+                                    geom_type,
+                                    self._geomType))
 
-                    if not isinstance(field_value, IgnoreType):
-                        # Check column type and rename if multiple select for
-                        # SQLAlchemy compatibility
-                        col_obj = destination_entity.column(dest_column)
-                        if col_obj.TYPE_INFO == 'MULTIPLE_SELECT':
-                            lk_name = col_obj.value_list.name
-                            dest_column = u'{0}_collection'.format(lk_name)
-
-                        column_value_mapping[dest_column] = field_value
-
-                    # Set supporting documents
-                    if destination_entity.supports_documents:
-                        column_value_mapping['documents'] = \
-                            self._source_doc_manager.model_objects()
-
-                    column_count += 1
-
-            # Only insert geometry if it has been defined by the user
-            if geomColumn is not None:
-                geom = feat.GetGeometryRef()
-                if geom is not None:
-                    # Check if the geometry types match
-                    layerGeomType = geom.GetGeometryName()
-
-                    # Convert polygon to multipolygon if the destination table is multi-polygon.
-                    geom_wkb, geom_type = self.auto_fix_geom_type(
-                        geom, layerGeomType, self._geomType)
-                    column_value_mapping[geomColumn] = "SRID={0!s};{1}".format(
-                        self._targetGeomColSRID, geom_wkb)
-
-                    if geom_type.lower() != self._geomType.lower():
-                        raise TypeError(
-                            "The geometries of the source and destination columns do not match.\n" \
-                            "Source Geometry Type: {0}, Destination Geometry Type: {1}".format(
-                                geom_type,
-                                self._geomType))
+                # Insert the record
+                if self._document_ingestor is not None and \
+                        self._document_ingestor.has_pending():
+                    # The primary key is required for linking the documents
+                    self._flush_rows(geomColumn)
+                    record_id = self._insertRow(
+                        targettable, column_value_mapping, geomColumn
+                    )
+                    # The record is committed, link its documents even if
+                    # writing the associations fails
+                    self._document_ingestor.assign(record_id)
+                    self._write_associations([record_id], [associations])
+
+                else:
+                    self._queue_row(targettable, column_value_mapping,
+                                    geomColumn, batch_size, associations,
+                                    init_val + 1)
+
+                init_val += 1
+
+        except:
+            exc_type, exc_value, exc_tb = sys.exc_info()
 
             try:
-                # Insert the record
-                self._insertRow(targettable, column_value_mapping)
+                # The rows of the features preceding the failing one are
+                # imported, a failure writing them is reported instead
+                if not isinstance(exc_value, FeatureImportException):
+                    self._flush_rows(geomColumn)
+
+            finally:
+                self._pending_rows = []
+                self._link_committed_documents(batch_size)
+                self._stop_document_ingestor()
+                if progress is not None:
+                    progress.close()
+
+                # Rows of the preceding features have been committed
+                notify_table_changes(set([targettable]))
+
+            # The row of the current feature could not be inserted
+            if isinstance(exc_value, SQLAlchemyError):
+                raise self._feature_error(init_val + 1, exc_value), \
+                    None, exc_tb
+
+            raise exc_type, exc_value, exc_tb
+
+        try:
+            self._flush_rows(geomColumn)
+
+            if self._document_ingestor is not None:
+                if progress is not None:
+                    progress.setLabelText(QApplication.translate(
+                        'OGRReader',
+                        'Linking supporting documents...'
+                    ))
+
+                self._document_ingestor.finish(batch_size)
+                self._document_ingestor = None
+
+        finally:
+            self._pending_rows = []
+            self._stop_document_ingestor()
+            if progress is not None:
+                progress.setValue(numFeat)
+
+            # Rows are inserted without the Model methods
+            notify_table_changes(set([targettable]))
+
+        if progress_callback is not None:
+            progress_callback(init_val, numFeat)
+
+        return init_val
+
+    def _init_document_handler(self, entity, document_workers,
+                               document_repository, translator_manager,
+                               columnmatch):
+        # Creates the ingestor or source document manager for uploading the
+        # supporting documents of the destination entity. The ingestor,
+        # which requires the document repository, is only created if the
+        # documents are imported.
+        if not entity.supports_documents:
+            return
+
+        imports_documents = any(
+            isinstance(
+                translator_manager.translator(dest_col),
+                SourceDocumentTranslator
+            )
+            for dest_col in columnmatch.values()
+        )
+
+        if document_workers > 0 and imports_documents:
+            if document_repository is None:
+                document_repository = network_document_path()
+
+            self._document_ingestor = DocumentIngestor(
+                entity,
+                self._mapped_doc_cls,
+                document_repository,
+                document_workers
+            )
 
-            except:
-                progress.close()
-                raise
+        elif self._source_doc_manager is None:
+            self._source_doc_manager = SourceDocumentManager(
+                entity.supporting_doc,
+                self._mapped_doc_cls
+            )
 
-            init_val += 1
+    def _link_committed_documents(self, batch_size):
+        # Writes the document rows of the records committed before the
+        # import failed, the remaining copies are deleted when the ingestor
+        # is stopped.
+        if self._document_ingestor is None:
+            return
+
+        try:
+            self._document_ingestor.finish(batch_size)
+        except Exception as ex:
+            LOGGER.debug(
+                'Documents of the imported records could not be linked: %s',
+                ex
+            )
 
-        progress.setValue(numFeat)
+    def _stop_document_ingestor(self):
+        # Stops copying documents after a failed import
+        if self._document_ingestor is not None:
+            self._document_ingestor.terminate()
+            self._document_ingestor = None
 
     def _enumeration_column_type(self, column_name, value):
         """
@@ -0,0 +1,589 @@
+"""
+/***************************************************************************
+Name                 : Import Validator
+Description          : Scans an OGR data source before an import and checks
+                       the mapped columns against the entity configuration
+                       using vectorized operations.
+Date                 : 19/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+from collections import OrderedDict
+from datetime import datetime
+import time
+
+# The module is imported by the reader, NumPy is only required when the
+# validation is run
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from PyQt4.QtGui import QApplication
+from PyQt4.QtCore import QFile
+
+try:
+    from osgeo import ogr
+except:
+    import ogr
+
+from stdm.data.pg_utils import (
+    export_data,
+    geometryType,
+    matching_column_values
+)
+from stdm.data.importexport.value_translators import (
+    LookupValueTranslator,
+    MultipleEnumerationTranslator,
+    RelatedTableTranslator,
+    SourceDocumentTranslator,
+    ValueTranslatorManager
+)
+
+__all__ = ["ColumnValidationResult", "ImportValidationReport",
+           "ImportValidator"]
+
+# Values that the reader treats as NULL
+_NULL_VALUES = [u'', u'null']
+
+_YES_NO_VALUES = [u'yes', u'no', u'true', u'false']
+
+_DATE_FORMATS = ['%Y-%m-%d', '%Y/%m/%d', '%d-%m-%Y', '%d/%m/%Y']
+
+_DATETIME_FORMATS = ['%Y-%m-%d %H:%M:%S', '%Y/%m/%d %H:%M:%S',
+                     '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M']
+
+_INT_TYPES = ['INT', 'SERIAL']
+
+_FLOAT_TYPES = ['DOUBLE', 'PERCENT']
+
+_FK_TYPES = ['LOOKUP', 'ADMIN_SPATIAL_UNIT', 'FOREIGN_KEY']
+
+_OGR_NUMERIC_TYPES = [ogr.OFTInteger, ogr.OFTReal]
+
+
+def tr(text):
+    """
+    Alias for translating validation messages in the same context.
+    """
+    return QApplication.translate('ImportValidator', text)
+
+
+def _is_int(value):
+    try:
+        int(value)
+
+        return True
+
+    except ValueError:
+        return False
+
+
+def _is_float(value):
+    try:
+        float(value.replace(u'%', u''))
+
+        return True
+
+    except ValueError:
+        return False
+
+
+def _parses_as(value, formats):
+    for f in formats:
+        try:
+            datetime.strptime(value, f)
+
+            return True
+
+        except ValueError:
+            continue
+
+    return False
+
+
+def _is_date(value):
+    return _parses_as(value, _DATE_FORMATS + _DATETIME_FORMATS)
+
+
+def _is_datetime(value):
+    return _parses_as(value, _DATETIME_FORMATS + _DATE_FORMATS)
+
+
+def failed_mask(values, predicate):
+    """
+    Applies a predicate to each distinct value in the array and broadcasts
+    the result back to all the rows. Source columns typically contain few
+    distinct values so the predicate is evaluated far fewer times than the
+    number of features.
+    :param values: Array of unicode values.
+    :type values: numpy.ndarray
+    :param predicate: Callable that returns True if a value is valid.
+    :type predicate: callable
+    :return: Boolean array which is True for rows that fail the predicate.
+    :rtype: numpy.ndarray
+    """
+    if len(values) == 0:
+        return np.zeros(0, dtype=bool)
+
+    uniq, inverse = np.unique(values, return_inverse=True)
+    uniq_failed = np.fromiter(
+        (not predicate(u) for u in uniq),
+        dtype=bool,
+        count=len(uniq)
+    )
+
+    return uniq_failed[inverse]
+
+
+class ColumnValidationResult(object):
+    """
+    Container for the validation issues of a single destination column.
+    """
+    def __init__(self, column):
+        self.column = column
+        # Message: (number of failed rows, sample row numbers)
+        self.issues = OrderedDict()
+
+    def add_issue(self, message, mask, max_samples=5):
+        """
+        Records an issue for the rows flagged in the mask.
+        :param message: Description of the issue.
+        :type message: str
+        :param mask: Boolean array of failed rows.
+        :type mask: numpy.ndarray
+        :param max_samples: Maximum number of sample row numbers to keep.
+        :type max_samples: int
+        """
+        num_failed = int(np.count_nonzero(mask))
+        if num_failed == 0:
+            return
+
+        # Row numbers are 1-based to match what users see in the source
+        samples = (np.flatnonzero(mask)[:max_samples] + 1).tolist()
+        self.issues[message] = (num_failed, samples)
+
+    def is_valid(self):
+        """
+        :return: True if no issues were found for the column.
+        :rtype: bool
+        """
+        return len(self.issues) == 0
+
+
+class ImportValidationReport(object):
+    """
+    Summary of the validation issues found in the source data.
+    """
+    def __init__(self, num_features):
+        self.num_features = num_features
+        self.columns = OrderedDict()
+        self.elapsed = 0.0
+
+    def column_result(self, column):
+        """
+        :param column: Name of the destination column.
+        :type column: str
+        :return: Returns the result object for the given column, a new one
+        is created if it does not exist.
+        :rtype: ColumnValidationResult
+        """
+        if not column in self.columns:
+            self.columns[column] = ColumnValidationResult(column)
+
+        return self.columns[column]
+
+    def has_errors(self):
+        """
+        :return: True if any of the columns has at least one issue.
+        :rtype: bool
+        """
+        return any(not c.is_valid() for c in self.columns.values())
+
+    def summary(self):
+        """
+        :return: Returns a user-friendly text of the issues found per column.
+        :rtype: str
+        """
+        lines = []
+        for col, result in self.columns.iteritems():
+            for msg, info in result.issues.iteritems():
+                num_failed, samples = info
+                lines.append(
+                    u'{0}: {1} - {2:d} row(s), e.g. {3}'.format(
+                        col,
+                        msg,
+                        num_failed,
+                        u', '.join([unicode(s) for s in samples])
+                    )
+                )
+
+        return u'\n'.join(lines)
+
+
+class ImportValidator(object):
+    """
+    Scans the first layer of an OGR data source once and checks all mapped
+    columns against the destination entity configuration before any data
+    is written. Values of each column are held in NumPy arrays so that
+    null, type, length and membership checks run on whole columns at once,
+    NumPy is therefore required to run the validation.
+    """
+    def __init__(self, reader, entity, column_match, geom_column=None,
+                 translator_manager=None, max_samples=5):
+        """
+        :param reader: Reader for the source data.
+        :type reader: stdm.data.importexport.OGRReader
+        :param entity: Destination entity.
+        :type entity: Entity
+        :param column_match: Source column names and corresponding
+        destination column names.
+        :type column_match: dict
+        :param geom_column: Destination geometry column, None for textual
+        imports.
+        :type geom_column: str
+        :param translator_manager: Value translators defined for the
+        destination columns.
+        :type translator_manager: ValueTranslatorManager
+        :param max_samples: Maximum number of sample row numbers to report
+        per issue.
+        :type max_samples: int
+        """
+        self._reader = reader
+        self._entity = entity
+        self._target_table = entity.name
+        self._column_match = column_match
+        self._geom_column = geom_column
+        self._max_samples = max_samples
+
+        if translator_manager is None:
+            translator_manager = ValueTranslatorManager()
+
+        self._translator_manager = translator_manager
+
+    def _required_source_columns(self):
+        # Mapped source columns plus those used by the value translators
+        src_cols = list(self._column_match.keys())
+
+        for dest_col in self._column_match.values():
+            translator = self._translator_manager.translator(dest_col)
+            if translator is None:
+                continue
+
+            for c in translator.source_column_names():
+                if not c in src_cols:
+                    src_cols.append(c)
+
+        return src_cols
+
+    def _read_source(self):
+        """
+        Reads the values of the required source columns and the geometry
+        type names in a single pass over the layer.
+        :return: Number of features, source column arrays and geometry type
+        array.
+        :rtype: tuple
+        """
+        lyr = self._reader.getLayer()
+        lyr.ResetReading()
+        feat_defn = lyr.GetLayerDefn()
+
+        src_cols = self._required_source_columns()
+        field_idxs = OrderedDict()
+        numeric_fields = []
+
+        for f in range(feat_defn.GetFieldCount()):
+            field_defn = feat_defn.GetFieldDefn(f)
+            field_name = field_defn.GetNameRef()
+
+            if field_name in src_cols:
+                field_idxs[field_name] = f
+                if field_defn.GetType() in _OGR_NUMERIC_TYPES:
+                    numeric_fields.append(field_name)
+
+        raw_values = dict((c, []) for c in field_idxs)
+        geom_types = []
+        num_features = 0
+
+        for feat in lyr:
+            num_features += 1
+            for name, idx in field_idxs.iteritems():
+                raw_values[name].append(feat.GetField(idx))
+
+            if self._geom_column is not None:
+                geom = feat.GetGeometryRef()
+                if geom is None:
+                    geom_types.append(u'')
+                else:
+                    geom_types.append(geom.GetGeometryName())
+
+        lyr.ResetReading()
+
+        col_arrays = {}
+        for name, values in raw_values.iteritems():
+            col_arrays[name] = self._to_unicode_array(
+                values,
+                name in numeric_fields
+            )
+
+        return num_features, col_arrays, np.array(geom_types, dtype=unicode)
+
+    def _to_unicode_array(self, values, numeric):
+        # Normalize values to a stripped unicode array, NULL becomes empty
+        if numeric:
+            norm = [u'' if v is None else
+                    (u'{0:d}'.format(int(v)) if float(v).is_integer()
+                     else unicode(v)) for v in values]
+
+        else:
+            norm = [u'' if v is None else unicode(v) for v in values]
+
+        return np.char.strip(np.array(norm, dtype=unicode))
+
+    def run(self):
+        """
+        Executes the validation checks.
+        :return: Report of the issues found per destination column.
+        :rtype: ImportValidationReport
+        """
+        if np is None:
+            raise ImportError(
+                tr('NumPy is required to validate the source data.')
+            )
+
+        start = time.time()
+
+        num_features, col_arrays, geom_types = self._read_source()
+        report = ImportValidationReport(num_features)
+
+        for src_col, dest_col in self._column_match.iteritems():
+            result = report.column_result(dest_col)
+            translator = self._translator_manager.translator(dest_col)
+            column = self._entity.column(dest_col)
+
+            if translator is not None:
+                self._check_translator(translator, col_arrays, result)
+
+            elif src_col in col_arrays and column is not None:
+                self._check_column(column, col_arrays[src_col], result)
+
+        if self._geom_column is not None:
+            self._check_geometry(
+                geom_types,
+                report.column_result(self._geom_column)
+            )
+
+        report.elapsed = time.time() - start
+
+        return report
+
+    def _add_issue(self, result, message, mask):
+        result.add_issue(message, mask, self._max_samples)
+
+    def _null_mask(self, values):
+        return np.in1d(np.char.lower(values), _NULL_VALUES)
+
+    def _check_column(self, column, values, result):
+        """
+        Checks the values of a column that has no value translator.
+        """
+        null_mask = self._null_mask(values)
+        type_info = column.TYPE_INFO
+
+        if column.mandatory:
+            self._add_issue(result, tr('Missing mandatory value'), null_mask)
+
+        not_null = ~null_mask
+
+        if type_info in _INT_TYPES:
+            failed = failed_mask(values, _is_int) & not_null
+            self._add_issue(result, tr('Not a whole number'), failed)
+
+        elif type_info in _FLOAT_TYPES:
+            failed = failed_mask(values, _is_float) & not_null
+            self._add_issue(result, tr('Not a decimal number'), failed)
+
+        elif type_info == 'DATE':
+            failed = failed_mask(values, _is_date) & not_null
+            self._add_issue(result, tr('Unrecognized date'), failed)
+
+        elif type_info == 'DATETIME':
+            failed = failed_mask(values, _is_datetime) & not_null
+            self._add_issue(result, tr('Unrecognized date and time'), failed)
+
+        elif type_info == 'BOOL':
+            failed = ~np.in1d(np.char.lower(values), _YES_NO_VALUES) & \
+                     not_null
+            self._add_issue(result, tr('Not a Yes/No value'), failed)
+
+        elif type_info in _FK_TYPES:
+            int_failed = failed_mask(values, _is_int) & not_null
+            self._add_issue(result, tr('Not a valid record id'), int_failed)
+
+            # Zero is treated as NULL by the reader
+            candidates = not_null & ~int_failed & (values != u'0')
+            parent = column.entity_relation.parent
+            if parent is not None and np.any(candidates):
+                self._check_membership(
+                    result,
+                    values,
+                    candidates,
+                    parent.name,
+                    'id',
+                    tr('Record id not found in {0}').format(parent.name)
+                )
+
+        if hasattr(column, 'maximum') and type_info in ['VARCHAR', 'TEXT']:
+            too_long = np.char.str_len(values) > column.maximum
+            self._add_issue(
+                result,
+                tr('Exceeds maximum length of {0}').format(column.maximum),
+                too_long
+            )
+
+    def _check_membership(self, result, values, mask, table, column,
+                          message):
+        # Query only the distinct candidate values in one round trip
+        uniq = np.unique(values[mask])
+        existing = matching_column_values(table, column, uniq.tolist())
+        failed = ~np.in1d(values, list(existing)) & mask
+
+        self._add_issue(result, message, failed)
+
+    def _lookup_values(self, table_name):
+        # Lowercase lookup values in the given value list table
+        return [unicode(r['value']).lower() for r in export_data(table_name)
+                if r['value'] is not None]
+
+    def _check_translator(self, translator, col_arrays, result):
+        """
+        Checks the source values that will be resolved by a value
+        translator, each of its source columns is checked.
+        """
+        src_cols = list(translator.source_column_names())
+        multiple = len(src_cols) > 1
+
+        for src_col in src_cols:
+            if not src_col in col_arrays:
+                continue
+
+            self._check_translator_column(
+                translator, src_col, col_arrays[src_col], result, multiple
+            )
+
+    def _check_translator_column(self, translator, src_col, values, result,
+                                 multiple=False):
+        """
+        Checks the values of one source column of a value translator. The
+        name of the source column is added to the messages if the
+        translator has several source columns.
+        """
+        not_null = ~self._null_mask(values)
+
+        def column_message(message):
+            if multiple:
+                return u'{0} ({1})'.format(message, src_col)
+
+            return message
+
+        if isinstance(translator, LookupValueTranslator):
+            if translator.default_value:
+                return
+
+            lk_values = self._lookup_values(translator.referenced_table())
+            failed = ~np.in1d(np.char.lower(values), lk_values) & not_null
+            self._add_issue(
+                result,
+                column_message(tr('Unknown lookup value in {0}').format(
+                    translator.referenced_table()
+                )),
+                failed
+            )
+
+        elif isinstance(translator, MultipleEnumerationTranslator):
+            column = self._entity.column(translator.referencing_column())
+            if column is None or column.TYPE_INFO != 'MULTIPLE_SELECT':
+                return
+
+            # Values and codes accepted by the translator
+            lk_values = translator.lookup_ids(column.value_list)
+            sep = translator.separator() or u' '
+
+            def all_known(v):
+                tokens = [t.strip().lower() for t in v.split(sep)]
+                return all(t in lk_values for t in tokens if t)
+
+            failed = failed_mask(values, all_known) & not_null
+            self._add_issue(
+                result,
+                column_message(tr('Unknown lookup value in {0}').format(
+                    column.value_list.name
+                )),
+                failed
+            )
+
+        elif isinstance(translator, SourceDocumentTranslator):
+            src_dir = translator.source_directory
+
+            def docs_exist(v):
+                docs = [d.replace('\\', '/').strip() for d in v.split(';')]
+                return all(
+                    QFile.exists(u'{0}/{1}'.format(src_dir, d))
+                    for d in docs if d
+                )
+
+            failed = failed_mask(values, docs_exist) & not_null
+            self._add_issue(
+                result,
+                column_message(tr('Supporting document not found')),
+                failed
+            )
+
+        elif isinstance(translator, RelatedTableTranslator):
+            # Each value has to exist in its referenced column, whether the
+            # values of several columns match the same record is not checked
+            ref_col = translator.input_referenced_columns().get(src_col)
+            if ref_col is None:
+                return
+
+            self._check_membership(
+                result,
+                values,
+                not_null,
+                translator.referenced_table(),
+                ref_col,
+                column_message(tr('No matching record in {0}').format(
+                    translator.referenced_table()
+                ))
+            )
+
+    def _check_geometry(self, geom_types, result):
+        """
+        Checks that the source geometries can be written to the destination
+        geometry column. Single geometries are accepted for multi-type
+        columns since the reader converts them.
+        """
+        dest_type, srid = geometryType(self._target_table, self._geom_column)
+        dest_type = dest_type.upper()
+
+        src_types = np.char.upper(geom_types)
+        has_geom = src_types != u''
+        compatible = (src_types == dest_type) | \
+                     (np.char.add(u'MULTI', src_types) == dest_type)
+
+        self._add_issue(
+            result,
+            tr('Geometry type does not match {0}').format(dest_type),
+            has_geom & ~compatible
+        )
@@ -47,12 +47,11 @@ from stdm.data.pg_utils import table_column_names
 from stdm.utils.util import (
     getIndex
 )
-from stdm.data.configuration import entity_model
 
 from .exceptions import TranslatorException
 
 __all__ = ["SourceValueTranslator", "ValueTranslatorManager",
-           "RelatedTableTranslator", "IgnoreType"]
+           "RelatedTableTranslator", "IgnoreType", "translator_from_dict"]
 
 class IgnoreType(object):
     """
@@ -226,6 +225,45 @@ class SourceValueTranslator(object):
         """
         return False
 
+    def to_dict(self):
+        """
+        :return: Returns the translator settings in a JSON-serializable
+        structure which can be used to recreate the translator using
+        'translator_from_dict'.
+        :rtype: dict
+        """
+        return {
+            'type': self.__class__.__name__,
+            'name': self._name,
+            'referencing_table': self._referencing_table,
+            'referencing_column': self._referencing_column,
+            'referenced_table': self._referenced_table,
+            'output_referenced_column': self._output_referenced_column,
+            'input_referenced_columns': [
+                [src, ref] for src, ref in
+                self._input_referenced_columns.iteritems()
+            ]
+        }
+
+    def from_dict(self, config):
+        """
+        Sets the translator settings from a structure created by 'to_dict'.
+        Subclasses should call this method before reading their own settings.
+        :param config: Translator settings.
+        :type config: dict
+        """
+        self._name = config.get('name', '')
+        self._referencing_table = config.get('referencing_table', '')
+        self._referencing_column = config.get('referencing_column', '')
+        self._referenced_table = config.get('referenced_table', '')
+        self._output_referenced_column = config.get(
+            'output_referenced_column',
+            ''
+        )
+        self._input_referenced_columns = OrderedDict(
+            config.get('input_referenced_columns', [])
+        )
+
     def referencing_column_value(self, field_values):
         """
         Abstract method to be implemented by subclasses.
@@ -367,6 +405,24 @@ class ValueTranslatorManager(object):
         if isinstance(translator, SourceValueTranslator):
             self.remove_translator_by_name(translator.name())
 
+    def translator_configs(self):
+        """
+        :return: Returns the settings of all translators in the collection
+        in a JSON-serializable list.
+        :rtype: list
+        """
+        return [t.to_dict() for t in self._translators.values()]
+
+    def load_translator_configs(self, configs):
+        """
+        Creates translators from a list of settings created by
+        'translator_configs' and adds them to the collection.
+        :param configs: List of translator settings.
+        :type configs: list
+        """
+        for config in configs:
+            self.add_translator(translator_from_dict(config))
+
 
 class RelatedTableTranslator(SourceValueTranslator):
     """
@@ -424,6 +480,16 @@ class LookupValueTranslator(RelatedTableTranslator):
         self.default_value = kwargs.get('default', '')
         self._lk_value_column = 'value'
 
+    def to_dict(self):
+        config = super(LookupValueTranslator, self).to_dict()
+        config['default'] = self.default_value
+
+        return config
+
+    def from_dict(self, config):
+        super(LookupValueTranslator, self).from_dict(config)
+        self.default_value = config.get('default', '')
+
     def referencing_column_value(self, field_values):
         """
         Searches a corresponding record from the linked table using one or more
@@ -485,7 +551,9 @@ class MultipleEnumerationTranslator(SourceValueTranslator):
         SourceValueTranslator.__init__(self)
         self._separator = ""
 
-        # Container for lookup id and corresponding values
+        # Lookup values and codes, in lower case, and the corresponding ids
+        # for each lookup table. Loaded once for the lifetime of the
+        # translator i.e. the import.
         self._lk_up_id_vals = {}
 
     def separator(self):
@@ -507,14 +575,60 @@ class MultipleEnumerationTranslator(SourceValueTranslator):
         else:
             self._separator = " "
 
+    def to_dict(self):
+        config = SourceValueTranslator.to_dict(self)
+        config['separator'] = self._separator
+
+        return config
+
+    def from_dict(self, config):
+        SourceValueTranslator.from_dict(self, config)
+        self.set_separator(config.get('separator', ''))
+
+    def lookup_ids(self, lookup_entity):
+        """
+        Reads all the records in the lookup table, the first time it is
+        called, and maps the case-insensitive values and codes to the
+        corresponding ids.
+        :param lookup_entity: Value list used by the multiple select column.
+        :type lookup_entity: ValueList
+        :return: Lookup values and codes in lower case and their ids.
+        :rtype: dict
+        """
+        lk_name = lookup_entity.name
+        if lk_name in self._lk_up_id_vals:
+            return self._lk_up_id_vals[lk_name]
+
+        lookup_table = self._table(lk_name)
+        lookup_recs = self._db_session.query(
+            lookup_table.c.id,
+            lookup_table.c.value,
+            lookup_table.c.code
+        ).all()
+
+        lk_ids = {}
+        # Codes are added first so that values take precedence
+        for lk_id, value, code in lookup_recs:
+            if code:
+                lk_ids[unicode(code).strip().lower()] = lk_id
+        for lk_id, value, code in lookup_recs:
+            if value:
+                lk_ids[unicode(value).strip().lower()] = lk_id
+
+        self._lk_up_id_vals[lk_name] = lk_ids
+
+        return lk_ids
+
     def referencing_column_value(self, field_values):
         """
-        Gets a list of lookup objects corresponding to the values extracted
-        from the source using the separator.
+        Gets the ids of the lookup values, or codes, extracted from the
+        source using the separator.
         :param field_values: Pair of field names and corresponding values i.e.
         {field1:value1, field2:value2, field3:value3...}
         :type field_values: dict
-        :return: One or more object instances of lookup value objects.
+        :return: Ids of the matching lookup records, without duplicates.
+        The reader writes these to the association table of the multiple
+        select column.
         :rtype: list
         """
         if len(self._input_referenced_columns) == 0:
@@ -543,27 +657,19 @@ class MultipleEnumerationTranslator(SourceValueTranslator):
         if not dest_col_obj:
             return IgnoreType()
 
-        # Get lookup entity and corresponding SQLAlchemy class
-        lk_entity = dest_col_obj.value_list
-        lookup_mapped_cls = entity_model(lk_entity)
+        lk_ids = self.lookup_ids(dest_col_obj.value_list)
 
-        # Lookup objects corresponding to the values in the source string
-        lk_objs = []
+        # Ids corresponding to the separated source values
+        lk_id_vals = []
         lk_vals = delimited_source_value.split(self._separator)
 
-        # Get the lookup objects corresponding to the separated source values
         for kv in lk_vals:
-            kv = kv.strip()
-            if kv:
-                # Get corresponding lookup value object based on a
-                # case-insensitive search
-                lookup_obj = self._db_session.query(lookup_mapped_cls).filter(
-                    func.lower(lookup_mapped_cls.value) == func.lower(kv)
-                ).first()
-                if lookup_obj:
-                    lk_objs.append(lookup_obj)
+            # Case-insensitive match
+            lk_id = lk_ids.get(kv.strip().lower(), None)
+            if lk_id is not None and not lk_id in lk_id_vals:
+                lk_id_vals.append(lk_id)
 
-        return lk_objs
+        return lk_id_vals
 
 
 class SourceDocumentTranslator(SourceValueTranslator):
@@ -586,9 +692,26 @@ class SourceDocumentTranslator(SourceValueTranslator):
         #Document type name
         self.document_type = None
 
+        #If set, documents are copied by the ingestor instead of the manager
+        self.document_ingestor = None
+
     def requires_source_document_manager(self):
         return True
 
+    def to_dict(self):
+        config = SourceValueTranslator.to_dict(self)
+        config['source_directory'] = self.source_directory
+        config['document_type_id'] = self.document_type_id
+        config['document_type'] = self.document_type
+
+        return config
+
+    def from_dict(self, config):
+        SourceValueTranslator.from_dict(self, config)
+        self.source_directory = config.get('source_directory', None)
+        self.document_type_id = config.get('document_type_id', None)
+        self.document_type = config.get('document_type', None)
+
     def _create_uploaded_docs_dir(self):
         #Creates an 'uploaded' directory where uploaded documents are moved to.
         uploaded_dir = QDir(self.source_directory)
@@ -605,7 +728,11 @@ class SourceDocumentTranslator(SourceValueTranslator):
         supporting document uploads.
         :rtype: IgnoreType
         """
-        if self.source_document_manager is None or self.entity is None:
+        if self.entity is None:
+            return IgnoreType
+
+        if self.source_document_manager is None and \
+                self.document_ingestor is None:
             return IgnoreType
 
         if self.document_type_id is None:
@@ -653,14 +780,15 @@ class SourceDocumentTranslator(SourceValueTranslator):
         #Separate files
         docs = doc_file_name.split(';')
 
-        #Create document container
-        doc_container = QVBoxLayout()
+        if self.document_ingestor is None:
+            #Create document container
+            doc_container = QVBoxLayout()
 
-        #Register container
-        self.source_document_manager.registerContainer(
-            doc_container,
-            self.document_type_id
-        )
+            #Register container
+            self.source_document_manager.registerContainer(
+                doc_container,
+                self.document_type_id
+            )
 
         for d in docs:
             if not d:
@@ -682,6 +810,16 @@ class SourceDocumentTranslator(SourceValueTranslator):
 
                 raise IOError(msg)
 
+            if self.document_ingestor is not None:
+                # Copied in the background and linked after the import
+                self.document_ingestor.submit(
+                    abs_doc_path,
+                    self.document_type_id,
+                    self.document_type
+                )
+
+                continue
+
             # Upload supporting document
             self.source_document_manager.insertDocumentFromFile(
                 abs_doc_path,
@@ -696,17 +834,33 @@ class SourceDocumentTranslator(SourceValueTranslator):
         return IgnoreType
 
 
+# Translator types that can be recreated from their serialized settings
+_translator_types = dict(
+    (t.__name__, t) for t in [
+        RelatedTableTranslator,
+        LookupValueTranslator,
+        MultipleEnumerationTranslator,
+        SourceDocumentTranslator
+    ]
+)
 
 
+def translator_from_dict(config):
+    """
+    Creates a value translator from settings created by
+    'SourceValueTranslator.to_dict'.
+    :param config: Translator settings.
+    :type config: dict
+    :return: Value translator object.
+    :rtype: SourceValueTranslator
+    """
+    t_type = _translator_types.get(config.get('type', ''), None)
+    if t_type is None:
+        raise TranslatorException(
+            u'Unknown value translator type: {0}'.format(config.get('type'))
+        )
 
+    translator = t_type()
+    translator.from_dict(config)
 
-
-
-
-
-
-
-
-
-
-
+    return translator
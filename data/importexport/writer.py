@@ -19,25 +19,21 @@ except:
     import osr
 
 from stdm.data.pg_utils import (
+    column_definitions,
     columnType,
-    geometryType,
-    pg_views
-)
-from stdm.utils.util import (
-    date_from_string,
-    datetime_from_string
-)
-from stdm.settings import (
-    current_profile,
-    save_configuration
+    geometryType
 )
 from enums import *
+from enums import _OFT_INTEGER64
+
+#Number of features written in a single OGR transaction
+DEFAULT_TRANSACTION_SIZE = 10000
+
+#Number of features written between progress dialog updates
+DEFAULT_PROGRESS_INTERVAL = 500
 
 class OGRWriter():
 
-    OGR_STRING_TYPE = 4
-    OGR_DATE_TYPE = 9
-   
     def __init__(self,targetFile): 
         self._ds=None 
         self._targetFile = targetFile
@@ -59,37 +55,185 @@ class OGRWriter():
         
         return str(fi.baseName()) 
     
-    def createField(self,table,field):
+    def createField(self, table, field, colType=None):
         #Creates an OGR field
+        #The column type is queried if not specified
 
-        colType = columnType(table, field)
-        #Get OGR type
-        ogrType = ogrTypes[colType]
-
-        #OGR date handling is broken! handle all dates as strings
-        if ogrType == OGRWriter.OGR_DATE_TYPE: 
-            ogrType = OGRWriter.OGR_STRING_TYPE
+        if colType is None:
+            colType = columnType(table, field)
+        #Get OGR type, unknown types are written as strings
+        ogrType = ogrTypes.get(colType, ogr.OFTString)
 
         field_defn = ogr.FieldDefn(field.encode('utf-8'), ogrType)
 
         return field_defn
         
-    def db2Feat(self,parent,table,results,columns,geom=""):
+    @staticmethod
+    def set_field_value(feat, index, ogr_type, value):
+        """
+        Sets the value of a feature field using the native OGR type of the
+        field instead of converting it to a string.
+        :param feat: Feature whose field is to be set.
+        :type feat: ogr.Feature
+        :param index: Field index.
+        :type index: int
+        :param ogr_type: OGR type of the field.
+        :type ogr_type: int
+        :param value: Value read from the database. Null values leave the
+        field unset.
+        :type value: object
+        """
+        if value is None:
+            return
+
+        if ogr_type == ogr.OFTInteger and isinstance(value, (int, long)):
+            feat.SetField(index, value)
+
+        elif ogr_type == _OFT_INTEGER64 and isinstance(value, (int, long)):
+            #Bindings of some GDAL builds lack the 64-bit setter
+            set_integer64 = getattr(feat, 'SetFieldInteger64', None)
+            if set_integer64 is not None:
+                set_integer64(index, value)
+            else:
+                feat.SetField(index, value)
+
+        elif ogr_type == ogr.OFTReal and \
+                isinstance(value, (int, long, float, decimal.Decimal)):
+            feat.SetField(index, float(value))
+
+        elif ogr_type in (ogr.OFTDate, ogr.OFTDateTime) and \
+                isinstance(value, datetime.date):
+            if isinstance(value, datetime.datetime):
+                feat.SetField(index, value.year, value.month, value.day,
+                              value.hour, value.minute, value.second, 0)
+            else:
+                feat.SetField(index, value.year, value.month, value.day,
+                              0, 0, 0, 0)
+
+        else:
+            if not isinstance(value, unicode):
+                value = unicode(value)
+
+            feat.SetField(index, value.encode('utf-8'))
+
+    def write_features(self, lyr, results, field_types, geom_index=-1,
+                       progress=None, num_feat=0,
+                       transaction_size=DEFAULT_TRANSACTION_SIZE,
+                       progress_interval=DEFAULT_PROGRESS_INTERVAL):
+        """
+        Writes the rows to the layer, committing an OGR transaction every
+        'transaction_size' features so that file based formats such as
+        GeoPackage do not sync their journal for each feature.
+        :param lyr: Destination layer.
+        :type lyr: ogr.Layer
+        :param results: Iterable of rows, rows can be streamed from the
+        database.
+        :param field_types: OGR types of the layer fields in the order of the
+        row values.
+        :type field_types: list
+        :param geom_index: Index of the WKB geometry value in each row, -1 if
+        there is no geometry.
+        :type geom_index: int
+        :param progress: Progress dialog, updated every
+        'progress_interval' features.
+        :type progress: QProgressDialog
+        :param num_feat: Total number of rows, used in the progress message.
+        It can be an estimate, the progress range is extended if more rows
+        are written.
+        :type num_feat: int
+        :return: Number of features written.
+        :rtype: int
+        """
+        lblMsgTemp = QApplication.translate(
+            'OGRWriter', 'Writing {0} of {1} to file...')
+        feat_defn = lyr.GetLayerDefn()
+        fields = list(enumerate(field_types))
+        transaction_size = max(1, transaction_size)
+        progress_interval = max(1, progress_interval)
+
+        count = 0
+        lyr.StartTransaction()
+
+        try:
+            for r in results:
+                if progress is not None and count % progress_interval == 0:
+                    if count >= num_feat:
+                        num_feat = count + progress_interval
+                        progress.setMaximum(num_feat)
+                    progress.setValue(count)
+                    progress.setLabelText(
+                        lblMsgTemp.format(str(count + 1), str(num_feat))
+                    )
+
+                    if progress.wasCanceled():
+                        break
+
+                feat = ogr.Feature(feat_defn)
+
+                for i, ogr_type in fields:
+                    self.set_field_value(feat, i, ogr_type, r[i])
+
+                if geom_index != -1 and r[geom_index] is not None:
+                    #bytea values are returned as buffers
+                    feat.SetGeometryDirectly(
+                        ogr.CreateGeometryFromWkb(bytes(r[geom_index]))
+                    )
+
+                if lyr.CreateFeature(feat) != 0:
+                    raise Exception(
+                        "Failed to create feature in %s"%(self._targetFile)
+                    )
+
+                count += 1
+
+                if count % transaction_size == 0:
+                    lyr.CommitTransaction()
+                    lyr.StartTransaction()
+
+            lyr.CommitTransaction()
+
+        except:
+            lyr.RollbackTransaction()
+            raise
+
+        return count
+
+    def db2Feat(self, parent, table, results, columns, geom="",
+                num_feat=None, transaction_size=DEFAULT_TRANSACTION_SIZE,
+                progress_interval=DEFAULT_PROGRESS_INTERVAL, dest_srid=None,
+                column_types=None):
         #Execute the export process
+        #'results' can be a result proxy or an iterator of rows, such as
+        #the one returned by pg_utils.stream_report_filter, in which case
+        #'num_feat' should be specified for the progress dialog.
+        #The geometry is expected as WKB after the column values. If the
+        #geometries have been transformed in the query then 'dest_srid'
+        #should be the SRID they were transformed to. 'column_types' maps
+        #column names to the PostgreSQL types of values that differ from the
+        #table column types, e.g. lookup values exported instead of ids.
         #Create driver
-        drv = ogr.GetDriverByName(self.getDriverName())        
+        drv = ogr.GetDriverByName(self.getDriverName())
         if drv is None:
             raise Exception(u"{0} driver not available.".format(self.getDriverName()))
-        
+
         #Create data source
         self._ds = drv.CreateDataSource(self._targetFile)
         if self._ds is None:
             raise Exception("Creation of output file failed.")
         dest_crs = None
+
+        #Read the types of all columns in a single catalog query
+        col_defs = column_definitions(table)
+
         #Create layer
         if geom != "":
-            pgGeomType,srid = geometryType(table,geom)
-            geomType = wkbTypes[pgGeomType]
+            if geom in col_defs and col_defs[geom][1] is not None:
+                pgGeomType, srid = col_defs[geom][1:]
+            else:
+                pgGeomType,srid = geometryType(table,geom)
+            if dest_srid is not None:
+                srid = dest_srid
+            geomType = wkbTypes.get(pgGeomType.upper(), ogr.wkbUnknown)
             try:
                 dest_crs = ogr.osr.SpatialReference()
             except AttributeError:
@@ -101,76 +245,50 @@ class OGRWriter():
         layer_name = self.getLayerName()
 
         lyr = self._ds.CreateLayer(layer_name, dest_crs, geomType)
-        
+
         if lyr is None:
             raise Exception("Layer creation failed")
 
         #Create fields
+        field_types = []
         for c in columns:
 
-            field_defn = self.createField(table, c)
+            #Names with spaces are quoted in the export query
+            col_name = c.strip('"')
+            col_def = col_defs.get(col_name, None)
+            colType = col_def[0] if col_def is not None else None
+            if column_types and col_name in column_types:
+                colType = column_types[col_name]
+            field_defn = self.createField(table, c, colType)
 
             if lyr.CreateField(field_defn) != 0:
                 raise Exception("Creating %s field failed"%(c))
-            
-        #Add Geometry column to list for referencing in the result set
+
+            field_types.append(field_defn.GetType())
+
+        #The geometry follows the field values in the result set
+        geom_index = -1
         if geom != "":
-            columns.append(geom) 
-            
-        featGeom=None  
-             
+            geom_index = len(columns)
+
         #Configure progress dialog
-        initVal=0 
-        numFeat = results.rowcount
-        progress = QProgressDialog("","&Cancel",initVal,numFeat,parent)        
-        progress.setWindowModality(Qt.WindowModal)    
-        lblMsgTemp = QApplication.translate(
-            'OGRWriter', 'Writing {0} of {1} to file...')
+        if num_feat is None:
+            num_feat = results.rowcount
+        progress = QProgressDialog("","&Cancel",0,num_feat,parent)
+        progress.setWindowModality(Qt.WindowModal)
+
+        try:
+            self.write_features(
+                lyr, results, field_types, geom_index, progress, num_feat,
+                transaction_size, progress_interval
+            )
+
+        finally:
+            progress.setValue(num_feat)
+            progress.close()
 
-        entity = current_profile().entity_by_name(table)
-        #Iterate the result set
-        for r in results:
-            #Progress dialog 
-            progress.setValue(initVal) 
-            progressMsg = lblMsgTemp.format(str(initVal+1), str(numFeat))
-            progress.setLabelText(progressMsg)
-            
-            if progress.wasCanceled():
-                break  
-            
-            #Create OGR Feature
-            feat = ogr.Feature(lyr.GetLayerDefn())
-
-            for i in range(len(columns)):
-                colName = columns[i]
-
-                #Check if its the geometry column in the iteration
-                if colName == geom:
-                    if r[i] is not None:
-                        featGeom = ogr.CreateGeometryFromWkt(r[i])
-                    else:
-                        featGeom = ogr.CreateGeometryFromWkt("")
-                        
-                    feat.SetGeometry(featGeom)
-                    
-                else:
-                    field_value = r[i]
-                    field_value = unicode(field_value).encode('utf-8')
-                    feat.SetField(i,field_value)
-                    
-            if lyr.CreateFeature(feat) != 0:
-                progress.close()
-                raise Exception(
-                    "Failed to create feature in %s"%(self._targetFile)
-                )
-            
-            if featGeom is not None:                
-                featGeom.Destroy()
-                
-            feat.Destroy()
-            initVal+=1
-            
-        progress.setValue(numFeat)
+            #Flush the features to the file
+            self._ds = None
 
     @staticmethod
     def is_date(string):
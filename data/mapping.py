@@ -172,10 +172,12 @@ class MapperMixin(object):
     '''
     Mixin class for use in a dialog or widget, and manages attribute mapping.
     '''
-    def __init__(self, model, entity):
+    def __init__(self, model, entity, entity_cls=None):
         '''
         :param model: Callable (new instances) or instance (existing instance
         for updating) of STDM model.
+        :param entity_cls: Model of the entity used for validation, it is
+        reflected from the database if None.
         '''
         if callable(model):
             self._model = model()
@@ -193,7 +195,9 @@ class MapperMixin(object):
 
         # Get document objects
 
-        self.entity_model = entity_model(entity)
+        if entity_cls is None:
+            entity_cls = entity_model(entity)
+        self.entity_model = entity_cls
 
         self.entity_model_obj = self.entity_model()
         #Initialize notification bar
@@ -516,7 +520,6 @@ class MapperMixin(object):
                 if isinstance(control, ExpressionLineEdit):
 
                     value = control.on_expression_triggered()
-                    print attrMapper._attrName, value
                     setattr(self.model(), attrMapper._attrName, value)
             self._model.update()
             # STDMDb.instance().session.flush()
@@ -0,0 +1,162 @@
+"""
+/***************************************************************************
+Name                 : Model Cache
+Description          : Process-wide cache of entity browser table models that
+                       is invalidated when the tables they display change.
+Date                 : 19/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+from collections import OrderedDict
+
+from stdm.data.database import (
+    add_table_change_listener,
+    Singleton
+)
+
+#Maximum number of table models kept in the cache
+MAX_CACHED_MODELS = 10
+
+
+def query_key(query):
+    """
+    :param query: ORM query.
+    :type query: Query
+    :return: Hashable key of the SQL statement and parameters of the query.
+    :rtype: tuple
+    """
+    compiled = query.statement.compile()
+    params = tuple(
+        sorted((k, repr(v)) for k, v in compiled.params.iteritems())
+    )
+
+    return unicode(compiled), params
+
+
+@Singleton
+class EntityModelCache(object):
+    """
+    Cache of the paged table models of the entity browsers, keyed by entity
+    and query, so that a browser opened again shows the records already
+    loaded. Browsers take a model out of the cache while they are visible
+    and add it back once hidden, so a model is never shared by two visible
+    browsers. Models are discarded once one of the tables they depend on is
+    changed through the Model save, update and delete methods or by an
+    import.
+    """
+    def __init__(self):
+        #Cached models, least recently used first, with the tables they
+        #depend on
+        self._models = OrderedDict()
+
+        add_table_change_listener(self.invalidate_tables)
+
+    @staticmethod
+    def key(entity_name, query, sort_column, descending, max_rows=0):
+        """
+        :param entity_name: Name of the entity table.
+        :type entity_name: str
+        :param query: Unordered query of the entity model objects.
+        :type query: Query
+        :param sort_column: Model attribute that the records are sorted by.
+        :type sort_column: InstrumentedAttribute
+        :param descending: True if the records are sorted in descending
+        order.
+        :type descending: bool
+        :param max_rows: Maximum number of records fetched, 0 for no limit.
+        :type max_rows: int
+        :return: Key of the model of the records.
+        :rtype: tuple
+        """
+        return (
+            entity_name,
+            max_rows,
+            query_key(query),
+            sort_column.key,
+            descending
+        )
+
+    def take(self, key):
+        """
+        Removes the model of the records from the cache.
+        :param key: Key created using 'key'.
+        :type key: tuple
+        :return: Cached model of the records or None if there is none.
+        :rtype: PagedEntityTableModel
+        """
+        entry = self._models.pop(key, None)
+        if entry is None:
+            return None
+
+        return entry[0]
+
+    def take_model(self, model):
+        """
+        Removes the model from the cache, e.g. when the browser that added
+        it is shown again.
+        :param model: Cached model.
+        :type model: PagedEntityTableModel
+        :return: False if the model was not in the cache, i.e. it has been
+        invalidated and its records should be fetched again.
+        :rtype: bool
+        """
+        for key, entry in self._models.items():
+            if entry[0] is model:
+                del self._models[key]
+
+                return True
+
+        return False
+
+    def add(self, model, entity_name, tables, max_rows=0):
+        """
+        Adds a model to the cache, keyed by the records it currently
+        contains. The least recently used models are discarded once the
+        cache is full.
+        :param model: Model of the entity records. It should not have a
+        parent that deletes it.
+        :type model: PagedEntityTableModel
+        :param entity_name: Name of the entity table.
+        :type entity_name: str
+        :param tables: Names of the tables whose changes invalidate the
+        model, i.e. the entity table and those of the display values.
+        :type tables: set
+        :param max_rows: Maximum number of records fetched by the model.
+        :type max_rows: int
+        """
+        sort_column, descending = model.sort_column()
+        key = self.key(
+            entity_name, model.query(), sort_column, descending, max_rows
+        )
+        self._models.pop(key, None)
+        self._models[key] = (model, set(tables))
+
+        while len(self._models) > MAX_CACHED_MODELS:
+            self._models.popitem(last=False)
+
+    def invalidate_tables(self, table_names):
+        """
+        Discards the models depending on the tables.
+        :param table_names: Names of the changed tables.
+        :type table_names: set
+        """
+        for key, entry in self._models.items():
+            if not entry[1].isdisjoint(table_names):
+                del self._models[key]
+
+    def clear(self):
+        """
+        Discards all models, e.g. when the user logs out.
+        """
+        self._models.clear()
@@ -17,6 +17,8 @@ email                : gkahiu@gmail.com
  *                                                                         *
  ***************************************************************************/
 """
+from collections import OrderedDict
+
 from qgis.core import *
 
 from PyQt4.QtCore import (
@@ -27,7 +29,19 @@ from PyQt4.QtCore import (
     QSettings)
 from qgis.utils import iface
 
-from sqlalchemy.sql.expression import text
+from sqlalchemy import (
+    and_,
+    cast,
+    func,
+    or_,
+    Text
+)
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.expression import (
+    literal_column,
+    table,
+    text
+)
 from sqlalchemy.exc import SQLAlchemyError
 from geoalchemy2 import WKBElement
 import stdm.data
@@ -52,6 +66,9 @@ _pg_numeric_col_types = ["smallint","integer","bigint","double precision",
                       "bigserial"]
 _text_col_types = ["character varying", "text"]
 
+#Number of rows fetched at a time from server-side cursors
+DEFAULT_FETCH_SIZE = 5000
+
 #Flags for specifying data source type
 VIEWS = 2500
 TABLES = 2501
@@ -227,8 +244,35 @@ def pg_table_count(table_name):
 
     return cnt
 
-def process_report_filter(tableName, columns, whereStr="", sortStmnt=""):
-    #Process the report builder filter
+def pg_table_estimate(table_name):
+    """
+    Returns the number of records in a table estimated from the planner
+    statistics, scaled to the current size of the table as the planner
+    does. Unlike an exact count it does not depend on the size of the
+    table.
+    :param table_name: Name of the table.
+    :type table_name: str
+    :return: Estimated number of records or None if the table has no
+    statistics, e.g. it has not been analyzed yet, or is a view.
+    :rtype: int
+    """
+    sql = text(
+        "SELECT CASE WHEN c.relpages > 0 AND c.reltuples >= 0 "
+        "THEN c.reltuples / c.relpages * (pg_relation_size(c.oid) / "
+        "current_setting('block_size')::integer) END AS cnt "
+        "FROM pg_class c "
+        "WHERE c.relname = :table_name AND c.relkind IN ('r', 'm') "
+        "AND pg_table_is_visible(c.oid)"
+    )
+
+    cnt = _execute(sql, table_name=table_name).scalar()
+    if cnt is None:
+        return None
+
+    return int(round(cnt))
+
+def _report_filter_sql(tableName, columns, whereStr="", sortStmnt=""):
+    #Builds the SELECT statement for the report builder filter
     if "'" in columns and '"' not in columns:
         cols = []
         spited_cols = columns.split(',')
@@ -247,10 +291,65 @@ def process_report_filter(tableName, columns, whereStr="", sortStmnt=""):
     if sortStmnt !="":
         sql += sortStmnt
 
+    return sql
+
+def process_report_filter(tableName, columns, whereStr="", sortStmnt=""):
+    #Process the report builder filter
+    sql = _report_filter_sql(tableName, columns, whereStr, sortStmnt)
+
     t = text(sql)
     
     return _execute(t)
 
+def report_filter_count(tableName, whereStr=""):
+    """
+    Counts the rows matching the report builder filter without fetching
+    them.
+    :param tableName: Table or view name.
+    :type tableName: str
+    :param whereStr: Filter expression.
+    :type whereStr: str
+    :rtype: int
+    """
+    sql = _report_filter_sql(tableName, "COUNT(*)", whereStr)
+
+    return _execute(text(sql)).scalar()
+
+def stream_report_filter(tableName, columns, whereStr="", sortStmnt="",
+                         fetch_size=DEFAULT_FETCH_SIZE):
+    """
+    Same as process_report_filter but the rows are read from a server-side
+    cursor, 'fetch_size' rows at a time, instead of buffering the whole
+    result set in memory.
+    The connection is closed once the rows have been read or the generator
+    is closed.
+    :param fetch_size: Number of rows fetched in each round trip.
+    :type fetch_size: int
+    :return: Generator of result rows.
+    """
+    sql = _report_filter_sql(tableName, columns, whereStr, sortStmnt)
+
+    conn = STDMDb.instance().engine.connect()
+    trans = conn.begin()
+    try:
+        results = conn.execution_options(stream_results=True).execute(
+            text(sql)
+        )
+        while True:
+            rows = results.fetchmany(fetch_size)
+            if not rows:
+                break
+
+            for r in rows:
+                yield r
+
+        results.close()
+        trans.commit()
+
+    finally:
+        # Rolls back the transaction if the rows were not all read
+        conn.close()
+
 def export_data(table_name):
     sql = u"SELECT * FROM {0} ".format(unicode(table_name))
 
@@ -445,6 +544,222 @@ def unique_column_values(tableName, columnName, quoteDataTypes=["character varyi
 
     return uniqueVals
 
+def _quoted_column(columnName):
+    #Column names are quoted so that names with spaces or capitals are valid
+    return u'"{0}"'.format(unicode(columnName).strip('"'))
+
+def _like_prefix(prefix):
+    #Escapes the LIKE wildcards in the prefix and appends one for the match
+    for c in ('\\', '%', '_'):
+        prefix = prefix.replace(c, u'\\' + c)
+
+    return prefix + u'%'
+
+def column_value_counts_query(tableName, columnName, prefix=None, key=None):
+    """
+    Creates a query of the distinct values in the column together with the
+    number of rows of each value, most frequent values first and nulls
+    last among values with the same count. Pages of values are fetched
+    using the count and value of the last value of the previous page
+    instead of an offset, so the groups of the previous pages are not
+    sorted and skipped again.
+    :param tableName: Table or view name.
+    :type tableName: str
+    :param columnName: Column name.
+    :type columnName: str
+    :param prefix: If specified, only values whose text starts with the
+    prefix, ignoring the case, are returned.
+    :type prefix: str
+    :param key: Count and value of the last value of the previous page,
+    None for the first page.
+    :type key: tuple
+    :return: Query of the 'val' and 'cnt' columns that is not bound to a
+    session, e.g. to be run by a RecordLoader.
+    :rtype: Query
+    """
+    column = literal_column(_quoted_column(columnName))
+    count = func.count()
+    query = Query([column.label('val'), count.label('cnt')]).select_from(
+        table(tableName)
+    )
+
+    if prefix:
+        query = query.filter(cast(column, Text).ilike(_like_prefix(prefix)))
+
+    query = query.group_by(column)
+
+    if key is not None:
+        last_count, last_value = key
+        if last_value is None:
+            query = query.having(count < last_count)
+        else:
+            query = query.having(or_(
+                count < last_count,
+                and_(
+                    count == last_count,
+                    or_(column > last_value, column.is_(None))
+                )
+            ))
+
+    return query.order_by(count.desc(), column.asc().nullslast())
+
+def column_common_values(tableName, columnName, schema="public"):
+    """
+    Gets the most common values of the column and their estimated number of
+    rows from the planner statistics, without scanning the table. The
+    estimates are only available once the table has been analyzed.
+    :param tableName: Table name.
+    :type tableName: str
+    :param columnName: Column name.
+    :type columnName: str
+    :param schema: Schema of the table.
+    :type schema: str
+    :return: List of (value, estimated count) tuples, most common values
+    first. The values are returned as text. Empty if the table has no
+    statistics.
+    :rtype: list
+    """
+    sql = u"SELECT CAST(CAST(s.most_common_vals AS text) AS text[]) AS vals, " \
+          u"s.most_common_freqs AS freqs, c.reltuples AS num_rows " \
+          u"FROM pg_stats s " \
+          u"JOIN pg_namespace n ON n.nspname = s.schemaname " \
+          u"JOIN pg_class c ON c.relnamespace = n.oid " \
+          u"AND c.relname = s.tablename " \
+          u"WHERE s.schemaname = :schema AND s.tablename = :table " \
+          u"AND s.attname = :column"
+    result = _execute(
+        text(sql),
+        schema=schema,
+        table=unicode(tableName),
+        column=unicode(columnName).strip('"')
+    ).first()
+
+    if result is None or result['vals'] is None:
+        return []
+
+    num_rows = max(result['num_rows'], 0)
+
+    return [
+        (val, int(round(freq * num_rows)))
+        for val, freq in zip(result['vals'], result['freqs'])
+    ]
+
+def matching_column_values(table_name, column_name, values):
+    """
+    Checks which of the given values exist in the specified column. The
+    comparison is done on the text representation of the column values so
+    that values read from a source file can be matched in one round trip.
+    :param table_name: Name of the database table.
+    :type table_name: str
+    :param column_name: Name of the column to search.
+    :type column_name: str
+    :param values: Values whose existence is to be checked.
+    :type values: list
+    :return: Text values which exist in the column.
+    :rtype: set
+    """
+    if len(values) == 0:
+        return set()
+
+    sql = u'SELECT DISTINCT CAST({0} AS text) AS val FROM {1} ' \
+          u'WHERE CAST({0} AS text) = ANY(:vals)'.format(
+        column_name, table_name
+    )
+    t = text(sql)
+    result = _execute(t, vals=[unicode(v) for v in values])
+
+    return set([r['val'] for r in result])
+
+def table_column_types(table_names, schema="public"):
+    """
+    Reads the columns and data types of several tables in one catalog
+    query.
+    :param table_names: Names of the tables.
+    :type table_names: list
+    :return: Table names and the list of their column name and data type
+    pairs in creation order. Geometry columns have the 'USER-DEFINED' data
+    type.
+    :rtype: dict
+    """
+    if len(table_names) == 0:
+        return {}
+
+    sql = u"SELECT table_name, column_name, data_type " \
+          u"FROM information_schema.columns " \
+          u"WHERE table_schema = :schema AND table_name = ANY(:tables) " \
+          u"ORDER BY table_name, ordinal_position"
+    result = _execute(text(sql), schema=schema, tables=list(table_names))
+
+    col_types = {}
+    for r in result:
+        col_types.setdefault(r['table_name'], []).append(
+            (r['column_name'], r['data_type'])
+        )
+
+    return col_types
+
+def table_geometry_columns(table_names, schema="public"):
+    """
+    Reads the geometry columns of several tables in one query.
+    :param table_names: Names of the tables.
+    :type table_names: list
+    :return: Table names and the list of their geometry column name,
+    geometry type and SRID.
+    :rtype: dict
+    """
+    if len(table_names) == 0:
+        return {}
+
+    sql = u"SELECT f_table_name, f_geometry_column, type, srid " \
+          u"FROM geometry_columns " \
+          u"WHERE f_table_schema = :schema AND f_table_name = ANY(:tables)"
+    result = _execute(text(sql), schema=schema, tables=list(table_names))
+
+    geom_cols = {}
+    for r in result:
+        geom_cols.setdefault(r['f_table_name'], []).append(
+            (r['f_geometry_column'], r['type'], r['srid'])
+        )
+
+    return geom_cols
+
+def column_definitions(table_name, schema="public"):
+    """
+    Reads the data types of all the columns of a table or view, and the
+    geometry type and SRID of its geometry columns, in one catalog query.
+    Unlike information_schema, the catalog also lists the columns of
+    materialized views.
+    :param table_name: Name of the table or view.
+    :type table_name: str
+    :return: Column names, in creation order, and a tuple of the data type,
+    geometry type and SRID of each column. The geometry type and SRID are
+    None for non-geometry columns.
+    :rtype: OrderedDict
+    """
+    sql = u"SELECT a.attname AS column_name, " \
+          u"format_type(a.atttypid, -1) AS data_type, " \
+          u"g.type AS geom_type, g.srid AS srid " \
+          u"FROM pg_attribute a " \
+          u"JOIN pg_class c ON c.oid = a.attrelid " \
+          u"JOIN pg_namespace n ON n.oid = c.relnamespace " \
+          u"LEFT JOIN geometry_columns g ON g.f_table_schema = n.nspname " \
+          u"AND g.f_table_name = c.relname " \
+          u"AND g.f_geometry_column = a.attname " \
+          u"WHERE c.relname = :tbname AND n.nspname = :tbschema " \
+          u"AND a.attnum > 0 AND NOT a.attisdropped " \
+          u"ORDER BY a.attnum"
+    result = _execute(text(sql), tbname=table_name, tbschema=schema)
+
+    col_defs = OrderedDict()
+    for r in result:
+        col_defs[r['column_name']] = (
+            r['data_type'],
+            r['geom_type'],
+            r['srid']
+        )
+
+    return col_defs
+
 def columnType(tableName, columnName):
     """
     Returns the PostgreSQL data type of the specified column.
@@ -927,6 +1242,123 @@ def create_postgis():
     _execute(t)
 
 
+def pg_trgm_exists():
+    """
+    :return: True if the pg_trgm extension, used for the similarity search
+    of text values, is installed in the STDM database.
+    :rtype: bool
+    """
+    sql = "SELECT COUNT(*) FROM pg_extension WHERE extname = 'pg_trgm';"
+    t = text(sql)
+
+    return _execute(t).scalar() > 0
+
+
+def create_pg_trgm():
+    """
+    Creates the pg_trgm extension in the STDM database if it is available,
+    it requires the privileges to create extensions.
+    """
+    sql = 'CREATE EXTENSION IF NOT EXISTS pg_trgm;'
+    t = text(sql)
+    _execute(t)
+
+
+def _execute_autocommit(sql, **kwargs):
+    #Executes a statement that cannot run in a transaction block, e.g.
+    #CREATE INDEX CONCURRENTLY
+    conn = STDMDb.instance().engine.connect().execution_options(
+        isolation_level='AUTOCOMMIT'
+    )
+    try:
+        return conn.execute(sql, **kwargs)
+    finally:
+        conn.close()
+
+
+def _create_index_concurrently(index_name, create_sql):
+    #Builds the index without locking out writes to the table. An index
+    #left invalid by a failed concurrent build is dropped and built again.
+    validity_sql = text(
+        'SELECT i.indisvalid FROM pg_class c '
+        'JOIN pg_index i ON i.indexrelid = c.oid '
+        'WHERE c.relname = :index_name'
+    )
+    valid = _execute(validity_sql, index_name=index_name).scalar()
+    if valid:
+        return False
+
+    if valid is not None:
+        drop_sql = u'DROP INDEX CONCURRENTLY {0};'.format(
+            _quoted_column(index_name)
+        )
+        _execute_autocommit(text(drop_sql))
+
+    _execute_autocommit(text(create_sql))
+
+    return True
+
+
+def trigram_index_name(table_name, column_name):
+    """
+    :return: Name of the trigram index of the column, truncated to the
+    maximum length of PostgreSQL identifiers.
+    :rtype: str
+    """
+    return u'{0}_{1}_trgm_idx'.format(table_name, column_name)[:63]
+
+
+def add_trigram_index(table_name, column_name):
+    """
+    Creates a GIN trigram index on the lower case values of a text column,
+    if it does not exist, so that substring and similarity searches of the
+    column do not scan the table. The index is built concurrently so that
+    the table can still be edited. The pg_trgm extension should have been
+    created.
+    :param table_name: Name of the table.
+    :type table_name: str
+    :param column_name: Name of the text column.
+    :type column_name: str
+    :return: True if the index has been created, False if it existed.
+    :rtype: bool
+    """
+    index_name = trigram_index_name(table_name, column_name)
+    sql = (
+        u'CREATE INDEX CONCURRENTLY {0} ON {1} '
+        u'USING gin (lower({2}) gin_trgm_ops);'
+    ).format(
+        _quoted_column(index_name),
+        _quoted_column(table_name),
+        _quoted_column(column_name)
+    )
+
+    return _create_index_concurrently(index_name, sql)
+
+
+def add_validity_period_index(table_name):
+    """
+    Creates a B-tree index on the validity_start and validity_end columns
+    of a social tenure relationship table, if it does not exist, so that
+    the relationships valid within a period are found without scanning the
+    table. The index is built concurrently so that the table can still be
+    edited.
+    :param table_name: Name of the social tenure relationship table.
+    :type table_name: str
+    :return: True if the index has been created, False if it existed.
+    :rtype: bool
+    """
+    index_name = u'{0}_validity_idx'.format(table_name)[:63]
+    sql = (
+        u'CREATE INDEX CONCURRENTLY {0} ON {1} '
+        u'(validity_start, validity_end);'
+    ).format(
+        _quoted_column(index_name),
+        _quoted_column(table_name)
+    )
+
+    return _create_index_concurrently(index_name, sql)
+
+
 def profile_sequences(prefix):
     """
     Returns all sequences of a given profile based on the profile prefix.
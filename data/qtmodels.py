@@ -19,18 +19,42 @@ email                : gkahiu@gmail.com
  ***************************************************************************/
 """
 
+import bisect
+from array import array
+from collections import OrderedDict
 from decimal import Decimal
 
 from PyQt4.QtCore import *
 from PyQt4.QtGui import *
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 from .modelformatters import (
     LookupFormatter,
     DoBFormatter
 )
+from .record_loader import RecordPager
+
 #Standard colors for widgets supporting alternating rows
 ALT_COLOR_EVEN = QColor(255,165,79)
 ALT_COLOR_ODD = QColor(135,206,255)
+
+#Number of records fetched at a time by the paged table model
+DEFAULT_PAGE_SIZE = 200
+
+#Approximate number of records kept in memory by the paged table model
+DEFAULT_WINDOW_SIZE = 5000
+
+#Array type codes of integer and float table model columns
+_INT_TYPECODE = 'l'
+_FLOAT_TYPECODE = 'd'
+
+#Range of the integers that can be stored in a typed column
+_INT_ARRAY_MAX = 2 ** (8 * array(_INT_TYPECODE).itemsize - 1) - 1
+_INT_ARRAY_MIN = -_INT_ARRAY_MAX - 1
  
 class EnumeratorTableModel(QAbstractTableModel):
     '''
@@ -438,35 +462,177 @@ class PersonTableModel(QAbstractTableModel):
         
         return True
     
+def _typecode(values):
+    """
+    Gets the array type code for storing the values, None if they should be
+    kept in a list i.e. if the column has nulls or non-numeric values.
+    """
+    if len(values) == 0:
+        return None
+
+    value_types = set(type(v) for v in values)
+    if value_types <= set([int, long]):
+        if min(values) >= _INT_ARRAY_MIN and max(values) <= _INT_ARRAY_MAX:
+            return _INT_TYPECODE
+
+    elif value_types == set([float]):
+        return _FLOAT_TYPECODE
+
+    return None
+
+
+def _fits(typecode, value):
+    #True if the value can be stored in an array of the given type
+    if typecode == _FLOAT_TYPECODE:
+        return type(value) is float
+
+    return type(value) in (int, long) and \
+        _INT_ARRAY_MIN <= value <= _INT_ARRAY_MAX
+
+
+def _lower(value):
+    if isinstance(value, basestring):
+        return value.lower()
+
+    return value
+
+
+class _TableColumn(object):
+    """
+    Values of a BaseSTDMTableModel column. Integer and float columns
+    without nulls are stored in typed arrays, other values are stored in a
+    list in which equal strings, such as lookup display values, share one
+    object.
+    """
+    __slots__ = ['values', 'typecode', '_strings']
+
+    def __init__(self, values):
+        self.typecode = _typecode(values)
+
+        if self.typecode is None:
+            self._strings = {}
+            self.values = [self._intern(v) for v in values]
+
+            #Sharing strings does not pay off if most of them are unique
+            if len(self._strings) > len(self.values) / 2:
+                self._strings = None
+
+        else:
+            self._strings = None
+            self.values = array(self.typecode, values)
+
+    def _intern(self, value):
+        if self._strings is not None and isinstance(value, basestring):
+            return self._strings.setdefault(value, value)
+
+        return value
+
+    def _demote(self, value):
+        #Moves the values to a list if the value does not fit in the array
+        if self.typecode is not None and not _fits(self.typecode, value):
+            self.values = list(self.values)
+            self.typecode = None
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+    def __setitem__(self, index, value):
+        self._demote(value)
+        self.values[index] = self._intern(value)
+
+    def __delitem__(self, index):
+        del self.values[index]
+
+    def insert(self, index, value):
+        self._demote(value)
+        self.values.insert(index, self._intern(value))
+
+    def _numpy_values(self):
+        return np.frombuffer(self.values, dtype=self.typecode)
+
+    def argsort(self, case_sensitive=True):
+        """
+        :param case_sensitive: False to ignore the case of text values.
+        :type case_sensitive: bool
+        :return: Row numbers in the ascending order of the column values,
+        rows with equal values keep their order.
+        """
+        if self.typecode is not None and np is not None and \
+                len(self.values) > 0:
+            return self._numpy_values().argsort(kind='mergesort')
+
+        values = self.values
+        if case_sensitive or self.typecode is not None:
+            key = values.__getitem__
+        else:
+            key = lambda i: _lower(values[i])
+
+        return sorted(xrange(len(values)), key=key)
+
+    def reorder(self, order):
+        """
+        Rearranges the values in the given order of row numbers.
+        :param order: Row numbers as returned by 'argsort'.
+        """
+        if self.typecode is None:
+            values = self.values
+            self.values = [values[i] for i in order]
+
+        elif np is not None and len(self.values) > 0:
+            reordered = array(self.typecode)
+            reordered.fromstring(self._numpy_values()[order].tostring())
+            self.values = reordered
+
+        else:
+            values = self.values
+            self.values = array(self.typecode, [values[i] for i in order])
+
+
 class BaseSTDMTableModel(QAbstractTableModel):
     """
-    Generic table model for use in STDM table views.
+    Generic table model for use in STDM table views. Values are stored by
+    column rather than by row to reduce the memory used by large tables
+    and sorting is done on the columns instead of by comparing rows in a
+    proxy model.
     """
     def __init__(self, initdata, headerdata, parent=None):
         QAbstractTableModel.__init__(self,parent)
 
-        self._initData = initdata
         self._headerdata = headerdata
+        self._row_count = len(initdata)
+        self._columns = [
+            _TableColumn([self._row_value(r, c) for r in initdata])
+            for c in range(len(headerdata))
+        ]
+
+    @staticmethod
+    def _row_value(row, column):
+        #Rows with fewer values than headers have null values
+        try:
+            return row[column]
+        except IndexError:
+            return None
 
     def rowCount(self, parent=QModelIndex()):
-        return len(self._initData)
+        return self._row_count
 
     def columnCount(self, parent=QModelIndex()):
         return len(self._headerdata)
 
     def data(self, index, role):
-        if index.row() != -1 and index.column() != -1:
-            try:
-                indexData = self._initData[index.row()][index.column()]
-            except:
-                return None
-        else:
+        if not index.isValid():
             return None
 
-        if not index.isValid():
+        if index.row() >= self._row_count or \
+                index.column() >= len(self._columns):
             return None
 
         elif role == Qt.DisplayRole:
+            indexData = self._columns[index.column()][index.row()]
+
             #Decimal not supported by QVariant so we adapt it to a supported type
             if isinstance(indexData,Decimal):
                 return str(indexData)
@@ -488,7 +654,7 @@ class BaseSTDMTableModel(QAbstractTableModel):
 
     def setData(self, index, value, role=Qt.EditRole):
         if index.isValid() and role == Qt.EditRole:
-            self._initData[index.row()][index.column()] = value
+            self._columns[index.column()][index.row()] = value
             self.dataChanged.emit(index,index)
 
             return True
@@ -503,16 +669,17 @@ class BaseSTDMTableModel(QAbstractTableModel):
         return Qt.ItemIsEditable|Qt.ItemIsSelectable|Qt.ItemIsEnabled
 
     def insertRows(self, position, rows, parent=QModelIndex()):
-        if position < 0 or position > len(self._initData):
+        if position < 0 or position > self._row_count:
             return False
 
         self.beginInsertRows(parent, position, position + rows - 1)
 
         #Initialize column values for the new row
-        initRowVals = ["" for c in range(self.columnCount())]
-
         for i in range(rows):
-            self._initData.insert(position,initRowVals)
+            for col in self._columns:
+                col.insert(position, "")
+
+        self._row_count += rows
 
         self.endInsertRows()
 
@@ -520,16 +687,643 @@ class BaseSTDMTableModel(QAbstractTableModel):
 
     def removeRows(self, position, count, parent=QModelIndex()):
 
-        if position < 0 or position > len(self._initData):
+        if position < 0 or position > self._row_count:
             return False
 
+        count = min(count, self._row_count - position)
+        if count <= 0:
+            return True
+
         self.beginRemoveRows(parent,position,position + count - 1)
 
+        for col in self._columns:
+            del col[position:position + count]
+
+        self._row_count -= count
+
+        self.endRemoveRows()
+
+        return True
+
+    def sort(self, column, order=Qt.AscendingOrder,
+             case_sensitivity=Qt.CaseSensitive):
+        """
+        Sorts the rows by the values in the column.
+        :param column: Column index.
+        :type column: int
+        :param order: Sort order.
+        :type order: Qt.SortOrder
+        :param case_sensitivity: Whether text values are compared ignoring
+        their case.
+        :type case_sensitivity: Qt.CaseSensitivity
+        """
+        if column < 0 or column >= len(self._columns) or \
+                self._row_count < 2:
+            return
+
+        self.layoutAboutToBeChanged.emit()
+
+        row_order = self._columns[column].argsort(
+            case_sensitivity == Qt.CaseSensitive
+        )
+        if order == Qt.DescendingOrder:
+            row_order = row_order[::-1]
+
+        for col in self._columns:
+            col.reorder(row_order)
+
+        #Update the indexes of selected items
+        persistent_indexes = self.persistentIndexList()
+        if len(persistent_indexes) > 0:
+            new_rows = [0] * self._row_count
+            for new_row, old_row in enumerate(row_order):
+                new_rows[old_row] = new_row
+
+            self.changePersistentIndexList(
+                persistent_indexes,
+                [self.index(new_rows[idx.row()], idx.column())
+                 for idx in persistent_indexes]
+            )
+
+        self.layoutChanged.emit()
+
+
+class _RecordPage(object):
+    """
+    Block of consecutive records in a PagedEntityTableModel.
+    """
+    __slots__ = ['key', 'end_key', 'num_db_records', 'length', 'rows',
+                 'local', 'pinned']
+
+    def __init__(self, key):
+        #Sort key of the record preceding the page, None for the first page
+        self.key = key
+        #Sort key of the last record fetched from the database
+        self.end_key = key
+        #Number of records in the page that exist in the database
+        self.num_db_records = 0
+        #Number of rows in the page, including evicted rows
+        self.length = 0
+        #Formatted row values, None once the page has been evicted
+        self.rows = []
+        #Flags of the rows inserted in the model
+        self.local = []
+        #Pages with rows inserted or edited in the model are never evicted
+        self.pinned = False
+
+    @property
+    def loaded(self):
+        return self.rows is not None
+
+    def set_rows(self, rows):
+        self.rows = rows
+        self.local = [False] * len(rows)
+        self.length = len(rows)
+
+    def __len__(self):
+        return self.length
+
+
+class PagedEntityTableModel(QAbstractTableModel):
+    """
+    Table model that fetches entity records page by page as the view is
+    scrolled instead of loading all of them up front. Pages are fetched
+    using keyset pagination on the sort column so that fetching a page
+    deep in the table is as fast as fetching the first one and only the
+    most recently used pages are kept in memory, evicted pages are fetched
+    again when their rows are displayed.
+    If a RecordLoader is specified then pages are fetched and formatted in
+    its worker thread and added to the model as they arrive, rows of pages
+    not yet loaded have no data until then.
+    """
+    def __init__(self, query, id_column, attrs, headers, sort_column=None,
+                 descending=False, formatters=None, total=None, max_rows=0,
+                 page_size=DEFAULT_PAGE_SIZE, window_size=DEFAULT_WINDOW_SIZE,
+                 load_options=None, loader=None, parent=None):
+        """
+        :param query: Unordered query of the entity model objects.
+        :type query: Query
+        :param id_column: Primary key attribute of the entity model, used
+        to order records with the same sort value.
+        :type id_column: InstrumentedAttribute
+        :param attrs: Names of the model attributes in the order of the
+        table columns.
+        :type attrs: list
+        :param headers: Column headers.
+        :type headers: list
+        :param sort_column: Model attribute that the records are sorted by,
+        the primary key if None.
+        :type sort_column: InstrumentedAttribute
+        :param descending: True to sort the records in descending order.
+        :type descending: bool
+        :param formatters: Objects whose 'format_column_value' method
+        formats the values of the attribute used as the key. Formatters
+        with a 'prefetch' method are given the attribute values of each
+        fetched page so that they can load the display values in one query.
+        :type formatters: dict
+        :param total: Number of records matching the query. It is counted
+        if not specified and there is no loader, otherwise it remains
+        unknown until set.
+        :type total: int
+        :param max_rows: Maximum number of records fetched, 0 for no limit.
+        :type max_rows: int
+        :param page_size: Number of records fetched at a time.
+        :type page_size: int
+        :param window_size: Approximate number of records kept in memory.
+        :type window_size: int
+        :param load_options: Loader options applied when fetching records,
+        e.g. to eagerly load the collections displayed in the table.
+        :type load_options: list
+        :param loader: Loader that fetches the pages in a worker thread,
+        pages are fetched in the calling thread if None.
+        :type loader: RecordLoader
+        """
+        QAbstractTableModel.__init__(self, parent)
+
+        self._id_column = id_column
+        self._attrs = attrs
+        self._headerdata = headers
+        self._formatters = formatters or {}
+        self._max_rows = max_rows
+        self._page_size = max(1, page_size)
+        self._window_size = max(self._page_size, window_size)
+        self._load_options = load_options or []
+
+        #Pages requested from the loader, by index, with the sort key
+        #preceding them and the number of records requested
+        self._pending_pages = {}
+        self._generation = 0
+        self._loader = loader
+        if loader is not None:
+            loader.page_loaded.connect(self._on_page_loaded)
+            loader.load_failed.connect(self._on_load_failed)
+
+        self._set_query(query, sort_column, descending, total)
+
+        #Fetch the first page so that the view has rows to display
+        self.fetchMore()
+
+    def _set_query(self, query, sort_column, descending, total):
+        self._query = query
+        self._pager = RecordPager(
+            self._id_column, self._attrs, sort_column, descending,
+            self._formatters, self._load_options
+        )
+
+        if total is None and self._loader is None:
+            total = query.count()
+        self._total = total
+        self._total_exact = total is not None
+
+        self._pages = []
+        #Row number of the first row in each page
+        self._offsets = []
+        self._row_count = 0
+        #Indexes of the loaded pages that can be evicted, least recently
+        #used first
+        self._lru_pages = OrderedDict()
+        self._num_lru_rows = 0
+        #Ids of the records inserted in the model, skipped when fetching
+        self._local_ids = set()
+        self._exhausted = False
+
+    def set_query(self, query, sort_column=None, descending=False,
+                  total=None):
+        """
+        Replaces the records in the model with those of the query, e.g.
+        when the records are filtered or sorted differently. Pages of the
+        previous query still being loaded are cancelled and the first page
+        of records is requested immediately.
+        :param query: Unordered query of the entity model objects.
+        :type query: Query
+        :param sort_column: Model attribute that the records are sorted by,
+        the primary key if None.
+        :type sort_column: InstrumentedAttribute
+        :param descending: True to sort the records in descending order.
+        :type descending: bool
+        :param total: Number of records matching the query. It is counted
+        if not specified and there is no loader, otherwise it remains
+        unknown until set.
+        :type total: int
+        """
+        self.cancel_loading()
+
+        self.beginResetModel()
+        self._set_query(query, sort_column, descending, total)
+        self.endResetModel()
+
+        self.fetchMore()
+
+    def cancel_loading(self):
+        """
+        Cancels the pages being loaded in the background, they are
+        requested again when needed.
+        """
+        self._generation += 1
+        self._pending_pages = {}
+        if self._loader is not None:
+            self._loader.cancel(self._generation)
+
+    def loader(self):
+        """
+        :return: Loader fetching the pages in a worker thread, None if they
+        are fetched in the calling thread.
+        :rtype: RecordLoader
+        """
+        return self._loader
+
+    def is_loading(self):
+        """
+        :return: True if pages are being loaded in the background.
+        :rtype: bool
+        """
+        return len(self._pending_pages) > 0
+
+    def query(self):
+        """
+        :return: Query of the records in the model.
+        :rtype: Query
+        """
+        return self._query
+
+    def sort_column(self):
+        """
+        :return: Model attribute that the records are sorted by and True if
+        they are sorted in descending order.
+        :rtype: tuple
+        """
+        return self._pager.sort_column, self._pager.descending
+
+    def total(self):
+        """
+        :return: Number of records matching the query, including the ones
+        not yet fetched, or None if it has not been counted.
+        :rtype: int
+        """
+        return self._total
+
+    def set_total(self, total, exact=True):
+        """
+        Sets the number of records matching the query, e.g. once it has been
+        counted in the background.
+        :param total: Number of records.
+        :type total: int
+        :param exact: False if the number of records is an estimate.
+        :type exact: bool
+        """
+        self._total = total
+        self._total_exact = exact
+
+    def is_total_exact(self):
+        """
+        :return: True if the total is the exact number of records, False
+        if it is an estimate or unknown.
+        :rtype: bool
+        """
+        return self._total is not None and self._total_exact
+
+    def _update_offsets(self):
+        self._offsets = []
+        row_count = 0
+        for page in self._pages:
+            self._offsets.append(row_count)
+            row_count += len(page)
+
+        self._row_count = row_count
+
+    def _page_index(self, row):
+        return bisect.bisect_right(self._offsets, row) - 1
+
+    def _touch_page(self, page_idx):
+        #Marks the page as most recently used and evicts the least
+        #recently used pages once the window is full.
+        page = self._pages[page_idx]
+        if page.pinned:
+            return
+
+        if page_idx in self._lru_pages:
+            del self._lru_pages[page_idx]
+        else:
+            self._num_lru_rows += len(page)
+        self._lru_pages[page_idx] = True
+
+        while self._num_lru_rows > self._window_size and \
+                len(self._lru_pages) > 1:
+            evict_idx, _ = self._lru_pages.popitem(last=False)
+            evicted = self._pages[evict_idx]
+            self._num_lru_rows -= len(evicted)
+            evicted.rows = None
+            evicted.local = None
+
+    def _pin_page(self, page_idx):
+        page = self._pages[page_idx]
+        if page.pinned:
+            return
+
+        if page_idx in self._lru_pages:
+            del self._lru_pages[page_idx]
+            self._num_lru_rows -= len(page)
+        page.pinned = True
+
+    def _request_page(self, page_idx, key, limit):
+        #Fetches the page, in the background if there is a loader
+        if page_idx in self._pending_pages:
+            return
+
+        self._pending_pages[page_idx] = (key, limit)
+
+        if self._loader is not None:
+            self._loader.request(
+                self._generation, page_idx, self._pager, self._query, key,
+                limit
+            )
+
+            return
+
+        page_data = self._pager.fetch(self._query, key, limit)
+        self._on_page_loaded(self._generation, page_idx, page_data)
+
+    def _on_page_loaded(self, generation, page_idx, page_data):
+        #Adds a fetched page or fills an evicted one
+        if generation != self._generation or \
+                page_idx not in self._pending_pages:
+            return
+
+        key, limit = self._pending_pages.pop(page_idx)
+
+        if page_idx < len(self._pages):
+            self._fill_page(page_idx, page_data)
+        else:
+            self._append_page(key, limit, page_data)
+
+    def _on_load_failed(self, generation, page_idx, msg):
+        if generation != self._generation or \
+                page_idx not in self._pending_pages:
+            return
+
+        del self._pending_pages[page_idx]
+
+        #Stop fetching or show the rows of the page as empty so that the
+        #view does not request the failing page again
+        if page_idx < len(self._pages):
+            page = self._pages[page_idx]
+            page.set_rows([self._empty_row() for i in range(len(page))])
+            self._touch_page(page_idx)
+            self._emit_page_changed(page_idx)
+        else:
+            self._exhausted = True
+
+    def _empty_row(self):
+        return [None] * len(self._attrs)
+
+    def _append_page(self, key, limit, page_data):
+        if page_data.num_records < limit:
+            self._exhausted = True
+
+        page = _RecordPage(key)
+        page.end_key = page_data.end_key
+        page.num_db_records = page_data.num_records
+        page.set_rows([
+            r for r, rec_id in zip(page_data.rows, page_data.ids)
+            if not rec_id in self._local_ids
+        ])
+
+        #Pages are added even if all their records have been inserted in
+        #the model so that the next page starts after them
+        start = self._row_count
+        if len(page) == 0:
+            if page_data.num_records > 0:
+                self._pages.append(page)
+                self._offsets.append(start)
+
+            return
+
+        self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+        self._pages.append(page)
+        self._offsets.append(start)
+        self._row_count += len(page)
+        self.endInsertRows()
+
+        self._touch_page(len(self._pages) - 1)
+
+    def _fill_page(self, page_idx, page_data):
+        page = self._pages[page_idx]
+        if page.loaded:
+            return
+
+        #Records inserted in the model are shown in the pinned pages, as
+        #when the page was appended. Pad the page if records have been
+        #deleted by other users.
+        rows = [
+            r for r, rec_id in zip(page_data.rows, page_data.ids)
+            if not rec_id in self._local_ids
+        ][:len(page)]
+        rows.extend([self._empty_row() for i in range(len(page) - len(rows))])
+        page.set_rows(rows)
+        self._touch_page(page_idx)
+
+        self._emit_page_changed(page_idx)
+
+    def _emit_page_changed(self, page_idx):
+        page = self._pages[page_idx]
+        if len(page) == 0:
+            return
+
+        start = self._offsets[page_idx]
+        self.dataChanged.emit(
+            self.index(start, 0),
+            self.index(start + len(page) - 1, self.columnCount() - 1)
+        )
+
+    def _load_page(self, page_idx):
+        #Fetches the records of an evicted page again
+        page = self._pages[page_idx]
+        self._request_page(page_idx, page.key, page.num_db_records)
+
+    def _page_for_row(self, row):
+        #Returns the page containing the row and the row index in the page,
+        #the page is None if it is being loaded in the background
+        page_idx = self._page_index(row)
+        page = self._pages[page_idx]
+        if not page.loaded:
+            self._load_page(page_idx)
+            if not page.loaded:
+                return None, -1
+        self._touch_page(page_idx)
+
+        return page, row - self._offsets[page_idx]
+
+    def _row(self, row):
+        page, page_row = self._page_for_row(row)
+        if page is None:
+            return None
+
+        return page.rows[page_row]
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return self._row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self._headerdata)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+
+        return not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+
+        limit = self._page_size
+        if self._max_rows > 0:
+            limit = min(limit, self._max_rows - self._row_count)
+
+        if limit <= 0:
+            self._exhausted = True
+
+            return
+
+        key = self._pages[-1].end_key if len(self._pages) > 0 else None
+        self._request_page(len(self._pages), key, limit)
+
+    def record_id(self, row):
+        """
+        :param row: Row number.
+        :type row: int
+        :return: Primary key of the record in the given row, None if the
+        row is being loaded.
+        """
+        return self.data(self.index(row, 0), Qt.DisplayRole)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+
+        if index.row() >= self._row_count:
+            return None
+
+        values = self._row(index.row())
+        if values is None:
+            return None
+
+        indexData = values[index.column()]
+
+        #Decimal not supported by QVariant so we adapt it to a supported type
+        if isinstance(indexData, Decimal):
+            return str(indexData)
+
+        return indexData
+
+    def headerData(self, section, orientation, role):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self._headerdata[section]
+
+        elif orientation == Qt.Vertical and role == Qt.DisplayRole:
+            return section + 1
+
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+
+        row = index.row()
+        values = self._row(row)
+        if values is None:
+            return False
+
+        values[index.column()] = value
+
+        #Keep the edited values instead of fetching the record again
+        self._pin_page(self._page_index(row))
+
+        if index.column() == 0 and value is not None:
+            self._local_ids.add(value)
+
+        self.dataChanged.emit(index, index)
+
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemIsEnabled
+
+        return Qt.ItemIsEditable|Qt.ItemIsSelectable|Qt.ItemIsEnabled
+
+    def insertRows(self, position, rows, parent=QModelIndex()):
+        if position < 0 or position > self._row_count:
+            return False
+
+        if position == self._row_count:
+            #Rows appended to the model go to a page of their own, starting
+            #after the last record fetched
+            if len(self._pages) == 0 or not self._pages[-1].pinned:
+                last_key = self._pages[-1].end_key \
+                    if len(self._pages) > 0 else None
+                self._pages.append(_RecordPage(last_key))
+                self._offsets.append(self._row_count)
+            page_idx = len(self._pages) - 1
+
+        else:
+            page_idx = self._page_index(position)
+
+        page = self._pages[page_idx]
+        if not page.loaded:
+            #Rows cannot be inserted in a page being loaded
+            self._load_page(page_idx)
+            if not page.loaded:
+                return False
+        self._pin_page(page_idx)
+        page_row = position - self._offsets[page_idx]
+
+        self.beginInsertRows(parent, position, position + rows - 1)
+
+        for i in range(rows):
+            #Initialize column values for the new row
+            values = ["" for c in range(self.columnCount())]
+            page.rows.insert(page_row, values)
+            page.local.insert(page_row, True)
+            page.length += 1
+
+        self._update_offsets()
+        if self._total is not None:
+            self._total += rows
+
+        self.endInsertRows()
+
+        return True
+
+    def removeRows(self, position, count, parent=QModelIndex()):
+        if position < 0 or position + count > self._row_count:
+            return False
+
+        self.beginRemoveRows(parent, position, position + count - 1)
+
         for i in range(count):
-            try:
-                del self._initData[position]
-            except IndexError:
-                pass
+            page_idx = self._page_index(position)
+            page = self._pages[page_idx]
+            page_row = position - self._offsets[page_idx]
+
+            #Evicted pages only contain records fetched from the database
+            if not page.loaded or not page.local[page_row]:
+                page.num_db_records -= 1
+            if page.loaded:
+                del page.rows[page_row]
+                del page.local[page_row]
+            page.length -= 1
+
+            if page_idx in self._lru_pages:
+                self._num_lru_rows -= 1
+
+            self._update_offsets()
+
+        if self._total is not None:
+            self._total = max(0, self._total - count)
 
         self.endRemoveRows()
 
@@ -547,6 +1341,17 @@ class VerticalHeaderSortFilterProxyModel(QSortFilterProxyModel):
 
         return super(VerticalHeaderSortFilterProxyModel, self).headerData(section, orientation, role)
 
+    def sort(self, column, order=Qt.AscendingOrder):
+        #Columnar source models sort their columns directly, which is much
+        #faster than comparing the rows in the proxy model
+        source_model = self.sourceModel()
+        if isinstance(source_model, BaseSTDMTableModel):
+            source_model.sort(column, order, self.sortCaseSensitivity())
+
+            return
+
+        super(VerticalHeaderSortFilterProxyModel, self).sort(column, order)
+
 class STRTreeViewModel(QAbstractItemModel):
     """
     Model for rendering social tenure relationship nodes in a tree view.
@@ -0,0 +1,361 @@
+"""
+/***************************************************************************
+Name                 : Record Loader
+Description          : Fetches and formats pages of entity records in a
+                       worker thread with its own database session so that
+                       the entity browser remains responsive while records
+                       are loaded.
+Date                 : 19/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import logging
+import threading
+from collections import namedtuple
+from Queue import Queue
+
+from PyQt4.QtCore import (
+    pyqtSignal,
+    QThread
+)
+
+from sqlalchemy import (
+    and_,
+    or_
+)
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import sessionmaker
+
+from stdm.data.database import (
+    STDMDb,
+    StatementCounter
+)
+
+LOGGER = logging.getLogger('stdm')
+
+# Loaders still running, referenced until they finish since the threads
+# are not parented to the models that use them
+_running_loaders = set()
+
+# Formatted rows of a page of records, the primary keys of the rows, the
+# sort key of the last record and the number of records fetched
+RecordPageData = namedtuple(
+    'RecordPageData',
+    ['rows', 'ids', 'end_key', 'num_records']
+)
+
+
+class RecordPager(object):
+    """
+    Fetches pages of entity records using keyset pagination on the sort
+    column, so that fetching a page deep in the table is as fast as
+    fetching the first one, and formats the values of each record for
+    display.
+    """
+    def __init__(self, id_column, attrs, sort_column=None, descending=False,
+                 formatters=None, load_options=None):
+        """
+        :param id_column: Primary key attribute of the entity model, used
+        to order records with the same sort value.
+        :type id_column: InstrumentedAttribute
+        :param attrs: Names of the model attributes in the order of the
+        table columns.
+        :type attrs: list
+        :param sort_column: Model attribute that the records are sorted by,
+        the primary key if None.
+        :type sort_column: InstrumentedAttribute
+        :param descending: True to sort the records in descending order.
+        :type descending: bool
+        :param formatters: Objects whose 'format_column_value' method
+        formats the values of the attribute used as the key. Formatters
+        with a 'prefetch' method are given the attribute values of each page
+        and the session the page was fetched in so that they can load the
+        display values in one query.
+        :type formatters: dict
+        :param load_options: Loader options applied when fetching records,
+        e.g. to eagerly load the collections displayed in the table.
+        :type load_options: list
+        """
+        self.id_column = id_column
+        self.attrs = attrs
+        self.sort_column = sort_column if sort_column is not None \
+            else id_column
+        self.descending = descending
+        self.formatters = formatters or {}
+        self.load_options = load_options or []
+
+    def record_key(self, record):
+        """
+        :return: Sort key of the record.
+        :rtype: tuple
+        """
+        return (
+            getattr(record, self.sort_column.key),
+            getattr(record, self.id_column.key)
+        )
+
+    def key_filter(self, key):
+        """
+        :param key: Sort key of a record.
+        :type key: tuple
+        :return: Condition for the records following the key in the sort
+        order. PostgreSQL sorts nulls last in ascending order and first in
+        descending order.
+        """
+        col, id_col = self.sort_column, self.id_column
+        value, rec_id = key
+
+        if col is id_col:
+            return id_col < rec_id if self.descending else id_col > rec_id
+
+        if self.descending:
+            if value is None:
+                return or_(
+                    col.isnot(None), and_(col.is_(None), id_col < rec_id)
+                )
+
+            return or_(col < value, and_(col == value, id_col < rec_id))
+
+        if value is None:
+            return and_(col.is_(None), id_col > rec_id)
+
+        return or_(
+            col > value, col.is_(None), and_(col == value, id_col > rec_id)
+        )
+
+    def _prefetch(self, records, session):
+        # Lets the formatters load the display values of the page at once
+        for attr, formatter in self.formatters.iteritems():
+            prefetch = getattr(formatter, 'prefetch', None)
+            if prefetch is None:
+                continue
+
+            values = set(getattr(r, attr) for r in records)
+            values.discard(None)
+            if len(values) > 0:
+                prefetch(values, session)
+
+    def format_record(self, record):
+        """
+        :return: Display values of the record.
+        :rtype: list
+        """
+        row = []
+        for attr in self.attrs:
+            attr_val = getattr(record, attr)
+
+            # No need of formatter for None value
+            if attr_val is not None and attr in self.formatters:
+                formatter = self.formatters[attr]
+                attr_val = formatter.format_column_value(attr_val)
+
+            row.append(attr_val)
+
+        return row
+
+    def fetch(self, query, key, limit):
+        """
+        Fetches and formats the records following the key in the sort
+        order.
+        :param query: Unordered query of the entity model objects.
+        :type query: Query
+        :param key: Sort key of the record preceding the page, None for
+        the first page.
+        :type key: tuple
+        :param limit: Maximum number of records.
+        :type limit: int
+        :rtype: RecordPageData
+        """
+        if key is not None:
+            query = query.filter(self.key_filter(key))
+
+        if len(self.load_options) > 0:
+            query = query.options(*self.load_options)
+
+        if self.descending:
+            ordering = [self.sort_column.desc(), self.id_column.desc()]
+        else:
+            ordering = [self.sort_column.asc(), self.id_column.asc()]
+
+        with StatementCounter(query.session.get_bind()) as counter:
+            records = query.order_by(*ordering).limit(limit).all()
+            self._prefetch(records, query.session)
+            rows = [self.format_record(r) for r in records]
+
+        LOGGER.debug(
+            '%s records fetched in %s queries.', len(records), counter.count
+        )
+
+        end_key = key
+        if len(records) > 0:
+            end_key = self.record_key(records[-1])
+
+        return RecordPageData(
+            rows,
+            [getattr(r, self.id_column.key) for r in records],
+            end_key,
+            len(records)
+        )
+
+
+class RecordLoader(QThread):
+    """
+    Fetches pages of records in a worker thread using its own database
+    session. Pages are requested with a generation number, requests of
+    earlier generations are discarded and their running query is
+    cancelled in the database once a later generation is set, e.g. when
+    the records are filtered again. The GUI thread never waits for the
+    worker thread, pages requested while the thread is stopping are
+    fetched once it has been started again.
+    """
+    # Generation, page index and RecordPageData
+    page_loaded = pyqtSignal(int, int, object)
+
+    # Generation, page index and error message
+    load_failed = pyqtSignal(int, int, unicode)
+
+    def __init__(self):
+        QThread.__init__(self)
+        self._requests = Queue()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._running_generation = None
+        self._dbapi_connection = None
+
+        self.finished.connect(self._on_finished)
+
+    def _start(self):
+        _running_loaders.add(self)
+        self.start()
+
+    def _on_finished(self):
+        # Requests queued after the thread was stopped are processed by a
+        # new run of the thread
+        if self.isRunning():
+            return
+
+        if self._requests.empty():
+            _running_loaders.discard(self)
+        else:
+            self._start()
+
+    def request(self, generation, page_index, pager, query, key, limit):
+        """
+        Queues a page of records for fetching, the thread is started if it
+        is not running.
+        :param generation: Generation of the request.
+        :type generation: int
+        :param page_index: Index of the page, emitted with the records.
+        :type page_index: int
+        :param pager: Pager that fetches and formats the records, or any
+        object with a compatible 'fetch' method whose result is emitted.
+        :type pager: RecordPager
+        :param query: Query of the records, it is run in the session of
+        the loader.
+        :type query: Query
+        :param key: Sort key of the record preceding the page.
+        :type key: tuple
+        :param limit: Maximum number of records.
+        :type limit: int
+        """
+        self._requests.put((generation, page_index, pager, query, key, limit))
+
+        if not self.isRunning():
+            self._start()
+
+    def cancel(self, generation):
+        """
+        Discards the requests of the earlier generations and cancels the
+        query of the page being fetched if it belongs to one of them.
+        :param generation: Current generation.
+        :type generation: int
+        """
+        with self._lock:
+            self._generation = generation
+            if self._running_generation is None or \
+                    self._running_generation >= generation or \
+                    self._dbapi_connection is None:
+                return
+
+            try:
+                self._dbapi_connection.cancel()
+            except Exception as ex:
+                LOGGER.debug('Page query could not be cancelled: %s', ex)
+
+    def stop(self):
+        """
+        Stops the thread once the pending requests have been processed,
+        it is started again if another page is requested. Requests should
+        be cancelled beforehand if their pages are no longer needed.
+        """
+        if self.isRunning() or not self._requests.empty():
+            self._requests.put(None)
+
+    def _is_current(self, generation):
+        with self._lock:
+            return generation >= self._generation
+
+    def _fetch(self, session, request):
+        generation, page_index, pager, query, key, limit = request
+
+        with self._lock:
+            if generation < self._generation:
+                return
+            self._running_generation = generation
+            self._dbapi_connection = \
+                session.connection().connection.connection
+
+        try:
+            page = pager.fetch(query.with_session(session), key, limit)
+
+        except Exception as ex:
+            session.rollback()
+            if self._is_current(generation):
+                LOGGER.debug('Page of records could not be loaded: %s', ex)
+                self.load_failed.emit(generation, page_index, unicode(ex))
+
+            return
+
+        finally:
+            with self._lock:
+                self._running_generation = None
+                self._dbapi_connection = None
+
+        # End the transaction so that the next page includes the changes
+        # committed meanwhile, the records are no longer needed once they
+        # have been formatted.
+        session.rollback()
+        session.expunge_all()
+
+        if self._is_current(generation):
+            self.page_loaded.emit(generation, page_index, page)
+
+    def run(self):
+        try:
+            session = sessionmaker(bind=STDMDb.instance().engine)()
+        except SQLAlchemyError as ex:
+            LOGGER.debug('Record loader session failed: %s', ex)
+
+            return
+
+        try:
+            while True:
+                request = self._requests.get()
+                if request is None:
+                    break
+
+                self._fetch(session, request)
+
+        finally:
+            session.close()
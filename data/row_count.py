@@ -0,0 +1,292 @@
+"""
+/***************************************************************************
+Name                 : Row Count
+Description          : Counts query rows in a background thread using a
+                       separate database connection so that the count can be
+                       cancelled once its result is no longer needed, and
+                       provides instant row estimates of large tables.
+Date                 : 19/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import logging
+import threading
+
+from PyQt4.QtCore import (
+    pyqtSignal,
+    QObject,
+    QThread
+)
+
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.expression import (
+    select,
+    table
+)
+
+from stdm.data.database import STDMDb
+from stdm.data.pg_utils import pg_table_estimate
+
+LOGGER = logging.getLogger('stdm')
+
+# Counts still running, referenced until they finish since the threads
+# are not parented to the widgets that started them
+_running_counts = set()
+
+# Tables with fewer estimated rows are counted exactly in the background
+EXACT_COUNT_LIMIT = 100000
+
+
+def count_text(count, exact=True):
+    """
+    :param count: Number of rows.
+    :type count: int
+    :param exact: False if the count is an estimate.
+    :type exact: bool
+    :return: Count for display, estimates are prefixed with a tilde.
+    :rtype: unicode
+    """
+    if exact:
+        return unicode(count)
+
+    return u'~{0}'.format(count)
+
+
+class BackgroundCount(QThread):
+    """
+    Counts the rows of a query in a worker thread. The count query runs in
+    its own connection and is cancelled in the database when 'cancel' is
+    called, in which case the 'counted' signal is not emitted.
+    """
+    counted = pyqtSignal(int)
+
+    def __init__(self, statement):
+        """
+        :param statement: Select statement returning the count.
+        """
+        QThread.__init__(self)
+        self._statement = statement
+        self._lock = threading.Lock()
+        self._dbapi_connection = None
+        self._cancelled = False
+
+        self.finished.connect(self._on_finished)
+
+    @classmethod
+    def from_query(cls, query, id_column):
+        """
+        Creates a count of the records returned by an ORM query.
+        :param query: Entity query.
+        :type query: Query
+        :param id_column: Primary key attribute of the entity model.
+        :type id_column: InstrumentedAttribute
+        :rtype: BackgroundCount
+        """
+        count_query = query.with_entities(func.count(id_column)).order_by(
+            None
+        )
+
+        return cls(count_query.statement)
+
+    @classmethod
+    def from_table(cls, table_name):
+        """
+        Creates a count of the rows in a table.
+        :param table_name: Name of the table.
+        :type table_name: str
+        :rtype: BackgroundCount
+        """
+        return cls(select([func.count()]).select_from(table(table_name)))
+
+    def start(self, *args):
+        _running_counts.add(self)
+        QThread.start(self, *args)
+
+    def _on_finished(self):
+        _running_counts.discard(self)
+
+    def is_cancelled(self):
+        """
+        :return: True if the count has been cancelled.
+        :rtype: bool
+        """
+        return self._cancelled
+
+    def cancel(self):
+        """
+        Cancels the count, the query is cancelled in the database if it is
+        running.
+        """
+        with self._lock:
+            self._cancelled = True
+            if self._dbapi_connection is None:
+                return
+
+            try:
+                self._dbapi_connection.cancel()
+            except Exception as ex:
+                LOGGER.debug('Count could not be cancelled: %s', ex)
+
+    def run(self):
+        try:
+            conn = STDMDb.instance().engine.connect()
+        except SQLAlchemyError as ex:
+            LOGGER.debug('Count connection failed: %s', ex)
+
+            return
+
+        try:
+            with self._lock:
+                if self._cancelled:
+                    return
+                self._dbapi_connection = conn.connection.connection
+
+            count = conn.execute(self._statement).scalar()
+
+        except SQLAlchemyError as ex:
+            if not self._cancelled:
+                LOGGER.debug('Count failed: %s', ex)
+
+            return
+
+        finally:
+            with self._lock:
+                self._dbapi_connection = None
+            conn.close()
+
+        if not self._cancelled:
+            self.counted.emit(count)
+
+
+class TableRowCount(QObject):
+    """
+    Number of rows in a table. The estimate of the planner statistics is
+    available at once and the exact count is made in the background when
+    'start' is called if the table is small, or when 'count_exactly' is
+    called e.g. at the request of the user, so that large tables are not
+    scanned just to display their size.
+    """
+    # Emitted with the exact number of rows once counted
+    counted = pyqtSignal(int)
+
+    def __init__(self, table_name, parent=None):
+        """
+        :param table_name: Name of the table.
+        :type table_name: str
+        """
+        QObject.__init__(self, parent)
+        self._table_name = table_name
+        self._exact = None
+        self._count = None
+
+        try:
+            self._estimate = pg_table_estimate(table_name)
+        except SQLAlchemyError as ex:
+            LOGGER.debug('Row estimate failed: %s', ex)
+            self._estimate = None
+
+    def estimate(self):
+        """
+        :return: Estimated number of rows, None if the table has no
+        statistics.
+        :rtype: int
+        """
+        return self._estimate
+
+    def exact(self):
+        """
+        :return: Exact number of rows, None until counted.
+        :rtype: int
+        """
+        return self._exact
+
+    def is_exact(self):
+        """
+        :return: True if the rows have been counted.
+        :rtype: bool
+        """
+        return self._exact is not None
+
+    def value(self):
+        """
+        :return: Exact number of rows if counted, otherwise the estimate
+        or 0 if there is none.
+        :rtype: int
+        """
+        if self._exact is not None:
+            return self._exact
+
+        return self._estimate or 0
+
+    def text(self):
+        """
+        :return: Number of rows for display.
+        :rtype: unicode
+        """
+        return count_text(self.value(), self.is_exact())
+
+    def is_counting(self):
+        """
+        :return: True if the exact count is running.
+        :rtype: bool
+        """
+        return self._count is not None
+
+    def start(self, limit=EXACT_COUNT_LIMIT):
+        """
+        Counts the rows exactly in the background if the table has fewer
+        estimated rows than the limit or no estimate.
+        :param limit: Maximum estimated number of rows.
+        :type limit: int
+        :return: True if the rows are being counted.
+        :rtype: bool
+        """
+        if self._estimate is None or self._estimate < limit:
+            self.count_exactly()
+
+        return self.is_counting()
+
+    def count_exactly(self):
+        """
+        Counts the rows exactly in the background, 'counted' is emitted
+        once done.
+        """
+        if self._count is not None or self._exact is not None:
+            return
+
+        self._count = BackgroundCount.from_table(self._table_name)
+        self._count.counted.connect(self._on_counted)
+        self._count.finished.connect(self._on_count_finished)
+        self._count.start()
+
+    def cancel(self):
+        """
+        Cancels the exact count if it is running.
+        """
+        if self._count is not None:
+            self._count.cancel()
+            self._count = None
+
+    def _on_count_finished(self):
+        if self.sender() is self._count:
+            self._count = None
+
+    def _on_counted(self, count):
+        if self.sender() is not self._count:
+            return
+
+        self._count = None
+        self._exact = count
+        self.counted.emit(count)
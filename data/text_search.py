@@ -0,0 +1,262 @@
+"""
+/***************************************************************************
+Name                 : Text Search
+Description          : Ranked prefix, substring and similarity searches of
+                       text columns backed by trigram indexes.
+Date                 : 19/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import logging
+
+from PyQt4.QtCore import QThread
+
+from sqlalchemy import (
+    case,
+    func,
+    or_
+)
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Query
+
+from stdm.data.pg_utils import (
+    add_trigram_index,
+    add_validity_period_index,
+    create_pg_trgm,
+    pg_trgm_exists
+)
+
+LOGGER = logging.getLogger('stdm')
+
+#Maximum number of records returned by a search
+SEARCH_LIMIT = 500
+
+#Whether the pg_trgm extension is installed, checked once per session
+_trgm_available = None
+
+#Indexers still running, referenced until they finish
+_running_indexers = set()
+
+
+def trigram_search_available():
+    """
+    :return: True if similarity searches can be used, i.e. the pg_trgm
+    extension is installed.
+    :rtype: bool
+    """
+    global _trgm_available
+
+    if _trgm_available is None:
+        try:
+            _trgm_available = pg_trgm_exists()
+        except SQLAlchemyError as ex:
+            LOGGER.debug('pg_trgm could not be checked: %s', ex)
+            _trgm_available = False
+
+    return _trgm_available
+
+
+def _escape_like(term):
+    #Escapes the LIKE wildcards in the search term
+    for c in ('\\', '%', '_'):
+        term = term.replace(c, u'\\' + c)
+
+    return term
+
+
+def text_match_query(query, column, term, id_column=None,
+                     limit=SEARCH_LIMIT):
+    """
+    Filters the query to the records whose column value contains the search
+    term or, if the pg_trgm extension is installed, is similar to it. The
+    records are ranked by exact, prefix, substring and then similar matches.
+    Case is ignored. The conditions use the lower case values of the column
+    so they are served by the index created by
+    pg_utils.add_trigram_index.
+    :param query: Query of the records.
+    :type query: Query
+    :param column: Text column that is searched.
+    :type column: InstrumentedAttribute
+    :param term: Search term.
+    :type term: str
+    :param id_column: Column ordering records of the same rank.
+    :type id_column: InstrumentedAttribute
+    :param limit: Maximum number of records, no limit if None.
+    :type limit: int
+    :return: Filtered and ordered query.
+    :rtype: Query
+    """
+    term = term.lower()
+    lower_col = func.lower(column)
+    escaped = _escape_like(term)
+
+    conditions = [lower_col.like(u'%' + escaped + u'%')]
+    rank = case(
+        [
+            (lower_col == term, 0),
+            (lower_col.like(escaped + u'%'), 1),
+            (lower_col.like(u'%' + escaped + u'%'), 2)
+        ],
+        else_=3
+    )
+    ordering = [rank]
+
+    if trigram_search_available():
+        #'%' is the similarity operator of pg_trgm, doubled for the driver
+        conditions.append(lower_col.op('%%')(term))
+        ordering.append(func.similarity(lower_col, term).desc())
+
+    if id_column is not None:
+        ordering.append(id_column)
+
+    query = query.filter(or_(*conditions)).order_by(*ordering)
+    if limit is not None:
+        query = query.limit(limit)
+
+    return query
+
+
+def prefix_values_query(column, prefix):
+    """
+    Creates a query of the distinct values of a text column that start with
+    the prefix, ignoring the case, in alphabetical order. The condition is
+    served by the index created by pg_utils.add_trigram_index.
+    :param column: Text column.
+    :type column: InstrumentedAttribute
+    :param prefix: Prefix of the values.
+    :type prefix: str
+    :return: Query that is not bound to a session, e.g. to be run by a
+    RecordLoader.
+    :rtype: Query
+    """
+    lower_col = func.lower(column)
+    like = _escape_like(prefix.lower()) + u'%'
+
+    return Query([column]).filter(lower_col.like(like)).distinct().order_by(
+        column
+    )
+
+
+class SearchIndexer(QThread):
+    """
+    Creates the pg_trgm extension and the trigram indexes of the searched
+    text columns, and the validity period indexes of the social tenure
+    relationship tables, in a worker thread, since building the index of a
+    large table takes a while. The indexes are built concurrently so the
+    tables can still be edited. Failures, e.g. when the user is not allowed
+    to create extensions or indexes, are only logged as searches still work
+    without the indexes.
+    """
+    def __init__(self, columns, validity_tables=None, parent=None):
+        """
+        :param columns: Names of the tables and text columns to index.
+        :type columns: list
+        :param validity_tables: Names of the social tenure relationship
+        tables whose validity periods are searched.
+        :type validity_tables: list
+        :param parent: Parent object.
+        :type parent: QObject
+        """
+        QThread.__init__(self, parent)
+        self._columns = columns
+        self._validity_tables = validity_tables or []
+
+        self.finished.connect(self._on_finished)
+
+    def _on_finished(self):
+        global _trgm_available
+
+        _running_indexers.discard(self)
+        #Check the extension again for the next searches
+        _trgm_available = None
+
+    def start(self):
+        """
+        Starts creating the indexes.
+        """
+        _running_indexers.add(self)
+        QThread.start(self)
+
+    def run(self):
+        for table_name in self._validity_tables:
+            try:
+                if add_validity_period_index(table_name):
+                    LOGGER.debug(
+                        'Validity period index created on %s', table_name
+                    )
+
+            except SQLAlchemyError as ex:
+                LOGGER.debug(
+                    'Validity period index on %s not created: %s',
+                    table_name, ex
+                )
+
+        try:
+            if not pg_trgm_exists():
+                create_pg_trgm()
+
+        except SQLAlchemyError as ex:
+            LOGGER.debug('pg_trgm extension unavailable: %s', ex)
+
+            return
+
+        for table_name, column_name in self._columns:
+            try:
+                if add_trigram_index(table_name, column_name):
+                    LOGGER.debug(
+                        'Search index created on %s.%s', table_name,
+                        column_name
+                    )
+
+            except SQLAlchemyError as ex:
+                LOGGER.debug(
+                    'Search index on %s.%s not created: %s', table_name,
+                    column_name, ex
+                )
+
+
+def search_index_columns(profile):
+    """
+    :param profile: Profile whose entities are searched in the STR view.
+    :type profile: Profile
+    :return: Names of the tables and columns of the searchable text columns
+    of the party and spatial unit entities, and of the values of their
+    searchable lookup columns.
+    :rtype: list
+    """
+    social_tenure = profile.social_tenure
+    columns = []
+    for entity in social_tenure.parties + social_tenure.spatial_units:
+        for c in entity.columns.values():
+            if not c.searchable:
+                continue
+
+            if c.TYPE_INFO in ('VARCHAR', 'TEXT'):
+                columns.append((entity.name, c.name))
+            elif c.TYPE_INFO == 'LOOKUP' and c.value_list is not None:
+                columns.append((c.value_list.name, 'value'))
+
+    return columns
+
+
+def create_search_indexes(profile):
+    """
+    Creates the search indexes of the profile in the background, once its
+    tables have been created or updated.
+    :param profile: Profile whose entities are searched in the STR view.
+    :type profile: Profile
+    """
+    SearchIndexer(
+        search_index_columns(profile), [profile.social_tenure.name]
+    ).start()
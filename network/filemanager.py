@@ -37,6 +37,10 @@ from stdm.utils.util import (
 )
 from stdm.settings import current_profile
 
+# Size of the blocks read when copying documents to the repository. Large
+# blocks reduce the number of round trips to network shares.
+DOCUMENT_BUFFER_SIZE = 1048576
+
 class NetworkFileManager(QObject):
     """
     Provides methods for managing the upload and download of source
@@ -99,7 +103,7 @@ class NetworkFileManager(QObject):
         #srcLen = self.sourceFile.bytesAvailable()
         totalRead = 0
         while True:
-            inbytes = srcFile.read(4096)
+            inbytes = srcFile.read(DOCUMENT_BUFFER_SIZE)
             if not inbytes:
                 break   
             destinationFile.write(inbytes)
@@ -75,6 +75,10 @@ from stdm.data.database import (
     NoPostGISError,
     STDMDb
 )
+from stdm.data.display_cache import DisplayValueCache
+from stdm.data.expression_evaluator import clear_expression_evaluators
+from stdm.ui.forms.form_template import clear_form_templates
+from stdm.data.model_cache import EntityModelCache
 from stdm.data.pg_utils import (
     pg_table_exists,
     spatial_tables,
@@ -207,7 +211,6 @@ class STDMQGISLoader(object):
         # STDM Tables
         self.stdmTables = []
         self.entity_formatters = {}
-        self.entity_table_model = {}
         self.stdm_config = StdmConfiguration.instance()
         self.reg_config = RegistryConfig()
         self.spatialLayerMangerDockWidget = None
@@ -2028,6 +2031,13 @@ class STDMQGISLoader(object):
             # Remove Spatial Unit Manager
             self.remove_spatial_unit_mgr()
 
+            # Discard the records, display values, expressions and form
+            # templates cached for the entity browsers and forms
+            EntityModelCache.instance().clear()
+            DisplayValueCache.instance().clear()
+            clear_expression_evaluators()
+            clear_form_templates()
+
             self.details_dock.close_dock()
 
             if not reload_plugin:
@@ -0,0 +1,127 @@
+"""
+Compares the export throughput to a GeoPackage of the former per-feature
+writes, i.e. every value converted to a UTF-8 string, WKT geometries and no
+OGR transactions, against OGRWriter.write_features with WKB geometries for
+1M generated rows.
+
+The former approach syncs the GeoPackage journal for every feature so it
+is only timed for a sample of the rows.
+
+Run with:
+
+    python -m stdm.tests.benchmarks.bench_export_features [--rows N]
+"""
+import argparse
+import datetime
+import decimal
+import os
+import random
+import shutil
+import tempfile
+import time
+
+try:
+    from osgeo import ogr
+    from osgeo import osr
+except:
+    import ogr
+    import osr
+
+from stdm.data.importexport.writer import OGRWriter
+
+NUM_ROWS = 1000000
+NUM_LEGACY_ROWS = 20000
+SRID = 32737
+
+# Name and OGR type of the exported fields
+FIELDS = [
+    ('id', ogr.OFTInteger),
+    ('first_name', ogr.OFTString),
+    ('area', ogr.OFTReal),
+    ('reg_date', ogr.OFTDate)
+]
+
+
+def _rows(num_rows, wkb=True):
+    # Rows in the same form as the export query i.e. fields then geometry
+    start_date = datetime.date(2000, 1, 1)
+    for i in range(num_rows):
+        point = ogr.Geometry(ogr.wkbPoint)
+        point.AddPoint_2D(random.uniform(200000, 800000),
+                          random.uniform(9000000, 9900000))
+        if wkb:
+            geom = buffer(point.ExportToWkb())
+        else:
+            geom = point.ExportToWkt()
+        yield (
+            i + 1,
+            u'Name {0:d}'.format(i),
+            decimal.Decimal('{0:.2f}'.format(random.uniform(10, 5000))),
+            start_date + datetime.timedelta(days=i % 7000),
+            geom
+        )
+
+
+def _create_layer(path):
+    ds = ogr.GetDriverByName('GPKG').CreateDataSource(path)
+    crs = osr.SpatialReference()
+    crs.ImportFromEPSG(SRID)
+    lyr = ds.CreateLayer('parcels', crs, ogr.wkbPoint)
+    for name, ogr_type in FIELDS:
+        lyr.CreateField(ogr.FieldDefn(name, ogr_type))
+
+    return ds, lyr
+
+
+def _write_legacy(lyr, rows):
+    # Former db2Feat loop, dates were exported as strings
+    geom_index = len(FIELDS)
+    for r in rows:
+        feat = ogr.Feature(lyr.GetLayerDefn())
+        for i in range(geom_index):
+            feat.SetField(i, unicode(r[i]).encode('utf-8'))
+        feat.SetGeometry(ogr.CreateGeometryFromWkt(r[geom_index]))
+        lyr.CreateFeature(feat)
+        feat.Destroy()
+
+
+def run(num_rows=NUM_ROWS, num_legacy_rows=NUM_LEGACY_ROWS):
+    out_dir = tempfile.mkdtemp()
+    field_types = [t for _, t in FIELDS]
+
+    try:
+        ds, lyr = _create_layer(os.path.join(out_dir, 'legacy.gpkg'))
+        start = time.time()
+        _write_legacy(lyr, _rows(num_legacy_rows, False))
+        ds = None
+        legacy_rate = num_legacy_rows / (time.time() - start)
+
+        path = os.path.join(out_dir, 'streaming.gpkg')
+        ds, lyr = _create_layer(path)
+        writer = OGRWriter(path)
+        start = time.time()
+        writer.write_features(lyr, _rows(num_rows), field_types,
+                              len(FIELDS))
+        ds = None
+        streaming_time = time.time() - start
+        streaming_rate = num_rows / streaming_time
+
+    finally:
+        shutil.rmtree(out_dir)
+
+    print('Rows:             {0:d}'.format(num_rows))
+    print('Per feature:      {0:.0f} rows/s ({1:d} row sample)'.format(
+        legacy_rate, num_legacy_rows))
+    print('Transactions:     {0:.0f} rows/s in {1:.1f}s'.format(
+        streaming_rate, streaming_time))
+    print('Estimated saving: {0:.1f}s'.format(
+        num_rows / legacy_rate - streaming_time))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=NUM_ROWS)
+    parser.add_argument('--legacy-rows', type=int, default=NUM_LEGACY_ROWS)
+    args = parser.parse_args()
+
+    run(args.rows, args.legacy_rows)
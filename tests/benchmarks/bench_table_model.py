@@ -0,0 +1,119 @@
+"""
+Compares the memory used by the former row based storage of
+BaseSTDMTableModel, i.e. a list of lists, against the columnar storage for
+rows formatted the same way as in the entity browser, and the time taken
+to sort them through a QSortFilterProxyModel against sorting the columns.
+
+Run with:
+
+    python -m stdm.tests.benchmarks.bench_table_model [--rows N]
+"""
+import argparse
+import datetime
+import decimal
+import random
+import sys
+import time
+
+from PyQt4.QtCore import (
+    QCoreApplication,
+    QSortFilterProxyModel,
+    Qt
+)
+
+from stdm.data.qtmodels import (
+    BaseSTDMTableModel,
+    VerticalHeaderSortFilterProxyModel
+)
+
+NUM_ROWS = 200000
+
+HEADERS = ['ID', 'First Name', 'Gender', 'Registration Date', 'Area', 'Age']
+
+# Lookup values and codes
+GENDERS = [(u'Male', u'M'), (u'Female', u'F'), (u'Other', u'O')]
+
+
+def _rows(num_rows):
+    # Lookup formatters create a new display string for every row
+    start_date = datetime.date(2000, 1, 1)
+    for i in range(num_rows):
+        gender = random.choice(GENDERS)
+        yield [
+            i + 1,
+            u'Name {0:d}'.format(random.randint(0, num_rows)),
+            u'{0} ({1})'.format(*gender),
+            start_date + datetime.timedelta(days=i % 7000),
+            decimal.Decimal('{0:.2f}'.format(random.uniform(10, 5000))),
+            random.randint(18, 90)
+        ]
+
+
+def _deep_size(obj, seen=None):
+    # Size of the object and the objects it references, counted once
+    if seen is None:
+        seen = set()
+
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (list, tuple)):
+        size += sum(_deep_size(o, seen) for o in obj)
+    elif isinstance(obj, dict):
+        size += sum(_deep_size(k, seen) + _deep_size(v, seen)
+                    for k, v in obj.iteritems())
+    elif hasattr(obj, '__slots__'):
+        size += sum(_deep_size(getattr(obj, a), seen)
+                    for a in obj.__slots__)
+
+    return size
+
+
+def _proxy_sort_time(model, column):
+    proxy = QSortFilterProxyModel()
+    proxy.setSourceModel(model)
+    proxy.setSortCaseSensitivity(Qt.CaseInsensitive)
+    start = time.time()
+    proxy.sort(column, Qt.AscendingOrder)
+
+    return time.time() - start
+
+
+def run(num_rows=NUM_ROWS):
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+    rows = list(_rows(num_rows))
+    num_cells = num_rows * len(HEADERS)
+    row_bytes = _deep_size(rows)
+
+    model = BaseSTDMTableModel(rows, HEADERS)
+    column_bytes = _deep_size(model._columns)
+
+    # The proxy compares the rows of the model, sorting them does not
+    # depend on the storage of the values.
+    proxy_time = _proxy_sort_time(model, 1)
+
+    proxy = VerticalHeaderSortFilterProxyModel()
+    proxy.setSourceModel(model)
+    proxy.setSortCaseSensitivity(Qt.CaseInsensitive)
+    start = time.time()
+    proxy.sort(1, Qt.AscendingOrder)
+    column_time = time.time() - start
+
+    print('Rows:            {0:d}'.format(num_rows))
+    print('List of lists:   {0:.1f} MB, {1:.0f} bytes per cell'.format(
+        row_bytes / 1048576.0, float(row_bytes) / num_cells))
+    print('Columnar:        {0:.1f} MB, {1:.0f} bytes per cell'.format(
+        column_bytes / 1048576.0, float(column_bytes) / num_cells))
+    print('Proxy sort:      {0:.2f}s'.format(proxy_time))
+    print('Column sort:     {0:.2f}s'.format(column_time))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=NUM_ROWS)
+    args = parser.parse_args()
+
+    run(args.rows)
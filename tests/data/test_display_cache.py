@@ -0,0 +1,79 @@
+from collections import namedtuple
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from stdm.data import display_cache
+from stdm.data.display_cache import ProfileDisplayValues
+
+Record = namedtuple('Record', ['id', 'name'])
+
+
+class CountingDisplayValues(ProfileDisplayValues):
+    """
+    Reads the parent records from a dictionary and keeps the primary keys
+    of each query.
+    """
+    def __init__(self, records):
+        ProfileDisplayValues.__init__(self, 'basic')
+        self.table_records = records
+        self.queries = []
+
+    def _execute(self, sql, params, session=None):
+        self.queries.append(sorted(params['ids']))
+
+        return [self.table_records[i] for i in params['ids']
+                if i in self.table_records]
+
+
+class TestProfileDisplayValues(TestCase):
+    def setUp(self):
+        self._max_records = display_cache.MAX_CACHED_RECORDS
+        self.values = CountingDisplayValues(
+            dict((i, Record(i, u'Person {0:d}'.format(i)))
+                 for i in range(1, 6))
+        )
+
+    def tearDown(self):
+        display_cache.MAX_CACHED_RECORDS = self._max_records
+
+    def test_prefetched_records(self):
+        self.values.prefetch_records('person', set([1, 2, 3]))
+
+        self.assertEqual(self.values.record('person', 2).name, u'Person 2')
+        self.assertEqual(self.values.queries, [[1, 2, 3]])
+
+    def test_missing_record(self):
+        self.assertIsNone(self.values.record('person', 9))
+        self.assertIsNone(self.values.record('person', 9))
+        self.values.prefetch_records('person', set([9]))
+
+        #Missing records are only queried once
+        self.assertEqual(self.values.queries, [[9]])
+
+    def test_invalidated_missing_record(self):
+        self.assertIsNone(self.values.record('person', 9))
+        self.values.table_records[9] = Record(9, u'Person 9')
+        self.values.invalidate_tables(set(['person']))
+
+        self.assertEqual(self.values.record('person', 9).name, u'Person 9')
+
+    def test_least_recently_used(self):
+        display_cache.MAX_CACHED_RECORDS = 2
+        self.values.record('person', 1)
+        self.values.record('person', 2)
+        self.values.record('person', 1)
+        self.values.record('person', 3)
+        self.values.queries = []
+
+        #Record 2 is discarded as record 1 was used since
+        self.values.record('person', 1)
+        self.values.record('person', 2)
+        self.assertEqual(self.values.queries, [[2]])
+
+
+def suite():
+    suite = makeSuite(TestProfileDisplayValues, 'test')
+
+    return suite
@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from stdm.data.importexport.document_ingestor import DocumentIngestor
+
+
+class Profile(object):
+    name = 'Basic'
+
+
+class Entity(object):
+    name = 'basic_household'
+    profile = Profile()
+
+
+class TestDocumentIngestor(TestCase):
+    def setUp(self):
+        self.repository = tempfile.mkdtemp()
+        self.source_dir = tempfile.mkdtemp()
+        self.ingestor = DocumentIngestor(Entity(), None, self.repository, 2)
+        self.directory = self.ingestor._doc_type_directory('Title Deed')
+
+    def tearDown(self):
+        self.ingestor.terminate()
+        shutil.rmtree(self.repository)
+        shutil.rmtree(self.source_dir)
+
+    def _source(self, name, contents):
+        path = os.path.join(self.source_dir, name)
+        with open(path, 'wb') as f:
+            f.write(contents)
+
+        return path
+
+    def _import(self, *paths):
+        #One record for each source document
+        for i, path in enumerate(paths):
+            self.ingestor.submit(path, 1, 'Title Deed')
+            self.ingestor.assign(i + 1)
+
+        return [doc for _, _, _, doc in self.ingestor._assigned_documents()]
+
+    def test_shared_source_document(self):
+        path = self._source('deed.pdf', 'deed')
+        first, second = self._import(path, path)
+
+        self.assertNotEqual(first.identifier, second.identifier)
+        self.assertFalse(first.reused)
+        self.assertTrue(second.reused)
+
+        #Deleting the document of one record keeps the other one
+        os.remove(first.path)
+        with open(os.path.join(
+                self.directory, second.identifier + '.pdf'), 'rb') as f:
+            self.assertEqual(f.read(), 'deed')
+
+    def test_same_contents(self):
+        first, second = self._import(
+            self._source('a.pdf', 'deed'), self._source('b.pdf', 'deed')
+        )
+
+        self.assertNotEqual(first.path, second.path)
+        os.remove(second.path)
+        self.assertTrue(os.path.isfile(first.path))
+
+    def test_existing_repository_file(self):
+        os.makedirs(self.directory)
+        existing = os.path.join(self.directory, 'existing.pdf')
+        with open(existing, 'wb') as f:
+            f.write('deed')
+
+        doc = self._import(self._source('deed.pdf', 'deed'))[0]
+
+        self.assertTrue(doc.reused)
+        self.assertNotEqual(doc.path, existing)
+        os.remove(doc.path)
+        self.assertTrue(os.path.isfile(existing))
+
+    def test_terminate_keeps_linked_files(self):
+        path = self._source('deed.pdf', 'deed')
+        self.ingestor.submit(path, 1, 'Title Deed')
+        self.ingestor.assign(1)
+        linked = self.ingestor._assigned_documents()[0]
+        store, doc = linked[2:]
+        store.keep(doc.path)
+
+        unlinked = store.link_copy(os.path.basename(doc.path))
+        self.ingestor.terminate()
+
+        self.assertTrue(os.path.isfile(doc.path))
+        self.assertFalse(os.path.isfile(
+            os.path.join(self.directory, unlinked + '.pdf')
+        ))
+
+
+def suite():
+    suite = makeSuite(TestDocumentIngestor, 'test')
+
+    return suite
@@ -0,0 +1,130 @@
+from datetime import date
+from decimal import Decimal
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Date,
+    Integer,
+    Numeric,
+    String
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.declarative import declarative_base
+
+from stdm.data.entity_filter import (
+    _contains_pattern,
+    _date_range,
+    entity_column_filter
+)
+
+Base = declarative_base()
+
+
+class Person(Base):
+    __tablename__ = 'person'
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    age = Column(Integer)
+    income = Column(Numeric)
+    married = Column(Boolean)
+    birth_date = Column(Date)
+
+
+class FilterColumn(object):
+    """
+    Entity column with the attributes used by the filter.
+    """
+    def __init__(self, name, type_info):
+        self.name = name
+        self.TYPE_INFO = type_info
+
+
+def _compile(expr):
+    compiled = expr.compile(dialect=postgresql.dialect())
+
+    return unicode(compiled), compiled.params
+
+
+class TestDateRange(TestCase):
+    def test_day(self):
+        self.assertEqual(
+            _date_range('2016-02-29'), (date(2016, 2, 29), date(2016, 3, 1))
+        )
+
+    def test_month(self):
+        self.assertEqual(
+            _date_range('2016-02'), (date(2016, 2, 1), date(2016, 3, 1))
+        )
+
+    def test_december(self):
+        self.assertEqual(
+            _date_range('2016-12'), (date(2016, 12, 1), date(2017, 1, 1))
+        )
+
+    def test_year(self):
+        self.assertEqual(
+            _date_range('2016'), (date(2016, 1, 1), date(2017, 1, 1))
+        )
+
+    def test_not_a_date(self):
+        self.assertIsNone(_date_range('2016-13'))
+        self.assertIsNone(_date_range('Nairobi'))
+
+
+class TestEntityColumnFilter(TestCase):
+    def _filter(self, name, type_info, text):
+        return entity_column_filter(
+            Person, FilterColumn(name, type_info), text
+        )
+
+    def test_empty_text(self):
+        self.assertIsNone(self._filter('name', 'VARCHAR', '  '))
+
+    def test_like_wildcards_escaped(self):
+        self.assertEqual(_contains_pattern(u'5%_^'), u'%5^%^_^^%')
+
+        sql, params = _compile(self._filter('name', 'VARCHAR', u' 5% '))
+        self.assertIn('ILIKE', sql.upper())
+        self.assertIn(u'5^%', params.values()[0])
+
+    def test_numeric(self):
+        sql, params = _compile(self._filter('income', 'DOUBLE', '12.50'))
+
+        self.assertIn('person.income =', sql)
+        self.assertEqual(params.values(), [Decimal('12.50')])
+
+    def test_not_a_number(self):
+        sql, params = _compile(self._filter('age', 'INT', 'twelve'))
+
+        self.assertEqual(sql, 'false')
+
+    def test_boolean(self):
+        sql, params = _compile(self._filter('married', 'BOOL', 'Yes'))
+        self.assertEqual(sql, 'person.married = true')
+
+        sql, params = _compile(self._filter('married', 'BOOL', 'n'))
+        self.assertEqual(sql, 'person.married = false')
+
+        sql, params = _compile(self._filter('married', 'BOOL', 'maybe'))
+        self.assertEqual(sql, 'false')
+
+    def test_date(self):
+        sql, params = _compile(self._filter('birth_date', 'DATE', '1980'))
+
+        self.assertIn('person.birth_date >=', sql)
+        self.assertIn('person.birth_date <', sql)
+        self.assertEqual(
+            sorted(params.values()), [date(1980, 1, 1), date(1981, 1, 1)]
+        )
+
+
+def suite():
+    suite = makeSuite(TestDateRange, 'test')
+    suite.addTest(makeSuite(TestEntityColumnFilter, 'test'))
+
+    return suite
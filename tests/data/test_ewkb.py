@@ -0,0 +1,53 @@
+import struct
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from stdm.data.importexport.reader import (
+    EWKB_SRID_FLAG,
+    to_ewkb
+)
+
+#Little endian WKB of POINT(1 2)
+POINT_WKB = '\x01' + struct.pack('<I', 1) + struct.pack('<dd', 1.0, 2.0)
+
+
+class WkbGeometry(object):
+    """
+    Geometry returning fixed WKB, as exported by OGR.
+    """
+    def __init__(self, wkb):
+        self.wkb = wkb
+
+    def ExportToWkb(self, byte_order):
+        return self.wkb
+
+
+class TestToEwkb(TestCase):
+    def test_srid_flag(self):
+        ewkb = to_ewkb(WkbGeometry(POINT_WKB), 4326)
+        geom_type, srid = struct.unpack('<Ii', ewkb[1:9])
+
+        self.assertEqual(geom_type, 1 | EWKB_SRID_FLAG)
+        self.assertEqual(srid, 4326)
+
+    def test_byte_order(self):
+        ewkb = to_ewkb(WkbGeometry(POINT_WKB), 4326)
+
+        #Little endian marker and unchanged coordinates
+        self.assertEqual(ewkb[0], '\x01')
+        self.assertEqual(ewkb[9:], POINT_WKB[5:])
+        self.assertEqual(len(ewkb), len(POINT_WKB) + 4)
+
+    def test_bytearray_wkb(self):
+        ewkb = to_ewkb(WkbGeometry(bytearray(POINT_WKB)), '32737')
+
+        self.assertEqual(struct.unpack('<i', ewkb[5:9])[0], 32737)
+        self.assertEqual(ewkb[9:], POINT_WKB[5:])
+
+
+def suite():
+    suite = makeSuite(TestToEwkb, 'test')
+
+    return suite
@@ -0,0 +1,127 @@
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from stdm.data.display_columns import display_columns
+from stdm.data.importexport.export_query import denormalized_query
+
+
+class Named(object):
+    def __init__(self, name):
+        self.name = name
+
+
+class Relation(object):
+    def __init__(self, parent, display_cols, parent_column='id'):
+        self.parent = Named(parent) if parent else None
+        self.display_cols = display_cols
+        self.parent_column = parent_column
+
+
+class ExportColumn(object):
+    """
+    Entity column with the attributes describing its display values.
+    """
+    def __init__(self, type_info, value_list=None, relation=None):
+        self.TYPE_INFO = type_info
+        self.value_list = Named(value_list) if value_list else None
+        self.entity_relation = relation
+
+
+class ExportEntity(object):
+    def __init__(self, columns):
+        self.columns = columns
+
+    def column(self, name):
+        return self.columns.get(name, None)
+
+
+PERSON = ExportEntity({
+    'gender': ExportColumn('LOOKUP', 'check_gender'),
+    'village': ExportColumn(
+        'ADMIN_SPATIAL_UNIT', relation=Relation('admin_unit', [])
+    ),
+    'household_id': ExportColumn(
+        'FOREIGN_KEY',
+        relation=Relation('household', ['code', 'name'], 'household_no')
+    ),
+    'age': ExportColumn('INT')
+})
+
+
+class TestDisplayColumns(TestCase):
+    def test_lookup(self):
+        self.assertEqual(
+            display_columns(PERSON.column('gender')),
+            ('check_gender', 'id', ['value'])
+        )
+
+    def test_admin_unit(self):
+        self.assertEqual(
+            display_columns(PERSON.column('village')),
+            ('admin_unit', 'id', ['name'])
+        )
+
+    def test_foreign_key(self):
+        self.assertEqual(
+            display_columns(PERSON.column('household_id')),
+            ('household', 'household_no', ['code', 'name'])
+        )
+
+    def test_no_display_values(self):
+        self.assertIsNone(display_columns(None))
+        self.assertIsNone(display_columns(PERSON.column('age')))
+        self.assertIsNone(display_columns(ExportColumn('LOOKUP')))
+        self.assertIsNone(display_columns(
+            ExportColumn('FOREIGN_KEY', relation=Relation('household', []))
+        ))
+
+
+class TestDenormalizedQuery(TestCase):
+    def test_plain_columns(self):
+        select_sql, from_sql, text_columns = denormalized_query(
+            None, 'vw_person', ['"age"', 'gender']
+        )
+
+        self.assertEqual(select_sql, u't."age",t."gender"')
+        self.assertEqual(from_sql, u'(SELECT * FROM vw_person) t')
+        self.assertEqual(text_columns, [])
+
+    def test_display_values(self):
+        select_sql, from_sql, text_columns = denormalized_query(
+            PERSON, 'person', ['age', 'gender', 'household_id'],
+            where='age > 18'
+        )
+
+        self.assertEqual(
+            select_sql,
+            u't."age",'
+            u'CAST(j1."value" AS text) AS "gender",'
+            u'concat_ws(\' \', j2."code", j2."name") AS "household_id"'
+        )
+        #The filter is applied to the exported table before the joins
+        self.assertEqual(
+            from_sql,
+            u'(SELECT * FROM person WHERE age > 18) t '
+            u'LEFT JOIN check_gender j1 ON j1."id" = t."gender" '
+            u'LEFT JOIN household j2 ON j2."household_no" = t."household_id"'
+        )
+        self.assertEqual(text_columns, ['gender', 'household_id'])
+
+    def test_geometry(self):
+        select_sql, from_sql, text_columns = denormalized_query(
+            PERSON, 'person', ['age'], geom_column='geom', dest_srid=4326
+        )
+
+        self.assertEqual(
+            select_sql,
+            u't."age",ST_AsBinary(ST_Transform(t."geom", 4326))'
+        )
+
+
+def suite():
+    suite = makeSuite(TestDisplayColumns, 'test')
+    suite.addTest(makeSuite(TestDenormalizedQuery, 'test'))
+
+    return suite
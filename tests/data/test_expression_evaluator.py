@@ -0,0 +1,114 @@
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from stdm.tests.utils import qgis_app
+
+from stdm.data.expression_evaluator import (
+    _literal_sql,
+    expression_sql
+)
+
+QGIS_APP = qgis_app()
+
+
+class Column(object):
+    def __init__(self, name, type_info):
+        self.name = name
+        self.TYPE_INFO = type_info
+
+
+class Entity(object):
+    def __init__(self, *columns):
+        self.columns = dict((c.name, c) for c in columns)
+
+
+class ExpressionColumn(object):
+    TYPE_INFO = 'EXPRESSION'
+
+    def __init__(self, expression, output_data_type='', entity=None):
+        self.expression = expression
+        self.output_data_type = output_data_type
+        self.entity = entity
+
+
+class TestExpressionSql(TestCase):
+    def setUp(self):
+        self.entity = Entity(
+            Column('id', 'SERIAL'),
+            Column('area', 'DOUBLE'),
+            Column('plots', 'INT'),
+            Column('first_name', 'VARCHAR'),
+            Column('last_name', 'TEXT'),
+            Column('dob', 'DATE')
+        )
+
+    def _sql(self, expression, output_data_type=''):
+        return expression_sql(
+            ExpressionColumn(expression, output_data_type, self.entity)
+        )
+
+    def test_arithmetic(self):
+        self.assertEqual(
+            self._sql('"area" * 2 - "plots"', 'float'),
+            u'CAST((("area" * 2) - "plots") AS double precision)'
+        )
+        self.assertEqual(
+            self._sql('-"plots" + 1', 'int'),
+            u'CAST(((-"plots") + 1) AS integer)'
+        )
+
+    def test_division_by_zero(self):
+        #QGIS evaluates division by zero to NULL
+        self.assertEqual(
+            self._sql('"area" / "plots"', 'float'),
+            u'CAST(("area"::double precision / NULLIF("plots", 0)) '
+            u'AS double precision)'
+        )
+        self.assertEqual(
+            self._sql('"area" // 0', 'int'),
+            u'CAST(floor("area"::double precision / NULLIF(0, 0)) '
+            u'AS integer)'
+        )
+        self.assertEqual(
+            self._sql('"plots" % "id"', 'int'),
+            u'CAST(("plots" % NULLIF("id", 0)) AS integer)'
+        )
+
+    def test_concatenation(self):
+        self.assertEqual(
+            self._sql('"first_name" || \' \' || "last_name"'),
+            u'CAST((("first_name"::text || \' \'::text)::text || '
+            u'"last_name"::text) AS text)'
+        )
+        #The plus operator concatenates text values
+        self.assertEqual(
+            self._sql('"first_name" + \' Jr\''),
+            u'CAST(("first_name"::text || \' Jr\'::text) AS text)'
+        )
+        self.assertEqual(
+            self._sql('"plots" || \' plots\''),
+            u'CAST(("plots"::text || \' plots\'::text) AS text)'
+        )
+
+    def test_literals(self):
+        self.assertEqual(_literal_sql(u"O'Neil"), (u"'O''Neil'", 'text'))
+        self.assertEqual(_literal_sql(2.5), ('2.5', 'float'))
+        self.assertIsNone(_literal_sql(True))
+
+    def test_not_translated(self):
+        #Evaluated by QGIS instead
+        self.assertIsNone(self._sql('"first_name" - 1'))
+        self.assertIsNone(self._sql('"first_name" * "plots"'))
+        self.assertIsNone(self._sql('"dob" + 1'))
+        self.assertIsNone(self._sql('"unknown" + 1'))
+        self.assertIsNone(self._sql('upper("first_name")'))
+        self.assertIsNone(self._sql('"area" > 2'))
+        self.assertIsNone(self._sql('"area" +'))
+
+
+def suite():
+    suite = makeSuite(TestExpressionSql, 'test')
+
+    return suite
@@ -0,0 +1,103 @@
+from unittest import (
+    makeSuite,
+    skipIf,
+    TestCase
+)
+
+from stdm.data.importexport import validator
+from stdm.data.importexport.validator import (
+    _is_date,
+    _is_float,
+    _is_int,
+    ColumnValidationResult,
+    failed_mask,
+    ImportValidator
+)
+
+np = validator.np
+
+
+class Entity(object):
+    name = 'basic_household'
+
+
+@skipIf(np is None, 'NumPy is not installed.')
+class TestFailedMask(TestCase):
+    def _count_calls(self, predicate):
+        calls = []
+
+        def counting_predicate(value):
+            calls.append(value)
+
+            return predicate(value)
+
+        return calls, counting_predicate
+
+    def test_failed_mask(self):
+        calls, predicate = self._count_calls(_is_int)
+        mask = failed_mask(
+            np.array([u'1', u'x', u'1', u'2', u'x', u'']), predicate
+        )
+
+        self.assertEqual(
+            mask.tolist(), [False, True, False, False, True, True]
+        )
+        #The predicate is only applied to the distinct values
+        self.assertEqual(len(calls), 4)
+
+    def test_failed_mask_empty(self):
+        mask = failed_mask(np.array([], dtype=object), _is_int)
+
+        self.assertEqual(len(mask), 0)
+
+
+class TestPredicates(TestCase):
+    def test_predicates(self):
+        self.assertTrue(_is_float(u'12.5%'))
+        self.assertFalse(_is_float(u'twelve'))
+        self.assertTrue(_is_date(u'2016-03-01'))
+        self.assertTrue(_is_date(u'01/03/2016'))
+        self.assertFalse(_is_date(u'2016-13-01'))
+
+
+@skipIf(np is None, 'NumPy is not installed.')
+class TestColumnValidationResult(TestCase):
+    def test_add_issue(self):
+        result = ColumnValidationResult('age')
+        result.add_issue(
+            'Not a number', np.array([False, True, True, False, True]),
+            max_samples=2
+        )
+
+        self.assertFalse(result.is_valid())
+        #Row numbers are 1-based
+        self.assertEqual(result.issues['Not a number'], (3, [2, 3]))
+
+    def test_no_issue(self):
+        result = ColumnValidationResult('age')
+        result.add_issue('Not a number', np.array([False, False]))
+
+        self.assertTrue(result.is_valid())
+
+
+class TestImportValidator(TestCase):
+    def setUp(self):
+        self._np = validator.np
+
+    def tearDown(self):
+        validator.np = self._np
+
+    def test_requires_numpy(self):
+        validator.np = None
+        import_validator = ImportValidator(None, Entity(), {})
+
+        self.assertRaises(ImportError, import_validator.run)
+
+
+def suite():
+    suite = makeSuite(TestFailedMask, 'test')
+    suite.addTest(makeSuite(TestPredicates, 'test'))
+    suite.addTest(makeSuite(TestColumnValidationResult, 'test'))
+    suite.addTest(makeSuite(TestImportValidator, 'test'))
+
+    return suite
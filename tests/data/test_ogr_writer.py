@@ -0,0 +1,120 @@
+import datetime
+import decimal
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+try:
+    from osgeo import ogr
+except:
+    import ogr
+
+from stdm.data.importexport.enums import _OFT_INTEGER64
+from stdm.data.importexport.writer import OGRWriter
+
+
+class Feature(object):
+    """
+    Records the values set on the feature fields.
+    """
+    def __init__(self):
+        self.values = {}
+
+    def SetField(self, index, *value):
+        self.values[index] = value
+
+
+class Integer64Feature(Feature):
+    def SetFieldInteger64(self, index, value):
+        self.values[index] = ('Integer64', value)
+
+
+class TestSetFieldValue(TestCase):
+    def _value(self, ogr_type, value):
+        feat = Feature()
+        OGRWriter.set_field_value(feat, 0, ogr_type, value)
+
+        return feat.values.get(0, None)
+
+    def test_null(self):
+        self.assertIsNone(self._value(ogr.OFTString, None))
+
+    def test_integer(self):
+        self.assertEqual(self._value(ogr.OFTInteger, 7), (7,))
+
+    def test_integer64(self):
+        feat = Integer64Feature()
+        OGRWriter.set_field_value(feat, 0, _OFT_INTEGER64, 2 ** 40)
+
+        if _OFT_INTEGER64 == ogr.OFTInteger:
+            #GDAL builds without 64-bit fields
+            self.assertEqual(feat.values[0], (2 ** 40,))
+        else:
+            self.assertEqual(feat.values[0], ('Integer64', 2 ** 40))
+
+    def test_integer64_without_setter(self):
+        self.assertEqual(
+            self._value(_OFT_INTEGER64, 2 ** 40), (2 ** 40,)
+        )
+
+    def test_real(self):
+        self.assertEqual(
+            self._value(ogr.OFTReal, decimal.Decimal('2.5')), (2.5,)
+        )
+        self.assertEqual(self._value(ogr.OFTReal, 3), (3.0,))
+
+    def test_date(self):
+        self.assertEqual(
+            self._value(ogr.OFTDate, datetime.date(2016, 3, 1)),
+            (2016, 3, 1, 0, 0, 0, 0)
+        )
+        self.assertEqual(
+            self._value(
+                ogr.OFTDateTime, datetime.datetime(2016, 3, 1, 10, 30, 5)
+            ),
+            (2016, 3, 1, 10, 30, 5, 0)
+        )
+
+    def test_string(self):
+        self.assertEqual(
+            self._value(ogr.OFTString, u'Nyal\xe9'),
+            (u'Nyal\xe9'.encode('utf-8'),)
+        )
+        #Values not matching the field type are written as text
+        self.assertEqual(self._value(ogr.OFTInteger, u'12a'), ('12a',))
+        self.assertEqual(self._value(ogr.OFTString, True), ('True',))
+
+
+class TestWriteFeatures(TestCase):
+    def setUp(self):
+        self.ds = ogr.GetDriverByName('Memory').CreateDataSource('export')
+        self.lyr = self.ds.CreateLayer('parcels', None, ogr.wkbPoint)
+        self.lyr.CreateField(ogr.FieldDefn('parcel_id', ogr.OFTInteger))
+
+    def tearDown(self):
+        self.ds = None
+
+    def test_wkb_geometries(self):
+        point = ogr.CreateGeometryFromWkt('POINT (36.8219 -1.2921)')
+        #Geometries are read from the database as buffers of WKB
+        rows = [(1, buffer(point.ExportToWkb())), (2, None)]
+        writer = OGRWriter('parcels.shp')
+
+        count = writer.write_features(
+            self.lyr, rows, [ogr.OFTInteger], 1, transaction_size=1
+        )
+
+        self.assertEqual(count, 2)
+        self.lyr.ResetReading()
+        feats = [f for f in self.lyr]
+        self.assertEqual(feats[0].GetField(0), 1)
+        self.assertTrue(feats[0].GetGeometryRef().Equals(point))
+        self.assertIsNone(feats[1].GetGeometryRef())
+
+
+def suite():
+    suite = makeSuite(TestSetFieldValue, 'test')
+    suite.addTest(makeSuite(TestWriteFeatures, 'test'))
+
+    return suite
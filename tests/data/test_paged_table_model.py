@@ -0,0 +1,78 @@
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from sqlalchemy import (
+    Column,
+    create_engine,
+    Integer,
+    String
+)
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker
+
+from stdm.data.qtmodels import PagedEntityTableModel
+
+Base = declarative_base()
+
+
+class Household(Base):
+    __tablename__ = 'household'
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+class TestPagedEntityTableModel(TestCase):
+    def setUp(self):
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        self.session = sessionmaker(bind=engine)()
+        self.session.add_all([
+            Household(id=i + 1, name=n)
+            for i, n in enumerate(['b', 'd', 'f', 'h', 'j', 'l'])
+        ])
+        self.session.commit()
+
+        #Only two pages of two records are kept in memory
+        self.model = PagedEntityTableModel(
+            self.session.query(Household), Household.id, ['id', 'name'],
+            ['ID', 'Name'], Household.name, page_size=2, window_size=2
+        )
+        while self.model.canFetchMore():
+            self.model.fetchMore()
+
+    def tearDown(self):
+        self.session.close()
+
+    def _ids(self):
+        return [self.model.record_id(r) for r in range(self.model.rowCount())]
+
+    def test_pages(self):
+        self.assertEqual(self._ids(), [1, 2, 3, 4, 5, 6])
+        self.assertFalse(self.model._pages[0].loaded)
+
+    def test_evicted_page_filled(self):
+        #Reading the first rows fetches the evicted page again
+        self.assertEqual(self.model.data(self.model.index(1, 1)), 'd')
+        self.assertTrue(self.model._pages[0].loaded)
+
+    def test_inserted_record_not_repeated(self):
+        #Record saved by the entity browser, sorted in an evicted page
+        row = self.model.rowCount()
+        self.model.insertRows(row, 1)
+        self.model.setData(self.model.index(row, 0), 7)
+        self.model.setData(self.model.index(row, 1), 'c')
+        self.session.add(Household(id=7, name='c'))
+        self.session.commit()
+
+        ids = self._ids()
+        self.assertEqual(len(ids), 7)
+        self.assertEqual(ids.count(7), 1)
+        self.assertEqual(ids[-1], 7)
+
+
+def suite():
+    suite = makeSuite(TestPagedEntityTableModel, 'test')
+
+    return suite
@@ -0,0 +1,79 @@
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from sqlalchemy import (
+    Column,
+    create_engine,
+    ForeignKey,
+    Integer,
+    Table
+)
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import (
+    relationship,
+    sessionmaker
+)
+
+from stdm.data.database import _pending_tables
+
+Base = declarative_base()
+
+person_crop = Table(
+    'person_crop', Base.metadata,
+    Column('person_id', Integer, ForeignKey('person.id')),
+    Column('crop_id', Integer, ForeignKey('crop.id'))
+)
+
+
+class Person(Base):
+    __tablename__ = 'person'
+    id = Column(Integer, primary_key=True)
+    age = Column(Integer)
+    crops = relationship('Crop', secondary=person_crop)
+
+
+class Crop(Base):
+    __tablename__ = 'crop'
+    id = Column(Integer, primary_key=True)
+
+
+class TestPendingTables(TestCase):
+    def setUp(self):
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        self.session = sessionmaker(bind=engine)()
+        self.session.add_all([Person(id=1), Crop(id=1)])
+        self.session.commit()
+
+        self.person = self.session.query(Person).get(1)
+        self.crop = self.session.query(Crop).get(1)
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_changed_column(self):
+        self.person.age = 30
+
+        self.assertEqual(_pending_tables(self.session), set(['person']))
+
+    def test_changed_association(self):
+        self.person.crops.append(self.crop)
+
+        self.assertEqual(
+            _pending_tables(self.session), set(['person', 'person_crop'])
+        )
+
+    def test_deleted_record(self):
+        self.session.delete(self.person)
+
+        self.assertEqual(
+            _pending_tables(self.session), set(['person', 'person_crop'])
+        )
+
+
+def suite():
+    suite = makeSuite(TestPendingTables, 'test')
+
+    return suite
@@ -0,0 +1,178 @@
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from stdm.data import pg_utils
+from stdm.data.pg_utils import (
+    _like_prefix,
+    _quoted_column,
+    add_validity_period_index,
+    column_definitions,
+    column_value_counts_query
+)
+
+
+class TestPgUtils(TestCase):
+    def test_quoted_column(self):
+        self.assertEqual(_quoted_column('name'), u'"name"')
+        self.assertEqual(_quoted_column('"First Name"'), u'"First Name"')
+
+    def test_like_prefix(self):
+        self.assertEqual(_like_prefix(u'Ka'), u'Ka%')
+        self.assertEqual(_like_prefix(u'10%_'), u'10\\%\\_%')
+        self.assertEqual(_like_prefix(u'a\\b'), u'a\\\\b%')
+
+
+class TestColumnValueCounts(TestCase):
+    def setUp(self):
+        engine = create_engine('sqlite://')
+        engine.execute('CREATE TABLE household (id INTEGER, "Village" TEXT)')
+        engine.execute(
+            "INSERT INTO household VALUES (1, 'Kibera'), (2, 'Mathare'), "
+            "(3, NULL), (4, 'Kibera'), (5, 'Kawangware'), (6, NULL), "
+            "(7, 'Mathare'), (8, 'Kibera'), (9, 'Dandora')"
+        )
+        self.session = sessionmaker(bind=engine)()
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_pages(self):
+        #Pages of two values following the last value of the previous page
+        values = []
+        key = None
+        while True:
+            query = column_value_counts_query('household', 'Village', key=key)
+            page = [
+                (r.val, r.cnt)
+                for r in query.with_session(self.session).limit(2).all()
+            ]
+            values.extend(page)
+            if len(page) < 2:
+                break
+            key = (page[-1][1], page[-1][0])
+
+        self.assertEqual(values, [
+            (u'Kibera', 3), (u'Mathare', 2), (None, 2), (u'Dandora', 1),
+            (u'Kawangware', 1)
+        ])
+
+    def test_prefix(self):
+        query = column_value_counts_query('household', 'Village', u'k%')
+        sql = unicode(query.statement.compile(dialect=postgresql.dialect()))
+
+        self.assertIn(u'CAST("Village" AS TEXT) ILIKE', sql)
+        self.assertEqual(
+            query.statement.compile().params.values(), [u'k\\%%']
+        )
+
+
+class TestColumnDefinitions(TestCase):
+    def setUp(self):
+        self._execute = pg_utils._execute
+        self.params = {}
+        pg_utils._execute = self._catalog_rows
+
+    def tearDown(self):
+        pg_utils._execute = self._execute
+
+    def _catalog_rows(self, sql, **params):
+        #Rows of the catalog query in attribute order
+        self.params = params
+
+        return [
+            {'column_name': 'id', 'data_type': 'bigint',
+             'geom_type': None, 'srid': None},
+            {'column_name': 'name', 'data_type': 'character varying',
+             'geom_type': None, 'srid': None},
+            {'column_name': 'geom', 'data_type': 'geometry',
+             'geom_type': 'MULTIPOLYGON', 'srid': 4326}
+        ]
+
+    def test_column_definitions(self):
+        col_defs = column_definitions('vw_household')
+
+        self.assertEqual(
+            self.params, {'tbname': 'vw_household', 'tbschema': 'public'}
+        )
+        self.assertEqual(list(col_defs.keys()), ['id', 'name', 'geom'])
+        self.assertEqual(col_defs['id'], ('bigint', None, None))
+        self.assertEqual(col_defs['geom'], ('geometry', 'MULTIPOLYGON', 4326))
+
+
+class Result(object):
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+
+class TestValidityPeriodIndex(TestCase):
+    def setUp(self):
+        self._execute = pg_utils._execute
+        self._execute_autocommit = pg_utils._execute_autocommit
+        self.statements = []
+        #Whether the existing index is valid, None if there is none
+        self.index_valid = None
+        pg_utils._execute = self._run
+        pg_utils._execute_autocommit = self._run
+
+    def tearDown(self):
+        pg_utils._execute = self._execute
+        pg_utils._execute_autocommit = self._execute_autocommit
+
+    def _run(self, sql, **params):
+        self.statements.append((unicode(sql), params))
+
+        return Result(self.index_valid)
+
+    def test_created(self):
+        self.assertTrue(
+            add_validity_period_index('basic_social_tenure_relationship')
+        )
+        self.assertEqual(
+            self.statements[0][1],
+            {'index_name': u'basic_social_tenure_relationship_validity_idx'}
+        )
+        self.assertEqual(
+            self.statements[1][0],
+            u'CREATE INDEX CONCURRENTLY '
+            u'"basic_social_tenure_relationship_validity_idx" '
+            u'ON "basic_social_tenure_relationship" '
+            u'(validity_start, validity_end);'
+        )
+
+    def test_exists(self):
+        self.index_valid = True
+
+        self.assertFalse(
+            add_validity_period_index('basic_social_tenure_relationship')
+        )
+        self.assertEqual(len(self.statements), 1)
+
+    def test_invalid_index_rebuilt(self):
+        #Left by a failed concurrent build
+        self.index_valid = False
+
+        self.assertTrue(add_validity_period_index('basic_str'))
+        self.assertEqual(
+            [s for s, p in self.statements[1:]],
+            [u'DROP INDEX CONCURRENTLY "basic_str_validity_idx";',
+             u'CREATE INDEX CONCURRENTLY "basic_str_validity_idx" '
+             u'ON "basic_str" (validity_start, validity_end);']
+        )
+
+
+def suite():
+    suite = makeSuite(TestPgUtils, 'test')
+    suite.addTest(makeSuite(TestColumnValueCounts, 'test'))
+    suite.addTest(makeSuite(TestColumnDefinitions, 'test'))
+    suite.addTest(makeSuite(TestValidityPeriodIndex, 'test'))
+
+    return suite
@@ -0,0 +1,77 @@
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from PyQt4.QtGui import QLineEdit
+
+from stdm.tests.utils import qgis_app
+
+from stdm.ui.customcontrols import prefix_completer
+from stdm.ui.customcontrols.prefix_completer import PrefixCompleter
+
+QGIS_APP = qgis_app()
+
+
+class TestPrefixCompleter(TestCase):
+    def setUp(self):
+        self.line_edit = QLineEdit()
+        self.completer = PrefixCompleter(self.line_edit)
+
+    def tearDown(self):
+        self.completer.stop()
+
+    def _load(self, prefix, values):
+        #Values loaded by the worker thread for the current request
+        self.completer._on_values_loaded(
+            self.completer._generation, 0, (prefix, values)
+        )
+
+    def test_cached_prefix(self):
+        self._load(u'Ka', [u'Kamau', u'Kariuki'])
+
+        self.assertEqual(
+            self.completer._cached_values(u'kA'), [u'Kamau', u'Kariuki']
+        )
+        self.assertIsNone(self.completer._cached_values(u'Ot'))
+
+    def test_longer_prefix_filtered(self):
+        self._load(u'ka', [u'Kamau', u'Kariuki', u'Katana'])
+
+        self.assertEqual(
+            self.completer._cached_values(u'KAR'), [u'Kariuki']
+        )
+
+    def test_incomplete_values_not_filtered(self):
+        #Other values of the longer prefix may not have been loaded
+        values = [u'Ka{0:03d}'.format(i)
+                  for i in range(prefix_completer.MAX_COMPLETIONS)]
+        self._load(u'ka', values)
+
+        self.assertIsNone(self.completer._cached_values(u'kar'))
+
+    def test_stale_values_ignored(self):
+        generation = self.completer._generation
+        self.completer._cancel()
+        self.completer._on_values_loaded(generation, 0, (u'ka', [u'Kamau']))
+
+        self.assertIsNone(self.completer._cached_values(u'ka'))
+
+    def test_cache_size(self):
+        for i in range(prefix_completer.MAX_CACHED_PREFIXES + 1):
+            self._load(u'p{0}'.format(i), [])
+
+        self.assertIsNone(self.completer._cached_values(u'p0'))
+        self.assertEqual(self.completer._cached_values(u'p1'), [])
+
+    def test_set_column_clears_cache(self):
+        self._load(u'ka', [u'Kamau'])
+        self.completer.set_column(None)
+
+        self.assertIsNone(self.completer._cached_values(u'ka'))
+
+
+def suite():
+    suite = makeSuite(TestPrefixCompleter, 'test')
+
+    return suite
@@ -0,0 +1,125 @@
+import threading
+import time
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+try:
+    from osgeo import ogr
+except:
+    import ogr
+
+from stdm.data.importexport import profile_exporter
+from stdm.data.importexport.profile_exporter import (
+    _READ_AHEAD_CHUNKS,
+    _TableReader,
+    ProfileExporter
+)
+
+
+class Rows(object):
+    """
+    Stands in for the rows streamed from a table.
+    """
+    def __init__(self, rows):
+        self._rows = rows
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def close(self):
+        self.closed = True
+
+
+class TestTableLayout(TestCase):
+    def setUp(self):
+        self.exporter = ProfileExporter(None, '/backups/basic.gpkg')
+
+    def test_single_file(self):
+        self.assertEqual(self.exporter.file_format, 'gpkg')
+
+    def test_unsupported_format(self):
+        self.assertRaises(
+            ValueError, ProfileExporter, None, '/backups', 'docx'
+        )
+
+    def test_geometry_columns(self):
+        select_cols, fields, geom_col = self.exporter._table_layout(
+            'spatial_unit',
+            [('id', 'integer'), ('geom', 'geometry'),
+             ('centroid', 'geometry'), ('area', 'double precision')],
+            [('geom', 'MULTIPOLYGON', 4326), ('centroid', 'POINT', 4326)]
+        )
+
+        #The first geometry column is the layer geometry, read last
+        self.assertEqual(
+            select_cols,
+            u'"id",ST_AsText("centroid"),"area",ST_AsBinary("geom")'
+        )
+        self.assertEqual(fields, [
+            ('id', ogr.OFTInteger), ('centroid', ogr.OFTString),
+            ('area', ogr.OFTReal)
+        ])
+        self.assertEqual(geom_col, ('geom', 'MULTIPOLYGON', 4326))
+
+    def test_no_geometry(self):
+        select_cols, fields, geom_col = self.exporter._table_layout(
+            'check_gender', [('id', 'integer'), ('value', 'unknown')], []
+        )
+
+        self.assertEqual(select_cols, u'"id","value"')
+        #Unknown types are written as strings
+        self.assertEqual(fields[1], ('value', ogr.OFTString))
+        self.assertIsNone(geom_col)
+
+
+class TestTableReader(TestCase):
+    def setUp(self):
+        self._stream = profile_exporter.stream_report_filter
+        self.rows = Rows([(i,) for i in range(5)])
+        profile_exporter.stream_report_filter = \
+            lambda table, columns, fetch_size: self.rows
+        self.cancelled = threading.Event()
+
+    def tearDown(self):
+        profile_exporter.stream_report_filter = self._stream
+
+    def test_rows(self):
+        reader = _TableReader('person', u'"id"', 2, self.cancelled)
+        reader.read()
+
+        self.assertEqual(list(reader.rows()), [(i,) for i in range(5)])
+
+    def test_error(self):
+        def failing_rows(table, columns, fetch_size):
+            raise IOError('Connection lost')
+
+        profile_exporter.stream_report_filter = failing_rows
+        reader = _TableReader('person', u'"id"', 2, self.cancelled)
+        reader.read()
+
+        self.assertRaises(IOError, list, reader.rows())
+
+    def test_cancelled(self):
+        #The writer stopped consuming the rows once the queue was full
+        self.rows = Rows([(i,) for i in range(_READ_AHEAD_CHUNKS + 2)])
+        reader = _TableReader('person', u'"id"', 1, self.cancelled)
+        thread = threading.Thread(target=reader.read)
+        thread.start()
+        deadline = time.time() + 5
+        while not reader._chunks.full() and time.time() < deadline:
+            time.sleep(0.01)
+        self.cancelled.set()
+        thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(self.rows.closed)
+
+
+def suite():
+    suite = makeSuite(TestTableLayout, 'test')
+    suite.addTest(makeSuite(TestTableReader, 'test'))
+
+    return suite
@@ -0,0 +1,245 @@
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from sqlalchemy import (
+    Column,
+    create_engine,
+    ForeignKey,
+    Integer,
+    String,
+    Table
+)
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import (
+    relationship,
+    sessionmaker,
+    subqueryload
+)
+
+from stdm.data import record_loader
+from stdm.data.database import StatementCounter
+from stdm.data.record_loader import (
+    RecordLoader,
+    RecordPager
+)
+
+Base = declarative_base()
+
+
+class Household(Base):
+    __tablename__ = 'household'
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+parcel_use = Table(
+    'parcel_use', Base.metadata,
+    Column('parcel_id', Integer, ForeignKey('parcel.id')),
+    Column('land_use_id', Integer, ForeignKey('land_use.id'))
+)
+
+
+class LandUse(Base):
+    __tablename__ = 'land_use'
+    id = Column(Integer, primary_key=True)
+    value = Column(String)
+
+
+class Parcel(Base):
+    __tablename__ = 'parcel'
+    id = Column(Integer, primary_key=True)
+    household_id = Column(Integer, ForeignKey('household.id'))
+    land_uses = relationship(LandUse, secondary=parcel_use)
+
+
+HOUSEHOLDS = [
+    (1, u'Kamau'), (2, None), (3, u'Achieng'), (4, u'Kamau'),
+    (5, None), (6, u'Wanjiru'), (7, u'Achieng'), (8, u'Otieno')
+]
+
+
+def _postgres_order(records, descending):
+    #Nulls are last in ascending order and first in descending order
+    def key(r):
+        return (r.name is None, r.name, r.id)
+
+    return sorted(records, key=key, reverse=descending)
+
+
+class UpperFormatter(object):
+    def format_column_value(self, value):
+        return value.upper()
+
+
+class HouseholdFormatter(object):
+    """
+    Loads the households of a page in one query, as the related entity
+    formatter does.
+    """
+    def __init__(self):
+        self.names = {}
+        self.prefetched = []
+
+    def prefetch(self, ids, session):
+        self.prefetched.append(ids)
+        for h in session.query(Household).filter(Household.id.in_(ids)):
+            self.names[h.id] = h.name
+
+    def format_column_value(self, value):
+        return self.names[value]
+
+
+class LandUseFormatter(object):
+    def format_column_value(self, value):
+        return u', '.join(sorted(u.value for u in value))
+
+
+class TestRecordPager(TestCase):
+    def setUp(self):
+        #The conditions are evaluated by the database, the records are
+        #ordered as PostgreSQL does in the test
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        self.session = sessionmaker(bind=engine)()
+        self.session.add_all(
+            [Household(id=i, name=n) for i, n in HOUSEHOLDS]
+        )
+        self.session.commit()
+        self.records = self.session.query(Household).all()
+
+    def tearDown(self):
+        self.session.close()
+
+    def _assert_follows(self, pager, ordered):
+        for i, record in enumerate(ordered):
+            condition = pager.key_filter(pager.record_key(record))
+            following = self.session.query(Household).filter(condition).all()
+
+            self.assertEqual(
+                set(r.id for r in following),
+                set(r.id for r in ordered[i + 1:]),
+                'Records following {0}'.format(record.id)
+            )
+
+    def test_ascending(self):
+        pager = RecordPager(Household.id, ['name'], Household.name)
+        self._assert_follows(pager, _postgres_order(self.records, False))
+
+    def test_descending(self):
+        pager = RecordPager(Household.id, ['name'], Household.name, True)
+        self._assert_follows(pager, _postgres_order(self.records, True))
+
+    def test_primary_key(self):
+        by_id = sorted(self.records, key=lambda r: r.id)
+        self._assert_follows(RecordPager(Household.id, ['name']), by_id)
+        self._assert_follows(
+            RecordPager(Household.id, ['name'], descending=True),
+            by_id[::-1]
+        )
+
+    def test_format_record(self):
+        pager = RecordPager(
+            Household.id, ['id', 'name'],
+            formatters={'name': UpperFormatter()}
+        )
+        named, unnamed = self.records[0], self.records[1]
+
+        self.assertEqual(pager.format_record(named), [1, u'KAMAU'])
+        #Null values are not formatted
+        self.assertEqual(pager.format_record(unnamed), [2, None])
+
+    def test_eager_loading(self):
+        land_uses = [LandUse(id=1, value=u'Farming'),
+                     LandUse(id=2, value=u'Residential')]
+        self.session.add_all([
+            Parcel(
+                id=i, household_id=(i % 4) + 1, land_uses=land_uses[:i % 3]
+            )
+            for i in range(1, 21)
+        ])
+        self.session.commit()
+        self.session.expunge_all()
+
+        households = HouseholdFormatter()
+        pager = RecordPager(
+            Parcel.id, ['id', 'household_id', 'land_uses'],
+            formatters={
+                'household_id': households, 'land_uses': LandUseFormatter()
+            },
+            load_options=[subqueryload(Parcel.land_uses)]
+        )
+
+        with StatementCounter(self.session.get_bind()) as counter:
+            page = pager.fetch(self.session.query(Parcel), None, 10)
+
+        #The page, the land uses and the households of the whole page
+        self.assertEqual(counter.count, 3)
+        self.assertEqual(households.prefetched, [set([1, 2, 3, 4])])
+        self.assertEqual(page.rows[1], [2, u'Achieng', u'Farming, Residential'])
+        self.assertEqual(page.end_key, (10, 10))
+
+
+class ThreadlessLoader(RecordLoader):
+    """
+    Counts the starts of the thread instead of running it.
+    """
+    def __init__(self):
+        RecordLoader.__init__(self)
+        self.running = False
+        self.starts = 0
+
+    def isRunning(self):
+        return self.running
+
+    def start(self, *args):
+        self.running = True
+        self.starts += 1
+
+    def wait(self, *args):
+        raise AssertionError('The loader thread was joined.')
+
+    def exit_thread(self):
+        #Requests processed until the thread is stopped
+        while self._requests.get() is not None:
+            pass
+        self.running = False
+        self._on_finished()
+
+
+class TestRecordLoader(TestCase):
+    def setUp(self):
+        self.loader = ThreadlessLoader()
+
+    def _request(self, generation):
+        self.loader.request(generation, 0, None, None, None, 10)
+
+    def test_stopped(self):
+        self._request(1)
+        self.loader.stop()
+        self.loader.exit_thread()
+
+        self.assertEqual(self.loader.starts, 1)
+        self.assertNotIn(self.loader, record_loader._running_loaders)
+
+    def test_request_while_stopping(self):
+        self._request(1)
+        self.loader.stop()
+        #Queued after the stop, fetched by a new run of the thread
+        self._request(2)
+        self.assertEqual(self.loader.starts, 1)
+
+        self.loader.exit_thread()
+
+        self.assertEqual(self.loader.starts, 2)
+        self.assertEqual(self.loader._requests.get()[0], 2)
+        self.assertIn(self.loader, record_loader._running_loaders)
+        record_loader._running_loaders.discard(self.loader)
+
+
+def suite():
+    suite = makeSuite(TestRecordPager, 'test')
+    suite.addTest(makeSuite(TestRecordLoader, 'test'))
+
+    return suite
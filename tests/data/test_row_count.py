@@ -0,0 +1,108 @@
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from PyQt4.QtCore import (
+    pyqtSignal,
+    QObject
+)
+
+from stdm.data import row_count
+from stdm.data.row_count import (
+    count_text,
+    TableRowCount
+)
+
+
+class Count(QObject):
+    """
+    Stands in for the background count, the rows are counted when
+    'counted' is emitted by the test.
+    """
+    counted = pyqtSignal(int)
+    finished = pyqtSignal()
+
+    def __init__(self, table_name):
+        QObject.__init__(self)
+        self.table_name = table_name
+        self.started = False
+        self.cancelled = False
+
+    @classmethod
+    def from_table(cls, table_name):
+        return cls(table_name)
+
+    def start(self):
+        self.started = True
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TestTableRowCount(TestCase):
+    def setUp(self):
+        self._estimate = row_count.pg_table_estimate
+        self._count = row_count.BackgroundCount
+        row_count.BackgroundCount = Count
+
+    def tearDown(self):
+        row_count.pg_table_estimate = self._estimate
+        row_count.BackgroundCount = self._count
+
+    def _row_count(self, estimate):
+        row_count.pg_table_estimate = lambda table_name: estimate
+
+        return TableRowCount('person')
+
+    def test_count_text(self):
+        self.assertEqual(count_text(1250), u'1250')
+        self.assertEqual(count_text(1250, False), u'~1250')
+
+    def test_small_table(self):
+        rows = self._row_count(48)
+
+        self.assertTrue(rows.start())
+        self.assertEqual(rows.text(), u'~48')
+
+        rows._count.counted.emit(50)
+        self.assertTrue(rows.is_exact())
+        self.assertFalse(rows.is_counting())
+        self.assertEqual(rows.value(), 50)
+        self.assertEqual(rows.text(), u'50')
+
+    def test_large_table(self):
+        #Only counted at the request of the user
+        rows = self._row_count(row_count.EXACT_COUNT_LIMIT + 1)
+
+        self.assertFalse(rows.start())
+        self.assertEqual(rows.value(), row_count.EXACT_COUNT_LIMIT + 1)
+        self.assertEqual(rows.text(), u'~100001')
+
+        rows.count_exactly()
+        rows._count.counted.emit(99950)
+        self.assertEqual(rows.text(), u'99950')
+
+    def test_no_estimate(self):
+        rows = self._row_count(None)
+
+        self.assertEqual(rows.value(), 0)
+        self.assertTrue(rows.start())
+        self.assertEqual(rows._count.table_name, 'person')
+
+    def test_cancelled_count(self):
+        rows = self._row_count(48)
+        rows.start()
+        count = rows._count
+        rows.cancel()
+        count.counted.emit(50)
+
+        self.assertTrue(count.cancelled)
+        self.assertFalse(rows.is_exact())
+        self.assertEqual(rows.text(), u'~48')
+
+
+def suite():
+    suite = makeSuite(TestTableRowCount, 'test')
+
+    return suite
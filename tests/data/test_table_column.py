@@ -0,0 +1,101 @@
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from stdm.data import qtmodels
+from stdm.data.qtmodels import _TableColumn
+
+
+class TestTableColumn(TestCase):
+    def setUp(self):
+        self._np = qtmodels.np
+
+    def tearDown(self):
+        qtmodels.np = self._np
+
+    def test_typed_arrays(self):
+        self.assertEqual(_TableColumn([3, 1, 2]).typecode, 'l')
+        self.assertEqual(_TableColumn([1.5, 0.5]).typecode, 'd')
+
+        #Nulls, mixed and text values are kept in a list
+        self.assertIsNone(_TableColumn([1, None]).typecode)
+        self.assertIsNone(_TableColumn([1, 1.5]).typecode)
+        self.assertIsNone(_TableColumn([u'a']).typecode)
+        self.assertIsNone(_TableColumn([]).typecode)
+
+    def test_demote_on_null(self):
+        col = _TableColumn([1, 2, 3])
+        col[1] = None
+
+        self.assertIsNone(col.typecode)
+        self.assertEqual(list(col), [1, None, 3])
+
+    def test_demote_on_insert(self):
+        col = _TableColumn([1.5, 2.5])
+        col.insert(0, u'n/a')
+
+        self.assertIsNone(col.typecode)
+        self.assertEqual(list(col), [u'n/a', 1.5, 2.5])
+
+    def test_demote_on_overflow(self):
+        col = _TableColumn([1, 2])
+        col[0] = qtmodels._INT_ARRAY_MAX + 1
+
+        self.assertIsNone(col.typecode)
+        self.assertEqual(col[0], qtmodels._INT_ARRAY_MAX + 1)
+
+    def test_fitting_value_kept_in_array(self):
+        col = _TableColumn([1, 2])
+        col[0] = 5
+
+        self.assertEqual(col.typecode, 'l')
+        self.assertEqual(list(col), [5, 2])
+
+    def test_interned_strings(self):
+        male = u''.join([u'Ma', u'le'])
+        col = _TableColumn([u'Male', u'Female', male, u'Male'])
+
+        self.assertIs(col[0], col[2])
+        self.assertIs(col[0], col[3])
+
+        col.insert(0, u''.join([u'Fem', u'ale']))
+        self.assertIs(col[0], col[2])
+
+    def test_unique_strings_not_interned(self):
+        col = _TableColumn([u'a', u'b', u'c'])
+
+        self.assertIsNone(col._strings)
+
+    def _assert_sorted(self, values, expected, case_sensitive=True):
+        col = _TableColumn(values)
+        col.reorder(col.argsort(case_sensitive))
+
+        self.assertEqual(list(col), expected)
+
+    def test_sort(self):
+        self._assert_sorted([3, 1, 2], [1, 2, 3])
+        self._assert_sorted([2.5, -1.0], [-1.0, 2.5])
+        self._assert_sorted([u'b', u'C', u'a'], [u'C', u'a', u'b'])
+        self._assert_sorted(
+            [u'b', u'C', u'a'], [u'a', u'b', u'C'], case_sensitive=False
+        )
+
+    def test_sort_without_numpy(self):
+        qtmodels.np = None
+        col = _TableColumn([3, 1, 2])
+        col.reorder(col.argsort())
+
+        self.assertEqual(col.typecode, 'l')
+        self.assertEqual(list(col), [1, 2, 3])
+
+    def test_stable_sort(self):
+        col = _TableColumn([2, 1, 2, 1])
+
+        self.assertEqual(list(col.argsort()), [1, 3, 0, 2])
+
+
+def suite():
+    suite = makeSuite(TestTableColumn, 'test')
+
+    return suite
@@ -0,0 +1,120 @@
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from sqlalchemy import (
+    Column,
+    Integer,
+    String
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import Query
+
+from stdm.data import text_search
+from stdm.data.text_search import (
+    _escape_like,
+    prefix_values_query,
+    search_index_columns,
+    text_match_query
+)
+
+Base = declarative_base()
+
+
+class Party(Base):
+    __tablename__ = 'party'
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+class SearchColumn(object):
+    def __init__(self, name, type_info, searchable=True, value_list=None):
+        self.name = name
+        self.TYPE_INFO = type_info
+        self.searchable = searchable
+        self.value_list = value_list
+
+
+class SearchEntity(object):
+    def __init__(self, name, columns):
+        self.name = name
+        self.columns = dict((c.name, c) for c in columns)
+
+
+class SearchProfile(object):
+    def __init__(self, parties, spatial_units):
+        self.social_tenure = self
+        self.parties = parties
+        self.spatial_units = spatial_units
+
+
+def _compile(query):
+    compiled = query.statement.compile(dialect=postgresql.dialect())
+
+    return unicode(compiled), compiled.params
+
+
+class TestTextSearch(TestCase):
+    def setUp(self):
+        self._trgm_available = text_search._trgm_available
+
+    def tearDown(self):
+        text_search._trgm_available = self._trgm_available
+
+    def test_escape_like(self):
+        self.assertEqual(_escape_like(u'plot'), u'plot')
+        self.assertEqual(_escape_like(u'50%_a'), u'50\\%\\_a')
+        self.assertEqual(_escape_like(u'c:\\x'), u'c:\\\\x')
+
+    def test_text_match(self):
+        text_search._trgm_available = False
+        query = text_match_query(
+            Query(Party), Party.name, u'Ann_', Party.id, limit=10
+        )
+        sql, params = _compile(query)
+
+        self.assertNotIn('similarity', sql)
+        self.assertIn('ORDER BY CASE', sql)
+        self.assertIn(u'%ann\\_%', params.values())
+        self.assertIn(u'ann\\_%', params.values())
+        self.assertIn(u'ann_', params.values())
+        self.assertIn(10, params.values())
+
+    def test_similar_match(self):
+        text_search._trgm_available = True
+        sql, params = _compile(
+            text_match_query(Query(Party), Party.name, u'Ann', limit=None)
+        )
+
+        self.assertIn('similarity(lower(party.name)', sql)
+        self.assertNotIn('LIMIT', sql)
+
+    def test_prefix_values(self):
+        sql, params = _compile(prefix_values_query(Party.name, u'Mc_'))
+
+        self.assertIn('SELECT DISTINCT party.name', sql)
+        self.assertEqual(params.values(), [u'mc\\_%'])
+
+    def test_search_index_columns(self):
+        party = SearchEntity('party', [
+            SearchColumn('name', 'VARCHAR'),
+            SearchColumn('notes', 'TEXT', searchable=False),
+            SearchColumn('age', 'INT'),
+            SearchColumn(
+                'gender', 'LOOKUP', value_list=SearchEntity('check_gender', [])
+            )
+        ])
+        parcel = SearchEntity('parcel', [SearchColumn('code', 'VARCHAR')])
+        columns = search_index_columns(SearchProfile([party], [parcel]))
+
+        self.assertEqual(sorted(columns), [
+            ('check_gender', 'value'), ('parcel', 'code'), ('party', 'name')
+        ])
+
+
+def suite():
+    suite = makeSuite(TestTextSearch, 'test')
+
+    return suite
@@ -0,0 +1,176 @@
+import json
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from stdm.data.database import STDMDb
+from stdm.data.importexport.exceptions import TranslatorException
+from stdm.data.importexport.value_translators import (
+    LookupValueTranslator,
+    MultipleEnumerationTranslator,
+    RelatedTableTranslator,
+    IgnoreType,
+    SourceDocumentTranslator,
+    translator_from_dict
+)
+
+
+class OfflineDb(object):
+    """
+    Stands in for the STDM database, translator settings do not use the
+    session that translators keep. An SQLite engine can be given for the
+    translators that read other tables.
+    """
+    def __init__(self, engine=None):
+        self.engine = engine
+        self.session = None
+        if engine is not None:
+            self.session = sessionmaker(bind=engine)()
+
+
+class LookupColumn(object):
+    def __init__(self, value_list):
+        self.value_list = value_list
+
+
+class LookupEntity(object):
+    def __init__(self, name):
+        self.name = name
+
+    def column(self, name):
+        return LookupColumn(LookupEntity('check_crop'))
+
+
+def _set_reference(translator):
+    translator.set_name('household_id')
+    translator.set_referencing_table('basic_person')
+    translator.set_referencing_column('household_id')
+    translator.set_referenced_table('basic_household')
+    translator.set_output_reference_column('id')
+    translator.add_source_reference_column('hh_code', 'code')
+    translator.add_source_reference_column('hh_name', 'name')
+
+
+class TestTranslatorSettings(TestCase):
+    def setUp(self):
+        self._db = getattr(STDMDb, '_instance', None)
+        STDMDb._instance = OfflineDb()
+
+    def tearDown(self):
+        if self._db is None:
+            STDMDb.cleanUp()
+        else:
+            STDMDb._instance = self._db
+
+    def _round_trip(self, translator):
+        #Settings are written to and read from JSON files
+        config = json.loads(json.dumps(translator.to_dict()))
+
+        return translator_from_dict(config)
+
+    def test_related_table(self):
+        translator = RelatedTableTranslator()
+        _set_reference(translator)
+        copy = self._round_trip(translator)
+
+        self.assertIsInstance(copy, RelatedTableTranslator)
+        self.assertEqual(copy.to_dict(), translator.to_dict())
+        #Source columns keep their order
+        self.assertEqual(
+            list(copy.input_referenced_columns().items()),
+            [('hh_code', 'code'), ('hh_name', 'name')]
+        )
+
+    def test_lookup(self):
+        translator = LookupValueTranslator(default='Unknown')
+        _set_reference(translator)
+        copy = self._round_trip(translator)
+
+        self.assertIsInstance(copy, LookupValueTranslator)
+        self.assertEqual(copy.default_value, 'Unknown')
+        self.assertEqual(copy.to_dict(), translator.to_dict())
+
+    def test_multiple_enumeration(self):
+        translator = MultipleEnumerationTranslator()
+        _set_reference(translator)
+        translator.set_separator(';')
+        copy = self._round_trip(translator)
+
+        self.assertIsInstance(copy, MultipleEnumerationTranslator)
+        self.assertEqual(copy.separator(), ';')
+
+    def test_source_document(self):
+        translator = SourceDocumentTranslator()
+        _set_reference(translator)
+        translator.source_directory = '/data/documents'
+        translator.document_type_id = 2
+        translator.document_type = 'Title deed'
+        copy = self._round_trip(translator)
+
+        self.assertIsInstance(copy, SourceDocumentTranslator)
+        self.assertEqual(copy.source_directory, '/data/documents')
+        self.assertEqual(copy.document_type_id, 2)
+        self.assertEqual(copy.document_type, 'Title deed')
+
+    def test_unknown_type(self):
+        self.assertRaises(
+            TranslatorException, translator_from_dict, {'type': 'Unknown'}
+        )
+
+
+class TestMultipleEnumerationTranslator(TestCase):
+    def setUp(self):
+        engine = create_engine('sqlite://')
+        engine.execute(
+            'CREATE TABLE check_crop (id INTEGER PRIMARY KEY, value TEXT, '
+            'code TEXT)'
+        )
+        engine.execute(
+            "INSERT INTO check_crop VALUES (1, 'Maize', 'M'), "
+            "(2, 'Beans', 'B'), (3, 'Millet', 'maize')"
+        )
+        self._db = getattr(STDMDb, '_instance', None)
+        STDMDb._instance = OfflineDb(engine)
+
+        self.translator = MultipleEnumerationTranslator()
+        self.translator.entity = LookupEntity('farmer')
+        self.translator.set_separator(',')
+        self.translator.add_source_reference_column('crops', 'crop')
+
+    def tearDown(self):
+        if self._db is None:
+            STDMDb.cleanUp()
+        else:
+            STDMDb._instance = self._db
+
+    def test_lookup_ids(self):
+        lk_ids = self.translator.lookup_ids(LookupEntity('check_crop'))
+
+        #Values take precedence over codes
+        self.assertEqual(lk_ids['maize'], 1)
+        self.assertEqual(lk_ids['b'], 2)
+        self.assertEqual(lk_ids['millet'], 3)
+
+    def test_values_and_codes(self):
+        ids = self.translator.referencing_column_value(
+            {'crops': u' beans, M ,MILLET,maize,unknown'}
+        )
+
+        #Unknown values are skipped and ids are not repeated
+        self.assertEqual(ids, [2, 1, 3])
+
+    def test_empty_value(self):
+        value = self.translator.referencing_column_value({'crops': u''})
+
+        self.assertIsInstance(value, IgnoreType)
+
+
+def suite():
+    suite = makeSuite(TestTranslatorSettings, 'test')
+    suite.addTest(makeSuite(TestMultipleEnumerationTranslator, 'test'))
+
+    return suite
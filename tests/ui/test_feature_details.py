@@ -0,0 +1,125 @@
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from PyQt4.QtCore import QModelIndex
+from PyQt4.QtGui import QStandardItem
+
+from stdm.tests.utils import qgis_app
+
+from stdm.ui import feature_details
+from stdm.ui.feature_details import (
+    DetailsTreeView,
+    LazyItemModel,
+    RECORD_NODE,
+    STR_NODE
+)
+
+QGIS_APP = qgis_app()
+
+PENDING_ROLE = LazyItemModel.PENDING_ROLE
+
+
+def _node(text, kind=None):
+    item = QStandardItem(text)
+    if kind is not None:
+        item.setData(kind, PENDING_ROLE)
+
+    return item
+
+
+class TestLazyItemModel(TestCase):
+    def setUp(self):
+        self.fetched = []
+        self.model = LazyItemModel(self.fetched.append)
+        self.item = _node('Parcel 1', RECORD_NODE)
+        self.model.appendRow(self.item)
+
+    def test_pending_children(self):
+        index = self.item.index()
+
+        self.assertFalse(self.model.canFetchMore(QModelIndex()))
+        self.assertTrue(self.model.canFetchMore(index))
+        #Expandable before the children are fetched
+        self.assertTrue(self.model.hasChildren(index))
+
+        self.model.fetchMore(index)
+        self.assertEqual(self.fetched, [self.item])
+
+    def test_fetched_children(self):
+        self.item.setData(None, PENDING_ROLE)
+        index = self.item.index()
+
+        self.assertFalse(self.model.canFetchMore(index))
+        self.assertFalse(self.model.hasChildren(index))
+
+        self.model.fetchMore(index)
+        self.assertEqual(self.fetched, [])
+
+
+class TestPendingNodes(TestCase):
+    def setUp(self):
+        self._batch = feature_details.FETCH_BATCH
+        #The tree view is only used for its model
+        self.view = DetailsTreeView.__new__(DetailsTreeView)
+        self.view.model = LazyItemModel(self.view.fetch_node_children)
+        self.fetched = []
+        self.view.fetch_record_nodes = \
+            lambda nodes: self.fetched.append((RECORD_NODE, nodes))
+        self.view.fetch_str_nodes = \
+            lambda nodes: self.fetched.append((STR_NODE, nodes))
+
+        self.roots = [_node('Party 1', RECORD_NODE), _node('Party 2'),
+                      _node('Party 3', RECORD_NODE),
+                      _node('Party 4', RECORD_NODE)]
+        for root in self.roots:
+            self.view.model.appendRow(root)
+
+        self.strs = [_node('STR 1', STR_NODE), _node('STR 2', STR_NODE),
+                     _node('STR 3', STR_NODE)]
+        self.roots[1].appendRow(self.strs[0])
+        self.roots[1].appendRow(self.strs[1])
+        self.roots[3].appendRow(_node('Gender'))
+        self.roots[3].appendRow(self.strs[2])
+
+    def tearDown(self):
+        feature_details.FETCH_BATCH = self._batch
+
+    def test_following_roots(self):
+        #Fetched roots are skipped
+        self.assertEqual(
+            self.view.pending_nodes(self.roots[0]),
+            [self.roots[0], self.roots[2], self.roots[3]]
+        )
+
+    def test_batch_size(self):
+        feature_details.FETCH_BATCH = 2
+
+        self.assertEqual(
+            self.view.pending_nodes(self.roots[0]),
+            [self.roots[0], self.roots[2]]
+        )
+
+    def test_following_str_nodes(self):
+        #STR nodes of the following roots are included
+        self.assertEqual(
+            self.view.pending_nodes(self.strs[1]),
+            [self.strs[1], self.strs[2]]
+        )
+
+    def test_fetch_node_children(self):
+        self.view.fetch_node_children(self.strs[0])
+
+        self.assertEqual(self.fetched, [(STR_NODE, self.strs)])
+        for node in self.strs:
+            self.assertIsNone(node.data(PENDING_ROLE))
+        #Nodes of another kind are left pending
+        self.assertEqual(self.roots[0].data(PENDING_ROLE), RECORD_NODE)
+
+
+def suite():
+    suite = makeSuite(TestLazyItemModel, 'test')
+    suite.addTest(makeSuite(TestPendingNodes, 'test'))
+
+    return suite
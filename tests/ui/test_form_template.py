@@ -0,0 +1,113 @@
+from collections import OrderedDict
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from stdm.data.database import notify_table_changes
+from stdm.ui.forms import form_template
+from stdm.ui.forms.form_template import (
+    clear_form_templates,
+    form_template as entity_form_template
+)
+
+
+class Profile(object):
+    name = 'basic'
+
+
+class ValueList(object):
+    def __init__(self, name):
+        self.name = name
+
+
+class Column(object):
+    def __init__(self, name, value_list=None):
+        self.name = name
+        if value_list is not None:
+            self.value_list = ValueList(value_list)
+
+
+class Entity(object):
+    def __init__(self, name, *columns):
+        self.profile = Profile()
+        self.name = name
+        self.columns = OrderedDict((c.name, c) for c in columns)
+
+
+class TestFormTemplate(TestCase):
+    def setUp(self):
+        self._column_names = form_template.table_column_names
+        self._entity_model = form_template.entity_model
+        self.models = []
+
+        def entity_model(entity, with_supporting_document=False):
+            self.models.append(entity.name)
+
+            return object()
+
+        form_template.table_column_names = \
+            lambda table_name: ['id', 'first_name', 'gender']
+        form_template.entity_model = entity_model
+
+        self.entity = Entity(
+            'basic_person', Column('id'), Column('first_name'),
+            Column('gender', 'check_gender'), Column('removed')
+        )
+
+    def tearDown(self):
+        clear_form_templates()
+        form_template.table_column_names = self._column_names
+        form_template.entity_model = self._entity_model
+
+    def test_reused(self):
+        template = entity_form_template(self.entity)
+        model = template.entity_cls
+
+        self.assertIs(entity_form_template(self.entity), template)
+        self.assertIs(template.entity_cls, model)
+        self.assertEqual(self.models, ['basic_person'])
+        self.assertTrue(template.is_current())
+
+    def test_table_columns(self):
+        template = entity_form_template(self.entity)
+
+        #Columns missing from the table have no widget
+        self.assertEqual(
+            [c.name for c in template.columns],
+            ['id', 'first_name', 'gender']
+        )
+        self.assertEqual(template.tables, set(['check_gender']))
+
+    def test_lookup_changed(self):
+        template = entity_form_template(self.entity)
+        notify_table_changes(set(['check_gender']))
+
+        self.assertFalse(template.is_current())
+        self.assertIsNot(entity_form_template(self.entity), template)
+
+    def test_other_table_changed(self):
+        template = entity_form_template(self.entity)
+        notify_table_changes(set(['basic_person', 'check_marital_status']))
+
+        self.assertTrue(template.is_current())
+
+    def test_entity_changed(self):
+        #The configuration was edited, creating new entity objects
+        template = entity_form_template(self.entity)
+        entity = Entity('basic_person', Column('id'))
+
+        self.assertIsNot(entity_form_template(entity), template)
+        self.assertFalse(template.is_current())
+
+    def test_cleared(self):
+        template = entity_form_template(self.entity)
+        clear_form_templates()
+
+        self.assertFalse(template.is_current())
+
+
+def suite():
+    suite = makeSuite(TestFormTemplate, 'test')
+
+    return suite
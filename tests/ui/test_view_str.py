@@ -0,0 +1,144 @@
+import datetime
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from sqlalchemy import (
+    Column,
+    create_engine,
+    Date,
+    ForeignKey,
+    Integer,
+    String
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker
+
+from stdm.ui.view_str import STRViewEntityWidget
+
+Base = declarative_base()
+
+
+class Party(Base):
+    __tablename__ = 'basic_party'
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+class SocialTenure(Base):
+    __tablename__ = 'basic_social_tenure_relationship'
+    id = Column(Integer, primary_key=True)
+    party_id = Column(Integer, ForeignKey('basic_party.id'))
+    validity_start = Column(Date)
+    validity_end = Column(Date)
+
+
+class Entity(object):
+    def __init__(self, name):
+        self.name = name
+
+
+class Profile(object):
+    prefix = 'basic'
+
+
+class Config(object):
+    #Model of the searched entity
+    STRModel = Party
+
+
+class DateEdit(object):
+    #Stands in for the date edit and the QDate it returns
+    def __init__(self, date):
+        self._date = date
+
+    def date(self):
+        return self
+
+    def toPyDate(self):
+        return self._date
+
+
+class SearchWidget(object):
+    """
+    Attributes of the search widget used by the filter.
+    """
+    def __init__(self, from_date, to_date):
+        self.validity_from_date = DateEdit(from_date)
+        self.validity_to_date = DateEdit(to_date)
+        self.curr_profile = Profile()
+        self.config = Config()
+        self.str_model = SocialTenure
+
+    def validity_period_filter(self, query, entity):
+        return STRViewEntityWidget.validity_period_filter.__func__(
+            self, query, entity
+        )
+
+
+class TestValidityPeriodFilter(TestCase):
+    def setUp(self):
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        self.session = sessionmaker(bind=engine)()
+        self.session.add_all([
+            Party(id=1, name=u'Kamau'),
+            Party(id=2, name=u'Achieng'),
+            Party(id=3, name=u'Otieno'),
+            SocialTenure(id=1, party_id=1,
+                         validity_start=datetime.date(2015, 1, 1),
+                         validity_end=datetime.date(2020, 1, 1)),
+            SocialTenure(id=2, party_id=2,
+                         validity_start=datetime.date(2010, 1, 1),
+                         validity_end=datetime.date(2020, 1, 1))
+        ])
+        self.session.commit()
+        self.widget = SearchWidget(
+            datetime.date(2014, 1, 1), datetime.date(2021, 1, 1)
+        )
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_sql(self):
+        query = self.widget.validity_period_filter(
+            self.session.query(Party.id), Entity('basic_party')
+        )
+        sql = unicode(query.statement.compile(dialect=postgresql.dialect()))
+
+        #One statement, the STR table is not queried per record
+        self.assertEqual(
+            u' '.join(sql.split()),
+            u'SELECT basic_party.id FROM basic_party WHERE EXISTS '
+            u'(SELECT * FROM basic_social_tenure_relationship WHERE '
+            u'basic_social_tenure_relationship.party_id = basic_party.id '
+            u'AND basic_social_tenure_relationship.validity_start >= '
+            u'%(validity_start_1)s AND '
+            u'basic_social_tenure_relationship.validity_end <= '
+            u'%(validity_end_1)s)'
+        )
+
+    def test_valid_records(self):
+        query = self.widget.validity_period_filter(
+            self.session.query(Party), Entity('basic_party')
+        )
+
+        self.assertEqual([p.id for p in query], [1])
+
+    def test_no_str_column(self):
+        query = self.session.query(Party)
+
+        self.assertIs(
+            self.widget.validity_period_filter(
+                query, Entity('basic_household')
+            ),
+            query
+        )
+
+
+def suite():
+    suite = makeSuite(TestValidityPeriodFilter, 'test')
+
+    return suite
@@ -0,0 +1,179 @@
+"""
+/***************************************************************************
+Name                 : PrefixCompleter
+Description          : QCompleter that loads the values of a column matching
+                       the typed prefix from the database on demand.
+Date                 : 19/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+from collections import OrderedDict
+
+from PyQt4.QtCore import (
+    Qt,
+    QTimer
+)
+from PyQt4.QtGui import (
+    QCompleter,
+    QStringListModel
+)
+
+from stdm.data.record_loader import RecordLoader
+from stdm.data.text_search import prefix_values_query
+
+# Milliseconds without typing before the values are loaded
+COMPLETION_DELAY = 300
+
+# Maximum number of values shown for a prefix
+MAX_COMPLETIONS = 50
+
+# Number of prefixes whose values are kept
+MAX_CACHED_PREFIXES = 20
+
+
+class _PrefixValueFetcher(object):
+    # Used by the record loader in place of a RecordPager, the key of the
+    # request is the prefix
+    def fetch(self, query, key, limit):
+        values = [r[0] for r in query.limit(limit).all()]
+
+        return key, [unicode(v) for v in values if v is not None]
+
+
+class PrefixCompleter(QCompleter):
+    """
+    Completer of a line edit that loads the distinct values of a column
+    starting with the typed text, at most MAX_COMPLETIONS of them, once the
+    user stops typing. The values are loaded in a worker thread and those of
+    the recent prefixes are cached, the values of a longer prefix are
+    filtered from those of a shorter one if all of them were loaded.
+    """
+    def __init__(self, line_edit, parent=None):
+        """
+        :param line_edit: Line edit whose text is completed.
+        :type line_edit: QLineEdit
+        :param parent: Parent object.
+        :type parent: QObject
+        """
+        QCompleter.__init__(self, parent)
+        self._model = QStringListModel(self)
+        self.setModel(self._model)
+        self.setCaseSensitivity(Qt.CaseInsensitive)
+        self.setCompletionMode(QCompleter.PopupCompletion)
+
+        self._line_edit = line_edit
+        self._column = None
+        self._cache = OrderedDict()
+        self._generation = 0
+        self._loader = None
+        self._fetcher = _PrefixValueFetcher()
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(COMPLETION_DELAY)
+        self._timer.timeout.connect(self._load_values)
+
+        line_edit.setCompleter(self)
+        line_edit.textEdited.connect(self._on_text_edited)
+
+    def set_column(self, column):
+        """
+        Sets the column whose values are completed, the values loaded for
+        the previous column are discarded.
+        :param column: Text column, None to disable completion.
+        :type column: InstrumentedAttribute
+        """
+        self._column = column
+        self._cache.clear()
+        self._model.setStringList([])
+        self._cancel()
+
+    def stop(self):
+        """
+        Cancels the pending requests and stops the worker thread, it is
+        started again once the user types.
+        """
+        self._timer.stop()
+        self._cancel()
+        if self._loader is not None:
+            self._loader.stop()
+
+    def _cancel(self):
+        self._generation += 1
+        if self._loader is not None:
+            self._loader.cancel(self._generation)
+
+    def _on_text_edited(self, text):
+        self._timer.start()
+
+    def _cached_values(self, prefix):
+        # Values of the prefix or, if all the values of a shorter prefix
+        # were loaded, those of them that start with the prefix
+        key = prefix.lower()
+        if key in self._cache:
+            return self._cache[key]
+
+        for p, values in self._cache.iteritems():
+            if key.startswith(p) and len(values) < MAX_COMPLETIONS:
+                return [v for v in values if v.lower().startswith(key)]
+
+        return None
+
+    def _load_values(self):
+        prefix = unicode(self._line_edit.text())
+        if self._column is None or not prefix:
+            return
+
+        values = self._cached_values(prefix)
+        if values is not None:
+            self._show_values(prefix, values)
+
+            return
+
+        if self._loader is None:
+            self._loader = RecordLoader()
+            self._loader.page_loaded.connect(self._on_values_loaded)
+
+        self._cancel()
+        self._loader.request(
+            self._generation,
+            0,
+            self._fetcher,
+            prefix_values_query(self._column, prefix),
+            prefix,
+            MAX_COMPLETIONS
+        )
+
+    def _on_values_loaded(self, generation, page_index, result):
+        if generation != self._generation:
+            return
+
+        prefix, values = result
+        self._cache.pop(prefix.lower(), None)
+        self._cache[prefix.lower()] = values
+        while len(self._cache) > MAX_CACHED_PREFIXES:
+            self._cache.popitem(last=False)
+
+        self._show_values(prefix, values)
+
+    def _show_values(self, prefix, values):
+        # Values are only shown if the user has not typed something else
+        text = unicode(self._line_edit.text())
+        if not text.lower().startswith(prefix.lower()):
+            return
+
+        self._model.setStringList(values)
+        self.setCompletionPrefix(text)
+        if len(values) > 0 and self._line_edit.hasFocus():
+            self.complete()
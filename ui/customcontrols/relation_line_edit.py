@@ -40,7 +40,7 @@ from PyQt4.QtCore import (
 from qgis.utils import (
     iface
 )
-from qgis.core import edit, QgsFeature, QgsExpression, QgsFeatureRequest
+from qgis.core import edit, QgsFeature
 
 from stdm.data.database import AdminSpatialUnitSet
 from stdm.data.configuration.columns import BaseColumn
@@ -52,7 +52,7 @@ from stdm.ui.admin_unit_manager import SELECT
 from stdm.ui.lookup_value_selector import LookupValueSelector
 from stdm.settings import current_profile
 
-from stdm.data.pg_utils import vector_layer
+from stdm.data.expression_evaluator import entity_expression_evaluator
 
 class ForeignKeyLineEdit(QLineEdit):
     """
@@ -243,13 +243,19 @@ class RelatedEntityLineEdit(ForeignKeyLineEdit):
         self.show_clear_button()
 
     @classmethod
-    def process_display(cls, column, model_object):
+    def display_text(cls, column, model_object):
         """
-        Format display value.
+        Joins the values of the display columns of the parent record. It
+        does not use any widget so it can be called by the formatters that
+        run in the worker threads of the entity browser.
+        :param column: Foreign key column.
+        :type column: ForeignKeyColumn
+        :param model_object: Parent record.
+        :return: Display values separated by COLUMN_SEPARATOR.
+        :rtype: unicode
         """
         display_columns = column.entity_relation.display_cols
         display_vals = []
-        QApplication.processEvents()
         for c in display_columns:
             if hasattr(model_object, c):
 
@@ -268,8 +274,17 @@ class RelatedEntityLineEdit(ForeignKeyLineEdit):
 
                 display_vals.append(unicode(display_val))
 
+        return cls.COLUMN_SEPARATOR.join(display_vals)
+
+    @classmethod
+    def process_display(cls, column, model_object):
+        """
+        Format display value.
+        """
+        QApplication.processEvents()
+
         try:
-            return cls.COLUMN_SEPARATOR.join(display_vals)
+            return cls.display_text(column, model_object)
 
         except RuntimeError:
             QMessageBox.warning(
@@ -769,7 +784,6 @@ class ExpressionLineEdit(QLineEdit):
         self.column = column
         self._entity = self.column.entity
 
-        self.layer = self.create_layer()
         self.host = host
         #Configure load button
         self.btn_load = QToolButton(parent)
@@ -804,46 +818,22 @@ class ExpressionLineEdit(QLineEdit):
         # Current model object
         self._current_item = None
 
-    def create_layer(self):
-        srid = None
-        column = ''
-        if self.entity.has_geometry_column():
-            geom_cols = [col.name for col in self.entity.columns.values()
-                         if col.TYPE_INFO == 'GEOMETRY']
-            column = geom_cols[0]
-            geom_col_obj = self.entity.columns[column]
-
-            if geom_col_obj.srid >= 100000:
-                srid = geom_col_obj.srid
-        layer = vector_layer(self.entity.name, geom_column=column,
-                             proj_wkt=srid)
-        return layer
-
     def get_feature_value(self, model=None):
-        self.layer.startEditing()
-        feature = None
-
-        request = QgsFeatureRequest()
+        """
+        Computes the value of the expression for a saved record using the
+        evaluator shared by the widgets of the entity.
+        :param model: Saved record, that of the host if None.
+        :type model: object
+        :return: Value of the expression or None if the record is not found.
+        :rtype: object
+        """
         if model is None:
             model = self.host.model()
-        request.setFilterFid(model.id)
-        feature_itr = self.layer.getFeatures(request)
-        for feat in feature_itr:
-            feature = feat
-            break
-
-        exp = QgsExpression(self.column.expression)
 
-        if exp.hasParserError():
-            raise Exception(exp.parserErrorString())
+        evaluator = entity_expression_evaluator(self.entity)
+        values = evaluator.evaluate([model.id], [self.column.name])
 
-        exp.prepare(self.layer.pendingFields())
-        if feature is not None:
-            value = exp.evaluate(feature)
-
-            return value
-        else:
-            return None
+        return values.get(model.id, {}).get(self.column.name, None)
 
     def set_button_minimum_size(self, button):
         """
@@ -885,8 +875,10 @@ class ExpressionLineEdit(QLineEdit):
         Slot raised to load browser for selecting foreign key entities. To be
         implemented by subclasses.
         """
-        self.format_display(self.get_feature_value(model))
-        return self.get_feature_value()
+        value = self.get_feature_value(model)
+        self.format_display(value)
+
+        return value
 
     def format_display(self, value):
         """
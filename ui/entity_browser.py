@@ -22,6 +22,8 @@ from datetime import date
 from collections import OrderedDict
 
 import cProfile
+import logging
+import time
 from PyQt4.QtCore import *
 from PyQt4.QtGui import *
 from qgis.utils import (
@@ -31,26 +33,36 @@ from qgis.core import (
     QgsMapLayerRegistry,
     QgsCoordinateReferenceSystem
 )
+from sqlalchemy.orm import subqueryload
 
 from stdm.data.configuration import entity_model
 from stdm.data.configuration.columns import (
+    ForeignKeyColumn,
     GeometryColumn,
     MultipleSelectColumn,
     VirtualColumn
 )
 from stdm.data.configuration.entity import Entity
+from stdm.data.entity_filter import entity_column_filter
 from stdm.data.pg_utils import(
     table_column_names,
     qgsgeometry_from_wkbelement,
     export_data,
-    fetch_from_table,
-    pg_table_count
+    fetch_from_table
 )
 
 from stdm.data.qtmodels import (
     BaseSTDMTableModel,
+    PagedEntityTableModel,
     VerticalHeaderSortFilterProxyModel
 )
+from stdm.data.model_cache import EntityModelCache
+from stdm.data.record_loader import RecordLoader
+from stdm.data.row_count import (
+    BackgroundCount,
+    count_text,
+    TableRowCount
+)
 
 from stdm.ui.forms.widgets import ColumnWidgetRegistry
 from stdm.navigation import TableContentGroup
@@ -85,6 +97,15 @@ from stdm.settings import (
 
 __all__ = ["EntityBrowser", "EntityBrowserWithEditor", "ContentGroupEntityBrowser"]
 
+LOGGER = logging.getLogger('stdm')
+
+# Milliseconds without typing before the records are filtered
+FILTER_DELAY = 300
+
+# Column types whose values are ids that are displayed as text so sorting
+# by them in the database would not match the displayed order
+_DISPLAY_VALUE_TYPES = ['LOOKUP', 'ADMIN_SPATIAL_UNIT', 'FOREIGN_KEY']
+
 class _EntityDocumentViewerHandler(object):
     """
     Class that loads the document viewer to display all documents
@@ -233,6 +254,26 @@ class EntityBrowser(SupportsManageMixin, QDialog, Ui_EntityBrowser):
         #ID of a record to select once records have been added to the table
         self._select_item = None
         self.current_records = 0
+        # Query of the records before filtering and background count of
+        # the filtered records, if the records are fetched page by page
+        self._base_query = None
+        self._record_count = None
+        # Action counting the records of large tables exactly, shown while
+        # the total is an estimate
+        self._count_records_act = None
+        # Worker thread fetching pages of records, the selected record and
+        # column widths are set once the first page has been loaded
+        self._record_loader = None
+        self._model_connected = False
+        self._max_rows = 0
+        self._select_pending = False
+        self._columns_resized = False
+
+        # Filter the records once the user stops typing
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(FILTER_DELAY)
+        self._filter_timer.timeout.connect(self.apply_record_filter)
 
         self.parent_record_id = ent_rec_id
         self.record_limit = self.get_records_limit() #get_entity_browser_record_limit()
@@ -248,10 +289,8 @@ class EntityBrowser(SupportsManageMixin, QDialog, Ui_EntityBrowser):
         self.tbEntity.doubleClicked[QModelIndex].connect(self.onDoubleClickView)
 
     def get_records_limit(self):
-        records = get_entity_browser_record_limit()
-        if records == 0:
-            records = pg_table_count(self.entity.name)
-        return records
+        # 0 if there is no limit, the records are fetched page by page
+        return get_entity_browser_record_limit()
 
     def children_entities(self):
         """
@@ -388,6 +427,9 @@ class EntityBrowser(SupportsManageMixin, QDialog, Ui_EntityBrowser):
         self.setWindowTitle(unicode(self.title()))
 
         if self._data_initialized:
+            if isinstance(self._tableModel, PagedEntityTableModel):
+                self._take_cached_model()
+
             return
         try:
             if not self._dbmodel is None:
@@ -408,7 +450,20 @@ class EntityBrowser(SupportsManageMixin, QDialog, Ui_EntityBrowser):
         Override event which just sets a flag to indicate that the data records have already been
         initialized.
         '''
-        pass
+        self._filter_timer.stop()
+        self._cancel_record_count()
+
+        # Pages are requested again if the browser is shown again, the
+        # model can be used by other browsers in the meantime
+        if isinstance(self._tableModel, PagedEntityTableModel):
+            self._tableModel.cancel_loading()
+            self._connect_table_model(False)
+            EntityModelCache.instance().add(
+                self._tableModel, self._entity.name, self._model_tables(),
+                self._max_rows
+            )
+        if self._record_loader is not None:
+            self._record_loader.stop()
 
     def clear_selection(self):
         """
@@ -426,6 +481,13 @@ class EntityBrowser(SupportsManageMixin, QDialog, Ui_EntityBrowser):
         '''
         Get the number of records in the specified table and updates the window title.
         '''
+        # The paged model keeps its total up to date when records are
+        # added or removed
+        if isinstance(self._tableModel, PagedEntityTableModel):
+            self._on_records_fetched()
+
+            return self._tableModel.total()
+
         entity = self._dbmodel()
 
         # Get number of records
@@ -433,23 +495,51 @@ class EntityBrowser(SupportsManageMixin, QDialog, Ui_EntityBrowser):
 
         if init_data:
             if self.current_records < 1:
-                if numRecords > self.record_limit:
+                if 0 < self.record_limit < numRecords:
                     self.current_records = self.record_limit
                     numRecords = self.record_limit
                 else:
                     self.current_records = numRecords
 
+        self._set_record_count_title(numRecords)
+
+        return numRecords
+
+    def _set_record_count_title(self, numRecords, exact=True):
+        #Shows the number of loaded and total records in the window title,
+        #estimated totals are marked as such
         rowStr = QApplication.translate('EntityBrowser', 'row') \
             if numRecords == 1 \
             else QApplication.translate('EntityBrowser', 'rows')
         showing = QApplication.translate('EntityBrowser', 'Showing')
         windowTitle = u"{0} - {1} {2} of {3} {4}".format(
-            self.title(), showing, self.current_records, numRecords, rowStr
+            self.title(), showing, self.current_records,
+            count_text(numRecords, exact), rowStr
         )
 
         self.setWindowTitle(windowTitle)
 
-        return numRecords
+    def _on_records_fetched(self, *args):
+        #Slot raised when the paged model fetches or removes records
+        self.current_records = self._tableModel.rowCount()
+
+        #Loaded records are shown until they have been counted
+        total = self._tableModel.total()
+        if total is None:
+            total = self.current_records
+        self._set_record_count_title(
+            total, self._tableModel.is_total_exact()
+        )
+
+        if self.current_records == 0:
+            return
+
+        if not self._columns_resized:
+            self._columns_resized = True
+            self.tbEntity.resizeColumnsToContents()
+
+        if self._select_pending:
+            self._select_pending = not self._select_record(self._select_item)
 
     def _init_entity_columns(self):
         """
@@ -526,9 +616,9 @@ class EntityBrowser(SupportsManageMixin, QDialog, Ui_EntityBrowser):
             )
 
     def _select_record(self, id):
-        #Selects record with the given ID.
+        #Selects record with the given ID, returns True if it was found.
         if id is None:
-            return
+            return False
 
         m = self.tbEntity.model()
         s = self.tbEntity.selectionModel()
@@ -550,6 +640,10 @@ class EntityBrowser(SupportsManageMixin, QDialog, Ui_EntityBrowser):
                 QItemSelectionModel.ClearAndSelect|QItemSelectionModel.Rows
             )
 
+            return True
+
+        return False
+
     # def on_advanced_search(self):
     #     search = AdvancedSearch(self._entity, parent=self)
     #     search.show()
@@ -605,74 +699,69 @@ class EntityBrowser(SupportsManageMixin, QDialog, Ui_EntityBrowser):
         else:
             self._init_entity_columns()
 
-            # Load entity data. There might be a better way in future in order
-            # to ensure that there is a balance between user data discovery
-            # experience and performance.
+            # Load entity data. Records are fetched page by page as the
+            # table is scrolled unless they have already been fetched.
             if filtered_records is not None:
                 self.current_records = filtered_records.rowcount
 
-            numRecords = self.recomputeRecordCount(init_data=True)
+            entity_query, max_rows = None, 0
+            # Only one filter is possible.
+            if len(self.filtered_records) == 0:
+                entity_query, max_rows = self._entity_query()
 
-            # Load progress dialog
-            progressLabel = QApplication.translate(
-                "EntityBrowser", "Fetching Records..."
-            )
-            progressDialog = QProgressDialog(
-                progressLabel, None, 0, numRecords, self
-            )
+            progressDialog = None
+            if entity_query is not None:
+                sort_column, descending = self.get_sorting_column(
+                    self._entity
+                )
+                if sort_column is None:
+                    sort_column = self._dbmodel.id
+
+                # Models of hidden browsers are reused for the same records
+                # until the tables they display are changed
+                model_cache = EntityModelCache.instance()
+                self._tableModel = model_cache.take(model_cache.key(
+                    self._entity.name, entity_query, sort_column, descending,
+                    max_rows
+                ))
+
+                self._max_rows = max_rows
+                if self._tableModel is None:
+                    self._tableModel = self._create_paged_model(
+                        entity_query, sort_column, descending
+                    )
+                self._record_loader = self._tableModel.loader()
+                self._connect_table_model()
+                self._base_query = entity_query
+                if not self._tableModel.is_total_exact():
+                    self._count_records(entity_query)
+                self._on_records_fetched()
+                all_loaded = False
 
-            QApplication.processEvents()
-            progressDialog.show()
-            progressDialog.setValue(0)
-
-            entity_records = []
-            # Add records to nested list for enumeration in table model
-            load_data = True
-            if self.plugin is not None:
-                if self._entity.name in self.plugin.entity_table_model.keys():
-                    if filtered_records is None:
-                        self._tableModel = self.plugin.entity_table_model[
-                            self._entity.name
-                        ]
-
-            if isinstance(self._parent, EntityEditorDialog):
-                load_data = True
-
-            if load_data:
-                # Only one filter is possible.
-                if len(self.filtered_records) > 0:
-                    entity_records = self.filtered_records
-                else:
-                    entity_cls = self._dbmodel()
-
-                    ordering = self.get_sorting_order(self._entity)
-
-                    if type(self.parent_record_id) == int and self.parent_record_id > 0:
-                        col = self.filter_col(self._entity)
-                        if col is None:
-                            entity_records = entity_cls.queryObject().filter().order_by(
-                                    ordering).limit(
-                                            self.record_limit
-                                            ).all()
-                        else:
-                            child_model = entity_model(self._entity)
-                            col_name = getattr(child_model, col.name)
-                            child_model_obj = child_model()
-                            entity_records = child_model_obj.queryObject().filter(
-                                    col_name==self.parent_record_id
-                                    ).order_by(ordering).all()
-                    else: 
-                        #if isinstance(self._parent, QMainWindow):
-                        if not isinstance(self._parent, EntityEditorDialog):
-                            entity_records = entity_cls.queryObject().filter().order_by(
-                                    ordering).limit(self.record_limit).all()
-
-                    numRecords = len(entity_records)
-
-            # if self._tableModel is None:
+            else:
+                numRecords = self.recomputeRecordCount(init_data=True)
+
+                # Load progress dialog
+                progressLabel = QApplication.translate(
+                    "EntityBrowser", "Fetching Records..."
+                )
+                progressDialog = QProgressDialog(
+                    progressLabel, None, 0, numRecords, self
+                )
+
+                QApplication.processEvents()
+                progressDialog.show()
+                progressDialog.setValue(0)
+
+                entity_records = self.filtered_records
+                numRecords = len(entity_records)
+                all_loaded = self.record_limit == 0 or \
+                    numRecords < self.record_limit
+
+                # Add records to nested list for enumeration in table model
                 entity_records_collection = []
                 for i, er in enumerate(entity_records):
-                    if i == self.record_limit:
+                    if self.record_limit > 0 and i == self.record_limit:
                         break
                     QApplication.processEvents()
                     entity_row_info = []
@@ -699,15 +788,10 @@ class EntityBrowser(SupportsManageMixin, QDialog, Ui_EntityBrowser):
 
                     entity_records_collection.append(entity_row_info)
 
-
                 self._tableModel = BaseSTDMTableModel(
                     entity_records_collection, self._headers, self
                 )
 
-                if self.plugin is not None:
-                    self.plugin.entity_table_model[self._entity.name] = \
-                            self._tableModel
-
             # Add filter columns
             for header, info in self._searchable_columns.iteritems():
                 column_name, index = info['name'], info['header_index']
@@ -725,7 +809,12 @@ class EntityBrowser(SupportsManageMixin, QDialog, Ui_EntityBrowser):
                 self.set_proxy_model_filter_column(0)
 
             self.tbEntity.setModel(self._proxyModel)
-            if numRecords < self.record_limit:
+            # Records fetched page by page are sorted in the database,
+            # otherwise sorting in the view is only possible once all records
+            # have been fetched.
+            if entity_query is not None:
+                self._init_record_sorting()
+            elif all_loaded:
                 self.tbEntity.setSortingEnabled(True)
                 self.tbEntity.sortByColumn(1, Qt.AscendingOrder)
 
@@ -740,9 +829,15 @@ class EntityBrowser(SupportsManageMixin, QDialog, Ui_EntityBrowser):
             self.connect(self.cboFilterColumn, SIGNAL('currentIndexChanged (int)'), self.onFilterColumnChanged)
             self.connect(self.txtFilterPattern, SIGNAL('textChanged(const QString&)'), self.onFilterRegExpChanged)
 
-            #Select record with the given ID if specified
+            #Select record with the given ID if specified, records fetched
+            #in the background are selected once they have been loaded
             if not self._select_item is None:
-                self._select_record(self._select_item)
+                self._select_pending = \
+                    not self._select_record(self._select_item) and \
+                    entity_query is not None
+
+            if progressDialog is None:
+                return
 
             if numRecords > 0:
                 # Set maximum value of the progress dialog
@@ -797,6 +892,74 @@ class EntityBrowser(SupportsManageMixin, QDialog, Ui_EntityBrowser):
         cols_ordered = OrderedDict(sorted(cols.items()))
         min_id = min(i for i in cols_ordered.keys() if i > -1)
         return cols_ordered[min_id]
+
+    def get_sorting_column(self, entity):
+        """
+        Gets the model attribute and direction that the records are sorted
+        by based on the sort order setting.
+        :param entity: Entity whose records are sorted.
+        :type entity: Entity
+        :return: Model attribute, None for the primary key, and True if the
+        records are sorted in descending order.
+        :rtype: tuple
+        """
+        if not self.sort_order or self.sort_order == 'idasc':
+            return None, False
+
+        if self.sort_order == 'iddesc':
+            return None, True
+
+        sort_field = self.get_sorting_field(entity)
+        # Virtual columns cannot be used for sorting
+        if not sort_field in self._dbmodel.__table__.columns:
+            return None, False
+
+        sort_column = getattr(self._dbmodel, sort_field)
+
+        return sort_column, self.sort_order == 'desc'
+
+    def _load_options(self):
+        """
+        :return: Loader options that load the multiple select collections
+        of a page of records in one query per collection instead of one
+        query per record.
+        :rtype: list
+        """
+        options = []
+        for c in self._entity.columns.values():
+            if not isinstance(c, MultipleSelectColumn):
+                continue
+
+            attr = getattr(self._dbmodel, c.model_attribute_name, None)
+            if attr is not None:
+                options.append(subqueryload(attr))
+
+        return options
+
+    def _entity_query(self):
+        """
+        :return: Query of the records listed in the browser and the maximum
+        number of records to fetch, 0 for no limit. The query is None if
+        no records should be listed.
+        :rtype: tuple
+        """
+        entity_cls = self._dbmodel()
+
+        if type(self.parent_record_id) == int and self.parent_record_id > 0:
+            col = self.filter_col(self._entity)
+            if col is None:
+                return entity_cls.queryObject(), self.record_limit
+
+            col_name = getattr(self._dbmodel, col.name)
+
+            return entity_cls.queryObject().filter(
+                col_name == self.parent_record_id
+            ), 0
+
+        if isinstance(self._parent, EntityEditorDialog):
+            return None, 0
+
+        return entity_cls.queryObject(), self.record_limit
             
     def _header_index_from_filter_combo_index(self, idx):
         col_info = self.cboFilterColumn.itemData(idx)
@@ -813,6 +976,9 @@ class EntityBrowser(SupportsManageMixin, QDialog, Ui_EntityBrowser):
         '''
         self.set_proxy_model_filter_column(index)
 
+        if self._base_query is not None and self.txtFilterPattern.text():
+            self._filter_timer.start()
+
     def _onFilterRegExpChanged(self,text):
         cProfile.runctx('self._onFilterRegExpChanged(text)', globals(), locals())
 
@@ -820,9 +986,261 @@ class EntityBrowser(SupportsManageMixin, QDialog, Ui_EntityBrowser):
         '''
         Slot raised whenever the filter text changes.
         '''
+        # Records fetched page by page are filtered in the database
+        if self._base_query is not None:
+            self._filter_timer.start()
+
+            return
+
         regExp = QRegExp(text,Qt.CaseInsensitive,QRegExp.FixedString)
         self._proxyModel.setFilterRegExp(regExp)
 
+    def _record_filter(self):
+        # Filter expression for the text and column in the filter controls
+        idx = self.cboFilterColumn.currentIndex()
+        if idx == -1:
+            return None
+
+        name, header_idx = self._header_index_from_filter_combo_index(idx)
+        column = self._entity.columns.get(name, None)
+        if column is None:
+            return None
+
+        return entity_column_filter(
+            self._dbmodel, column, unicode(self.txtFilterPattern.text())
+        )
+
+    def _cancel_record_count(self):
+        if self._record_count is not None:
+            self._record_count.cancel()
+            self._record_count = None
+
+    def _connect_table_model(self, connect=True):
+        # Connects the paged model to the browser, or disconnects it while
+        # the browser is hidden since the model is shared through the cache
+        if self._model_connected == connect:
+            return
+
+        self._model_connected = connect
+        signals = [
+            (self._tableModel.rowsInserted, self._on_records_fetched),
+            (self._tableModel.rowsRemoved, self._on_records_fetched),
+            (self._record_loader.load_failed, self._on_record_load_failed)
+        ]
+        for signal, slot in signals:
+            if connect:
+                signal.connect(slot)
+            else:
+                signal.disconnect(slot)
+
+    def _create_paged_model(self, query, sort_column, descending):
+        # Pages are fetched in a worker thread and added to the table as
+        # they arrive. The model has no parent so that it can be cached.
+        return PagedEntityTableModel(
+            query,
+            self._dbmodel.id,
+            self._entity_attrs,
+            self._headers,
+            sort_column,
+            descending,
+            self._cell_formatters,
+            max_rows=self._max_rows,
+            load_options=self._load_options(),
+            loader=RecordLoader()
+        )
+
+    def _take_cached_model(self):
+        # Takes the model back from the cache when the browser is shown
+        # again
+        if EntityModelCache.instance().take_model(self._tableModel):
+            self._connect_table_model()
+            self._on_records_fetched()
+
+            return
+
+        # The model has been invalidated or taken by another browser
+        sort_column, descending = self._tableModel.sort_column()
+        self._tableModel = self._create_paged_model(
+            self._base_query, sort_column, descending
+        )
+        self._record_loader = self._tableModel.loader()
+        self._proxyModel.setSourceModel(self._tableModel)
+        self._connect_table_model()
+        self._reload_records(sort_column, descending)
+
+    def _model_tables(self):
+        # Tables whose changes invalidate the cached model, i.e. the entity
+        # table and those of the display values of its columns
+        tables = set([self._entity.name])
+        for column in self._entity.columns.values():
+            if column.TYPE_INFO == 'MULTIPLE_SELECT':
+                if column.association is not None:
+                    tables.add(column.association.name)
+                if column.value_list is not None:
+                    tables.add(column.value_list.name)
+
+            elif isinstance(column, ForeignKeyColumn) and \
+                    column.parent is not None:
+                tables.add(column.parent.name)
+
+        return tables
+
+    def _on_record_load_failed(self, generation, page_index, msg):
+        self._notifBar.insertErrorNotification(msg)
+
+    def _count_records(self, query):
+        # Counts the records matching the query in the background. All
+        # records of the entity table are estimated first and only counted
+        # if the table is small or the user requests it.
+        self._cancel_record_count()
+        self._show_count_records_action(False)
+
+        if query is self._base_query and self._base_query_is_table():
+            table_count = TableRowCount(self._entity.name, self)
+            table_count.counted.connect(self._on_records_counted)
+            self._record_count = table_count
+            if not table_count.start():
+                self._tableModel.set_total(table_count.value(), False)
+                self._show_count_records_action(True)
+
+            return
+
+        self._record_count = BackgroundCount.from_query(
+            query, self._dbmodel.id
+        )
+        self._record_count.counted.connect(self._on_records_counted)
+        self._record_count.start()
+
+    def _base_query_is_table(self):
+        # True if the base query lists all records of the entity table
+        return not (type(self.parent_record_id) == int and
+                    self.parent_record_id > 0 and
+                    self.filter_col(self._entity) is not None)
+
+    def _show_count_records_action(self, visible):
+        if self._count_records_act is None:
+            if not visible:
+                return
+
+            self._count_records_act = QAction(
+                QIcon(':/plugins/stdm/images/icons/update.png'),
+                QApplication.translate('EntityBrowser', 'Count Records'),
+                self
+            )
+            self._count_records_act.triggered.connect(
+                self.on_count_records
+            )
+            self.tbActions.addAction(self._count_records_act)
+
+        self._count_records_act.setVisible(visible)
+
+    def on_count_records(self):
+        """
+        Slot raised to count all records exactly when only the estimate of
+        a large table is shown.
+        """
+        if isinstance(self._record_count, TableRowCount):
+            self._show_count_records_action(False)
+            self._record_count.count_exactly()
+
+    def _on_records_counted(self, count):
+        # Ignore counts of previous filters that completed before they were
+        # cancelled
+        if self.sender() is not self._record_count:
+            return
+
+        self._record_count = None
+        self._show_count_records_action(False)
+        self._tableModel.set_total(count)
+        self._on_records_fetched()
+
+    def _reload_records(self, sort_column, descending):
+        '''
+        Fetches the records matching the filter in the background, sorted
+        by the given model attribute. Records of the previous filter still
+        being loaded or counted are cancelled.
+        '''
+        self._cancel_record_count()
+        self._notifBar.clear()
+
+        query = self._base_query
+        try:
+            record_filter = self._record_filter()
+            if record_filter is not None:
+                query = query.filter(record_filter)
+
+            self._tableModel.set_query(query, sort_column, descending)
+
+        except Exception as ex:
+            self._notifBar.insertErrorNotification(unicode(ex))
+
+            return
+
+        self._count_records(query)
+        self._on_records_fetched()
+
+    def apply_record_filter(self):
+        '''
+        Slot raised when the user stops typing in the filter text box,
+        filters the records in the database.
+        '''
+        if self._base_query is None:
+            return
+
+        self._reload_records(*self._tableModel.sort_column())
+
+    def _init_record_sorting(self):
+        # Sort the records in the database when a column header is clicked
+        header = self.tbEntity.horizontalHeader()
+        header.setClickable(True)
+        header.setSortIndicatorShown(True)
+        self._init_sort_indicator()
+
+        header.sortIndicatorChanged.connect(self.on_sort_indicator_changed)
+
+    def _sortable_attribute(self, index):
+        # Model attribute of the table column if it can be sorted in the
+        # database
+        if index < 0 or index >= len(self._entity_attrs):
+            return None
+
+        attr = self._entity_attrs[index]
+        column = self._entity.columns.get(attr, None)
+        if column is None or column.TYPE_INFO in _DISPLAY_VALUE_TYPES:
+            return None
+
+        if not attr in self._dbmodel.__table__.columns:
+            return None
+
+        return getattr(self._dbmodel, attr)
+
+    def on_sort_indicator_changed(self, index, order):
+        '''
+        Slot raised when a column header is clicked, sorts the records in
+        the database.
+        '''
+        sort_column = self._sortable_attribute(index)
+        if sort_column is None:
+            # Restore the indicator of the current sort column
+            self._init_sort_indicator()
+
+            return
+
+        self._reload_records(sort_column, order == Qt.DescendingOrder)
+
+    def _init_sort_indicator(self):
+        # Shows the sort indicator on the column the records are sorted by
+        header = self.tbEntity.horizontalHeader()
+        sort_column, descending = self._tableModel.sort_column()
+        sort_idx = -1
+        if sort_column.key in self._entity_attrs:
+            sort_idx = self._entity_attrs.index(sort_column.key)
+        order = Qt.DescendingOrder if descending else Qt.AscendingOrder
+
+        header.blockSignals(True)
+        header.setSortIndicator(sort_idx, order)
+        header.blockSignals(False)
+
     def onDoubleClickView(self,modelindex):
         '''
         Slot raised upon double clicking the table view.
@@ -925,6 +1343,9 @@ class EntityBrowserWithEditor(EntityBrowser):
 
         self.record_id = 0
 
+        # Editor kept for adding the next record
+        self._new_entity_dlg = None
+
         self.highlight = None
         self.load_records = load_records
         self.selection_layer = None
@@ -1040,11 +1461,25 @@ class EntityBrowserWithEditor(EntityBrowser):
             result = False # a workaround to avoid duplicate model insert
             self.addEntityDlg = gps_tool.entity_editor
         else:
-            self.addEntityDlg = self._editor_dlg(
-                self._entity, parent=self, parent_entity=self.parent_entity, plugin=self.plugin
-            )
+            start = time.time()
+            # Reuse the editor of the previous record if it is up to date
+            # instead of building its widgets again
+            dlg = self._new_entity_dlg
+            if dlg is not None and dlg.is_reusable():
+                dlg.reset()
+            else:
+                dlg = self._editor_dlg(
+                    self._entity, parent=self, parent_entity=self.parent_entity, plugin=self.plugin
+                )
+                dlg.addedModel.connect(self.on_save_and_new)
+                self._new_entity_dlg = dlg
 
-            self.addEntityDlg.addedModel.connect(self.on_save_and_new)
+            LOGGER.debug(
+                '%s editor opened in %.3fs.',
+                self._entity.name,
+                time.time() - start
+            )
+            self.addEntityDlg = dlg
 
             result = self.addEntityDlg.exec_()
 
@@ -1455,6 +1890,8 @@ class EntityBrowserWithEditor(EntityBrowser):
         :type QCloseEvent
         :return: None
         """
+        EntityBrowser.hideEvent(self, hideEvent)
+
         if self._entity.has_geometry_column():
             if self.selection_layer is not None:
                 self.selection_layer.removeSelection()
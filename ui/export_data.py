@@ -22,21 +22,32 @@ import sys
 from PyQt4.QtGui import *
 from PyQt4.QtCore import (
     Qt,
+    QTimer,
     SIGNAL
 )
 
 import sqlalchemy
 
+from qgis.gui import QgsGenericProjectionSelector
+
 from stdm.utils import *
 from stdm.utils.util import getIndex
 from stdm.ui.reports import SqlHighlighter
 from stdm.data.pg_utils import (
+    column_common_values,
+    column_value_counts_query,
+    columnType,
+    pg_table_estimate,
     process_report_filter,
+    report_filter_count,
+    stream_report_filter,
     table_column_names,
-    unique_column_values,
     pg_tables
 )
 from stdm.data.importexport.writer import OGRWriter
+from stdm.data.importexport.export_query import denormalized_query
+from stdm.data.record_loader import RecordLoader
+from stdm.data.row_count import EXACT_COUNT_LIMIT
 
 from stdm.data.importexport import (
     vectorFileDir,
@@ -48,6 +59,22 @@ from stdm.utils.util import (
 )
 from .ui_export_data import Ui_frmExportWizard 
 
+#Number of unique values loaded at a time in the query builder
+UNIQUE_VALUES_PAGE_SIZE = 100
+
+#Data types whose values are quoted in the query builder
+QUOTED_DATA_TYPES = ["character varying"]
+
+class _ValueCountFetcher(object):
+    #Used by the record loader in place of a RecordPager, the result is the
+    #values and counts of the page and the key of its last value
+    def fetch(self, query, key, limit):
+        values = [(r.val, r.cnt) for r in query.limit(limit).all()]
+        if len(values) > 0:
+            key = (values[-1][1], values[-1][0])
+
+        return values, key
+
 class ExportData(QWizard,Ui_frmExportWizard):
     def __init__(self,parent=None):
         QWizard.__init__(self,parent) 
@@ -57,6 +84,8 @@ class ExportData(QWizard,Ui_frmExportWizard):
         self.btnDestFile.clicked.connect(self.setDestFile)
         self.lstSrcTab.itemSelectionChanged.connect(self.srcSelectChanged)
         self.btnUniqueVals.clicked.connect(self.colUniqueValues)
+        self.btnMoreVals.clicked.connect(self.loadMoreValues)
+        self.txtValueFilter.textChanged.connect(self._valueFilterChanged)
         
         #Query Builder signals
         self.lstQueryCols.itemDoubleClicked.connect(self.filter_insertField)
@@ -74,6 +103,30 @@ class ExportData(QWizard,Ui_frmExportWizard):
         self.btnQueryVerify.clicked.connect(self.filter_verifyQuery)
         self.select_all.clicked.connect(self.select_all_columns)
         self.select_none.clicked.connect(self.select_none_columns)
+        self.chkTransform.toggled.connect(self.btnOutputCrs.setEnabled)
+        self.btnOutputCrs.clicked.connect(self.select_output_crs)
+
+        #SRID geometries are transformed to on the server, if any
+        self._output_srid = None
+
+        #Column whose unique values are listed, whether they are quoted and
+        #count and value of the last value loaded
+        self._values_column = None
+        self._values_quote = False
+        self._values_key = None
+
+        #Unique values are counted in a worker thread, the values of
+        #earlier requests are discarded
+        self._values_loader = None
+        self._values_generation = 0
+        self._values_fetcher = _ValueCountFetcher()
+
+        #Delays the prefix search until the user stops typing
+        self._value_filter_timer = QTimer(self)
+        self._value_filter_timer.setSingleShot(True)
+        self._value_filter_timer.setInterval(300)
+        self._value_filter_timer.timeout.connect(self.colUniqueValues)
+
         #Init controls
         self.initControls()
         
@@ -113,6 +166,10 @@ class ExportData(QWizard,Ui_frmExportWizard):
             selTableIndex = self.field("srcTabIndex")
             self.srcTab = str(self.lstSrcTab.item(selTableIndex).text())
             self.lstQueryCols.clear()
+            self.lstUniqueVals.clear()
+            self.btnMoreVals.setEnabled(False)
+            self._values_column = None
+            self._cancelValues()
 
             self.lstQueryCols.addItems(self.allCols)
             
@@ -142,6 +199,17 @@ class ExportData(QWizard,Ui_frmExportWizard):
             #Set Geometry column
             geomCol = str(self.field("geomCol"))
             self.geomColumn = "" if geomCol == "NULL" else geomCol 
+
+            if validPage and self.geomColumn != "" and \
+                    self.chkTransform.isChecked() and \
+                    self._output_srid is None:
+                msg = QApplication.translate(
+                    'ExportData',
+                    u"Please select the CRS that the geometries are to be "
+                    u"reprojected to.")
+
+                self.ErrorInfoMessage(msg)
+                validPage=False
                   
         if self.currentId()==2:
             validPage = self.execExport() 
@@ -245,32 +313,195 @@ class ExportData(QWizard,Ui_frmExportWizard):
         if len(spColumns) > 0:
             self.cboSpatialCols_2.setEnabled(True)
         
+    def select_output_crs(self):
+        """
+        Opens the QGIS projection selector for choosing the CRS that the
+        exported geometries are transformed to.
+        """
+        crs_selector = QgsGenericProjectionSelector(self)
+
+        if crs_selector.exec_() == QDialog.Accepted:
+            auth_id = crs_selector.selectedAuthId()
+            #Only EPSG codes can be used in ST_Transform
+            if not auth_id.startswith('EPSG:'):
+                msg = QApplication.translate(
+                    'ExportData', u"Please select a CRS with an EPSG code.")
+                self.ErrorInfoMessage(msg)
+
+                return
+
+            self._output_srid = int(auth_id[5:])
+            self.btnOutputCrs.setText(auth_id)
+
+    def output_srid(self):
+        """
+        :return: SRID that the geometries are transformed to, None if they
+        are exported in the CRS of the source table.
+        :rtype: int
+        """
+        if self.geomColumn == "" or not self.chkTransform.isChecked():
+            return None
+
+        return self._output_srid
+
+    def _value_literal(self, value, quote):
+        #Text inserted in the filter expression for the column value
+        if value is None:
+            return u"''" if quote else u"NULL"
+
+        if quote:
+            return u"'{0}'".format(unicode(value).replace(u"'", u"''"))
+
+        return unicode(value)
+
+    def _addValueItems(self, values, quote, estimated=False):
+        """
+        Adds the values to the unique values list, showing the number of
+        rows of each value. The text inserted in the filter expression is
+        stored in the item data.
+        :param values: List of (value, count) tuples.
+        :type values: list
+        :param quote: True if the values should be quoted in the filter.
+        :type quote: bool
+        :param estimated: True if the counts are planner estimates.
+        :type estimated: bool
+        """
+        count_tmpl = u'{0} (~{1:d})' if estimated else u'{0} ({1:d})'
+
+        for value, count in values:
+            literal = self._value_literal(value, quote)
+            item = QListWidgetItem(count_tmpl.format(literal, count))
+            item.setData(Qt.UserRole, literal)
+            self.lstUniqueVals.addItem(item)
+
+    def _valueFilterChanged(self, text):
+        #Restart the delay for each character typed
+        if self._values_column is not None:
+            self._value_filter_timer.start()
+
+    def _cancelValues(self):
+        #Discards the unique values being counted
+        self._values_generation += 1
+        if self._values_loader is not None:
+            self._values_loader.cancel(self._values_generation)
+
+    def _requestValues(self, page_index):
+        #Counts the next page of unique values in the worker thread
+        if self._values_loader is None:
+            self._values_loader = RecordLoader()
+            self._values_loader.page_loaded.connect(self._onValuesLoaded)
+            self._values_loader.load_failed.connect(self._onValuesFailed)
+
+        query = column_value_counts_query(
+            self.srcTab,
+            self._values_column,
+            unicode(self.txtValueFilter.text()),
+            self._values_key
+        )
+        self._values_loader.request(
+            self._values_generation,
+            page_index,
+            self._values_fetcher,
+            query,
+            self._values_key,
+            UNIQUE_VALUES_PAGE_SIZE
+        )
+
     def colUniqueValues(self):
         #Slot for getting unique values for the selected column
+        self._value_filter_timer.stop()
+        self._cancelValues()
         self.lstUniqueVals.clear()
+        self.btnMoreVals.setEnabled(False)
+        self._values_key = None
         selCols = self.lstQueryCols.selectedItems()
-        
-        if len(selCols) > 0:
-            selCol = selCols[0]
-            colName = unicode(selCol.text())
 
-            uniqVals = unique_column_values(self.srcTab,colName)
+        if len(selCols) == 0:
+            self._values_column = None
+
+            return
+
+        colName = unicode(selCols[0].text())
+        self._values_column = colName
+        self._values_quote = columnType(self.srcTab, colName) in \
+                             QUOTED_DATA_TYPES
+
+        #Planner statistics give an instant first answer for large tables,
+        #they are shown until the exact counts have been loaded
+        if not unicode(self.txtValueFilter.text()):
+            common_vals = column_common_values(self.srcTab, colName)
+            if len(common_vals) > 0:
+                self._addValueItems(common_vals, self._values_quote, True)
+
+        self._requestValues(0)
+
+    def loadMoreValues(self):
+        #Slot for appending the next page of unique values
+        if self._values_column is None:
+            return
+
+        self.btnMoreVals.setEnabled(False)
+        self._requestValues(1)
+
+    def _onValuesLoaded(self, generation, page_index, result):
+        #Shows the values counted by the worker thread
+        if generation != self._values_generation:
+            return
+
+        values, self._values_key = result
+        if page_index == 0:
+            self.lstUniqueVals.clear()
+
+        self._addValueItems(values, self._values_quote)
+        self.btnMoreVals.setEnabled(
+            len(values) == UNIQUE_VALUES_PAGE_SIZE
+        )
+
+    def _onValuesFailed(self, generation, page_index, error):
+        if generation != self._values_generation:
+            return
+
+        msg = QApplication.translate(
+            'ExportData',
+            'The unique values could not be loaded.'
+        )
+        self.ErrorInfoMessage(u'{0}\n{1}'.format(msg, error))
+
+    def done(self, result):
+        #Stops counting unique values when the wizard is closed
+        self._value_filter_timer.stop()
+        self._cancelValues()
+        if self._values_loader is not None:
+            self._values_loader.stop()
+
+        QWizard.done(self, result)
+
 
-            self.lstUniqueVals.addItems(uniqVals)
-            self.lstUniqueVals.sortItems() 
-            
     def execExport(self):
         #Initiate the export process
         succeed = False
         
         targetFile = str(self.field("destFile"))
         writer = OGRWriter(targetFile)
-        resultSet = self.filter_buildQuery()
+        whereStmnt = self.txtWhereQuery.toPlainText()
 
-        if resultSet is None:
+        try:
+            # Large tables are not scanned just to size the progress dialog,
+            # their estimated number of rows is used instead
+            numFeat = None
+            if not whereStmnt:
+                numFeat = pg_table_estimate(self.srcTab)
+                if numFeat is not None and numFeat < EXACT_COUNT_LIMIT:
+                    numFeat = None
+
+            if numFeat is None:
+                numFeat = report_filter_count(self.srcTab, whereStmnt)
+
+        except sqlalchemy.exc.SQLAlchemyError as ex:
+            self._sql_error_message(ex)
             return succeed
-        
-        if resultSet.rowcount == 0:
+
+        if numFeat == 0:
             msg = QApplication.translate(
                 'ExportData', u"There are no records to export.")
 
@@ -279,9 +510,31 @@ class ExportData(QWizard,Ui_frmExportWizard):
 
         try:
 
+            column_types = {}
+            if self.chkDisplayValues.isChecked():
+                # The database replaces the ids with the display values
+                columnList, fromStmnt, text_columns = denormalized_query(
+                    self.curr_profile.entity_by_name(self.srcTab),
+                    self.srcTab,
+                    self.selectedColumns(),
+                    whereStmnt,
+                    self.geomColumn,
+                    self.output_srid()
+                )
+                column_types = dict((c, 'text') for c in text_columns)
+                resultSet = stream_report_filter(fromStmnt, columnList)
+
+            else:
+                resultSet = stream_report_filter(
+                    self.srcTab, u",".join(self._query_columns()),
+                    whereStmnt
+                )
+
+            # Rows are streamed from the database while they are written
             writer.db2Feat(
                 self, self.srcTab, resultSet, self.selectedColumns(),
-                self.geomColumn
+                self.geomColumn, num_feat=numFeat,
+                dest_srid=self.output_srid(), column_types=column_types
             )
             ft = QApplication.translate('ExportData', 'Features in ')
             succ = QApplication.translate(
@@ -293,10 +546,22 @@ class ExportData(QWizard,Ui_frmExportWizard):
 
             succeed = True
 
+        except sqlalchemy.exc.SQLAlchemyError as ex:
+            # Raised while the rows are streamed, e.g. by an invalid filter
+            self._sql_error_message(ex)
+
         except Exception as ex:
             self.ErrorInfoMessage(ex)
 
         return succeed
+
+    def _sql_error_message(self, error):
+        #Shows the database error raised by the filter statement
+        msg = QApplication.translate(
+            'ExportData', u"The SQL statement is invalid!")
+        detail = getattr(error, 'orig', None) or error
+
+        self.ErrorInfoMessage(u'{0}\n{1}'.format(msg, unicode(detail)))
             
     def filter_clearQuery(self):        
         #Deletes all the text in the SQL text editor
@@ -345,15 +610,26 @@ class ExportData(QWizard,Ui_frmExportWizard):
                         where_stmnt += "'{}'".format(i.strip('"').strip("'"))
             self.txtWhereQuery.setPlainText(where_stmnt)
 
-    def filter_buildQuery(self):
-        #Build query set and return results 
+    def _query_columns(self):
+        #Selected columns followed by the geometry, if any, as WKB which
+        #is more compact than WKT and keeps the full coordinate precision
         queryCols = self.selectedColumns() 
         
         if self.geomColumn != "":
-            queryCols.append(u"ST_AsText(%s)"%(self.geomColumn))
-        # remove quote from each column
+            geom_col = self.geomColumn
+            dest_srid = self.output_srid()
+            #Reproject all the geometries on the server
+            if dest_srid is not None:
+                geom_col = u"ST_Transform({0}, {1:d})".format(
+                    geom_col, dest_srid
+                )
+            queryCols.append(u"ST_AsBinary(%s)"%(geom_col))
 
-        columnList = u",".join(queryCols)
+        return queryCols
+
+    def filter_buildQuery(self):
+        #Build query set and return results 
+        columnList = u",".join(self._query_columns())
        
         whereStmnt = self.txtWhereQuery.toPlainText()
 
@@ -363,11 +639,8 @@ class ExportData(QWizard,Ui_frmExportWizard):
         try:
             results = process_report_filter(self.srcTab,columnList,whereStmnt,sortStmnt)
               
-        except sqlalchemy.exc.DataError:
-            msg = QApplication.translate(
-                'ExportData', u"The SQL statement is invalid!")
-
-            self.ErrorInfoMessage(msg)
+        except sqlalchemy.exc.SQLAlchemyError as ex:
+            self._sql_error_message(ex)
 
         return results    
         
@@ -376,7 +649,9 @@ class ExportData(QWizard,Ui_frmExportWizard):
         Inserts the text of the clicked field item into the
         SQL parser text editor.
         '''
-        field = lstItem.text()
+        field = lstItem.data(Qt.UserRole)
+        if field is None:
+            field = lstItem.text()
         if "'" in field and '"' not in field:
             field = u'{}'.format(field)
         self.txtWhereQuery.insertPlainText(field)
@@ -23,7 +23,7 @@ import re
 from collections import OrderedDict
 import cProfile
 import inspect
-from PyQt4.QtCore import Qt, QDateTime, QDate
+from PyQt4.QtCore import Qt, QDateTime, QDate, QModelIndex
 from PyQt4.QtGui import (
     QDockWidget,
     QMessageBox,
@@ -82,6 +82,13 @@ from ui_feature_details import Ui_DetailsDock
 
 DETAILS_DOCK_ON = False
 
+# Kinds of the tree nodes whose children are fetched when expanded
+RECORD_NODE = 'record'
+STR_NODE = 'str'
+
+# Maximum number of nodes whose children are fetched together
+FETCH_BATCH = 50
+
 class LayerSelectionHandler(object):
     """
      Handles all tasks related to the layer.
@@ -293,6 +300,7 @@ class DetailsDBHandler(LayerSelectionHandler):
         self._formatted_record = OrderedDict()
         self.display_columns = None
         self._entity_supporting_doc_tables = {}
+        self._entity_models = {}
         LayerSelectionHandler.__init__(self, iface, plugin)
 
     def set_entity(self, entity):
@@ -377,22 +385,46 @@ class DetailsDBHandler(LayerSelectionHandler):
         :return: SQLAlchemy result proxy
         :rtype: Object
         """
-        model = entity_model(entity)
+        model = self.cached_model(entity)
         model_obj = model()
 
         if isinstance(id, QgsFeature):
             id = id.id()
 
-        #result = model_obj.queryObject().filter(model.id == id).all()
-        result = model_obj.queryObject().all()
-        if len(result) > 0:
-            for r in result:
-                if r.id == id:
-                    result = r
-                    break
-            return result
-        else:
-            return None
+        return model_obj.queryObject().filter(model.id == id).first()
+
+    def cached_model(self, entity):
+        """
+        Gets the model of an entity, reflected once per handler.
+        :param entity: Entity
+        :type entity: Object
+        :return: SQLAlchemy model of the entity
+        :rtype: Object
+        """
+        model = self._entity_models.get(entity.name, None)
+        if model is None:
+            model = entity_model(entity)
+            self._entity_models[entity.name] = model
+
+        return model
+
+    def records_by_id(self, entity, ids):
+        """
+        Gets the records of an entity with the given ids in one query.
+        :param entity: Entity
+        :type entity: Object
+        :param ids: Ids of the records
+        :type ids: List
+        :return: The records indexed by id
+        :rtype: Dictionary
+        """
+        if len(ids) == 0:
+            return {}
+
+        model = self.cached_model(entity)
+        result = model().queryObject().filter(model.id.in_(ids)).all()
+
+        return dict((r.id, r) for r in result)
 
     def feature_str_link(self, feature_id, entity=None):
         """
@@ -403,15 +435,12 @@ class DetailsDBHandler(LayerSelectionHandler):
         :return: The list of social tenure records
         :rtype: List
         """
-        str_model = entity_model(
+        str_model = self.cached_model(
             self.current_profile.social_tenure
         )
         if entity is None:
-            spatial_unit_entity_id = '{}_id'.format(
-                self._entity.short_name.replace(' ', '_').lower())
-        else:
-            spatial_unit_entity_id = '{}_id'.format(
-                entity.short_name.replace(' ', '_').lower())
+            entity = self._entity
+        spatial_unit_entity_id = self.str_link_column(entity)
 
         spatial_unit_col_obj = getattr(str_model, spatial_unit_entity_id)
         model_obj = str_model()
@@ -431,13 +460,11 @@ class DetailsDBHandler(LayerSelectionHandler):
         :return: The list of social tenure records
         :rtype: List
         """
-        str_model = entity_model(
+        str_model = self.cached_model(
             self.current_profile.social_tenure
         )
         model_obj = str_model()
-        party_name = party_entity.name
-        party_entity_id = u'{}_id'.format(
-            party_name.split(self.current_profile.prefix)[1]).lstrip('_')
+        party_entity_id = self.str_link_column(party_entity, True)
 
         party_col_obj = getattr(str_model, party_entity_id)
 
@@ -447,6 +474,57 @@ class DetailsDBHandler(LayerSelectionHandler):
 
         return result
 
+    def str_link_column(self, entity, party_query=False):
+        """
+        Gets the name of the STR column referencing a party or a spatial
+        unit entity.
+        :param entity: The party or spatial unit entity
+        :type entity: Object
+        :param party_query: True if the entity is a party entity
+        :type party_query: Boolean
+        :return: The column name
+        :rtype: String
+        """
+        if party_query:
+            return u'{}_id'.format(
+                entity.name.split(self.current_profile.prefix)[1]
+            ).lstrip('_')
+
+        return '{}_id'.format(entity.short_name.replace(' ', '_').lower())
+
+    def str_links(self, entity, ids, party_query=False):
+        """
+        Gets the STR records linked to several party or spatial unit
+        records in one query.
+        :param entity: The party or spatial unit entity
+        :type entity: Object
+        :param ids: Ids of the party or spatial unit records
+        :type ids: List
+        :param party_query: True if the entity is a party entity
+        :type party_query: Boolean
+        :return: The lists of STR records indexed by the id of the
+        linked record
+        :rtype: Dictionary
+        """
+        links = {}
+        if len(ids) == 0:
+            return links
+
+        str_model = self.cached_model(
+            self.current_profile.social_tenure
+        )
+        col_name = self.str_link_column(entity, party_query)
+        col_obj = getattr(str_model, col_name)
+
+        result = str_model().queryObject().filter(
+            col_obj.in_(ids)
+        ).order_by(str_model.id).all()
+
+        for r in result:
+            links.setdefault(getattr(r, col_name), []).append(r)
+
+        return links
+
     def column_widget_registry(self, model, entity):
         """
         Registers the column widgets using the model and the entity.
@@ -623,6 +701,45 @@ class SelectedItem(object):
     def __init__(self, q_standard_item):
         self.standard_item = q_standard_item
 
+
+class LazyItemModel(QStandardItemModel):
+    """
+    Standard item model whose items can be marked as having children that
+    are only fetched when the item is expanded. The kind of the pending
+    children is stored in the PENDING_ROLE of the item and the children are
+    added by the fetcher, which is expected to clear the role.
+    """
+    PENDING_ROLE = Qt.UserRole + 2
+
+    def __init__(self, fetcher, parent=None):
+        """
+        :param fetcher: Callable taking the expanded QStandardItem that adds
+        its children.
+        :type fetcher: callable
+        :param parent: Parent object.
+        :type parent: QObject
+        """
+        QStandardItemModel.__init__(self, parent)
+        self._fetcher = fetcher
+
+    def hasChildren(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            return True
+
+        return QStandardItemModel.hasChildren(self, parent)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return False
+
+        return parent.data(self.PENDING_ROLE) is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+
+        self._fetcher(self.itemFromIndex(parent))
+
 class DetailsTreeView(DetailsDBHandler):
     """
     Avails the treeview dock widget. This class must be called
@@ -660,8 +777,9 @@ class DetailsTreeView(DetailsDBHandler):
         self.party_items = {}
         self._selected_features = []
         self.spatial_unit_items = {}
-        self.model = QStandardItemModel()
+        self.model = LazyItemModel(self.fetch_node_children)
         self.view.setModel(self.model)
+        self.view.expanded.connect(self.model.fetchMore)
         self.view.setUniformRowHeights(True)
         self.view.setRootIsDecorated(True)
         self.view.setAlternatingRowColors(True)
@@ -1018,67 +1136,295 @@ class DetailsTreeView(DetailsDBHandler):
 
     def search_spatial_unit(self, entity, spatial_unit_ids):
         """
-        Shows the treeview.
+        Shows the spatial unit records found by a search. The details of a
+        record are fetched when its node is expanded.
+        :param entity: The spatial unit entity
+        :type entity: Object
+        :param spatial_unit_ids: Ids of the records found
+        :type spatial_unit_ids: List
         """
         self.reset_tree_view()
         layer_icon = QIcon(':/plugins/stdm/images/icons/layer.gif')
-        ### add non entity layer for views.
 
-        # self.reset_tree_view(selected_features)
+        self.add_search_roots(
+            layer_icon, entity, spatial_unit_ids, self.spatial_unit_items
+        )
+
+        self.layer.selectByIds(spatial_unit_ids)
+
+    def search_party(self, entity, party_ids):
+        """
+        Shows the party records found by a search. The details of a
+        record are fetched when its node is expanded.
+        :param entity: The party entity
+        :type entity: Object
+        :param party_ids: Ids of the records found
+        :type party_ids: List
+        :return: The id of the spatial unit of the first STR of the first
+        party or -1 if it has none.
+        :rtype: Integer
+        """
+        self.reset_tree_view()
+        table_icon = QIcon(':/plugins/stdm/images/icons/table.png')
+
+        self.add_search_roots(table_icon, entity, party_ids, self.party_items)
 
-        for spu_id in spatial_unit_ids:
+        if len(party_ids) == 0:
+            return -1
 
-            root = QStandardItem(layer_icon, unicode(entity.short_name))
-            self.spatial_unit_items[root] = entity
-            root.setData(spu_id)
+        for str_id in self.feature_str_model.get(party_ids[0], []):
+            record_dict = self.str_models[str_id].__dict__
+            spatial_unit, spatial_unit_id = self.current_spatial_unit(
+                record_dict
+            )
+            if spatial_unit_id is not None:
+                return record_dict[spatial_unit_id]
+
+        return -1
+
+    def add_search_roots(self, icon, entity, ids, entity_items):
+        """
+        Adds the root nodes of search results. Their children are fetched
+        when they are expanded, only the first root is expanded.
+        :param icon: The icon of the roots
+        :type icon: QIcon
+        :param entity: The entity of the records found
+        :type entity: Object
+        :param ids: Ids of the records found
+        :type ids: List
+        :param entity_items: Collection of the items of the entity,
+        party_items or spatial_unit_items
+        :type entity_items: Dictionary
+        """
+        roots = []
+        for id in ids:
+            root = QStandardItem(icon, unicode(entity.short_name))
+            entity_items[root] = entity
+            root.setData(id)
+            root.setData(RECORD_NODE, LazyItemModel.PENDING_ROLE)
             self.set_bold(root)
-            self.model.appendRow(root)
+            roots.append(root)
+
+        if len(roots) == 0:
+            return
+
+        self.model.invisibleRootItem().appendRows(roots)
 
-            str_records = self.feature_str_link(spu_id, entity)
+        self.model.fetchMore(roots[0].index())
+        self.expand_node(roots[0])
 
-            if len(str_records) > 0:
-                db_model = getattr(str_records[0], entity.name)
+    def pending_nodes(self, item):
+        """
+        Gets a node and the nodes of the same kind following it whose
+        children have not been fetched, up to FETCH_BATCH nodes. Pending
+        nodes are either roots or children of roots.
+        :param item: The expanded node
+        :type item: QStandardItem
+        :return: The pending nodes
+        :rtype: List
+        """
+        kind = item.data(LazyItemModel.PENDING_ROLE)
+        root = self.model.invisibleRootItem()
+        parent = item.parent()
+
+        def following_nodes():
+            if parent is None:
+                for row in xrange(item.row() + 1, root.rowCount()):
+                    yield root.child(row)
+                return
+
+            for row in xrange(item.row() + 1, parent.rowCount()):
+                yield parent.child(row)
+
+            for parent_row in xrange(parent.row() + 1, root.rowCount()):
+                next_parent = root.child(parent_row)
+                for row in xrange(next_parent.rowCount()):
+                    yield next_parent.child(row)
+
+        nodes = [item]
+        for node in following_nodes():
+            if len(nodes) >= FETCH_BATCH:
+                break
+            if node.data(LazyItemModel.PENDING_ROLE) == kind:
+                nodes.append(node)
 
+        return nodes
+
+    def fetch_node_children(self, item):
+        """
+        Adds the children of an expanded node together with those of the
+        pending nodes of the same kind following it, so that the nodes in
+        view are loaded using one query per table.
+        :param item: The expanded node
+        :type item: QStandardItem
+        """
+        kind = item.data(LazyItemModel.PENDING_ROLE)
+        nodes = self.pending_nodes(item)
+        for node in nodes:
+            node.setData(None, LazyItemModel.PENDING_ROLE)
+
+        if kind == RECORD_NODE:
+            self.fetch_record_nodes(nodes)
+        elif kind == STR_NODE:
+            self.fetch_str_nodes(nodes)
+
+    def fetch_record_nodes(self, nodes):
+        """
+        Adds the column values and the STR nodes of party or spatial unit
+        root nodes.
+        :param nodes: The root nodes
+        :type nodes: List
+        """
+        groups = OrderedDict()
+        for node in nodes:
+            if node in self.party_items:
+                key = (self.party_items[node].name, True)
             else:
-                db_model = self.feature_model(entity, spu_id)
+                key = (self.spatial_unit_items[node].name, False)
+            groups.setdefault(key, []).append(node)
 
-            self.add_root_children(db_model, root, str_records)
+        for (entity_name, party_query), entity_nodes in groups.iteritems():
+            entity = self.current_profile.entity_by_name(entity_name)
+            ids = [n.data() for n in entity_nodes]
 
-        self.layer.selectByIds(
-            self.feature_models.keys()
-        )
-        #self.zoom_to_selected(self.layer)
+            records = self.records_by_id(entity, ids)
+            str_links = {}
+            if self.shows_str_nodes():
+                str_links = self.str_links(entity, ids, party_query)
 
-    def search_party(self, entity, party_ids):
+            for node in entity_nodes:
+                model = records.get(node.data(), None)
+                if model is None:
+                    continue
+
+                self.add_root_children(
+                    model, node, str_links.get(node.data(), []),
+                    party_query, True
+                )
+
+    def fetch_str_nodes(self, nodes):
         """
-        Shows the treeview.
+        Adds the column values, the custom tenure information and the
+        party or spatial unit of STR nodes.
+        :param nodes: The STR nodes
+        :type nodes: List
         """
-        self.reset_tree_view()
-        table_icon = QIcon(':/plugins/stdm/images/icons/table.png')
-        ### add non entity layer for views.
+        entities = {}
+        related_ids = OrderedDict()
+        custom_attr_ids = OrderedDict()
+        str_nodes = []
 
-        for spu_id in party_ids:
-            str_records = self.party_str_link(entity, spu_id)
+        for node in nodes:
+            record = self.str_models.get(node.data(), None)
+            if record is None:
+                continue
 
-            root = QStandardItem(table_icon, unicode(entity.short_name))
-            self.party_items[root] = entity
-            root.setData(spu_id)
-            self.set_bold(root)
-            self.model.appendRow(root)
+            record_dict = record.__dict__
+            party_query = node.parent() in self.party_items
+            spatial_unit, spatial_unit_id = self.current_spatial_unit(
+                record_dict
+            )
+            if party_query:
+                related, related_col = spatial_unit, spatial_unit_id
+            else:
+                related, related_col = self.current_party(record_dict) or \
+                                       (None, None)
+
+            if related is not None:
+                entities[related.name] = related
+                related_ids.setdefault(related.name, set()).add(
+                    record_dict[related_col]
+                )
 
-            if len(str_records) > 0:
-                db_model = getattr(str_records[0], entity.name)
+            custom_attr_entity = self.social_tenure.spu_custom_attribute_entity(
+                spatial_unit
+            )
+            if custom_attr_entity is not None and \
+                    len(custom_attr_entity.columns) > 2:
+                entities[custom_attr_entity.name] = custom_attr_entity
+                custom_attr_ids.setdefault(
+                    custom_attr_entity.name, []
+                ).append(record.id)
             else:
-                db_model = self.feature_model(entity, spu_id)
+                custom_attr_entity = None
+
+            str_nodes.append(
+                (node, record, party_query, related, related_col,
+                 custom_attr_entity)
+            )
 
-            self.add_root_children(db_model, root, str_records, True)
+        related_records = {}
+        for name, ids in related_ids.iteritems():
+            related_records[name] = self.records_by_id(
+                entities[name], list(ids)
+            )
 
-        return getattr(str_records[0], self.layer_table).id  # Nasty hack!!
+        custom_attr_records = {}
+        for name, str_ids in custom_attr_ids.iteritems():
+            try:
+                custom_attr_records[name] = self.custom_attr_records(
+                    entities[name], str_ids
+                )
+            except Exception:
+                custom_attr_records[name] = {}
 
-        #self.layer.selectByIds(
-            #self.feature_models.keys()
-        #)
-        #self.zoom_to_selected(self.layer)
+        for node, record, party_query, related, related_col, \
+                custom_attr_entity in str_nodes:
+            self.column_widget_registry(record, self.social_tenure)
+            for col, row in self._formatted_record.iteritems():
+                str_child = QStandardItem(u'{}: {}'.format(col, row))
+                str_child.setSelectable(False)
+                node.appendRow([str_child])
+
+            if custom_attr_entity is not None:
+                custom_attr_model = custom_attr_records[
+                    custom_attr_entity.name
+                ].get(record.id, None)
+                if custom_attr_model is not None:
+                    self.add_custom_attr_child(
+                        node, custom_attr_entity, custom_attr_model
+                    )
+
+            if related is None:
+                continue
+
+            related_model = related_records[related.name].get(
+                record.__dict__[related_col], None
+            )
+            if related_model is None:
+                continue
+
+            if party_query:
+                spu_root = self.add_spatial_unit_child(
+                    node, related, related_model
+                )
+                self.spatial_unit_items[spu_root] = related
+            else:
+                party_root = self.add_party_child(
+                    node, related, related_model
+                )
+                self.party_items[party_root] = related
+
+    def custom_attr_records(self, custom_attr_entity, str_ids):
+        """
+        Gets the custom tenure information of STR records in one query.
+        :param custom_attr_entity: The custom attribute entity
+        :type custom_attr_entity: Object
+        :param str_ids: Ids of the STR records
+        :type str_ids: List
+        :return: The custom attribute records indexed by the STR id
+        :rtype: Dictionary
+        """
+        model = self.cached_model(custom_attr_entity)
+        result = model().queryObject().filter(
+            model.social_tenure_relationship_id.in_(str_ids)
+        ).order_by(model.id).all()
+
+        records = {}
+        for r in result:
+            records.setdefault(r.social_tenure_relationship_id, r)
+
+        return records
 
     def add_non_entity_parent(self, layer_icon):
         """
@@ -1187,7 +1533,8 @@ class DetailsTreeView(DetailsDBHandler):
             roots[feature_id] = root
         return roots
 
-    def add_root_children(self, model, parent, str_records, party_query=False):
+    def add_root_children(self, model, parent, str_records, party_query=False,
+                          lazy=False):
         """
         Adds the root children.
         :param model: The entity model
@@ -1196,6 +1543,9 @@ class DetailsTreeView(DetailsDBHandler):
         :type parent: QStandardItem
         :param str_records: STR record models linked to the spatial unit.
         :type str_records: List
+        :param lazy: True to add STR nodes whose children are fetched when
+        expanded and to leave the root collapsed.
+        :type lazy: Boolean
         """
 
         if model is None: return
@@ -1226,13 +1576,16 @@ class DetailsTreeView(DetailsDBHandler):
 
             # Add Social Tenure Relationship node as a last child
             if i == len(self._formatted_record) - 1:
-                if len(str_records) > 0:
+                if len(str_records) > 0 and lazy:
+                    self.add_str_nodes(parent, str_records, feature_id)
+                elif len(str_records) > 0:
                     self.add_str_child(parent, str_records, feature_id, party_query)
                 else:
 
                     if self.entity in self.social_tenure.spatial_units:
                         self.add_no_str_steam(parent)
-        self.expand_node(parent)
+        if not lazy:
+            self.expand_node(parent)
 
     def add_str_node(self, parent, str_id):
         """
@@ -1326,13 +1679,7 @@ class DetailsTreeView(DetailsDBHandler):
         """
         if str_records is None: return
 
-        if self.layer_table is None and self.plugin is not None:
-            return
-
-        spatial_unit_names = [sp.name for sp in self.spatial_units]
-
-        # If the layer table is not spatial unit table, don't show STR node.
-        if self.layer_table not in spatial_unit_names  and self.plugin is not None:
+        if not self.shows_str_nodes():
             return
 
         for record in str_records:
@@ -1402,6 +1749,45 @@ class DetailsTreeView(DetailsDBHandler):
 
         self.feature_str_model[feature_id] = self.str_models.keys()
 
+    def shows_str_nodes(self):
+        """
+        Checks if STR nodes are shown, which is the case if the layer table
+        is a spatial unit table or if the tree is not used by the plugin.
+        :return: True if STR nodes are shown.
+        :rtype: Boolean
+        """
+        if self.plugin is None:
+            return True
+
+        if self.layer_table is None:
+            return False
+
+        spatial_unit_names = [sp.name for sp in self.spatial_units]
+
+        return self.layer_table in spatial_unit_names
+
+    def add_str_nodes(self, parent, str_records, feature_id):
+        """
+        Adds STR nodes whose children are fetched when they are expanded.
+        :param parent: The root node.
+        :type parent: QStandardItem
+        :param str_records: STR record models linked to the root record.
+        :type str_records: List
+        :param feature_id: The id of the root record.
+        :type feature_id: Integer
+        """
+        str_ids = []
+        for record in str_records:
+            if self.current_spatial_unit(record.__dict__) is None:
+                continue
+
+            self.str_models[record.id] = record
+            str_ids.append(record.id)
+            str_root = self.add_str_node(parent, record.id)
+            str_root.setData(STR_NODE, LazyItemModel.PENDING_ROLE)
+
+        self.feature_str_model[feature_id] = str_ids
+
     def add_party_node(self, parent, party_entity, party_id):
         """
         Add party steam with table icon and entity short name.
@@ -1812,6 +2198,10 @@ class DetailsTreeView(DetailsDBHandler):
         str_edit = False
         id, item = self.node_data('delete', self._selected_features)
 
+        # Load the STR nodes of the record before checking them
+        if item is not None and self.model.canFetchMore(item.index()):
+            self.model.fetchMore(item.index())
+
         if isinstance(id, str):
             data_error = QApplication.translate(
                 'DetailsTreeView', id
@@ -49,15 +49,11 @@ from qgis.utils import (
 
 from stdm.ui.admin_unit_manager import VIEW,MANAGE,SELECT
 
-from stdm.data.configuration import entity_model
 from stdm.data.configuration.entity import Entity
-from stdm.data.configuration.columns import (
-    MultipleSelectColumn,
-    VirtualColumn
-)
+from stdm.data.configuration.columns import MultipleSelectColumn
 from stdm.data.mapping import MapperMixin
-from stdm.data.pg_utils import table_column_names
 from stdm.utils.util import format_name
+from stdm.ui.forms.form_template import form_template
 from stdm.ui.forms.widgets import (
     ColumnWidgetRegistry,
     UserTipLabel
@@ -149,19 +145,22 @@ class EntityEditorDialog(QDialog, MapperMixin):
         else:
             self._manage_documents = False
 
+        # Columns and models of the entity, shared by its editors
+        self._template = form_template(self._entity)
+
         # Setup entity model
         self._ent_document_model = None
         if self._entity.supports_documents:
-            self.ent_model, self._ent_document_model = entity_model(
-                self._entity,
-                with_supporting_document=True
-            )
+            self.ent_model, self._ent_document_model = \
+                self._template.document_models
         else:
-            self.ent_model = entity_model(self._entity)
+            self.ent_model = self._template.entity_cls
         if not model is None:
             self.ent_model = model
 
-        MapperMixin.__init__(self, self.ent_model, entity)
+        MapperMixin.__init__(
+            self, self.ent_model, entity, self._template.entity_cls
+        )
 
         self.collect_model = collect_model
 
@@ -384,16 +383,42 @@ class EntityEditorDialog(QDialog, MapperMixin):
 
         if self.is_valid:
             self.addedModel.emit(self.model())
-            self.setModel(self.ent_model())
-            self.clear()
-            self.child_models.clear()
-            for index in range(0, self.entity_tab_widget.count()-1):
-                if isinstance(
-                        self.entity_tab_widget.widget(index),
-                        EntityBrowserWithEditor
-                ):
-                    child_browser = self.entity_tab_widget.widget(index)
-                    child_browser.remove_rows()
+            self.reset()
+
+    def reset(self):
+        """
+        Clears the form for entering a new record so that the dialog can be
+        reused instead of building the widgets again.
+        """
+        from stdm.ui.entity_browser import (
+            EntityBrowserWithEditor
+        )
+        self.setModel(self.ent_model())
+        self.clear()
+        self.clearNotifications()
+        self.child_models.clear()
+        for index in range(0, self.entity_tab_widget.count()-1):
+            if isinstance(
+                    self.entity_tab_widget.widget(index),
+                    EntityBrowserWithEditor
+            ):
+                child_browser = self.entity_tab_widget.widget(index)
+                child_browser.remove_rows()
+
+        if isinstance(self._parent._parent, EntityEditorDialog):
+            self.set_parent_values()
+
+        self.is_valid = False
+        self._dirtyTracker.markAllControlsAsClean()
+
+    def is_reusable(self):
+        """
+        :return: True if the dialog adds new records and its widgets are
+        up to date, i.e. it can be reset and shown again for another record.
+        :rtype: bool
+        """
+        return self.edit_model is None and not self.collect_model and \
+               self._template.is_current()
 
     def on_model_added(self):
         """
@@ -468,7 +493,7 @@ class EntityEditorDialog(QDialog, MapperMixin):
         for row_entity, model in self.child_models.iteritems():
             row_pos = row_entity[0]
             entity = row_entity[1]
-            ent_model = entity_model(entity)
+            ent_model = self._template.child_model(entity)
             entity_obj = ent_model()
             for col in entity.columns.values():
                 if col.TYPE_INFO == 'FOREIGN_KEY':
@@ -482,17 +507,13 @@ class EntityEditorDialog(QDialog, MapperMixin):
         Registers the column widgets.
         """
         # Append column labels and widgets
-        table_name = self._entity.name
-        columns = table_column_names(table_name)
         self.scroll_widget_contents = QWidget()
         self.scroll_widget_contents.setObjectName(
             'scrollAreaWidgetContents'
         )
-        for c in self._entity.columns.values():
+        for c in self._template.columns:
             if c.name in self.exclude_columns:
                 continue
-            if not c.name in columns and not isinstance(c, VirtualColumn):
-                continue
             # Get widget factory
             column_widget = ColumnWidgetRegistry.create(
                 c,
@@ -515,17 +536,10 @@ class EntityEditorDialog(QDialog, MapperMixin):
         self.gl = QGridLayout(self.scroll_widget_contents)
         self.gl.setObjectName('gl_widget_contents')
     
-        # Append column labels and widgets
-        table_name = self._entity.name
-        columns = table_column_names(table_name)
-        # Iterate entity column and assert if they exist
+        # Append column labels and widgets, the columns have been filtered
+        # when registering the widgets
         row_id = 0
         for c, column_widget in self.column_widgets.iteritems():
-            if c.name in self.exclude_columns:
-                continue
-            if not c.name in columns and not isinstance(c, VirtualColumn):
-                continue
-
             if column_widget is not None:
                 header = c.ui_display()
                 self.c_label = QLabel(self.scroll_widget_contents)
@@ -681,7 +695,7 @@ class EntityEditorDialog(QDialog, MapperMixin):
 
     def set_filter(self, entity, browser):
         col = self.filter_col(entity)
-        child_model = entity_model(entity)
+        child_model = self._template.child_model(entity)
         child_model_obj = child_model()
         col_obj = getattr(child_model, col.name)
 
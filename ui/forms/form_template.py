@@ -0,0 +1,147 @@
+"""
+/***************************************************************************
+Name                 : Form Template
+Description          : Entity information needed to build editor forms,
+                       computed once per entity and session.
+Date                 : 19/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+from stdm.data.configuration import entity_model
+from stdm.data.configuration.columns import VirtualColumn
+from stdm.data.database import add_table_change_listener
+from stdm.data.pg_utils import table_column_names
+
+#Cached templates by profile and entity name
+_templates = {}
+
+_listening = False
+
+
+class EntityFormTemplate(object):
+    """
+    Columns, reflected models and lookup tables of an entity used by its
+    editor forms. Reflecting the models and reading the table columns is
+    done once instead of every time an editor is opened.
+    """
+    def __init__(self, entity):
+        """
+        :param entity: Entity edited by the forms.
+        :type entity: Entity
+        """
+        self.entity = entity
+        self.table_columns = set(table_column_names(entity.name))
+
+        #Columns that have a form widget, in the configuration order
+        self.columns = [
+            c for c in entity.columns.values()
+            if c.name in self.table_columns or isinstance(c, VirtualColumn)
+        ]
+
+        #Value lists whose changes make the form widgets out of date
+        self.tables = set()
+        for c in self.columns:
+            value_list = getattr(c, 'value_list', None)
+            if value_list is not None:
+                self.tables.add(value_list.name)
+
+        self._entity_cls = None
+        self._document_models = None
+        self._child_models = {}
+
+    @property
+    def entity_cls(self):
+        """
+        :return: Model of the entity and its related entities.
+        :rtype: object
+        """
+        if self._entity_cls is None:
+            self._entity_cls = entity_model(self.entity)
+
+        return self._entity_cls
+
+    @property
+    def document_models(self):
+        """
+        :return: Model of the entity with supporting documents and the
+        model of the supporting documents.
+        :rtype: tuple
+        """
+        if self._document_models is None:
+            self._document_models = entity_model(
+                self.entity, with_supporting_document=True
+            )
+
+        return self._document_models
+
+    def child_model(self, child_entity):
+        """
+        :param child_entity: Entity referencing the entity of the template.
+        :type child_entity: Entity
+        :return: Model of the child entity.
+        :rtype: object
+        """
+        model = self._child_models.get(child_entity.name, None)
+        if model is None:
+            model = entity_model(child_entity)
+            self._child_models[child_entity.name] = model
+
+        return model
+
+    def is_current(self):
+        """
+        :return: True if the template has not been discarded, i.e. the
+        forms built from it are up to date.
+        :rtype: bool
+        """
+        key = (self.entity.profile.name, self.entity.name)
+
+        return _templates.get(key, None) is self
+
+
+def _invalidate_tables(table_names):
+    #Discards the templates whose lookups have been changed
+    for key, template in _templates.items():
+        if not template.tables.isdisjoint(table_names):
+            del _templates[key]
+
+
+def form_template(entity):
+    """
+    :param entity: Entity edited by the form.
+    :type entity: Entity
+    :return: Template of the editor forms of the entity, created once and
+    reused until the entity configuration or its lookups change.
+    :rtype: EntityFormTemplate
+    """
+    global _listening
+
+    if not _listening:
+        add_table_change_listener(_invalidate_tables)
+        _listening = True
+
+    key = (entity.profile.name, entity.name)
+    template = _templates.get(key, None)
+    if template is None or template.entity is not entity:
+        template = EntityFormTemplate(entity)
+        _templates[key] = template
+
+    return template
+
+
+def clear_form_templates():
+    """
+    Discards all templates, e.g. when the user logs out.
+    """
+    _templates.clear()
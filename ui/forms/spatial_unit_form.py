@@ -81,6 +81,7 @@ from stdm.utils.util import (
     format_name
 )
 
+from stdm.data.expression_evaluator import entity_expression_evaluator
 from stdm.ui.customcontrols.relation_line_edit import ExpressionLineEdit
 
 from stdm.ui.helpers import valueHandler
@@ -617,16 +618,25 @@ class STDMFieldWidget():
         entity_obj.saveMany(
             self.feature_models.values()
         )
-        for model in self.feature_models.values():
-            STDMDb.instance().session.flush()
-
-            for attrMapper in self.editor._attrMappers:
-                control = attrMapper.valueHandler().control
-                if isinstance(control, ExpressionLineEdit):
-                    value = control.on_expression_triggered(model)
-                    print attrMapper._attrName, value
+        # Compute the expression columns of all the saved features at once
+        exp_mappers = [
+            m for m in self.editor._attrMappers
+            if isinstance(m.valueHandler().control, ExpressionLineEdit)
+        ]
+        if len(exp_mappers) > 0 and len(self.feature_models) > 0:
+            models = self.feature_models.values()
+            evaluator = entity_expression_evaluator(self.entity)
+            values = evaluator.evaluate(
+                [m.id for m in models], [m._attrName for m in exp_mappers]
+            )
+            for model in models:
+                rec_values = values.get(model.id, {})
+                for attrMapper in exp_mappers:
+                    value = rec_values.get(attrMapper._attrName, None)
                     setattr(model, attrMapper._attrName, value)
-            model.update()
+                    attrMapper.valueHandler().control.format_display(value)
+
+            entity_obj.update()
 
         # Save child models
         if self.editor is not None:
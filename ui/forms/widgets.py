@@ -58,7 +58,7 @@ from stdm.data.configuration.columns import (
     AutoGeneratedColumn,
     ExpressionColumn
 )
-from stdm.data.configuration import entity_model
+from stdm.data.display_cache import profile_display_values
 from stdm.settings import current_profile
 from stdm.ui.customcontrols.relation_line_edit import (
     AdministrativeUnitLineEdit,
@@ -66,10 +66,6 @@ from stdm.ui.customcontrols.relation_line_edit import (
     AutoGeneratedLineEdit,
     ExpressionLineEdit
 )
-from stdm.data.pg_utils import(
-    export_data
-)
-
 from stdm.ui.customcontrols.multi_select_view import MultipleSelectTreeView
 
 class WidgetException(Exception):
@@ -588,9 +584,6 @@ class RelatedEntityWidgetFactory(ColumnWidgetRegistry):
     def __init__(self, column):
         ColumnWidgetRegistry.__init__(self, column)
 
-        self._parent_entity_cache = {}
-
-        #Query all parent entities. Need for optimization
         p_entity = self._column.entity_relation.parent
 
         if p_entity is None:
@@ -601,13 +594,12 @@ class RelatedEntityWidgetFactory(ColumnWidgetRegistry):
             )
             raise WidgetException(msg)
 
-        self._p_entity_cls = entity_model(p_entity, entity_only=True)
-        self._p_entity_obj = self._p_entity_cls()
-
-        # res = self._p_entity_obj.queryObject().filter().all()
-        res = export_data(p_entity.name)
-        for r in res:
-            self._parent_entity_cache[r.id] = r
+        #Parent records are shared by the factories of the profile and
+        #loaded on demand, in batches when prefetched
+        self._p_table = p_entity.name
+        self._display_values = profile_display_values(
+            self._column.entity.profile
+        )
 
     @classmethod
     def _create_widget(cls, c, parent, host=None):
@@ -625,23 +617,24 @@ class RelatedEntityWidgetFactory(ColumnWidgetRegistry):
         :return: Display extracted from the selected parent record.
         :rtype: str
         """
-        if value in self._parent_entity_cache:
-            rec = self._parent_entity_cache[value]
-
-        else:
-            #Query value
-            rec = self._p_entity_obj.queryObject().filter(
-                self._p_entity_cls.id == value
-            ).first()
-
-            if rec is None:
-                return ''
+        rec = self._display_values.record(self._p_table, value)
+        if rec is None:
+            return ''
 
-            else:
-                #Add to cache
-                self._parent_entity_cache[rec.id] = rec
+        #Also called in the worker threads of the entity browser
+        return RelatedEntityLineEdit.display_text(self._column, rec)
 
-        return RelatedEntityLineEdit.process_display(self._column, rec)
+    def prefetch(self, ids, session=None):
+        """
+        Loads the parent records that are not yet cached in a single query,
+        e.g. for the records in a page of the entity browser.
+        :param ids: Primary keys of the parent records.
+        :type ids: set
+        :param session: Session used for the query, e.g. that of a worker
+        thread loading the records, a new connection if None.
+        :type session: Session
+        """
+        self._display_values.prefetch_records(self._p_table, ids, session)
 
 RelatedEntityWidgetFactory.register()
 
@@ -657,17 +650,11 @@ class AdministrativeUnitWidgetFactory(ColumnWidgetRegistry):
 
         ColumnWidgetRegistry.__init__(self, column)
 
-        self._aus_cache = {}
-
-        #Query all admin units on initializing
-        aus = self._column.entity.profile.administrative_spatial_unit
-        self._aus_cls = entity_model(aus, entity_only=True)
-        self._aus_obj = self._aus_cls()
-
-        # res = self._aus_obj.queryObject().filter().all()
-        res = export_data(aus.name)
-        for r in res:
-            self._aus_cache[r.id] = [r.name, r.code]
+        #Admin units are shared by the factories of the profile and loaded
+        #in one query when first needed
+        profile = self._column.entity.profile
+        self._aus_table = profile.administrative_spatial_unit.name
+        self._display_values = profile_display_values(profile)
 
     @classmethod
     def _create_widget(cls, c, parent, host=None):
@@ -684,24 +671,12 @@ class AdministrativeUnitWidgetFactory(ColumnWidgetRegistry):
         :return: Name and code corresponding to the given id.
         :rtype: str
         """
-        if value in self._aus_cache:
-            nc = self._aus_cache[value]
-            name, code = nc[0], nc[1]
-
-        else:
-            #Query value
-            res = self._aus_obj.queryObject().filter(
-                self._aus_cls.id == value
-            ).first()
+        aus = self._display_values.admin_units(self._aus_table)
+        if not value in aus:
+            return ''
 
-            if res is None:
-                return ''
+        name, code = aus[value]
 
-            else:
-                #Add result to the cache
-                self._aus_cache[res.id] = res
-                name, code = res.name, res.code
-        
         if code:
             if 'code' not in self._column.entity_relation.display_cols:
                 name = u'{0}'.format(name)
@@ -710,6 +685,18 @@ class AdministrativeUnitWidgetFactory(ColumnWidgetRegistry):
 
         return name
 
+    def prefetch(self, ids, session=None):
+        """
+        Loads the administrative units if they are not cached, e.g. for the
+        records in a page of the entity browser.
+        :param ids: Primary keys of the administrative units.
+        :type ids: set
+        :param session: Session used for the query, e.g. that of a worker
+        thread loading the records, a new connection if None.
+        :type session: Session
+        """
+        self._display_values.admin_units(self._aus_table, session)
+
 AdministrativeUnitWidgetFactory.register()
 
 
@@ -744,25 +731,22 @@ class LookupWidgetFactory(ColumnWidgetRegistry):
     def __init__(self, column):
         ColumnWidgetRegistry.__init__(self, column)
 
-        self._lookups = {}
-
-        # Query all lookups on initializing so as to reduce db roundtrips
-        lookup = self._column.value_list
-        # lk_cls = entity_model(lookup, entity_only=True)
-        # lk_obj = lk_cls()
-        # res = lk_obj.queryObject().filter().all()
-        res = export_data(lookup.name)
-        for r in res:
-            self._lookups[r.id] = [r.value, r.code]
+        # Lookups are shared by the factories of the profile and loaded in
+        # one query per value list when first needed
+        self._lookup_table = self._column.value_list.name
+        self._display_values = profile_display_values(
+            self._column.entity.profile
+        )
 
     def lookups(self):
         """
         :return: Returns a collection indexed by the row id in the database.
         Each item in the collection contains a list where the value is the
-        first item and code is the second.
+        first item and code is the second. The collection is shared by the
+        factories and should not be modified.
         :rtype: dict
         """
-        return self._lookups
+        return self._display_values.value_list(self._lookup_table)
 
     def code_value(self, id):
         """
@@ -773,8 +757,9 @@ class LookupWidgetFactory(ColumnWidgetRegistry):
         otherwise None.
         :rtype: tuple
         """
-        if id in self._lookups:
-            item = self._lookups[id]
+        lookups = self.lookups()
+        if id in lookups:
+            item = lookups[id]
             return item[0], item[1]
 
         return None
@@ -813,6 +798,18 @@ class LookupWidgetFactory(ColumnWidgetRegistry):
 
         return lk_val
 
+    def prefetch(self, ids, session=None):
+        """
+        Loads the lookups if they are not cached, e.g. for the records in a
+        page of the entity browser.
+        :param ids: Primary keys of the lookups.
+        :type ids: set
+        :param session: Session used for the query, e.g. that of a worker
+        thread loading the records, a new connection if None.
+        :type session: Session
+        """
+        self._display_values.value_list(self._lookup_table, session)
+
 
 LookupWidgetFactory.register()
 
@@ -825,6 +822,10 @@ class MultipleSelectWidgetFactory(LookupWidgetFactory):
     _TYPE_PREFIX = 'mstv_'
     SEPARATOR = '; '
 
+    # Selected lookups are loaded with the records, there are no ids to
+    # prefetch
+    prefetch = None
+
     @classmethod
     def _create_widget(cls, c, parent, host=None):
         mstv = MultipleSelectTreeView(c, parent)
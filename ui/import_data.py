@@ -87,6 +87,13 @@ class ImportData(QWizard, Ui_frmImport):
         #Initialize value translators from definitions
         self._init_translators()
 
+        #Button for validating the source data prior to importing
+        self.setButtonText(
+            QWizard.CustomButton1,
+            QApplication.translate('ImportData', 'Validate...')
+        )
+        self.customButtonClicked.connect(self._on_custom_button_clicked)
+
         #self._set_target_fields_stylesheet()
 
     def _init_translators(self):
@@ -270,6 +277,9 @@ class ImportData(QWizard, Ui_frmImport):
                 self.loadTables("spatial")
                 self.geomClm.setEnabled(True)
                 
+        #Validation is only available once columns have been matched
+        self.setOption(QWizard.HaveCustomButton1, pageid == 2)
+
         if pageid == 2:
             self.lstSrcFields.clear()
             self.lstTargetFields.clear()
@@ -508,6 +518,66 @@ class ImportData(QWizard, Ui_frmImport):
 
         return success
 
+    def _on_custom_button_clicked(self, which):
+        # Slot raised when a custom wizard button is clicked.
+        if which == QWizard.CustomButton1:
+            self.validate_source_data()
+
+    def validate_source_data(self):
+        """
+        Checks the matched source columns against the destination table
+        configuration and shows a summary of the issues found. No data is
+        written to the database.
+        """
+        matchCols = self.getSrcDestPairs()
+        if len(matchCols) == 0:
+            self.ErrorInfoMessage("Please select at least one source column.")
+            return
+
+        geom_column = None
+        if self.field("typeSpatial"):
+            geom_column = self.field("geomCol")
+
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+
+        try:
+            report = self.dataReader.validate(
+                self.targetTab, matchCols, geom_column,
+                self._trans_widget_mgr.translator_manager()
+            )
+
+        except:
+            QApplication.restoreOverrideCursor()
+            self.ErrorInfoMessage(unicode(sys.exc_info()[1]))
+
+            return
+
+        QApplication.restoreOverrideCursor()
+
+        msg = QMessageBox(self)
+        msg.setWindowTitle(
+            QApplication.translate('ImportData', 'Validate Source Data')
+        )
+
+        if report.has_errors():
+            msg.setIcon(QMessageBox.Warning)
+            msg.setText(QApplication.translate(
+                'ImportData',
+                '{0:d} feature(s) checked in {1:.2f} seconds. Some values '
+                'will not be imported correctly, see the details below.'
+            ).format(report.num_features, report.elapsed))
+            msg.setDetailedText(report.summary())
+
+        else:
+            msg.setIcon(QMessageBox.Information)
+            msg.setText(QApplication.translate(
+                'ImportData',
+                '{0:d} feature(s) checked in {1:.2f} seconds. No issues '
+                'were found.'
+            ).format(report.num_features, report.elapsed))
+
+        msg.exec_()
+
     def _clear_dest_table_selections(self, exclude=None):
         #Clears checked items in destination table list view
         if exclude is None:
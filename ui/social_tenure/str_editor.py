@@ -67,7 +67,7 @@ from stdm.utils.util import (
     entity_attr_to_model
 )
 
-from stdm.data.pg_utils import pg_table_count
+from stdm.data.row_count import TableRowCount
 
 from str_data import STRDataStore, STRDBHandler
 
@@ -976,9 +976,14 @@ class STREditor(QDialog, Ui_STREditor):
 
         self.social_tenure = self.current_profile.social_tenure
 
-        count = pg_table_count(self.social_tenure.name)
-
-        self.setWindowTitle(self.tr(u'{}{}'.format(self.windowTitle(), '- '+unicode(count)+' rows')))
+        # The estimated number of STRs is shown until they are counted in
+        # the background, large tables are not counted
+        self._base_title = self.windowTitle()
+        self._count_title = None
+        self._str_count = TableRowCount(self.social_tenure.name, self)
+        self._str_count.counted.connect(self._set_str_count_title)
+        self._set_str_count_title()
+        self._str_count.start()
 
         self.party_count = OrderedDict()
 
@@ -1018,6 +1023,20 @@ class STREditor(QDialog, Ui_STREditor):
         self.sync = SyncSTREditorData(self)
         self.validate = ValidateSTREditor(self)
 
+    def _set_str_count_title(self, *args):
+        """
+        Shows the number of STRs in the window title, unless the title has
+        been changed since it was last set.
+        """
+        if self._count_title is not None and \
+                self.windowTitle() != self._count_title:
+            return
+
+        self._count_title = self.tr(u'{}{}'.format(
+            self._base_title, '- ' + self._str_count.text() + ' rows'
+        ))
+        self.setWindowTitle(self._count_title)
+
     def _init_str_editor(self):
         """
         Initializes the GUI of the STR editor.
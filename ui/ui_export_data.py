@@ -92,6 +92,9 @@ class Ui_frmExportWizard(object):
         self.lstSrcCols_2 = QtGui.QListWidget(self.groupBox_7)
         self.lstSrcCols_2.setObjectName(_fromUtf8("lstSrcCols_2"))
         self.gridLayout_6.addWidget(self.lstSrcCols_2, 1, 0, 1, 3)
+        self.chkDisplayValues = QtGui.QCheckBox(self.groupBox_7)
+        self.chkDisplayValues.setObjectName(_fromUtf8("chkDisplayValues"))
+        self.gridLayout_6.addWidget(self.chkDisplayValues, 2, 0, 1, 3)
         self.gridLayout_3.addWidget(self.groupBox_7, 0, 1, 1, 1)
         self.groupBox_8 = QtGui.QGroupBox(self.pgSrcTab)
         self.groupBox_8.setObjectName(_fromUtf8("groupBox_8"))
@@ -99,7 +102,14 @@ class Ui_frmExportWizard(object):
         self.gridLayout_7.setObjectName(_fromUtf8("gridLayout_7"))
         self.cboSpatialCols_2 = QtGui.QComboBox(self.groupBox_8)
         self.cboSpatialCols_2.setObjectName(_fromUtf8("cboSpatialCols_2"))
-        self.gridLayout_7.addWidget(self.cboSpatialCols_2, 0, 0, 1, 1)
+        self.gridLayout_7.addWidget(self.cboSpatialCols_2, 0, 0, 1, 2)
+        self.chkTransform = QtGui.QCheckBox(self.groupBox_8)
+        self.chkTransform.setObjectName(_fromUtf8("chkTransform"))
+        self.gridLayout_7.addWidget(self.chkTransform, 1, 0, 1, 1)
+        self.btnOutputCrs = QtGui.QPushButton(self.groupBox_8)
+        self.btnOutputCrs.setEnabled(False)
+        self.btnOutputCrs.setObjectName(_fromUtf8("btnOutputCrs"))
+        self.gridLayout_7.addWidget(self.btnOutputCrs, 1, 1, 1, 1)
         self.gridLayout_3.addWidget(self.groupBox_8, 1, 1, 1, 1)
         frmExportWizard.addPage(self.pgSrcTab)
         self.pgFilter = QtGui.QWizardPage()
@@ -119,16 +129,26 @@ class Ui_frmExportWizard(object):
         self.groupBox_5.setObjectName(_fromUtf8("groupBox_5"))
         self.gridLayout_4 = QtGui.QGridLayout(self.groupBox_5)
         self.gridLayout_4.setObjectName(_fromUtf8("gridLayout_4"))
+        self.horizontalLayout_3 = QtGui.QHBoxLayout()
+        self.horizontalLayout_3.setObjectName(_fromUtf8("horizontalLayout_3"))
         self.btnUniqueVals = QtGui.QPushButton(self.groupBox_5)
         self.btnUniqueVals.setObjectName(_fromUtf8("btnUniqueVals"))
-        self.gridLayout_4.addWidget(self.btnUniqueVals, 2, 1, 1, 1)
+        self.horizontalLayout_3.addWidget(self.btnUniqueVals)
+        self.btnMoreVals = QtGui.QPushButton(self.groupBox_5)
+        self.btnMoreVals.setEnabled(False)
+        self.btnMoreVals.setObjectName(_fromUtf8("btnMoreVals"))
+        self.horizontalLayout_3.addWidget(self.btnMoreVals)
+        self.gridLayout_4.addLayout(self.horizontalLayout_3, 3, 1, 1, 1)
         self.lstQueryCols = QtGui.QListWidget(self.groupBox_5)
         self.lstQueryCols.setSelectionBehavior(QtGui.QAbstractItemView.SelectRows)
         self.lstQueryCols.setObjectName(_fromUtf8("lstQueryCols"))
-        self.gridLayout_4.addWidget(self.lstQueryCols, 1, 0, 2, 1)
+        self.gridLayout_4.addWidget(self.lstQueryCols, 1, 0, 3, 1)
+        self.txtValueFilter = QtGui.QLineEdit(self.groupBox_5)
+        self.txtValueFilter.setObjectName(_fromUtf8("txtValueFilter"))
+        self.gridLayout_4.addWidget(self.txtValueFilter, 1, 1, 1, 1)
         self.lstUniqueVals = QtGui.QListWidget(self.groupBox_5)
         self.lstUniqueVals.setObjectName(_fromUtf8("lstUniqueVals"))
-        self.gridLayout_4.addWidget(self.lstUniqueVals, 1, 1, 1, 1)
+        self.gridLayout_4.addWidget(self.lstUniqueVals, 2, 1, 1, 1)
         self.label_2 = QtGui.QLabel(self.groupBox_5)
         self.label_2.setObjectName(_fromUtf8("label_2"))
         self.gridLayout_4.addWidget(self.label_2, 0, 1, 1, 1)
@@ -220,11 +240,16 @@ class Ui_frmExportWizard(object):
         self.groupBox_7.setTitle(_translate("frmExportWizard", "Textual Columns:", None))
         self.select_all.setText(_translate("frmExportWizard", "Select All", None))
         self.select_none.setText(_translate("frmExportWizard", "Select None", None))
+        self.chkDisplayValues.setText(_translate("frmExportWizard", "Export lookup and related record values instead of ids", None))
         self.groupBox_8.setTitle(_translate("frmExportWizard", "Spatial Columns:", None))
+        self.chkTransform.setText(_translate("frmExportWizard", "Reproject to:", None))
+        self.btnOutputCrs.setText(_translate("frmExportWizard", "Select CRS...", None))
         self.pgFilter.setTitle(_translate("frmExportWizard", "Filter Data", None))
         self.pgFilter.setSubTitle(_translate("frmExportWizard", "Specify a custom query to filter out the resulting dataset.", None))
         self.gpQBuilder.setTitle(_translate("frmExportWizard", "Query Builder:", None))
         self.btnUniqueVals.setText(_translate("frmExportWizard", "Get Unique Values", None))
+        self.btnMoreVals.setText(_translate("frmExportWizard", "Load More", None))
+        self.txtValueFilter.setPlaceholderText(_translate("frmExportWizard", "Values starting with...", None))
         self.label_2.setText(_translate("frmExportWizard", "Unique Values:", None))
         self.label.setText(_translate("frmExportWizard", "Columns:", None))
         self.groupBox_6.setTitle(_translate("frmExportWizard", "Operators:", None))
@@ -32,7 +32,8 @@ from qgis.utils import (
     iface
 )
 from sqlalchemy import (
-    func,
+    and_,
+    exists,
     String,
     Table
 )
@@ -41,10 +42,7 @@ from stdm.ui.social_tenure.str_editor import STREditor, EditSTREditor
 
 import stdm.data
 
-from stdm.data.qtmodels import (
-    BaseSTDMTableModel,
-    STRTreeViewModel
-)
+from stdm.data.qtmodels import STRTreeViewModel
 
 from stdm.data.database import Content
 
@@ -52,6 +50,7 @@ from stdm.settings import current_profile
 from stdm.data.configuration import entity_model
 
 from stdm.ui.forms.widgets import ColumnWidgetRegistry
+from stdm.ui.customcontrols.prefix_completer import PrefixCompleter
 from stdm.ui.spatial_unit_manager import SpatialUnitManagerDockWidget
 from stdm.security.authorization import Authorizer
 from stdm.utils.util import (
@@ -62,7 +61,11 @@ from stdm.utils.util import (
     lookup_parent_entity
 )
 
-from stdm.data.pg_utils import pg_table_count
+from stdm.data.row_count import TableRowCount
+from stdm.data.text_search import (
+    SEARCH_LIMIT,
+    text_match_query
+)
 
 from stdm.ui.feature_details import DetailsTreeView, SelectedItem
 from .notification import (
@@ -158,12 +161,15 @@ class ViewSTRWidget(QMainWindow, Ui_frmManageSTR):
         self.details_tree_view.add_tree_view()
         self.details_tree_view.model.clear()
 
-        count = pg_table_count(self.curr_profile.social_tenure.name)
-        self.setWindowTitle(
-            self.tr(u'{}{}'.format(
-                self.windowTitle(), '- ' + str(count) +' rows'
-            ))
+        # The estimated number of STRs is shown until they are counted in
+        # the background, large tables are not counted
+        self._base_title = self.windowTitle()
+        self._str_count = TableRowCount(
+            self.curr_profile.social_tenure.name, self
         )
+        self._str_count.counted.connect(self._set_str_count_title)
+        self._set_str_count_title()
+        self._str_count.start()
 
         self.active_spu_id = -1
 
@@ -196,6 +202,16 @@ class ViewSTRWidget(QMainWindow, Ui_frmManageSTR):
             '''
         )
 
+    def _set_str_count_title(self, *args):
+        """
+        Shows the number of STRs in the window title.
+        """
+        self.setWindowTitle(
+            self.tr(u'{}{}'.format(
+                self._base_title, '- ' + self._str_count.text() + ' rows'
+            ))
+        )
+
     def add_tool_buttons(self):
         """
         Add toolbar buttons of add, edit and delete buttons.
@@ -395,8 +411,6 @@ class ViewSTRWidget(QMainWindow, Ui_frmManageSTR):
         add it to the 'Search Entity' tab.
         """
         entityWidg = STRViewEntityWidget(config)
-        entityWidg.asyncStarted.connect(self._progressStart)
-        entityWidg.asyncFinished.connect(self._progressFinish)
 
         tabIndex = self.tbSTREntity.addTab(entityWidg, config.Title)
 
@@ -765,22 +779,6 @@ class ViewSTRWidget(QMainWindow, Ui_frmManageSTR):
     #         self._deleteSourceDocTabs()
     #         self._curr_rootnode_hash = rootHash
 
-    def _progressStart(self):
-        """
-        Load progress dialog window.
-        For items whose durations is unknown,
-        'isindefinite' = True by default.
-        If 'isindefinite' is False, then
-        'rangeitems' has to be specified.
-        """
-        pass
-
-    def _progressFinish(self):
-        """
-        Hide progress dialog window.
-        """
-        pass
-
     def _edit_permissions(self):
         """
         Returns True/False whether the current logged in user
@@ -873,9 +871,6 @@ class STRViewEntityWidget(QWidget, Ui_frmSTRViewEntity, EntitySearchItem):
     """
     A widget that represents options for searching through an entity.
     """
-    asyncStarted = pyqtSignal()
-    asyncFinished = pyqtSignal()
-
     def __init__(self, config, formatter=None, parent=None):
         QWidget.__init__(self, parent)
         EntitySearchItem.__init__(self, formatter)
@@ -885,9 +880,10 @@ class STRViewEntityWidget(QWidget, Ui_frmSTRViewEntity, EntitySearchItem):
         self.curr_profile = current_profile()
         self.social_tenure = self.curr_profile.social_tenure
         self.str_model = entity_model(self.social_tenure)
-        #Model for storing display and actual mapping values
-        self._completer_model = None
-        self._proxy_completer_model = None
+        #Suggests the values of the filter column as the user types
+        self._completer = PrefixCompleter(self.txtFilterPattern, self)
+        #Models of the value lists of lookup filter columns
+        self._lookup_models = {}
 
         #Hook up signals
         self.cboFilterCol.currentIndexChanged.connect(
@@ -955,29 +951,45 @@ class STRViewEntityWidget(QWidget, Ui_frmSTRViewEntity, EntitySearchItem):
 
     def loadAsync(self):
         """
-        Asynchronously loads an entity's attribute values.
+        Sets the column whose values are suggested as the user types the
+        search term, they are loaded on demand for the typed text.
         """
-        self.asyncStarted.emit()
+        self._completer.set_column(self._completion_column())
 
-        #Create model worker
-        workerThread = QThread(self)
-        modelWorker = ModelWorker()
-        modelWorker.moveToThread(workerThread)
+    def _completion_column(self):
+        # Text column or value list column of the current filter column
+        field_name = self.currentFieldName()
+        if field_name is None:
+            return None
 
-        #Connect signals
-        modelWorker.error.connect(self.errorHandler)
-        workerThread.started.connect(
-            lambda: modelWorker.fetch(
-                self.config.STRModel, self.currentFieldName()
-            )
+        entity = self.curr_profile.entity_by_name(
+            self.config.data_source_name
         )
-        modelWorker.retrieved.connect(self._asyncFinished)
-        modelWorker.retrieved.connect(workerThread.quit)
-        workerThread.finished.connect(modelWorker.deleteLater)
-        workerThread.finished.connect(workerThread.deleteLater)
+        col = entity.columns.get(field_name, None)
+        if col is None:
+            return None
+
+        if col.TYPE_INFO == 'LOOKUP':
+            lkp_name = col.value_list.name
+            if not lkp_name in self._lookup_models:
+                self._lookup_models[lkp_name] = entity_model(
+                    col.value_list, entity_only=True
+                )
+
+            return getattr(self._lookup_models[lkp_name], 'value')
 
-        #Start thread
-        workerThread.start()
+        if col.TYPE_INFO in ('VARCHAR', 'TEXT'):
+            return getattr(self.config.STRModel, field_name, None)
+
+        return None
+
+    def hideEvent(self, event):
+        """
+        Stops loading suggestions once the widget is hidden.
+        """
+        self._completer.stop()
+
+        QWidget.hideEvent(self, event)
 
     def validate(self):
         """
@@ -1015,23 +1027,7 @@ class STRViewEntityWidget(QWidget, Ui_frmSTRViewEntity, EntitySearchItem):
         )
         search_term = self._searchTerm()
 
-        prog_dialog.setValue(2)
-        #Try to get the corresponding search term value from the completer model
-        if not self._completer_model is None:
-            reg_exp = QRegExp("^%s$"%(search_term), Qt.CaseInsensitive,
-                              QRegExp.RegExp2)
-            self._proxy_completer_model.setFilterRegExp(reg_exp)
-
-            if self._proxy_completer_model.rowCount() > 0:
-                #Get corresponding actual value from the first matching item
-                value_model_idx  = self._proxy_completer_model.index(0, 1)
-                source_model_idx = self._proxy_completer_model.mapToSource(
-                    value_model_idx
-                )
-                prog_dialog.setValue(4)
-                search_term = self._completer_model.data(
-                    source_model_idx, Qt.DisplayRole
-                )
+        prog_dialog.setValue(4)
 
         modelInstance = self.config.STRModel()
 
@@ -1046,6 +1042,12 @@ class STRViewEntityWidget(QWidget, Ui_frmSTRViewEntity, EntitySearchItem):
 
         entity = self.curr_profile.entity_by_name(entity_name)
 
+        # Only records with a relationship valid in the period are searched
+        if self.validity.isEnabled():
+            modelQueryObj = self.validity_period_filter(
+                modelQueryObj, entity
+            )
+
         prog_dialog.setValue(6)
         # Get property type so that the filter can
         # be applied according to the appropriate type
@@ -1067,32 +1069,28 @@ class STRViewEntityWidget(QWidget, Ui_frmSTRViewEntity, EntitySearchItem):
                         lkp_model, 'value'
                     )
 
-                    result  = lkp_obj.queryObject().filter(
-                        func.lower(value_obj) == func.lower(search_term)
+                    # Use the best matching lookup value
+                    result = text_match_query(
+                        lkp_obj.queryObject(), value_obj, search_term,
+                        lkp_model.id, 1
                     ).first()
-                    if result is None:
-                        result = lkp_obj.queryObject().filter(
-                            func.lower(value_obj).like(search_term+'%')
-                        ).first()
 
                     if not result is None:
                         results = modelQueryObj.filter(
                             queryObjProperty == result.id
+                        ).order_by(self.config.STRModel.id).limit(
+                            SEARCH_LIMIT
                         ).all()
 
                     else:
                         results = []
 
             else:
-                results = modelQueryObj.filter(
-                    func.lower(queryObjProperty) == func.lower(search_term)
+                results = text_match_query(
+                    modelQueryObj, queryObjProperty, search_term,
+                    self.config.STRModel.id
                 ).all()
 
-            if self.validity.isEnabled():
-                valid_str_ids = self.str_validity_period_filter(results)
-            else:
-                valid_str_ids = None
-
             prog_dialog.setValue(7)
         except exc.StatementError:
             return model_root_node, [], search_term
@@ -1105,30 +1103,35 @@ class STRViewEntityWidget(QWidget, Ui_frmSTRViewEntity, EntitySearchItem):
 
         return results, search_term
 
-    def str_validity_period_filter(self, results):
+    def validity_period_filter(self, query, entity):
         """
-        Filter the entity results using validity period in STR table.
-        :param results: Entity result
-        :type results: SQLAlchemy result proxy
-        :return: Valid list of STR ids
-        :rtype: List
+        Filters the entity query to the records linked to an STR whose
+        validity period is within the selected dates. The condition is
+        evaluated by the database as part of the search query and served by
+        the index created by pg_utils.add_validity_period_index.
+        :param query: Query of the entity records
+        :type query: Query
+        :param entity: Party or spatial unit entity of the query
+        :type entity: Entity
+        :return: Filtered query
+        :rtype: Query
         """
-        self.str_model_obj = self.str_model()
-        valid_str_ids = []
-        for result in results:
-            from_date = self.validity_from_date.date().toPyDate()
-            to_date = self.validity_to_date.date().toPyDate()
-            entity_id = '{}_id'.format(result.__table__.name[3:])
-            str_column_obj = getattr(self.str_model, entity_id)
-            str_result = self.str_model_obj.queryObject().filter(
-                self.str_model.validity_start >= from_date).filter(
-                self.str_model.validity_end <= to_date
-            ).filter(str_column_obj==result.id).all()
+        from_date = self.validity_from_date.date().toPyDate()
+        to_date = self.validity_to_date.date().toPyDate()
+        entity_id = u'{}_id'.format(
+            entity.name.split(self.curr_profile.prefix, 1)[1]
+        ).lstrip('_')
+        str_column_obj = getattr(self.str_model, entity_id, None)
+        if str_column_obj is None:
+            return query
 
-            for res in str_result:
-                valid_str_ids.append(res.id)
+        valid_str = exists().where(and_(
+            str_column_obj == self.config.STRModel.id,
+            self.str_model.validity_start >= from_date,
+            self.str_model.validity_end <= to_date
+        ))
 
-        return valid_str_ids
+        return query.filter(valid_str)
 
 
 
@@ -1160,60 +1163,6 @@ class STRViewEntityWidget(QWidget, Ui_frmSTRViewEntity, EntitySearchItem):
         """
         return self.txtFilterPattern.text()
 
-    def _asyncFinished(self, model_values):
-        """
-        Slot raised when worker has finished retrieving items.
-        """
-        #Create QCompleter and add values to it.
-        self._update_completer(model_values)
-        self.asyncFinished.emit()
-
-    def _update_completer(self, values):
-        #Get the items in a tuple and put them in a list
-
-        # Store display and actual values in a
-        # model for easier mapping and
-        # retrieval when carrying out searches
-
-        model_attr_mapping = []
-
-        # Check if there are formaters specified
-        # for the current field name
-        for mv in values:
-            f_model_values = []
-
-            m_val = mv[0]
-
-            if m_val is not None:
-                col_label = self.currentFieldName()
-                if col_label in self.config.LookupFormatters:
-                    formatter = self.config.LookupFormatters[col_label]
-                    if formatter.column.TYPE_INFO == 'LOOKUP':
-                        m_val = formatter.code_value(m_val)[0]
-                    else:
-                        m_val = formatter.format_column_value(m_val)
-            f_model_values.extend([m_val, m_val])
-
-            model_attr_mapping.append(f_model_values)
-
-        self._completer_model = BaseSTDMTableModel(model_attr_mapping, ["",""], self)
-
-        #We will use the QSortFilterProxyModel for filtering purposes
-        self._proxy_completer_model = QSortFilterProxyModel()
-        self._proxy_completer_model.setDynamicSortFilter(True)
-        self._proxy_completer_model.setSourceModel(self._completer_model)
-        self._proxy_completer_model.setSortCaseSensitivity(Qt.CaseInsensitive)
-        self._proxy_completer_model.setFilterKeyColumn(0)
-
-        #Configure completer
-        mod_completer = QCompleter(self._completer_model, self)
-        mod_completer.setCaseSensitivity(Qt.CaseInsensitive)
-        mod_completer.setCompletionMode(QCompleter.PopupCompletion)
-        mod_completer.setCompletionColumn(0)
-        mod_completer.setCompletionRole(Qt.DisplayRole)
-
-        self.txtFilterPattern.setCompleter(mod_completer)
-
     def _on_column_index_changed(self,int):
         """
         Slot raised when the user selects a different filter column.
@@ -1246,30 +1195,3 @@ class EntityConfiguration(object):
         #Reset filter and display columns
         self.filterColumns = OrderedDict()
         self.displayColumns = OrderedDict()
-
-class ModelWorker(QObject):
-    """
-    Worker for retrieving model attribute
-    values stored in the database.
-    """
-    retrieved = pyqtSignal(object)
-    error = pyqtSignal(unicode)
-
-    pyqtSlot(object, unicode)
-    def fetch(self, model, fieldname):
-        """
-        Fetch attribute values from the
-        database for the specified model
-        and corresponding column name.
-        """
-        try:
-            if hasattr(model, fieldname):
-                modelInstance = model()
-                obj_property = getattr(model, fieldname)
-                model_values = modelInstance.queryObject(
-                    [obj_property]
-                ).distinct()
-                self.retrieved.emit(model_values)
-
-        except Exception as ex:
-            self.error.emit(unicode(ex))